@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Compressed backup images with a sidecar index.
+#
+# The backup command writes its archive to a named pipe, the archive is
+# read by blocks that are compressed in parallel by worker threads (zlib
+# releases the GIL) and written in order to the image file. Each block is
+# an independent gzip member, so the image can still be read with gunzip,
+# and the sidecar index <image>.idx records the offsets of the blocks in
+# the archive and in the image:
+#     {
+#         "format": "gzip-blocks",
+#         "block_size": 4194304,
+#         "size": <archive size>,
+#         "compressed_size": <image size>,
+#         "sha256": <archive checksum>,
+#         "blocks": [[<archive offset>, <image offset>], ...],
+#         "view": {<command>: <output>, ...}
+#     }
+# which allows to decompress the blocks of the image in parallel. The
+# decompressed archive is streamed in order to the command reading it
+# through a named pipe, no decompressed copy is written to disk. The output
+# of the commands reading the image header (lsmksysb -l, restvg -l) is
+# cached in the index.
+
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.worker_pool import WorkerPool
+
+INDEX_SUFFIX = '.idx'
+INDEX_FORMAT = 'gzip-blocks'
+BLOCK_SIZE = 4 * 1024 * 1024
+# wbits to produce and read a gzip member
+GZIP_WBITS = 31
+READ_BUFSIZE = 1024 * 1024
+
+
+def index_path(location):
+    return location + INDEX_SUFFIX
+
+
+def read_index(location):
+    """
+    Read the sidecar index of a compressed image.
+
+    arguments:
+        location (str): path of the image
+    return:
+        the index dictionary
+        None if the image is not a compressed image or has no valid index
+    """
+    try:
+        with open(index_path(location)) as fobj:
+            index = json.load(fobj)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get('format') != INDEX_FORMAT:
+        return None
+    return index
+
+
+def write_index(location, index):
+    """
+    Write the sidecar index of a compressed image atomically.
+    """
+    directory = os.path.dirname(os.path.abspath(location))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.idx')
+    try:
+        with os.fdopen(fd, 'w') as fobj:
+            json.dump(index, fobj)
+        os.replace(tmp, index_path(location))
+    except Exception:
+        os.unlink(tmp)
+        raise
+
+
+def read_full(fobj, size):
+    """
+    Read size bytes from a file object, a pipe can return less data than
+    requested. Return less than size bytes only at the end of file.
+    """
+    chunks = []
+    left = size
+    while left > 0:
+        data = fobj.read(left)
+        if not data:
+            break
+        chunks.append(data)
+        left -= len(data)
+    return b''.join(chunks)
+
+
+def _job_runner(func):
+    """
+    Wrap func for a WorkerPool, the exception raised by func is recorded
+    in the job and the event of the job is set when it ends.
+    """
+    def run(job):
+        try:
+            func(job)
+        except Exception as exc:
+            job['error'] = exc
+        job['event'].set()
+    return run
+
+
+def compress_stream(src, dest, block_size=BLOCK_SIZE, level=6, max_workers=4):
+    """
+    Compress a stream to an image made of independent gzip members.
+
+    At most 2 * max_workers blocks are in memory at the same time.
+
+    arguments:
+        src       (file): file object to read the archive from
+        dest       (str): path of the image to write
+        block_size (int): size of the archive blocks
+        level      (int): compression level
+        max_workers(int): number of compression threads
+    return:
+        the index of the image, with the elapsed time and the throughput
+        in MB/s of the compression
+    """
+
+    def compress(job):
+        comp = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+        job['out'] = comp.compress(job['data']) + comp.flush()
+        job['data'] = None
+
+    start = time.time()
+    sha = hashlib.sha256()
+    blocks = []
+    offsets = {'size': 0, 'compressed_size': 0}
+    pending = collections.deque()
+    pool = WorkerPool(_job_runner(compress), max_workers, name='CompressThread')
+
+    def write(out, job):
+        job['event'].wait()
+        if 'error' in job:
+            raise job['error']
+        blocks.append([offsets['size'], offsets['compressed_size']])
+        out.write(job['out'])
+        offsets['size'] += job['len']
+        offsets['compressed_size'] += len(job['out'])
+
+    try:
+        with open(dest, 'wb') as out:
+            while True:
+                data = read_full(src, block_size)
+                if not data:
+                    break
+                sha.update(data)
+                job = {'data': data, 'len': len(data), 'event': threading.Event()}
+                pool.put(job)
+                pending.append(job)
+                while len(pending) > 2 * max_workers or (pending and pending[0]['event'].is_set()):
+                    write(out, pending.popleft())
+            while pending:
+                write(out, pending.popleft())
+    finally:
+        pool.close()
+
+    elapsed = time.time() - start
+    return {
+        'format': INDEX_FORMAT,
+        'block_size': block_size,
+        'size': offsets['size'],
+        'compressed_size': offsets['compressed_size'],
+        'sha256': sha.hexdigest(),
+        'blocks': blocks,
+        'view': {},
+        'elapsed': round(elapsed, 3),
+        'throughput': round(offsets['size'] / (1024 * 1024) / elapsed, 2) if elapsed else None,
+    }
+
+
+def decompress_stream(location, dest, index, max_workers=4):
+    """
+    Decompress a compressed image to a stream. The blocks are decompressed
+    in parallel and written in order, at most 2 * max_workers blocks are in
+    memory at the same time. The checksum of the archive is verified once
+    the whole image is written.
+
+    arguments:
+        location   (str): path of the compressed image
+        dest      (file): file object to write the archive to
+        index     (dict): index of the image
+        max_workers(int): number of decompression threads
+    return:
+        the size of the archive written
+    raise:
+        ValueError if the image does not match its index
+        BrokenPipeError if dest is a pipe closed by its reader
+    """
+
+    def decompress(job):
+        coffset, cend = job['block']
+        job['out'] = zlib.decompress(os.pread(src_fd, cend - coffset, coffset), GZIP_WBITS)
+
+    blocks = [block[1] for block in index['blocks']]
+    ends = blocks[1:] + [index['compressed_size']]
+    sha = hashlib.sha256()
+    written = {'size': 0}
+    pending = collections.deque()
+    src_fd = os.open(location, os.O_RDONLY)
+    pool = WorkerPool(_job_runner(decompress), max_workers, name='DecompressThread')
+
+    def write(job):
+        job['event'].wait()
+        if 'error' in job:
+            raise ValueError(f'cannot decompress block at offset {job["block"][0]}: {job["error"]}')
+        sha.update(job['out'])
+        dest.write(job['out'])
+        written['size'] += len(job['out'])
+
+    try:
+        for coffset, cend in zip(blocks, ends):
+            job = {'block': (coffset, cend), 'event': threading.Event()}
+            pool.put(job)
+            pending.append(job)
+            while len(pending) > 2 * max_workers or (pending and pending[0]['event'].is_set()):
+                write(pending.popleft())
+        while pending:
+            write(pending.popleft())
+        dest.flush()
+    finally:
+        pool.close()
+        os.close(src_fd)
+
+    if written['size'] != index['size'] or sha.hexdigest() != index['sha256']:
+        raise ValueError(f'checksum mismatch for {location}')
+    return written['size']
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Content-defined chunking deduplication store for backup images.
+#
+# Backup images of systems at the same oslevel share most of their content
+# but not at the same offsets, so the images are cut into variable size
+# chunks at positions chosen from the data itself: a chunk ends after an
+# occurrence of the anchor byte whose preceding window has a crc32 with
+# its low bits at zero. Both the anchor search and the crc32 run in C,
+# which keeps the ingest close to the disk throughput, and an insertion in
+# an image only changes the chunks around it. Each chunk is stored once
+# under its sha256 in:
+#     <store>/chunks/<2 first hex digits>/<sha256>
+# and each image is described by a recipe listing its chunks:
+#     <store>/recipes/<name>.json
+# The image is reconstituted by concatenating its chunks.
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+
+ANCHOR = b'\x8f'
+WINDOW = 32
+
+
+def cut_points(data, start, end, min_size, max_size, mask):
+    """
+    Find the end of the chunk starting at offset start in data.
+
+    arguments:
+        data  (bytes): the buffer
+        start   (int): offset of the beginning of the chunk
+        end     (int): offset of the end of valid data in the buffer
+        min_size(int): minimum chunk size
+        max_size(int): maximum chunk size
+        mask    (int): bits of the window crc32 that must be zero to cut
+    return:
+        offset of the end of the chunk, or None if there is not enough
+        data after start to decide
+    """
+    limit = min(start + max_size, end)
+    pos = start + max(min_size, WINDOW)
+    while pos < limit:
+        i = data.find(ANCHOR, pos, limit)
+        if i < 0:
+            break
+        if not zlib.crc32(data[i - WINDOW:i + 1]) & mask:
+            return i + 1
+        pos = i + 1
+    if limit == start + max_size:
+        return limit
+    return None
+
+
+class DedupStore(object):
+    """
+    Deduplication store of backup images on the local file system.
+
+    Usage:
+        store = DedupStore('/export/nim/dedup')
+        stats = store.ingest('/export/nim/mksysb/lpar1_sysb', 'lpar1_sysb')
+        store.reconstitute('lpar1_sysb', '/export/nim/mksysb/lpar1_sysb')
+    """
+
+    def __init__(self, path, avg_size=65536, bufsize=4 * 1024 * 1024):
+        self.path = path
+        self.chunk_dir = os.path.join(path, 'chunks')
+        self.recipe_dir = os.path.join(path, 'recipes')
+        self.avg_size = avg_size
+        self.min_size = avg_size // 4
+        self.max_size = avg_size * 4
+        # the anchor byte is found every 256 bytes of random data
+        self.mask = max(avg_size >> 8, 1) - 1
+        self.bufsize = max(bufsize, self.max_size)
+        # the directories are created by the first write, reading an
+        # empty store does not create it
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def recipe_path(self, name):
+        return os.path.join(self.recipe_dir, name + '.json')
+
+    def _write_atomic(self, path, data):
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # created by a concurrent ingest
+                pass
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fobj:
+                fobj.write(data)
+            os.replace(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+    def chunks(self, fobj):
+        """
+        Generator of the content-defined chunks of a file object.
+        """
+        data = b''
+        eof = False
+        while True:
+            if not eof:
+                block = fobj.read(self.bufsize)
+                if block:
+                    data += block
+                else:
+                    eof = True
+            start = 0
+            end = len(data)
+            while start < end:
+                cut = cut_points(data, start, end, self.min_size, self.max_size, self.mask)
+                if cut is None:
+                    if not eof:
+                        break
+                    cut = end
+                yield data[start:cut]
+                start = cut
+            data = data[start:]
+            if eof and not data:
+                return
+
+    def ingest(self, image, name, **attrs):
+        """
+        Cut an image in chunks, store the new chunks and write its recipe.
+
+        arguments:
+            image (str): path of the image file
+            name  (str): name of the image in the store
+            attrs (dict): additional attributes saved in the recipe
+        return:
+            dictionary with the size, new_bytes, chunks, new_chunks,
+            dedup_ratio, elapsed and throughput (MB/s) of the ingest
+        """
+        start = time.time()
+        sha = hashlib.sha256()
+        recipe = []
+        size = new_bytes = new_chunks = 0
+        with open(image, 'rb') as fobj:
+            for chunk in self.chunks(fobj):
+                sha.update(chunk)
+                digest = hashlib.sha256(chunk).hexdigest()
+                recipe.append([digest, len(chunk)])
+                size += len(chunk)
+                path = self.chunk_path(digest)
+                if not os.path.exists(path):
+                    self._write_atomic(path, chunk)
+                    new_bytes += len(chunk)
+                    new_chunks += 1
+
+        elapsed = time.time() - start
+        stats = {
+            'size': size,
+            'new_bytes': new_bytes,
+            'chunks': len(recipe),
+            'new_chunks': new_chunks,
+            'dedup_ratio': round(size / new_bytes, 2) if new_bytes else None,
+            'elapsed': round(elapsed, 3),
+            'throughput': round(size / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        }
+        # chunks are never removed, keep accounting the ones added by a
+        # previous ingest of the same name
+        previous = self.recipe(name)
+        stored = new_bytes + (previous['new_bytes'] if previous else 0)
+        content = dict(attrs)
+        content.update({'name': name, 'size': size, 'sha256': sha.hexdigest(),
+                        'new_bytes': stored, 'ctime': int(start), 'chunks': recipe})
+        self._write_atomic(self.recipe_path(name), json.dumps(content).encode())
+        return stats
+
+    def recipe(self, name):
+        """
+        return: the recipe of an image, None if it is not in the store
+        """
+        try:
+            with open(self.recipe_path(name)) as fobj:
+                return json.load(fobj)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def reconstitute(self, name, dest):
+        """
+        Rebuild an image from its chunks, its checksum is verified before
+        the file is moved to dest.
+
+        arguments:
+            name (str): name of the image in the store
+            dest (str): path of the file to create
+        return:
+            dictionary with the size, elapsed and throughput (MB/s)
+        raise:
+            ValueError if the image is not in the store or is corrupted
+        """
+        recipe = self.recipe(name)
+        if recipe is None:
+            raise ValueError(f'{name} is not in the deduplication store {self.path}')
+
+        start = time.time()
+        directory = os.path.dirname(dest) or '.'
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp')
+        try:
+            sha = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as out:
+                for digest, size in recipe['chunks']:
+                    with open(self.chunk_path(digest), 'rb') as fobj:
+                        chunk = fobj.read()
+                    if len(chunk) != size:
+                        raise ValueError(f'chunk {digest} of {name} is corrupted')
+                    sha.update(chunk)
+                    out.write(chunk)
+            if sha.hexdigest() != recipe['sha256']:
+                raise ValueError(f'checksum mismatch for {name}')
+            os.replace(tmp, dest)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        elapsed = time.time() - start
+        return {
+            'size': recipe['size'],
+            'elapsed': round(elapsed, 3),
+            'throughput': round(recipe['size'] / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        }
+
+    def verify(self, name):
+        """
+        Compute the checksum of an image from its chunks without rebuilding it.
+
+        arguments:
+            name (str): name of the image in the store
+        return:
+            tuple (sha256 of the chunks, sha256 recorded at ingest)
+        raise:
+            ValueError if the image is not in the store or a chunk is missing
+        """
+        recipe = self.recipe(name)
+        if recipe is None:
+            raise ValueError(f'{name} is not in the deduplication store {self.path}')
+        sha = hashlib.sha256()
+        for digest, size in recipe['chunks']:
+            try:
+                with open(self.chunk_path(digest), 'rb') as fobj:
+                    sha.update(fobj.read())
+            except (IOError, OSError):
+                raise ValueError(f'chunk {digest} of {name} is missing')
+        return sha.hexdigest(), recipe['sha256']
+
+    def stats(self):
+        """
+        return: dictionary with the number of images, their total size,
+                the bytes they added to the store and the store dedup ratio
+        """
+        images = size = new_bytes = 0
+        try:
+            entries = os.listdir(self.recipe_dir)
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if not entry.endswith('.json'):
+                continue
+            recipe = self.recipe(entry[:-len('.json')])
+            if recipe is None:
+                continue
+            images += 1
+            size += recipe['size']
+            new_bytes += recipe['new_bytes']
+        return {
+            'images': images,
+            'size': size,
+            'stored_bytes': new_bytes,
+            'dedup_ratio': round(size / new_bytes, 2) if new_bytes else None,
+        }
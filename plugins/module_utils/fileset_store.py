@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Content-addressed store of the filesets downloaded by SUMA.
+#
+# The lpp_sources created under a download root share most of their
+# filesets: an lpp_source per TL/SP downloads again the filesets that did
+# not change since the previous SP. The filesets of the lpp_sources are
+# stored once under their sha256 in:
+#     <download root>/.filesets/<2 first hex digits>/<sha256>
+# and an index maps the path of a fileset in an lpp_source to its content:
+#     <download root>/.filesets/index.json
+#     {
+#         "installp/ppc/bos.rte.7.2.5.1.U": {"sha256": ..., "size": ...},
+#         ...
+#     }
+# A fileset that SUMA would download is hard linked from the store (or
+# from a sibling lpp_source not yet in the store) into the new lpp_source
+# before the download, SUMA then skips it. A symbolic link is used when
+# the lpp_source is on another file system than the store. Files are
+# never copied: a fileset is added to the store by linking it, and a
+# downloaded copy of a fileset already in the store is replaced by a
+# link to the store.
+
+import binascii
+import errno
+import hashlib
+import json
+import os
+import tempfile
+
+INDEX_FILE = 'index.json'
+STORE_DIR = '.filesets'
+FILESET_SUFFIXES = ('.bff', '.I', '.U', '.rpm')
+READ_BUFSIZE = 1024 * 1024
+LINK_ATTEMPTS = 100
+
+
+def is_fileset(name):
+    return name.endswith(FILESET_SUFFIXES)
+
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fobj:
+        for data in iter(lambda: fobj.read(READ_BUFSIZE), b''):
+            sha.update(data)
+    return sha.hexdigest()
+
+
+class FilesetStore(object):
+    """
+    Content-addressed fileset store under a download root.
+
+    Usage:
+        store = FilesetStore(module, '/usr/sys/inst.images')
+        src = store.find('installp/ppc/bos.rte.7.2.5.1.U', ['7200-05-00-0000-lpp_source'])
+        store.link(src, '/usr/sys/inst.images/7200-05-01-2038-lpp_source/installp/ppc/bos.rte.7.2.5.1.U')
+        store.ingest_dir('/usr/sys/inst.images/7200-05-01-2038-lpp_source')
+        store.save()
+    """
+
+    def __init__(self, module, root):
+        self.module = module
+        self.root = root
+        self.path = os.path.join(root, STORE_DIR)
+        self.index_file = os.path.join(self.path, INDEX_FILE)
+        self.index = self._load()
+        # index entries by (st_dev, st_ino) of their blob, built on first use
+        self.inodes = None
+
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as exc:
+            self.module.log(f'[WARNING] Ignoring fileset store index {self.index_file}: {exc}')
+            return {}
+        if not isinstance(index, dict):
+            return {}
+        return index
+
+    def save(self):
+        try:
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+            fd, tmp_file = tempfile.mkstemp(dir=self.path, prefix='.index_')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+            os.replace(tmp_file, self.index_file)
+        except OSError as exc:
+            self.module.log(f'[WARNING] Failed to save fileset store index {self.index_file}: {exc}')
+
+    def blob_path(self, digest):
+        return os.path.join(self.path, digest[:2], digest)
+
+    def lpp_sources(self, exclude=None):
+        """
+        return: the directories under the download root, except exclude
+        """
+        try:
+            names = sorted(os.listdir(self.root))
+        except OSError:
+            return []
+        dirs = []
+        for name in names:
+            path = os.path.join(self.root, name)
+            if name != STORE_DIR and os.path.isdir(path) and \
+                    (exclude is None or os.path.abspath(path) != os.path.abspath(exclude)):
+                dirs.append(path)
+        return dirs
+
+    def find(self, relname, search_dirs=()):
+        """
+        Find an existing copy of a fileset, in the store or in a sibling
+        lpp_source.
+
+        arguments:
+            relname      (str): path of the fileset relative to the lpp_source
+            search_dirs (list): lpp_source directories to look into
+        return:
+            (path, size) of the copy, (None, 0) if there is no copy
+        """
+        entry = self.index.get(relname)
+        if entry:
+            blob = self.blob_path(entry['sha256'])
+            try:
+                if os.stat(blob).st_size == entry['size']:
+                    return blob, entry['size']
+            except OSError:
+                pass
+        for directory in search_dirs:
+            path = os.path.join(directory, relname)
+            if os.path.isfile(path):
+                return path, os.path.getsize(path)
+        return None, 0
+
+    def _link_atomic(self, src, dest, symlink=False):
+        directory = os.path.dirname(dest)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        # the link is created under a unique name, then renamed over dest
+        for attempt in range(LINK_ATTEMPTS):
+            tmp = os.path.join(directory, f'.link_{os.getpid()}_{binascii.hexlify(os.urandom(6)).decode()}')
+            try:
+                if symlink:
+                    os.symlink(src, tmp)
+                else:
+                    os.link(src, tmp)
+                break
+            except FileExistsError:
+                continue
+        else:
+            raise FileExistsError(errno.EEXIST, 'Cannot create a temporary link', directory)
+        try:
+            os.replace(tmp, dest)
+        except OSError:
+            os.unlink(tmp)
+            raise
+
+    def link(self, src, dest, relname=None):
+        """
+        Link an existing copy of a fileset into an lpp_source.
+
+        A hard link is used when possible. Across file systems, the copy is
+        added to the store and dest is a symbolic link to the store.
+
+        arguments:
+            src     (str): path of the copy returned by find
+            dest    (str): path of the fileset in the lpp_source
+            relname (str): path of the fileset relative to the lpp_source
+        return:
+            'hardlink', 'symlink' or None if the fileset cannot be linked
+        """
+        try:
+            self._link_atomic(src, dest)
+            return 'hardlink'
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                self.module.log(f'[WARNING] Cannot link {src} to {dest}: {exc}')
+                return None
+        if not src.startswith(self.path + os.sep):
+            entry = self.add(src, relname or os.path.basename(src))
+            if entry is None:
+                return None
+            src = self.blob_path(entry['sha256'])
+        try:
+            self._link_atomic(src, dest, symlink=True)
+        except OSError as exc:
+            self.module.log(f'[WARNING] Cannot link {src} to {dest}: {exc}')
+            return None
+        # a blob referenced by a symbolic link is never pruned
+        for entry in self.index.values():
+            if self.blob_path(entry['sha256']) == src:
+                entry['symlinked'] = True
+        return 'symlink'
+
+    def add(self, path, relname):
+        """
+        Add a fileset to the store. If the same content is already in the
+        store, the file is replaced by a hard link to it.
+
+        arguments:
+            path    (str): path of the fileset in an lpp_source
+            relname (str): path of the fileset relative to the lpp_source
+        return:
+            the index entry of the fileset, None if the fileset cannot be
+            stored
+        """
+        st = os.lstat(path)
+        shared = self._inodes().get((st.st_dev, st.st_ino))
+        if shared:
+            # already linked into the store, no need to read it
+            entry = self.index.get(relname)
+            if not entry or entry['sha256'] != shared['sha256']:
+                entry = self.index[relname] = {'sha256': shared['sha256'], 'size': shared['size']}
+            return entry
+
+        digest = file_sha256(path)
+        blob = self.blob_path(digest)
+        try:
+            if os.path.exists(blob):
+                self._link_atomic(blob, path)
+            else:
+                self._link_atomic(path, blob)
+        except OSError as exc:
+            self.module.log(f'[WARNING] Cannot add {path} to fileset store {self.path}: {exc}')
+            return None
+        entry = {'sha256': digest, 'size': st.st_size}
+        self.index[relname] = entry
+        try:
+            blob_st = os.stat(blob)
+            self.inodes[(blob_st.st_dev, blob_st.st_ino)] = entry
+        except OSError:
+            pass
+        return entry
+
+    def _inodes(self):
+        """
+        return: the index entries by (st_dev, st_ino) of their blob, a stat
+        of each blob replaces reading the filesets already in the store
+        """
+        if self.inodes is None:
+            self.inodes = {}
+            for entry in self.index.values():
+                try:
+                    blob_st = os.stat(self.blob_path(entry['sha256']))
+                except OSError:
+                    continue
+                if blob_st.st_size == entry['size']:
+                    self.inodes.setdefault((blob_st.st_dev, blob_st.st_ino), entry)
+        return self.inodes
+
+    def ingest_dir(self, directory):
+        """
+        Add the filesets of an lpp_source to the store.
+
+        return:
+            dictionary with the number of filesets and the bytes shared
+            with the store
+        """
+        stats = {'filesets': 0, 'size': 0}
+        for dirpath, dirnames, filenames in os.walk(directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if not is_fileset(name) or os.path.islink(path) or not os.path.isfile(path):
+                    continue
+                entry = self.add(path, os.path.relpath(path, directory))
+                if entry:
+                    stats['filesets'] += 1
+                    stats['size'] += entry['size']
+        return stats
+
+    def prune(self):
+        """
+        Remove the filesets that are no more in any lpp_source, i.e. the
+        store holds the only hard link and no symbolic link points to it.
+
+        return: the number of bytes freed
+        """
+        symlinked = set(entry['sha256'] for entry in self.index.values() if entry.get('symlinked'))
+        freed = 0
+        for relname, entry in list(self.index.items()):
+            blob = self.blob_path(entry['sha256'])
+            try:
+                st = os.stat(blob)
+            except OSError:
+                del self.index[relname]
+                continue
+            if st.st_nlink == 1 and entry['sha256'] not in symlinked:
+                os.unlink(blob)
+                freed += st.st_size
+                del self.index[relname]
+        return freed
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Parsing of the hdcryptmgr show commands shared by the hdcrypt modules.
+#
+# The show commands print a header line followed by a line per device, the
+# columns being separated by blanks:
+#     NAME                CRYPTO_STATUS         %_ENCRYPTED     NOTE
+#     testlv              encrypted             100
+# The encryption status of all the devices is collected with one
+# 'hdcryptmgr showvg', one 'hdcryptmgr showlv' for all the volume groups
+# and one 'hdcryptmgr showpv', instead of a command per device preceded by
+# lslv, lsvg or lspv to check the device exists: a device that does not
+# appear in the output does not exist or cannot be queried, the reason
+# being in the error output of the command.
+#
+# The progress of the running conversions is read with a single
+# 'hdcryptmgr showconv', conversion_rate derives the throughput and the
+# remaining time of a conversion from two of its samples.
+
+HDCRYPTMGR = '/usr/sbin/hdcryptmgr'
+
+KEYS = {
+    'vg': ["VG NAME / ID", "ENCRYPTION ENABLED"],
+    'lv': ["NAME", "CRYPTO_STATUS", "%_ENCRYPTED", "NOTE"],
+    'pv': ["NAME", "CRYPTO_STATUS", "%_ENCRYPTED", "NOTE"],
+    'conv': ["NAME", "TID/STATUS", "%_ENCRYPTED", "DIRECTION", "START_TIME"],
+}
+
+
+def parse_table(kind, stdout):
+    """
+    Parse the output of a hdcryptmgr show command. The header lines and
+    the blank lines are skipped, the missing columns have an empty value.
+
+    arguments:
+        kind    (str): 'vg', 'lv', 'pv' or 'conv', the columns of KEYS
+        stdout  (str): output of the command
+    return:
+        dict {device name: {column: value}} in the order of the output
+    """
+    keys = KEYS[kind]
+    lines = stdout.splitlines()
+    header = lines[0].split() if lines else []
+    table = {}
+    for line in lines[1:]:
+        fields = line.split()
+        if not fields or fields == header:
+            continue
+        fields += [""] * (len(keys) - len(fields))
+        table[fields[0]] = dict(zip(keys, fields))
+    return table
+
+
+def error_lines(stderr):
+    """
+    return: the non blank lines of the error output of a command
+    """
+    return [line.strip() for line in stderr.splitlines() if line.strip()]
+
+
+def collect_status(module, devices=None):
+    """
+    Collect the encryption status of the volume groups, logical volumes
+    and physical volumes with one hdcryptmgr command per kind of device.
+    The output of a command is used even if it fails for some devices.
+
+    arguments:
+        module   (dict): The Ansible module
+        devices  (list): names of VGs, LVs or PVs to return, all if None
+    return:
+        dict {'vg': {name: status}, 'lv': {name: status}, 'pv': {name: status},
+              'missing': names of devices not found, 'errors': error lines}
+        with the status of each device as parsed by parse_table
+    """
+    status = {'vg': {}, 'lv': {}, 'pv': {}, 'missing': [], 'errors': []}
+
+    def show(kind, names=None):
+        cmd = [HDCRYPTMGR, f'show{kind}'] + (names or [])
+        rc, stdout, stderr = module.run_command(cmd)
+        status['errors'] += error_lines(stderr)
+        if rc:
+            module.debug(f"Command '{' '.join(cmd)}' failed with return code {rc}")
+        status[kind].update(parse_table(kind, stdout))
+
+    show('vg')
+    if status['vg']:
+        show('lv', list(status['vg']))
+    show('pv')
+
+    if devices is not None:
+        names = set(devices)
+        for kind in ('vg', 'lv', 'pv'):
+            status[kind] = {name: value for name, value in status[kind].items() if name in names}
+        status['missing'] = [name for name in devices
+                             if not any(name in status[kind] for kind in ('vg', 'lv', 'pv'))]
+    return status
+
+
+def conversion_rate(size_mb, start_percent, start_time, percent, now):
+    """
+    Compute the throughput and the remaining time of a conversion from its
+    progress, in percent of the device converted, at two points in time.
+
+    arguments:
+        size_mb        (float): size of the device in megabytes
+        start_percent  (float): progress at start_time
+        start_time     (float): time of the first sample, in seconds
+        percent        (float): progress at now
+        now            (float): time of the last sample, in seconds
+    return:
+        (throughput in megabytes per second, remaining seconds), the
+        remaining time is None while no progress was observed
+    """
+    elapsed = now - start_time
+    done = (percent - start_percent) * size_mb / 100
+    if elapsed <= 0 or done <= 0:
+        return 0.0, None
+    throughput = done / elapsed
+    remaining = (100 - percent) * size_mb / 100
+    return round(throughput, 2), int(remaining / throughput)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Snapshot of the mount table shared by the mount and filesystem modules.
+#
+# The output of 'mount' (the mounted filesystems) and of 'lsfs -c' (the
+# filesystems defined in /etc/filesystems) are each parsed once, on first
+# use, and indexed by mount point, device and vfs. All the lookups are then
+# exact matches on the indexes, e.g. /tmp/test is not reported mounted when
+# only /tmp/testfs is.
+#
+# A snapshot is not updated: take a new one after a mount, umount, crfs,
+# chfs or rmfs command.
+
+MOUNT_CMD = '/usr/sbin/mount'
+LSFS_CMD = '/usr/sbin/lsfs'
+
+MOUNT_FIELDS = ['node', 'device', 'mount_point', 'vfs', 'date', 'options']
+LSFS_FIELDS = ['mount_point', 'device', 'vfs', 'nodename', 'type', 'size', 'options', 'automount', 'acct']
+
+
+class MountTableError(Exception):
+    """
+    Raised when the command building a snapshot fails.
+
+    attributes:
+        cmd     (str): the command run
+        rc      (int): its return code
+        stdout  (str): its standard output
+        stderr  (str): its standard error
+    """
+
+    def __init__(self, cmd, rc, stdout, stderr):
+        Exception.__init__(self, f"Command '{cmd}' failed with return code {rc}")
+        self.cmd = cmd
+        self.rc = rc
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+def parse_mount_output(stdout):
+    """
+    Parse the output of the mount command. The node column is empty for
+    the local filesystems, the lines of the remote filesystems start with
+    the node name.
+
+    arguments:
+        stdout (str): output of the mount command
+    return:
+        list of dict with the MOUNT_FIELDS keys, in the order of the output
+    """
+    entries = []
+    for line in stdout.splitlines():
+        fields = line.split()
+        if not fields or fields[0] == 'node' or set(fields[0]) == {'-'}:
+            continue
+        if line[0].isspace():
+            fields.insert(0, '')
+        if len(fields) < 4:
+            continue
+        entries.append({
+            'node': fields[0],
+            'device': fields[1],
+            'mount_point': fields[2],
+            'vfs': fields[3],
+            'date': ' '.join(fields[4:7]),
+            'options': fields[7] if len(fields) > 7 else '',
+        })
+    return entries
+
+
+def parse_lsfs_output(stdout):
+    """
+    Parse the output of lsfs -c, a header line starting with '#' and a line
+    per filesystem with colon separated fields.
+
+    arguments:
+        stdout (str): output of lsfs -c
+    return:
+        list of dict with the LSFS_FIELDS keys, in the order of the output
+    """
+    entries = []
+    for line in stdout.splitlines():
+        if not line.strip() or line.startswith('#') or line.startswith('('):
+            continue
+        fields = line.split(':')
+        if len(fields) < len(LSFS_FIELDS):
+            continue
+        if len(fields) > len(LSFS_FIELDS):
+            # the options can contain colons
+            extra = len(fields) - len(LSFS_FIELDS)
+            fields[6:7 + extra] = [':'.join(fields[6:7 + extra])]
+        entries.append(dict(zip(LSFS_FIELDS, fields)))
+    return entries
+
+
+def index(entries, key):
+    """
+    return: dict {entry[key]: [entries]}
+    """
+    indexed = {}
+    for entry in entries:
+        indexed.setdefault(entry[key], []).append(entry)
+    return indexed
+
+
+class MountTable(object):
+    """
+    Snapshot of the mounted and defined filesystems, each command being run
+    once on first use.
+
+    Usage:
+        table = MountTable(module)
+        table.is_mounted('/tmp/testfs')
+        table.filesystem('/tmp/testfs')['vfs']
+    """
+
+    def __init__(self, module, mount_output=None, lsfs_output=None):
+        """
+        arguments:
+            module       (dict): The Ansible module
+            mount_output  (str): output of mount, run on first use if None
+            lsfs_output   (str): output of lsfs -c, run on first use if None
+        """
+        self.module = module
+        self._mounted = None
+        self._filesystems = None
+        if mount_output is not None:
+            self._load_mounted(mount_output)
+        if lsfs_output is not None:
+            self._load_filesystems(lsfs_output)
+
+    def _run(self, cmd):
+        rc, stdout, stderr = self.module.run_command(cmd)
+        if rc != 0:
+            raise MountTableError(' '.join(cmd), rc, stdout, stderr)
+        return stdout
+
+    def _load_mounted(self, stdout):
+        entries = parse_mount_output(stdout)
+        self._mounted = {
+            'entries': entries,
+            'mount_point': index(entries, 'mount_point'),
+            'device': index(entries, 'device'),
+            'vfs': index(entries, 'vfs'),
+            'node': index(entries, 'node'),
+        }
+
+    def _load_filesystems(self, stdout):
+        entries = parse_lsfs_output(stdout)
+        self._filesystems = {
+            'entries': entries,
+            'mount_point': index(entries, 'mount_point'),
+            'device': index(entries, 'device'),
+            'vfs': index(entries, 'vfs'),
+            'type': index(entries, 'type'),
+        }
+
+    def mounted(self, key=None, value=None):
+        """
+        Get the mounted filesystems.
+
+        arguments:
+            key    (str): 'mount_point', 'device', 'vfs' or 'node', all
+                          the mounted filesystems if None
+            value  (str): the value of key
+        return:
+            list of the mount entries
+        note:
+            Raises MountTableError if the mount command fails
+        """
+        if self._mounted is None:
+            self._load_mounted(self._run([MOUNT_CMD]))
+        if key is None:
+            return self._mounted['entries']
+        return self._mounted[key].get(value, [])
+
+    def filesystems(self, key=None, value=None):
+        """
+        Get the filesystems defined in /etc/filesystems.
+
+        arguments:
+            key    (str): 'mount_point', 'device', 'vfs' or 'type' (mount
+                          group), all the filesystems if None
+            value  (str): the value of key
+        return:
+            list of the lsfs entries
+        note:
+            Raises MountTableError if the lsfs command fails
+        """
+        if self._filesystems is None:
+            self._load_filesystems(self._run([LSFS_CMD, '-c']))
+        if key is None:
+            return self._filesystems['entries']
+        return self._filesystems[key].get(value, [])
+
+    def is_mounted(self, path):
+        """
+        return: True if a filesystem is mounted over path
+        """
+        return bool(self.mounted('mount_point', path))
+
+    def mounted_status(self, paths):
+        """
+        return: dict {path: True if a filesystem is mounted over path}
+        """
+        return {path: self.is_mounted(path) for path in paths}
+
+    def filesystem(self, name):
+        """
+        Get the definition of a filesystem by mount point or device.
+
+        return:
+            the lsfs entry, None if the filesystem is not defined
+        """
+        entries = self.filesystems('mount_point', name) or self.filesystems('device', name)
+        return entries[0] if entries else None
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Compact index of the MultiPath I/O paths and delta between two runs.
+#
+# The output of 'lspath -F name:parent:connection:path_id:path_status:status'
+# is parsed once into a list of path tuples, from which the mpio module
+# builds either the nested paths dictionary or a compact index counting the
+# paths by status per disk and per parent adapter.
+#
+# In delta mode the paths are saved on the target in a snapshot file:
+#     {
+#         "scope": ["<device>", "<parent>"],
+#         "paths": {"<name>:<parent>:<connection>": [<path_id>, "<path_status>", "<status>"], ...}
+#     }
+# and only the paths added, removed or whose status changed since the
+# previous snapshot are reported. A snapshot taken with another device or
+# parent filter is not compared.
+
+import json
+import os
+import tempfile
+
+SNAPSHOT_FILE = '/var/adm/ansible/mpio_paths.json'
+LSPATH_FORMAT = 'name:parent:connection:path_id:path_status:status'
+
+
+def parse_lspath(stdout):
+    """
+    Parse the output of lspath -F LSPATH_FORMAT.
+
+    arguments:
+        stdout (str): output of lspath
+    return:
+        list of (name, parent, connection, path_id, path_status, status)
+        tuples, status being None when lspath reports N/A
+    """
+    entries = []
+    for line in stdout.splitlines():
+        fields = line.split(':')
+        if len(fields) != 6:
+            continue
+        status = fields[5] if fields[5] != 'N/A' else None
+        entries.append((fields[0], fields[1], fields[2], int(fields[3]), fields[4], status))
+    return entries
+
+
+def build_paths(entries):
+    """
+    return: dict {name: {parent: {connection: {path_id, path_status, status}}}},
+    the first line of a path is used
+    """
+    paths = {}
+    for name, parent, connection, path_id, path_status, status in entries:
+        connections = paths.setdefault(name, {}).setdefault(parent, {})
+        if connection in connections:
+            continue
+        connections[connection] = dict(path_id=path_id, path_status=path_status)
+        if status is not None:
+            connections[connection]['status'] = status
+    return paths
+
+
+def build_index(entries):
+    """
+    Count the paths by status, the status of a path being its lspath status
+    or its path_status when the status is N/A.
+
+    return:
+        dict {'disks': {name: {'paths': count, 'status': {status: count},
+                               'parents': {parent: {status: count}}}},
+              'parents': {parent: {'disks': count, 'paths': count, 'status': {status: count}}}}
+    """
+    disks = {}
+    parents = {}
+    parent_disks = {}
+    for name, parent, connection, path_id, path_status, status in entries:
+        status = status or path_status
+        disk = disks.setdefault(name, {'paths': 0, 'status': {}, 'parents': {}})
+        disk['paths'] += 1
+        disk['status'][status] = disk['status'].get(status, 0) + 1
+        disk_parent = disk['parents'].setdefault(parent, {})
+        disk_parent[status] = disk_parent.get(status, 0) + 1
+
+        adapter = parents.setdefault(parent, {'disks': 0, 'paths': 0, 'status': {}})
+        adapter['paths'] += 1
+        adapter['status'][status] = adapter['status'].get(status, 0) + 1
+        parent_disks.setdefault(parent, set()).add(name)
+
+    for parent, names in parent_disks.items():
+        parents[parent]['disks'] = len(names)
+    return {'disks': disks, 'parents': parents}
+
+
+def snapshot(entries):
+    """
+    return: the compact form of the paths saved in the snapshot file
+    """
+    return {f'{name}:{parent}:{connection}': [path_id, path_status, status]
+            for name, parent, connection, path_id, path_status, status in entries}
+
+
+def path_dict(key, values):
+    """
+    return: the dict of a path of a snapshot
+    """
+    name, parent, connection = key.split(':', 2)
+    path = dict(name=name, parent=parent, connection=connection,
+                path_id=values[0], path_status=values[1])
+    if values[2] is not None:
+        path['status'] = values[2]
+    return path
+
+
+def compute_delta(previous, current):
+    """
+    Compare two snapshots of the paths.
+
+    arguments:
+        previous (dict): paths of the previous snapshot, None if there is none
+        current  (dict): paths of the current snapshot
+    return:
+        dict {'added': [paths], 'removed': [paths], 'changed': [paths]}, a
+        changed path having its previous path_status and status in
+        'previous'; all the paths are added when there is no previous snapshot
+    """
+    previous = previous or {}
+    delta = {'added': [], 'removed': [], 'changed': []}
+    for key, values in current.items():
+        if key not in previous:
+            delta['added'].append(path_dict(key, values))
+        elif list(previous[key][1:]) != list(values[1:]):
+            path = path_dict(key, values)
+            path['previous'] = path_dict(key, previous[key])
+            for attr in ('name', 'parent', 'connection', 'path_id'):
+                path['previous'].pop(attr)
+            delta['changed'].append(path)
+    for key, values in previous.items():
+        if key not in current:
+            delta['removed'].append(path_dict(key, values))
+    return delta
+
+
+def load_snapshot(module, snapshot_file, scope):
+    """
+    Load the paths of the previous snapshot taken with the same scope.
+
+    arguments:
+        module         (dict): The Ansible module
+        snapshot_file   (str): path of the snapshot file
+        scope          (list): [device, parent] filters of lspath
+    return:
+        the paths of the snapshot, None if there is no usable snapshot
+    """
+    if not os.path.exists(snapshot_file):
+        return None
+    try:
+        with open(snapshot_file, 'r') as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as exc:
+        module.log(f'[WARNING] Ignoring mpio snapshot {snapshot_file}: {exc}')
+        return None
+    if not isinstance(saved, dict) or saved.get('scope') != list(scope) or not isinstance(saved.get('paths'), dict):
+        return None
+    return saved['paths']
+
+
+def save_snapshot(module, snapshot_file, scope, paths):
+    """
+    Replace the snapshot file with the current paths.
+
+    arguments:
+        module         (dict): The Ansible module
+        snapshot_file   (str): path of the snapshot file
+        scope          (list): [device, parent] filters of lspath
+        paths          (dict): paths of the current snapshot
+    """
+    try:
+        directory = os.path.dirname(snapshot_file)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        fd, tmp_file = tempfile.mkstemp(dir=directory, prefix='.mpio_paths_')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'scope': list(scope), 'paths': paths}, f, separators=(',', ':'))
+        os.replace(tmp_file, snapshot_file)
+    except OSError as exc:
+        module.log(f'[WARNING] Failed to save mpio snapshot {snapshot_file}: {exc}')
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Collector of the oslevel of NIM clients shared by the NIM modules.
+#
+# 'oslevel -s' is run on the clients through c_rsh by a bounded pool of
+# worker threads, with one deadline for the whole collection: a client
+# that does not answer in time is reported as 'timedout' and its thread is
+# abandoned instead of blocking the module. The levels found are kept for
+# a short time in a cache file shared by the modules, so that a playbook
+# running nim_suma then nim on the same clients does not query them twice:
+#     {
+#         "<client>": {"oslevel": "7200-05-03-2148", "timestamp": <time>},
+#         ...
+#     }
+# Modules changing the oslevel of clients invalidate their entries. The
+# updates of the cache are serialized with a lock on a '.lock' file next to
+# it, the cache file itself being replaced on each update.
+
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.worker_pool import WorkerPool
+
+CACHE_FILE = '/var/adm/ansible/nim_oslevel_cache.json'
+CACHE_TTL = 300
+MAX_WORKERS = 20
+TIMEOUT = 300
+TIMEDOUT = 'timedout'
+CACHE_LOCK = threading.Lock()
+
+OSLEVEL_RE = re.compile(r"^([0-9]{4})-([0-9]{2})(?:-([0-9]{2})(?:-([0-9]{4}))?)?$")
+
+
+def oslevel_key(oslevel):
+    """
+    Sort key of an oslevel xxxx-xx[-xx[-xxxx]].
+
+    return:
+        tuple of the numeric fields of the oslevel, None if the oslevel is
+        not valid
+    """
+    matched = OSLEVEL_RE.match(oslevel or '')
+    if not matched:
+        return None
+    return tuple(int(field) for field in matched.groups() if field is not None)
+
+
+def min_oslevel(oslevels):
+    """
+    Find the minimum oslevel of a dictionary {client: oslevel}, the clients
+    without a valid oslevel are ignored.
+
+    return:
+        the minimum oslevel, None if there is no valid oslevel
+    """
+    levels = [(oslevel_key(level), level) for level in oslevels.values() if oslevel_key(level)]
+    return min(levels)[1] if levels else None
+
+
+def max_oslevel(oslevels):
+    """
+    Find the maximum oslevel of a dictionary {client: oslevel}, the clients
+    without a valid oslevel are ignored.
+
+    return:
+        the maximum oslevel, None if there is no valid oslevel
+    """
+    levels = [(oslevel_key(level), level) for level in oslevels.values() if oslevel_key(level)]
+    return max(levels)[1] if levels else None
+
+
+def run_oslevel(module, target, host=None):
+    """
+    Run 'oslevel -s' on a NIM client using c_rsh, or locally on the master.
+
+    arguments:
+        module  (dict): The Ansible module
+        target   (str): NIM name of the client
+        host     (str): hostname or IP address of the client, the NIM name if None
+    return:
+        (rc, stdout, stderr) of the command
+    """
+    cmd = ['/usr/bin/oslevel', '-s']
+    if target == 'master':
+        return module.run_command(cmd)
+
+    rcmd = f'( LC_ALL=C {" ".join(cmd)} ); echo rc=$?'
+    rc, stdout, stderr = module.run_command(['/usr/lpp/bos.sysmgt/nim/methods/c_rsh', host or target, rcmd])
+    if rc != 0:
+        return rc, stdout, stderr
+    matched = re.search(r'rc=([-\d]+)$', stdout)
+    if matched:
+        rc = int(matched.group(1))
+        # remove the rc of c_rsh with echo $?
+        stdout = re.sub(r'rc=[-\d]+\n$', '', stdout)
+    return rc, stdout, stderr
+
+
+def load_cache(module, cache_file, ttl):
+    """
+    Load the oslevels cached less than ttl seconds ago.
+    """
+    if ttl <= 0 or not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as exc:
+        module.log(f'[WARNING] Ignoring oslevel cache {cache_file}: {exc}')
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    now = time.time()
+    return {target: entry['oslevel'] for target, entry in cache.items()
+            if isinstance(entry, dict) and now - entry.get('timestamp', 0) < ttl}
+
+
+def update_cache(module, cache_file, oslevels=None, invalidate=None):
+    """
+    Add oslevels to the cache file and remove the entries of the
+    invalidated clients. The file is read again before it is replaced so
+    that the entries saved by another module in the meantime are kept, the
+    read and replace being done under an exclusive lock.
+
+    arguments:
+        module      (dict): The Ansible module
+        cache_file   (str): path of the cache file
+        oslevels    (dict): oslevels to add {client: oslevel}
+        invalidate  (list): clients to remove from the cache
+    """
+    if not oslevels and not os.path.exists(cache_file):
+        # nothing to invalidate
+        return
+    directory = os.path.dirname(cache_file)
+    try:
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        lock = open(cache_file + '.lock', 'a')
+    except OSError as exc:
+        module.log(f'[WARNING] Failed to lock oslevel cache {cache_file}: {exc}')
+        return
+    # the flock may be a per process lock, the threads of a module are
+    # serialized by CACHE_LOCK
+    with CACHE_LOCK, lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        _update_cache(module, cache_file, oslevels, invalidate)
+
+
+def _update_cache(module, cache_file, oslevels, invalidate):
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    if invalidate:
+        if not any(target in cache for target in invalidate):
+            return
+        for target in invalidate:
+            cache.pop(target, None)
+    now = int(time.time())
+    for target, oslevel in (oslevels or {}).items():
+        cache[target] = {'oslevel': oslevel, 'timestamp': now}
+    try:
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file), prefix='.oslevel_')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, cache_file)
+    except OSError as exc:
+        module.log(f'[WARNING] Failed to save oslevel cache {cache_file}: {exc}')
+
+
+def get_oslevels(module, targets, max_workers=MAX_WORKERS, timeout=TIMEOUT,
+                 cache_file=CACHE_FILE, ttl=CACHE_TTL, resolve=None):
+    """
+    Get the oslevel of NIM clients, from the cache or with at most
+    max_workers concurrent 'oslevel -s' commands.
+
+    arguments:
+        module      (dict): The Ansible module
+        targets     (list): NIM clients, can contain 'master'
+        max_workers  (int): maximum number of concurrent commands
+        timeout      (int): seconds to wait for all the clients
+        cache_file   (str): path of the cache file shared by the modules
+        ttl          (int): seconds the oslevels are cached, 0 disables the cache
+        resolve (callable): returns the hostname or IP address c_rsh must use
+                            for a NIM name, the NIM name is used if None
+    return:
+        (oslevels, errors)
+        oslevels (dict): oslevel of each client, 'timedout' when the client
+                         did not answer or the command failed
+        errors   (dict): error message of each client in failure
+    """
+    oslevels = {}
+    errors = {}
+    cached = load_cache(module, cache_file, ttl)
+    for target in targets:
+        if target in oslevels:
+            continue
+        if target in cached:
+            oslevels[target] = cached[target]
+        else:
+            oslevels[target] = TIMEDOUT
+    pending = set(target for target in oslevels if target not in cached)
+    if cached:
+        module.debug(f'oslevels found in cache {cache_file}: {sorted(set(oslevels) - pending)}')
+    # resolved before starting the threads, resolve may not be thread safe
+    hosts = {target: resolve(target) if resolve and target != 'master' else target for target in pending}
+
+    found = {}
+    done = threading.Condition()
+
+    def worker(target):
+        with done:
+            if target not in pending:
+                # deadline reached
+                return
+        try:
+            rc, stdout, stderr = run_oslevel(module, target, hosts[target])
+        except Exception as exc:
+            rc, stdout, stderr = -1, '', str(exc)
+        with done:
+            if target not in pending:
+                # late answer after the deadline
+                return
+            if rc == 0 and oslevel_key(stdout.strip()):
+                found[target] = stdout.strip()
+                if stderr.rstrip():
+                    module.log(f'[WARNING] "oslevel -s" command stderr on {target}: {stderr}')
+            else:
+                errors[target] = f"Command 'oslevel -s' failed with return code {rc}, " \
+                                 f"stdout: '{stdout.strip()}', stderr: '{stderr.strip()}'"
+            pending.discard(target)
+            done.notify_all()
+
+    if pending:
+        todo = [target for target in oslevels if target in pending]
+        # a client that never answers must not prevent the module to exit
+        pool = WorkerPool(worker, min(max_workers, len(todo)), name='OslevelThread', daemon=True)
+        for target in todo:
+            pool.put(target)
+        pool.close(wait=False)
+
+    deadline = time.time() + timeout
+    with done:
+        while pending:
+            left = deadline - time.time()
+            if left <= 0:
+                break
+            done.wait(left)
+        for target in pending:
+            errors[target] = f'No answer after {timeout} seconds'
+            module.log(f'[WARNING] oslevel of {target} not received after {timeout} seconds')
+        pending.clear()
+    oslevels.update(found)
+
+    if found and ttl > 0:
+        update_cache(module, cache_file, oslevels=found)
+    return oslevels, errors
+
+
+def invalidate_oslevels(module, targets, cache_file=CACHE_FILE):
+    """
+    Remove clients from the oslevel cache, to be called when their
+    oslevel may have changed.
+    """
+    update_cache(module, cache_file, invalidate=targets)
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Shared watcher of NIM object states.
+#
+# NIM operations such as alt_disk_install, cust or updateios are started
+# asynchronously and their progress is reported through the Cstate, info
+# and Cstate_result attributes of the NIM object. Instead of having each
+# caller fork its own lsnim every few seconds, the NimStateWatcher polls
+# all the watched objects with a single 'lsnim -Z' command from one
+# background thread and wakes up the waiters of each object when its
+# operation ends.
+
+import threading
+import time
+
+NIM_READY_STATE = 'ready for a NIM operation'
+
+
+def parse_lsnim_state(stdout, names):
+    """
+    Parse the output of 'lsnim -Z -a Cstate -a info -a Cstate_result <names>'.
+
+    The info attribute can be empty, in which case the field is not
+    printed, and it can span several lines:
+        #name:Cstate:info:Cstate_result:
+        vios1:ready for a NIM operation:success:
+        vios2:alt_disk_install operation is being performed:Creating logical volume alt_hd2.:success:
+
+    arguments:
+        stdout   (str): output of the lsnim command
+        names   (list): names of the NIM objects queried
+    return:
+        dictionary of NIM object name and their Cstate, info and Cstate_result
+    """
+    records = {}
+    name = None
+    for line in stdout.splitlines():
+        if not line.strip() or line.startswith('#'):
+            continue
+        key = line.split(':', 1)[0]
+        if key in names:
+            name = key
+            records[name] = line[len(key) + 1:]
+        elif name is not None:
+            # continuation of a multi-line info attribute
+            records[name] += ' ' + line.strip()
+
+    states = {}
+    for name, record in records.items():
+        fields = record.rstrip().rstrip(':').split(':')
+        state = {'Cstate': fields[0].strip(), 'info': '', 'Cstate_result': ''}
+        if len(fields) > 1:
+            state['Cstate_result'] = fields[-1].strip().lower()
+            state['info'] = ':'.join(fields[1:-1]).strip()
+        states[name] = state
+    return states
+
+
+class NimStateWatcher(object):
+    """
+    Watch the state of NIM objects with one shared polling loop.
+
+    The polling interval starts at min_interval and grows by the backoff
+    factor up to max_interval while the info attribute of the watched
+    objects does not change. It is reset to min_interval as soon as one
+    object makes progress. An object whose info attribute does not change
+    for stall_timeout seconds is reported as blocked.
+
+    An lsnim failure is retried on the next poll, an object is reported in
+    error after max_failures consecutive failures to get its state.
+
+    Usage:
+        watcher = NimStateWatcher(module)
+        watcher.watch('vios1')
+        state = watcher.wait('vios1')
+        if state['status'] != 'success':
+            ...
+    """
+
+    def __init__(self, module, min_interval=5, max_interval=60, backoff=1.5, stall_timeout=1800,
+                 max_failures=3):
+        self.module = module
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.stall_timeout = stall_timeout
+        self.max_failures = max_failures
+        self.polls = 0
+        self._cond = threading.Condition()
+        self._watched = {}
+        self._done = {}
+        self._thread = None
+        self._wakeup = threading.Event()
+
+    def watch(self, name):
+        """
+        Start watching a NIM object. Must be called once the NIM operation
+        has been started on the object.
+
+        arguments:
+            name (str): NIM object name
+        """
+        with self._cond:
+            now = time.time()
+            self._done.pop(name, None)
+            self._watched[name] = {'start': now, 'last_progress': now, 'info': None, 'failures': 0}
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll_loop, name='nim_state_watcher')
+                self._thread.daemon = True
+                self._thread.start()
+            else:
+                # new object, poll it at the fast rate
+                self._wakeup.set()
+
+    def wait(self, name, timeout=None):
+        """
+        Wait for the NIM operation on an object to end.
+
+        arguments:
+            name     (str): NIM object name
+            timeout  (int): maximum number of seconds to wait, None to wait
+                            until the operation ends or is blocked
+        return:
+            dictionary with the Cstate, info, Cstate_result, elapsed and
+            status keys, status being one of 'success', 'failure',
+            'blocked' or 'error'; None if timeout expired
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: name in self._done, timeout):
+                return None
+            return self._done.pop(name)
+
+    def wait_any(self, timeout=None):
+        """
+        Wait for the NIM operation of any watched object to end.
+
+        return:
+            tuple (name, state) as returned by wait(); (None, None) if
+            nothing is watched or timeout expired
+        """
+        with self._cond:
+            if not self._watched and not self._done:
+                return (None, None)
+            if not self._cond.wait_for(lambda: self._done, timeout):
+                return (None, None)
+            name = next(iter(self._done))
+            return (name, self._done.pop(name))
+
+    def pending(self):
+        """
+        return: list of NIM objects whose operation is still running
+        """
+        with self._cond:
+            return list(self._watched)
+
+    def _finish(self, name, status, state):
+        entry = self._watched.pop(name)
+        state = dict(state)
+        state['status'] = status
+        state['elapsed'] = int(time.time() - entry['start'])
+        self._done[name] = state
+        self.module.debug(f'NIM state watcher: {name} ended with {status}: {state}')
+
+    def _query(self, names):
+        cmd = ['lsnim', '-Z', '-a', 'Cstate', '-a', 'info', '-a', 'Cstate_result'] + names
+        rc, stdout, stderr = self.module.run_command(cmd)
+        self.polls += 1
+        return rc, stdout, stderr
+
+    def _poll(self, names):
+        """
+        Get the NIM state of the watched objects with one lsnim command. If
+        it fails, query each object on its own so that only the objects in
+        error are reported.
+
+        arguments:
+            names (list): NIM object names
+        return:
+            tuple (states, errors) with the dictionary of NIM states and
+            the dictionary of error message per object name
+        """
+        rc, stdout, stderr = self._query(names)
+        if rc == 0:
+            states = parse_lsnim_state(stdout, names)
+            errors = {}
+        else:
+            if len(names) == 1:
+                return ({}, {names[0]: stderr.strip()})
+            states = {}
+            errors = {}
+            for name in names:
+                rc, stdout, stderr = self._query([name])
+                if rc != 0:
+                    errors[name] = stderr.strip()
+                else:
+                    states.update(parse_lsnim_state(stdout, [name]))
+        for name in names:
+            if name not in states and name not in errors:
+                errors[name] = f'no NIM state returned for {name}'
+        return (states, errors)
+
+    def _poll_loop(self):
+        try:
+            self._run_loop()
+        except Exception as exc:
+            # do not leave the waiters hanging if the polling thread dies
+            with self._cond:
+                for name in list(self._watched):
+                    self._finish(name, 'error', {'Cstate': '', 'Cstate_result': '',
+                                                 'info': f'NIM state watcher failed: {exc}'})
+                self._thread = None
+                self._cond.notify_all()
+
+    def _run_loop(self):
+        interval = self.min_interval
+        while True:
+            self._wakeup.wait(interval)
+            if self._wakeup.is_set():
+                self._wakeup.clear()
+                interval = self.min_interval
+
+            with self._cond:
+                names = list(self._watched)
+                if not names:
+                    self._thread = None
+                    return
+
+            states, errors = self._poll(names)
+
+            progress = False
+            with self._cond:
+                now = time.time()
+                for name in names:
+                    if name not in self._watched:
+                        continue
+                    entry = self._watched[name]
+                    if name in errors:
+                        # transient lsnim failures are retried on the next tick
+                        entry['failures'] += 1
+                        if entry['failures'] >= self.max_failures:
+                            self._finish(name, 'error', {'Cstate': '', 'Cstate_result': '', 'info': errors[name]})
+                        continue
+                    entry['failures'] = 0
+                    state = states[name]
+                    if state['Cstate'] == NIM_READY_STATE:
+                        status = 'success' if state['Cstate_result'] == 'success' else 'failure'
+                        self._finish(name, status, state)
+                        continue
+                    if state['info'] != entry['info']:
+                        entry['info'] = state['info']
+                        entry['last_progress'] = now
+                        progress = True
+                    elif now - entry['last_progress'] >= self.stall_timeout:
+                        self._finish(name, 'blocked', state)
+                self._cond.notify_all()
+
+            if progress:
+                interval = self.min_interval
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
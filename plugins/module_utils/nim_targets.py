@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Expansion of the NIM target patterns shared by the NIM modules.
+#
+# A target pattern can be of the following form:
+#     target*       all the NIM clients whose names start with 'target'
+#     target[n1:n2] where n1 and n2 are numeric: target<n1> to target<n2>
+#     * or ALL      all the NIM clients
+#     <group>       all the NIM clients of a group, e.g. standalone or vios
+#     client_name   the NIM client named 'client_name'
+#
+# The client names are kept in a sorted index: the clients of a prefix
+# pattern or of a range pattern are found by bisection as a slice of the
+# index instead of matching each pattern against every client. The
+# patterns are compiled once. The expanded targets are returned without
+# duplicates in a stable order: in the order of the patterns, the clients
+# matched by one pattern being sorted by name (by number for a range).
+
+import bisect
+import re
+
+RANGE_RE = re.compile(r"(\w+)\[(\d+):(\d+)\]")
+PREFIX_RE = re.compile(r"(\w+)\*$")
+
+_compiled = {}
+
+
+def compile_pattern(pattern, groups=()):
+    """
+    Compile a target pattern.
+
+    arguments:
+        pattern  (str): the target pattern
+        groups  (list): the names of the groups
+    return:
+        tuple (kind, arguments) where kind is 'all', 'group', 'range',
+        'prefix' or 'name'
+    """
+    key = (pattern, tuple(groups))
+    compiled = _compiled.get(key)
+    if compiled is not None:
+        return compiled
+
+    if pattern.upper() == 'ALL' or pattern == '*':
+        compiled = ('all', ())
+    elif pattern.lower() in groups:
+        compiled = ('group', (pattern.lower(),))
+    else:
+        matched = RANGE_RE.match(pattern)
+        if matched:
+            compiled = ('range', (matched.group(1), int(matched.group(2)), int(matched.group(3))))
+        else:
+            matched = PREFIX_RE.match(pattern)
+            if matched:
+                compiled = ('prefix', (matched.group(1),))
+            else:
+                compiled = ('name', (pattern,))
+    _compiled[key] = compiled
+    return compiled
+
+
+class NimTargets(object):
+    """
+    Sorted index of NIM client names to expand target patterns.
+
+    Usage:
+        index = NimTargets(groups={'standalone': ['lpar1', 'lpar2'], 'vios': ['vios1']}, extra=['master'])
+        targets = index.expand(['lpar*', 'vios[1:2]', 'master'])
+    """
+
+    def __init__(self, clients=(), groups=None, extra=()):
+        """
+        arguments:
+            clients  (list): the NIM client names
+            groups   (dict): group name: NIM client names of the group,
+                             the clients of the groups are added to clients
+            extra    (list): names that can be targeted by name only,
+                             e.g. 'master'
+        """
+        self.groups = {}
+        names = set(clients)
+        for group, members in (groups or {}).items():
+            self.groups[group] = sorted(members)
+            names.update(members)
+        self.names = sorted(names)
+        self.members = names
+        self.extra = set(extra)
+
+    def prefixed(self, prefix):
+        """
+        return: the sorted names starting with prefix
+        """
+        start = bisect.bisect_left(self.names, prefix)
+        # the names starting with prefix sort before prefix followed by the
+        # highest character
+        end = bisect.bisect_left(self.names, prefix + '\U0010ffff', start)
+        return self.names[start:end]
+
+    def in_range(self, name, first, last):
+        """
+        return: the names <name><n> with first <= n <= last, sorted by n
+        """
+        numbers = []
+        for client in self.prefixed(name):
+            suffix = client[len(name):]
+            # <name><n> is built from the integer n, without leading zeros
+            if suffix.isdigit() and str(int(suffix)) == suffix and first <= int(suffix) <= last:
+                numbers.append(int(suffix))
+        return [name + str(number) for number in sorted(numbers)]
+
+    def match(self, pattern):
+        """
+        return: the sorted names matching one target pattern
+        """
+        kind, args = compile_pattern(pattern, self.groups)
+        if kind == 'all':
+            return self.names
+        if kind == 'group':
+            return self.groups[args[0]]
+        if kind == 'range':
+            return self.in_range(*args)
+        if kind == 'prefix':
+            return self.prefixed(args[0])
+        if args[0] in self.members or args[0] in self.extra:
+            return [args[0]]
+        return []
+
+    def expand(self, patterns):
+        """
+        Expand a list of target patterns.
+
+        arguments:
+            patterns (list): the target patterns
+        return:
+            the list of the NIM clients matching the patterns, without
+            duplicates, in the order of the patterns
+        """
+        targets = []
+        seen = set()
+        for pattern in patterns:
+            for name in self.match(pattern):
+                if name not in seen:
+                    seen.add(name)
+                    targets.append(name)
+        return targets
+
+
+def expand_targets(patterns, clients=(), groups=None, extra=()):
+    """
+    Expand a list of target patterns against the NIM clients.
+
+    arguments:
+        patterns (list): the target patterns
+        clients  (list): the NIM client names
+        groups   (dict): group name: NIM client names of the group
+        extra    (list): names that can be targeted by name only
+    return:
+        the list of the NIM clients matching the patterns
+    """
+    return NimTargets(clients, groups, extra).expand(patterns)
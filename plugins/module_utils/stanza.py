@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Native reader and writer of the AIX stanza files, e.g. /etc/security/user,
+# /etc/security/limits, /etc/security/login.cfg:
+#     * comment
+#     default:
+#             admin = false
+#             SYSTEM = "compat"
+#
+#     root:
+#             loginretries = 0
+# and of the colon separated files, e.g. /etc/passwd, /etc/group or
+# /etc/inittab, so that the modules read them with a file open instead of
+# running lssec, lsuser, lsgroup or lsitab.
+#
+# The lines of a stanza file are kept as they are: a rewrite only changes
+# the lines of the modified attributes, the comments, blank lines and the
+# order of the stanzas and attributes are preserved. A file is written to a
+# temporary file in the same directory then renamed over the original one,
+# and the rewrite is refused if the file was changed since it was read.
+#
+# The colon separated output of the listing commands run with the -c flag,
+# e.g. lsuser -c ALL, is parsed by parse_colon_listing, and the output of
+# odmget, where the stanza names repeat, by parse_stanza_records.
+#
+# The parsed files are cached by inode, size and modification time. A file
+# modified in the same second it was read is read again, as its modification
+# time may not change on the next update.
+
+import os
+import re
+import stat
+import tempfile
+import time
+
+COMMENT_CHARS = ('*', '#')
+COLON_COMMENT_CHARS = ('#', ':')
+# a file modified less than RACY_DELAY seconds before it was read is not cached
+RACY_DELAY = 1
+
+_cache = {}
+
+
+class StanzaError(Exception):
+    """
+    Raised when a stanza file cannot be rewritten.
+    """
+    pass
+
+
+def file_key(path):
+    """
+    return: the key identifying the content of a file, (inode, size, mtime)
+    """
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def decode_value(raw):
+    """
+    return: the value of an attribute, without the enclosing double quotes
+    """
+    value = raw.strip()
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1]
+    return value
+
+
+def encode_value(value):
+    """
+    return: the value of an attribute as written in a stanza file, enclosed
+    in double quotes if it is empty or contains blanks
+    """
+    value = str(value)
+    if value == '' or value != value.strip() or ' ' in value or '\t' in value:
+        value = f'"{value}"'
+    return value
+
+
+class Stanza(object):
+    """
+    A stanza of a stanza file.
+
+    attributes:
+        name    (str): the stanza name
+        start   (int): index of the line of the stanza name
+        end     (int): index of the last line of the stanza
+        attrs  (dict): attribute: (value, first line index, last line index)
+    """
+
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.end = start
+        self.attrs = {}
+
+    def values(self):
+        """
+        return: dict of the attribute values, in the order of the file
+        """
+        return {attr: entry[0] for attr, entry in self.attrs.items()}
+
+
+class StanzaFile(object):
+    """
+    Parsed stanza file.
+
+    Usage:
+        sfile = StanzaFile.from_file('/etc/security/user')
+        sfile.get('root', default='default')
+        sfile.set('root', {'loginretries': 3, 'rlogin': None})
+        sfile.write()
+    """
+
+    def __init__(self, text='', path=None, key=None):
+        """
+        arguments:
+            text  (str): content of the stanza file
+            path  (str): path of the file
+            key (tuple): file_key of the file when it was read
+        """
+        self.path = path
+        self.key = key
+        self.lines = text.splitlines(True)
+        self.parse()
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Read and parse a stanza file.
+        """
+        key = file_key(path)
+        with open(path, 'r') as fobj:
+            text = fobj.read()
+        return cls(text, path, key)
+
+    def parse(self):
+        """
+        Build the index of the stanzas and attributes from the lines.
+        The first occurrence of a stanza or an attribute is used, as lssec.
+        """
+        self.stanzas = {}
+        current = None
+        index = 0
+        while index < len(self.lines):
+            line = self.lines[index]
+            stripped = line.strip()
+            if not stripped or stripped[0] in COMMENT_CHARS:
+                index += 1
+                continue
+            if not line[0].isspace() and stripped.endswith(':'):
+                name = stripped[:-1].strip()
+                current = Stanza(name, index)
+                # the attributes of a duplicate stanza are ignored
+                if name not in self.stanzas:
+                    self.stanzas[name] = current
+            elif current is not None and '=' in stripped:
+                start = index
+                # a value can be continued on the next line with a backslash
+                while stripped.endswith('\\') and index + 1 < len(self.lines):
+                    index += 1
+                    stripped = stripped[:-1] + self.lines[index].strip()
+                attr, raw = stripped.split('=', 1)
+                attr = attr.strip()
+                if attr not in current.attrs:
+                    current.attrs[attr] = (decode_value(raw), start, index)
+                current.end = index
+            index += 1
+
+    def names(self):
+        """
+        return: the list of the stanza names, in the order of the file
+        """
+        return list(self.stanzas)
+
+    def get(self, name, default=None):
+        """
+        Get the attributes of a stanza.
+
+        arguments:
+            name     (str): the stanza name
+            default  (str): name of the stanza providing the value of the
+                            attributes not set in the stanza, e.g. 'default'
+        return:
+            dict of the attribute values, None if the stanza does not exist
+        """
+        if name not in self.stanzas:
+            return None
+        values = {}
+        if default and default in self.stanzas:
+            values.update(self.stanzas[default].values())
+        values.update(self.stanzas[name].values())
+        return values
+
+    def query(self, names=None, attrs=None, default=None):
+        """
+        Get the attributes of several stanzas.
+
+        arguments:
+            names   (list): the stanza names, all the stanzas if None
+            attrs   (list): the attributes to return, all if None; the
+                            attributes not set have an empty value
+            default  (str): name of the stanza providing the value of the
+                            attributes not set in the stanzas
+        return:
+            dict {stanza name: {attribute: value}} of the existing stanzas
+        """
+        result = {}
+        for name in (self.names() if names is None else names):
+            values = self.get(name, default)
+            if values is None:
+                continue
+            if attrs is not None:
+                values = {attr: values.get(attr, '') for attr in attrs}
+            result[name] = values
+        return result
+
+    def set(self, name, attrs):
+        """
+        Set the attributes of a stanza, the stanza is added at the end of
+        the file if it does not exist.
+
+        arguments:
+            name   (str): the stanza name
+            attrs (dict): attribute: value, None removes the attribute
+        return:
+            True if the content changed
+        """
+        changed = False
+        if name not in self.stanzas:
+            if self.lines and not self.lines[-1].endswith('\n'):
+                self.lines[-1] += '\n'
+            if self.lines and self.lines[-1].strip():
+                self.lines.append('\n')
+            self.lines.append(f'{name}:\n')
+            self.parse()
+            changed = True
+
+        for attr, value in attrs.items():
+            stanza = self.stanzas[name]
+            entry = stanza.attrs.get(attr)
+            if value is None:
+                if entry is None:
+                    continue
+                del self.lines[entry[1]:entry[2] + 1]
+            elif entry is None:
+                self.lines.insert(stanza.end + 1, f'\t{attr} = {encode_value(value)}\n')
+            elif entry[0] == str(value):
+                continue
+            else:
+                line = self.lines[entry[1]]
+                indent = line[:len(line) - len(line.lstrip())]
+                self.lines[entry[1]:entry[2] + 1] = [f'{indent}{attr} = {encode_value(value)}\n']
+            self.parse()
+            changed = True
+        return changed
+
+    def remove(self, name):
+        """
+        Remove a stanza and the blank line following it.
+
+        return:
+            True if the stanza existed
+        """
+        stanza = self.stanzas.get(name)
+        if stanza is None:
+            return False
+        end = stanza.end + 1
+        if end < len(self.lines) and not self.lines[end].strip():
+            end += 1
+        del self.lines[stanza.start:end]
+        self.parse()
+        return True
+
+    def text(self):
+        """
+        return: the content of the file
+        """
+        return ''.join(self.lines)
+
+    def write(self, path=None):
+        """
+        Atomically replace the file with the content, keeping its mode and
+        owner.
+
+        arguments:
+            path (str): the file to write, the file read by default
+        note:
+            Raises StanzaError if the file read was changed in the meantime
+        """
+        path = path or self.path
+        exists = os.path.exists(path)
+        if path == self.path and self.key is not None and exists and file_key(path) != self.key:
+            raise StanzaError(f'{path} was modified since it was read')
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_file = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.')
+        try:
+            with os.fdopen(fd, 'w') as fobj:
+                fobj.write(self.text())
+                fobj.flush()
+                os.fsync(fobj.fileno())
+            if exists:
+                st = os.stat(path)
+                os.chmod(tmp_file, stat.S_IMODE(st.st_mode))
+                try:
+                    os.chown(tmp_file, st.st_uid, st.st_gid)
+                except OSError:
+                    # not privileged, the file is owned by the caller
+                    pass
+            os.replace(tmp_file, path)
+        except Exception:
+            if os.path.exists(tmp_file):
+                os.unlink(tmp_file)
+            raise
+        self.path = path
+        self.key = file_key(path)
+        _cache.pop(path, None)
+
+
+def parse_stanza_records(text):
+    """
+    Parse stanzas whose names can repeat, e.g. the output of odmget where
+    each object is a stanza named after its object class:
+        CuAt:
+                name = "hdisk0"
+                attribute = "queue_depth"
+                value = "20"
+
+    arguments:
+        text (str): the stanzas
+    return:
+        list of (stanza name, {attribute: value}) in the order of the text
+    """
+    records = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped[0] in COMMENT_CHARS:
+            continue
+        if not line[0].isspace() and stripped.endswith(':'):
+            records.append((stripped[:-1].strip(), {}))
+        elif records and '=' in stripped:
+            attr, raw = stripped.split('=', 1)
+            records[-1][1][attr.strip()] = decode_value(raw)
+    return records
+
+
+def parse_colon_file(text, comments=COLON_COMMENT_CHARS):
+    """
+    Parse a colon separated file, e.g. /etc/passwd or /etc/inittab.
+
+    arguments:
+        text      (str): content of the file
+        comments (list): first characters of the comment lines
+    return:
+        dict {first field: list of the fields} in the order of the file,
+        the first line of a name is used
+    """
+    records = {}
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip()[0] in comments:
+            continue
+        fields = line.split(':')
+        if fields[0] not in records:
+            records[fields[0]] = fields
+    return records
+
+
+def parse_colon_listing(stdout):
+    """
+    Parse the output of the AIX listing commands run with the -c flag, e.g.
+    lsuser -c ALL or lsgroup -c ALL: a header line starting with '#' with
+    the attribute names followed by a line of values for each entry. The
+    header is repeated when the entries have different attributes. The
+    colons in the values are escaped with a backslash.
+
+    arguments:
+        stdout (str): output of the command
+    return:
+        dict {entry name: {attribute: value}} in the order of the output
+    """
+    entries = {}
+    names = []
+    for line in stdout.splitlines():
+        if not line.strip():
+            continue
+        if line.startswith('#'):
+            names = line[1:].split(':')
+            continue
+        if not names:
+            continue
+        values = [value.replace('\\:', ':') for value in re.split(r'(?<!\\):', line)]
+        entries[values[0]] = dict(zip(names[1:], values[1:]))
+    return entries
+
+
+def _cached(path, kind, loader):
+    """
+    Return the cached result of loader(path) if the file did not change
+    since it was loaded.
+    """
+    key = file_key(path)
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == (kind, key):
+        return entry[2]
+    read_time = time.time()
+    value = loader(path)
+    if read_time - key[2] / 1e9 > RACY_DELAY:
+        _cache[path] = ((kind, key), read_time, value)
+    else:
+        _cache.pop(path, None)
+    return value
+
+
+def read_stanza_file(path):
+    """
+    Read a stanza file, from the cache if it did not change.
+    The StanzaFile returned is shared, use StanzaFile.from_file to modify
+    a file.
+
+    note:
+        Raises OSError if the file cannot be read
+    """
+    return _cached(path, 'stanza', StanzaFile.from_file)
+
+
+def _load_colon_file(path):
+    with open(path, 'r') as fobj:
+        return parse_colon_file(fobj.read())
+
+
+def read_colon_file(path):
+    """
+    Read a colon separated file, from the cache if it did not change.
+
+    return:
+        dict {first field: list of the fields}, the lists are shared and
+        must not be modified
+    note:
+        Raises OSError if the file cannot be read
+    """
+    return _cached(path, 'colon', _load_colon_file)
+
+
+def get_stanza(path, name, default=None):
+    """
+    Get the attributes of a stanza of a stanza file.
+
+    arguments:
+        path     (str): the stanza file
+        name     (str): the stanza name
+        default  (str): name of the stanza providing the value of the
+                        attributes not set in the stanza
+    return:
+        dict of the attribute values, None if the stanza does not exist
+    note:
+        Raises OSError if the file cannot be read
+    """
+    return read_stanza_file(path).get(name, default)
+
+
+def get_stanzas(path, names=None, attrs=None, default=None):
+    """
+    Get the attributes of several stanzas of a stanza file, see
+    StanzaFile.query.
+
+    note:
+        Raises OSError if the file cannot be read
+    """
+    return read_stanza_file(path).query(names, attrs, default)
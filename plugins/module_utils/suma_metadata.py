@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Persistent cache of the SUMA metadata.
+#
+# Finding the SP build of an oslevel requires a 'suma -x -a Action=Metadata'
+# request that downloads one XML file per level into installp/ppc/, each
+# file naming its SP build in a '<SP name="xxxx-xx-xx-xxxx">' line. The
+# files are downloaded in a temporary directory under metadata_dir, parsed
+# once, and only the result is kept in <metadata_dir>/metadata_index.json:
+#     {
+#         "<FilterML>": {
+#             "timestamp": <time of the download>,
+#             "levels": {"7200-05-01": "7200-05-01-2038", ...}
+#         }
+#     }
+# An entry is downloaded again when it is older than the TTL, or when a
+# requested level is not found in it (the SP may have been published since
+# the last download). The lookups of SP versions are done in an in memory
+# index of the cached metadata: TL -> sorted SP versions.
+
+import bisect
+import glob
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+INDEX_FILE = 'metadata_index.json'
+
+
+class SumaMetadataError(Exception):
+    """
+    Failure of a SUMA metadata request.
+    """
+
+    def __init__(self, msg, cmd=None, rc=None, stdout='', stderr=''):
+        super(SumaMetadataError, self).__init__(msg)
+        self.msg = msg
+        self.cmd = cmd
+        self.rc = rc
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+def parse_sp_version(file):
+    """
+    Parse a SUMA metadata file to find its SP version.
+
+    arguments:
+        file (str): path of the file to parse
+    return:
+        the SP version xxxx-xx-xx-xxxx or None
+    """
+    with open(file, mode="r", encoding="utf-8") as myfile:
+        for line in myfile:
+            match_item = re.match(r"^<SP name=\"([0-9]{4}-[0-9]{2}-[0-9]{2}-[0-9]{4})\">$", line.rstrip())
+            if match_item:
+                return match_item.group(1)
+    return None
+
+
+class SumaMetadata(object):
+    """
+    SUMA metadata cache keyed by FilterML.
+
+    Usage:
+        metadata = SumaMetadata(module, '/var/adm/ansible/metadata', 'preview request')
+        build = metadata.sp_build('7200-05', '7200-05-01')
+        latest = metadata.latest_sp('7200-05', tl='7200-05')
+    """
+
+    def __init__(self, module, metadata_dir, description, ttl=86400):
+        self.module = module
+        self.metadata_dir = metadata_dir
+        self.description = description
+        self.ttl = ttl
+        self.index_file = os.path.join(metadata_dir, INDEX_FILE)
+        self.downloaded = set()
+        self.index = self._load()
+        self._tl_index = None
+
+    def _load(self):
+        if self.ttl <= 0 or not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as exc:
+            self.module.log(f'[WARNING] Ignoring SUMA metadata cache {self.index_file}: {exc}')
+            return {}
+        if not isinstance(index, dict):
+            return {}
+        return index
+
+    def _save(self):
+        if self.ttl <= 0:
+            return
+        try:
+            fd, tmp_file = tempfile.mkstemp(dir=self.metadata_dir, prefix='.metadata_')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+            os.replace(tmp_file, self.index_file)
+        except OSError as exc:
+            self.module.log(f'[WARNING] Failed to save SUMA metadata cache {self.index_file}: {exc}')
+
+    def _download(self, filter_ml):
+        """
+        Run the SUMA metadata request for a FilterML and parse the files.
+
+        return:
+            dictionary of metadata file level and its SP version
+        """
+        if not os.path.exists(self.metadata_dir):
+            os.makedirs(self.metadata_dir)
+        dl_target = tempfile.mkdtemp(dir=self.metadata_dir, prefix=f'{filter_ml}.')
+        try:
+            cmd = ['/usr/sbin/suma', '-x', '-a', 'Action=Metadata', '-a', 'RqType=Latest']
+            cmd += ['-a', f'DLTarget={dl_target}']
+            cmd += ['-a', f'FilterML={filter_ml}']
+            cmd += ['-a', f'DisplayName="{self.description}"']
+            cmd += ['-a', f'FilterDir={dl_target}']
+
+            rc, stdout, stderr = self.module.run_command(cmd)
+            if rc != 0:
+                msg_cmd = ' '.join(cmd)
+                raise SumaMetadataError(f"Suma metadata command '{msg_cmd}' failed with return code {rc}",
+                                        msg_cmd, rc, stdout, stderr)
+            self.module.debug(f"SUMA command '{' '.join(cmd)}' rc:{rc}, stdout:{stdout}")
+
+            levels = {}
+            for cur_file in glob.glob(os.path.join(dl_target, 'installp', 'ppc', '*.xml')):
+                version = parse_sp_version(cur_file)
+                if version:
+                    levels[os.path.basename(cur_file)[:-len('.xml')]] = version
+        finally:
+            shutil.rmtree(dl_target, ignore_errors=True)
+
+        self.downloaded.add(filter_ml)
+        self.index[filter_ml] = {'timestamp': int(time.time()), 'levels': levels}
+        self._tl_index = None
+        self._save()
+        return levels
+
+    def levels(self, filter_ml, refresh=False):
+        """
+        Get the SP versions of the metadata files of a FilterML, from the
+        cache if the entry is not expired.
+
+        arguments:
+            filter_ml (str): the FilterML of the metadata request
+            refresh  (bool): to download the metadata even if cached
+        return:
+            dictionary of metadata file level and its SP version
+        raise:
+            SumaMetadataError if the SUMA request fails
+        """
+        entry = self.index.get(filter_ml)
+        if not refresh and entry and time.time() - entry.get('timestamp', 0) < self.ttl:
+            self.module.debug(f'SUMA metadata for {filter_ml} found in cache {self.index_file}')
+            return entry['levels']
+        return self._download(filter_ml)
+
+    @property
+    def tl_index(self):
+        """
+        In memory index of the cached metadata: TL -> sorted SP versions.
+        """
+        if self._tl_index is None:
+            tl_index = {}
+            for entry in self.index.values():
+                for version in entry['levels'].values():
+                    tl_index.setdefault(version[:7], set()).add(version)
+            self._tl_index = {tl: sorted(versions) for tl, versions in tl_index.items()}
+        return self._tl_index
+
+    def _lookup(self, filter_ml, func):
+        self.levels(filter_ml)
+        result = func()
+        if result is None and filter_ml not in self.downloaded:
+            # not found in cached metadata, the level may have been published since
+            self.levels(filter_ml, refresh=True)
+            result = func()
+        return result
+
+    def sp_build(self, filter_ml, sp):
+        """
+        Get the SP version (xxxx-xx-xx-xxxx) of a short SP level (xxxx-xx-xx).
+
+        return:
+            the SP version or None
+        raise:
+            SumaMetadataError if the SUMA request fails
+        """
+        def build():
+            versions = self.tl_index.get(sp[:7], [])
+            i = bisect.bisect_left(versions, sp + '-')
+            if i < len(versions) and versions[i].startswith(sp + '-'):
+                return versions[i]
+            return None
+        return self._lookup(filter_ml, build)
+
+    def latest_sp(self, filter_ml, tl=None):
+        """
+        Get the latest SP version of TL tl, or of the metadata of a FilterML
+        if tl is not specified.
+
+        return:
+            the SP version or None
+        raise:
+            SumaMetadataError if the SUMA request fails
+        """
+        def latest():
+            if tl is not None:
+                versions = self.tl_index.get(tl)
+                return versions[-1] if versions else None
+            versions = self.index[filter_ml]['levels'].values()
+            return max(versions) if versions else None
+        return self._lookup(filter_ml, latest)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Bounded pool of worker threads shared by the modules.
+#
+# A fixed number of threads take the items put in a queue and call the
+# same function on each of them, so that at most max_workers commands
+# (chdev, crfs, c_rsh, ...) or compressions run at the same time. The
+# pool is either fed while it runs and closed at the end (WorkerPool), or
+# given all its items at once (run_parallel).
+
+import queue
+import threading
+
+_STOP = object()
+
+
+class WorkerPool(object):
+    """
+    Pool of threads calling func on the items put in its queue, in the
+    order they are put.
+
+    An exception raised by func does not stop its thread, the first one
+    is raised again by close().
+
+    Usage:
+        pool = WorkerPool(func, 4)
+        for item in items:
+            pool.put(item)
+        pool.close()
+    """
+
+    def __init__(self, func, max_workers, name='Worker', daemon=False):
+        """
+        arguments:
+            func      (func): function called with each item
+            max_workers(int): number of threads, at least one is started
+            name       (str): prefix of the thread names
+            daemon    (bool): a daemon thread does not prevent the module
+                              to exit, to be used when close() does not wait
+        """
+        self.func = func
+        self.error = None
+        self._todo = queue.Queue()
+        self._lock = threading.Lock()
+        self.threads = []
+        for i in range(max(max_workers, 1)):
+            thd = threading.Thread(target=self._worker, name=f'{name}({i})')
+            thd.daemon = daemon
+            thd.start()
+            self.threads.append(thd)
+
+    def _worker(self):
+        while True:
+            item = self._todo.get()
+            if item is _STOP:
+                return
+            try:
+                self.func(item)
+            except Exception as exc:
+                with self._lock:
+                    if self.error is None:
+                        self.error = exc
+
+    def put(self, item):
+        """
+        Queue an item, it is processed as soon as a thread is free.
+        """
+        self._todo.put(item)
+
+    def close(self, wait=True):
+        """
+        Stop the threads once the queued items are processed.
+
+        arguments:
+            wait (bool): wait for the threads to end and raise the first
+                         exception raised by func
+        """
+        for thd in self.threads:
+            self._todo.put(_STOP)
+        if not wait:
+            return
+        for thd in self.threads:
+            thd.join()
+        if self.error is not None:
+            raise self.error
+
+
+def run_parallel(func, items, max_workers, name='Worker'):
+    """
+    Call func on each item with at most max_workers threads and wait for
+    the end of all the calls.
+
+    arguments:
+        func      (func): function called with each item
+        items     (list): the items
+        max_workers(int): maximum number of threads
+        name       (str): prefix of the thread names
+    raise:
+        the first exception raised by func, once all the items are processed
+    """
+    items = list(items)
+    if not items:
+        return
+    pool = WorkerPool(func, min(max(max_workers, 1), len(items)), name)
+    for item in items:
+        pool.put(item)
+    pool.close()
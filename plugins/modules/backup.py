@@ -5,8 +5,14 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 from __future__ import absolute_import, division, print_function
+import os
 import re
+import shutil
+import tempfile
+import threading
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.backup_stream import (
+    compress_stream, decompress_stream, index_path, read_index, write_index)
 __metaclass__ = type
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
@@ -205,6 +211,26 @@ options:
     - Can be used if I(action=create) or I(action=restore).
     type: bool
     default: no
+  compress:
+    description:
+    - Specifies to compress the backup image while it is created.
+    - The backup command writes to a named pipe and its output is compressed by blocks in parallel
+      into I(location), so the uncompressed image is never written to disk.
+    - The image can be decompressed with C(gunzip). A sidecar index I(location).idx records the
+      offset of each block, so the image can be decompressed in parallel, and caches the output of
+      C(lsmksysb) and C(restvg) when I(action=view).
+    - When I(action=restore) or I(action=view), compressed images are detected from their index and
+      decompressed to the restore or view command through a named pipe, this option is not needed.
+      No decompressed copy of the image is written to disk.
+    - I(location) must be a file.
+    - Can be used if I(action=create).
+    type: bool
+    default: no
+  compress_threads:
+    description:
+    - Specifies the number of threads compressing or decompressing the backup image.
+    type: int
+    default: 4
 notes:
   - C(restore) C(mksysb) operation can be long, one can use the default log file
     /var/adm/ras/alt_disk_inst.log to track progress.
@@ -263,6 +289,14 @@ EXAMPLES = r'''
     exclude_files: true
     create_data_file: true
 
+- name: backup the rootvg with mksysb to a compressed image
+  backup:
+    action: create
+    type: mksysb
+    location: /backup/rootvg.mksysb.gz
+    compress: true
+    compress_threads: 8
+
 - name: view the vg backup image stored on /dev/hdisk1 with savevg
   backup:
     action: view
@@ -330,6 +364,30 @@ rc:
     returned: always
     type: int
     sample: 0
+compression:
+    description: Information on the compressed backup image.
+    returned: if I(action=create) and I(compress=true)
+    type: dict
+    contains:
+        size:
+            description: Size in bytes of the uncompressed backup.
+            type: int
+        compressed_size:
+            description: Size in bytes of the compressed image.
+            type: int
+        ratio:
+            description: Compression ratio.
+            type: float
+        throughput:
+            description: Throughput of the backup in MB/s of uncompressed data.
+            type: float
+    sample:
+        "compression": {
+            "size": 5368709120,
+            "compressed_size": 2147483648,
+            "ratio": 2.5,
+            "throughput": 310.4
+        }
 '''
 
 results = None
@@ -369,6 +427,198 @@ def check_vg(module, vg):
     return False
 
 
+def stream_backup(module, cmd, params):
+    """
+    Run a backup command writing to a named pipe and compress its output
+    into the location with a sidecar index.
+
+    arguments:
+        module  (dict): The Ansible module
+        cmd     (list): the backup command, writing to params['location']
+        params  (dict): the command parameters
+    return:
+        rc       (int): the return code of the command
+        stdout   (str): the standard output of the command
+        stderr   (str): the standard error of the command
+    """
+
+    location = params['location']
+    # the previous image is replaced only when the backup succeeds
+    fd, image = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(location)), prefix='.backup_')
+    os.close(fd)
+
+    tmpdir = tempfile.mkdtemp(prefix='backup_')
+    fifo = os.path.join(tmpdir, 'archive')
+    os.mkfifo(fifo)
+    cmd = [fifo if arg == location else arg for arg in cmd]
+    state = {}
+
+    def compressor():
+        try:
+            with open(fifo, 'rb') as src:
+                state['opened'] = True
+                state['index'] = compress_stream(src, image, max_workers=params['compress_threads'])
+        except Exception as exc:
+            state['error'] = exc
+
+    thd = threading.Thread(target=compressor)
+    thd.start()
+    try:
+        module.log(f'running command: { cmd }')
+        rc, stdout, stderr = module.run_command(cmd)
+    finally:
+        while thd.is_alive():
+            if not state.get('opened'):
+                # the command did not open the pipe, unblock the compressor
+                try:
+                    os.close(os.open(fifo, os.O_WRONLY | os.O_NONBLOCK))
+                except OSError:
+                    pass
+            thd.join(1)
+        shutil.rmtree(tmpdir)
+
+    if rc == 0 and 'error' in state:
+        rc = 1
+        stderr += f'\nCannot compress the backup to { location }: { state["error"] }'
+    if rc != 0:
+        os.remove(image)
+        return rc, stdout, stderr
+
+    if os.path.exists(index_path(location)):
+        os.remove(index_path(location))
+    os.replace(image, location)
+    index = state['index']
+    write_index(location, index)
+    results['compression'] = {
+        'size': index['size'],
+        'compressed_size': index['compressed_size'],
+        'ratio': round(index['size'] / index['compressed_size'], 2) if index['compressed_size'] else None,
+        'throughput': index['throughput'],
+    }
+    return rc, stdout, stderr
+
+
+def run_backup_cmd(module, cmd, params):
+    """
+    Run the mksysb or savevg command, through the compressor if requested.
+
+    arguments:
+        module  (dict): The Ansible module
+        cmd     (list): the backup command
+        params  (dict): the command parameters
+    return:
+        rc       (int): the return code of the command
+    """
+
+    if params['compress']:
+        rc, stdout, stderr = stream_backup(module, cmd, params)
+    else:
+        module.log(f'running command: { cmd }')
+        rc, stdout, stderr = module.run_command(cmd)
+        # the index of a previous compressed image is stale
+        if rc == 0 and params['location'] and os.path.isfile(index_path(params['location'])):
+            os.remove(index_path(params['location']))
+    results['cmd'] = ' '.join(cmd)
+    results['stdout'] = stdout
+    results['stderr'] = stderr
+    results['rc'] = rc
+    if rc == 0:
+        results['changed'] = True
+    return rc
+
+
+def run_on_stream(module, cmd, params, index):
+    """
+    Run a command reading a compressed image from a named pipe, the image
+    is decompressed to the pipe while the command reads it.
+
+    arguments:
+        module  (dict): The Ansible module
+        cmd     (list): the command, reading params['location']
+        params  (dict): the command parameters
+        index   (dict): the index of the compressed image
+    return:
+        rc       (int): the return code of the command
+        stdout   (str): the standard output of the command
+        stderr   (str): the standard error of the command
+    """
+
+    location = params['location'].strip()
+    tmpdir = tempfile.mkdtemp(prefix='backup_')
+    fifo = os.path.join(tmpdir, 'archive')
+    os.mkfifo(fifo)
+    cmd = [fifo if arg == location else arg for arg in cmd]
+    state = {}
+
+    def decompressor():
+        try:
+            with open(fifo, 'wb') as dest:
+                state['opened'] = True
+                decompress_stream(location, dest, index, max_workers=params['compress_threads'])
+        except BrokenPipeError:
+            # the command does not read the whole image, e.g. only its header
+            module.debug(f'{ cmd[0] } stopped reading { location }')
+        except Exception as exc:
+            state['error'] = exc
+
+    thd = threading.Thread(target=decompressor)
+    thd.start()
+    try:
+        module.log(f'running command: { cmd }')
+        rc, stdout, stderr = module.run_command(cmd)
+    finally:
+        while thd.is_alive():
+            if not state.get('opened'):
+                # the command did not open the pipe, unblock the decompressor
+                try:
+                    os.close(os.open(fifo, os.O_RDONLY | os.O_NONBLOCK))
+                except OSError:
+                    pass
+            thd.join(1)
+        shutil.rmtree(tmpdir)
+
+    if 'error' in state:
+        results['msg'] = f'Cannot decompress { location }: { state["error"] }'
+        if rc == 0:
+            rc = 1
+    return rc, stdout, stderr
+
+
+def run_on_image(module, cmd, params, index, cache=False):
+    """
+    Run a command on a compressed image: the image is decompressed to a
+    named pipe that replaces the location in the command.
+
+    arguments:
+        module  (dict): The Ansible module
+        cmd     (list): the command, reading params['location']
+        params  (dict): the command parameters
+        index   (dict): the index of the compressed image
+        cache   (bool): to get the output from the index or save it there
+    return:
+        rc       (int): the return code of the command
+    """
+
+    location = params['location'].strip()
+    key = ' '.join(cmd)
+    results['cmd'] = key
+    if cache and key in index['view']:
+        module.log(f'Output of \'{ key }\' found in { index_path(location) }.')
+        results['stdout'] = index['view'][key]
+        results['stderr'] = ''
+        results['rc'] = 0
+        return 0
+
+    rc, stdout, stderr = run_on_stream(module, cmd, params, index)
+    results['stdout'] = stdout
+    results['stderr'] = stderr
+    results['rc'] = rc
+    if rc == 0 and cache:
+        index['view'][key] = stdout
+        write_index(location, index)
+    return rc
+
+
 def mksysb(module, params):
     """
     Perform a mksysb of the OS.
@@ -452,15 +702,7 @@ def mksysb(module, params):
             cmd += [f]
     cmd += [params['location']]
 
-    module.log(f'running command: { cmd }')
-    rc, stdout, stderr = module.run_command(cmd)
-    results['cmd'] = ' '.join(cmd)
-    results['stdout'] = stdout
-    results['stderr'] = stderr
-    results['rc'] = rc
-    if rc == 0:
-        results['changed'] = True
-    return rc
+    return run_backup_cmd(module, cmd, params)
 
 
 def alt_disk_mksysb(module, params):
@@ -538,6 +780,13 @@ def alt_disk_mksysb(module, params):
         for f in params['flags'].split(' '):
             cmd += [f]
 
+    index = read_index(params['location'])
+    if index:
+        rc = run_on_image(module, cmd, params, index)
+        if rc == 0:
+            results['changed'] = True
+        return rc
+
     module.log(f'running command: { cmd }')
     rc, stdout, stderr = module.run_command(cmd)
     results['cmd'] = ' '.join(cmd)
@@ -570,6 +819,10 @@ def lsmksysb(module, params):
     if params['location'].strip():
         cmd += ['-f', params['location']]
 
+        index = read_index(params['location'].strip())
+        if index:
+            return run_on_image(module, cmd, params, index, cache=True)
+
     module.log(f'running command: { cmd }')
     rc, stdout, stderr = module.run_command(cmd)
     results['cmd'] = ' '.join(cmd)
@@ -660,15 +913,7 @@ def savevg(module, params, vg):
             cmd += [f]
     cmd += [vg]
 
-    module.log(f'running command: { cmd }')
-    rc, stdout, stderr = module.run_command(cmd)
-    results['cmd'] = ' '.join(cmd)
-    results['stdout'] = stdout
-    results['stderr'] = stderr
-    results['rc'] = rc
-    if rc == 0:
-        results['changed'] = True
-    return rc
+    return run_backup_cmd(module, cmd, params)
 
 
 def restvg(module, params, action, disk):
@@ -716,6 +961,13 @@ def restvg(module, params, action, disk):
     if disk:
         cmd += [disk]
 
+    index = read_index(params['location']) if params['location'] else None
+    if index:
+        rc = run_on_image(module, cmd, params, index)
+        if rc == 0:
+            results['changed'] = True
+        return rc
+
     module.log(f'running command: { cmd }')
     rc, stdout, stderr = module.run_command(cmd)
     results['cmd'] = ' '.join(cmd)
@@ -750,6 +1002,10 @@ def restvg_view(module, params):
     #                   Used when action is 'view'.
     cmd = ['/bin/restvg', '-f', location, '-l']
 
+    index = read_index(location)
+    if index:
+        return run_on_image(module, cmd, params, index, cache=True)
+
     module.log(f'running command: { cmd }')
     rc, stdout, stderr = module.run_command(cmd)
     results['cmd'] = ' '.join(cmd)
@@ -796,6 +1052,9 @@ def main():
             create_data_file=dict(type='str', choices=['yes', 'mapfile', 'no'], default='no'),
             force=dict(type='bool', default=False),
             minimize_lv_size=dict(type='bool', default=False),
+            # for compressed images
+            compress=dict(type='bool', default=False),
+            compress_threads=dict(type='int', default=4),
         ),
         required_if=[
             ['action', 'view', ['location']],
@@ -816,6 +1075,7 @@ def main():
     params['objtype'] = module.params['type']
     params['flags'] = module.params['flags']
     params['location'] = module.params['location']
+    params['compress_threads'] = max(module.params['compress_threads'], 1)
 
     if action == 'create':
         params['verbose'] = module.params['verbose']
@@ -824,6 +1084,11 @@ def main():
         params['exclude_files'] = module.params['exclude_files']
         params['extend_fs'] = module.params['extend_fs']
         params['force'] = module.params['force']
+        params['compress'] = module.params['compress']
+
+        if params['compress'] and (not params['location'] or params['location'].startswith('/dev/')):
+            results['msg'] = 'location must be a file when compress is set.'
+            module.fail_json(**results)
 
         if params['objtype'] == 'mksysb':
             params['exclude_packing_files'] = module.params['exclude_packing_files']
@@ -13,6 +13,7 @@
 
 from __future__ import absolute_import, division, print_function
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.stanza import decode_value, get_stanza, parse_colon_listing
 __metaclass__ = type
 
 DOCUMENTATION = r'''
@@ -136,7 +137,9 @@ attrs:
   returned: always
   contains:
     cmd:
-      description: Command that is run to update attr
+      description:
+        - Command that is run to update attr.
+        - All the attributes that require change are updated by the same command.
       returned: Only if attr requires change
       type: str
     stdout:
@@ -154,9 +157,10 @@ attrs:
 '''
 
 
-def set_attr_value(module, filename, stanza, attr, target_value):
+def set_attr_values(module, filename, stanza, target_values):
     # -> dict:
-    """ Sets the selected file->stanza->attr=target_value.
+    """ Sets the selected file->stanza->attr=target_value for all the
+    attributes of target_values with a single chsec command.
     If command fails, exits using module.fail_json.
     Returns a dict of:
         cmd: string of command run
@@ -165,22 +169,19 @@ def set_attr_value(module, filename, stanza, attr, target_value):
         stderr: stderr
     """
     chsec_command = module.get_bin_path('chsec', required=True)
-    if str(target_value) in ["True", "False"]:
-        if str(target_value) == "True":
-            target_value = "true"
-        else:
-            target_value = "false"
-    cmd = [
-        chsec_command,
-        '-f', filename,
-        '-s', stanza,
-        '-a', '='.join(map(str, [attr, target_value]))
-    ]
+    cmd = [chsec_command, '-f', filename, '-s', stanza]
+    for attr, target_value in target_values.items():
+        if str(target_value) in ["True", "False"]:
+            if str(target_value) == "True":
+                target_value = "true"
+            else:
+                target_value = "false"
+        cmd += ['-a', '='.join(map(str, [attr, target_value]))]
     rc, stdout, stderr = module.run_command(cmd)
     if rc != 0:
         msg = 'Failed to run chsec command: ' + ' '.join(cmd)
         if "3004-692" in stderr:
-            msg += f"Invalid value provided - {target_value}"
+            msg += " Invalid value provided"
         module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
     return_dict = {
         'cmd': ' '.join(cmd),
@@ -191,19 +192,32 @@ def set_attr_value(module, filename, stanza, attr, target_value):
     return return_dict
 
 
-def get_current_attr_value(module, filename, stanza, attr):
-    """ Given single filename+stanza+attr, returns str(attr_value) """
+def get_current_attr_values(module, filename, stanza, attrs):
+    """ Given filename+stanza and a list of attrs, returns a dict of
+    attr: str(attr_value) read from the stanza file, or with a single
+    lssec command if the file cannot be read or has no such stanza """
+    if not attrs:
+        return {}
+    try:
+        values = get_stanza(filename, stanza)
+    except (OSError, UnicodeDecodeError) as exc:
+        module.debug(f'Cannot read {filename}: {exc}, using lssec')
+        values = None
+    if values is not None:
+        return {attr: values.get(attr, '') for attr in attrs}
     lssec_command = module.get_bin_path('lssec', required=True)
-    cmd = [lssec_command, '-c', '-f', filename, '-s', stanza, '-a', attr]
+    cmd = [lssec_command, '-c', '-f', filename, '-s', stanza]
+    for attr in attrs:
+        cmd += ['-a', attr]
     rc, stdout, stderr = module.run_command(cmd)
     if rc != 0:
         msg = 'Failed to run lssec command: ' + ' '.join(cmd)
         if "3004-725" in stderr:
             msg += f" Invalid stanza: '{stanza}'"
         module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
-    # Strip newline and double-quotation marks that are sometimes added
-    lssec_out = stdout.splitlines()[1].split(':', 1)[1].strip('\\\"\n')
-    return str(lssec_out)
+    values = next(iter(parse_colon_listing(stdout).values()), {})
+    # the values are sometimes enclosed in double quotes
+    return {attr: decode_value(values.get(attr, '')) for attr in attrs}
 
 
 def run_chsec(module):
@@ -221,7 +235,7 @@ def run_chsec(module):
         'attrs': {},
     }
 
-    changed_attrs = 0
+    target_values = {}
     for attr, target_value in attrs.items():
         if state == 'absent':
             # 'absent' sets all of the given attrs to None, regardless of given value
@@ -230,7 +244,14 @@ def run_chsec(module):
             # target_value needs to be a string for comparisons later
             # We cant allot bools/ints to be interpreted as anything other than strings
             target_value = str(target_value)
-        current_value = get_current_attr_value(module, filename, stanza, attr)
+        target_values[attr] = target_value
+
+    # Read all the attributes at once
+    current_values = get_current_attr_values(module, filename, stanza, list(target_values))
+
+    changes = {}
+    for attr, target_value in target_values.items():
+        current_value = current_values[attr]
 
         # Start our msg dict for this particular key+value
         msg_attr = {
@@ -242,12 +263,16 @@ def run_chsec(module):
             if module.check_mode:
                 msg_attr["check_mode"] = True
             else:
-                cmd_return = set_attr_value(module, filename, stanza, attr, target_value)
-                msg_attr.update(cmd_return)
+                changes[attr] = target_value
             results['changed'] = True
             msg_attr['status'] = 'changed'
-            changed_attrs += 1
         results['attrs'][attr] = msg_attr
+
+    # Apply all the changes at once
+    if changes:
+        cmd_return = set_attr_values(module, filename, stanza, changes)
+        for attr in changes:
+            results['attrs'][attr].update(cmd_return)
     return results
 
 
@@ -7,6 +7,8 @@
 from __future__ import absolute_import, division, print_function
 import re
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.stanza import parse_stanza_records
+from ansible_collections.ibm.power_aix.plugins.module_utils.worker_pool import run_parallel
 
 __metaclass__ = type
 
@@ -91,11 +93,41 @@ options:
     type: str
     choices: [ unconfigure, stop ]
     default: unconfigure
+  devices:
+    description:
+    - Specifies a list of devices whose attributes are changed in one task.
+    - The state and the attributes of the devices are read once from the ODM, then C(chdev) is only
+      run for the devices whose attributes differ.
+    - The devices in Defined state are not in use and are changed in the device database, up to
+      I(max_parallel) at the same time. The other devices are changed one after the other
+      according to I(chtype).
+    - I(force) and I(chtype) apply to all the devices, I(state) is ignored.
+    - Mutually exclusive with I(device), I(attributes) and I(parent_device).
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+        - Specifies the device logical name.
+        type: str
+        required: true
+      attributes:
+        description:
+        - Specifies the device attribute-value pairs to set.
+        type: dict
+        required: true
+  max_parallel:
+    description:
+    - When I(devices) is used, specifies the maximum number of devices in Defined state changed at
+      the same time.
+    type: int
+    default: 1
 notes:
   - You can refer to the IBM documentation for additional information on the commands used at
     U(https://www.ibm.com/support/knowledgecenter/ssw_aix_72/c_commands/cfgmgr.html),
     U(https://www.ibm.com/support/knowledgecenter/ssw_aix_72/c_commands/chdev.html),
     U(https://www.ibm.com/support/knowledgecenter/ssw_aix_72/r_commands/rmdev.html),
+    U(https://www.ibm.com/support/knowledgecenter/ssw_aix_72/o_commands/odmget.html).
 '''
 
 EXAMPLES = r'''
@@ -160,6 +192,20 @@ EXAMPLES = r'''
   devices:
     device: "all"
     state: available
+
+- name: Change the queue depth and reserve policy of several disks at next reboot
+  devices:
+    devices:
+      - name: hdisk1
+        attributes:
+          queue_depth: 32
+          reserve_policy: no_reserve
+      - name: hdisk2
+        attributes:
+          queue_depth: 32
+          reserve_policy: no_reserve
+    chtype: reboot
+    max_parallel: 8
 '''
 
 RETURN = r'''
@@ -179,9 +225,17 @@ stderr:
     description: The standard error.
     returned: If the command failed.
     type: str
+devices:
+    description:
+    - The names of the devices modified and of the devices whose modification failed.
+    returned: When I(devices) is used.
+    type: dict
+    sample: {"modified": ["hdisk1"], "failed": []}
 '''
 
 results = None
+# status of the devices in Defined state in the CuDv object class
+DEFINED_STATUS = '0'
 
 
 def str_to_dict(init_props, attributes):
@@ -492,6 +546,144 @@ def rmdev(module, device, state):
     return True, msg
 
 
+def run_odmget(module, object_class, criteria=None):
+    """
+    Reads the objects of an ODM object class.
+    param module: Ansible module argument spec.
+    param object_class: the object class, e.g. CuDv.
+    param criteria: the odmget search criteria, all the objects if None.
+    return: list of dict, an attribute: value dict per object
+    """
+    cmd = ["odmget"]
+    if criteria:
+        cmd += ["-q", criteria]
+    cmd.append(object_class)
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        msg = f"Command { ' '.join(cmd) } failed."
+        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+    return [attrs for name, attrs in parse_stanza_records(stdout)]
+
+
+def get_devices_odm(module, devices):
+    """
+    Reads the state and the current attributes of devices from the ODM,
+    with an odmget of the customized devices, an odmget of the customized
+    attributes and an odmget of the predefined attributes per device type,
+    whatever the number of devices.
+    The value of an attribute is its customized value, or the default value
+    of the device type when it was not changed.
+    param module: Ansible module argument spec.
+    param devices: list of device names.
+    return: dict {device: {'status': CuDv status, 'attributes': {attribute: list of values}}}
+            for the existing devices
+    """
+    names = set(devices)
+    cudv = {obj['name']: obj for obj in run_odmget(module, "CuDv") if obj.get('name') in names}
+
+    defaults = {}
+    for uniquetype in set(obj['PdDvLn'] for obj in cudv.values()):
+        defaults[uniquetype] = {}
+        for obj in run_odmget(module, "PdAt", f"uniquetype={ uniquetype }"):
+            defaults[uniquetype].setdefault(obj['attribute'], [obj['deflt']])
+
+    customized = {}
+    for obj in run_odmget(module, "CuAt"):
+        if obj.get('name') in cudv:
+            attrs = customized.setdefault(obj['name'], {})
+            attrs.setdefault(obj['attribute'], []).append(obj['value'])
+
+    odm = {}
+    for name, obj in cudv.items():
+        attributes = dict(defaults[obj['PdDvLn']])
+        attributes.update(customized.get(name, {}))
+        odm[name] = {'status': obj['status'], 'attributes': attributes}
+    return odm
+
+
+def chdev_devices(module):
+    """
+    Changes the attributes of the devices of the 'devices' option. The
+    devices are read once from the ODM, then chdev is only run for the
+    devices with attributes to change. The devices in Defined state, not
+    in use, are changed in the device database, in parallel when
+    max_parallel is greater than 1. The other devices are changed one
+    after the other, according to chtype.
+    param module: Ansible module argument spec.
+    return: changed - True/False(attributes of a device modified or not),
+            msg - message,
+            summary of the modified devices
+    """
+    force = module.params["force"]
+    chtype = module.params["chtype"]
+    names = [entry['name'] for entry in module.params['devices']]
+
+    odm = get_devices_odm(module, names)
+    missing = [name for name in names if name not in odm]
+    if missing:
+        module.fail_json(msg=f"Devices not found: { ', '.join(missing) }")
+
+    chtype_opt = {
+        "both": ['-U'],
+        "current": ['-T'],
+        "reboot": ['-P'],
+        "reset": [],
+    }
+
+    defined = []
+    configured = []
+    for entry in module.params['devices']:
+        device = odm[entry['name']]
+        opts = []
+        for attr, val in (entry['attributes'] or {}).items():
+            if str(val) not in device['attributes'].get(attr, []):
+                opts += ['-a', f"{ attr }={ val }"]
+        if not opts:
+            continue
+        if force:
+            opts.append('-g')
+        cmd = ['chdev', '-l', entry['name']] + opts
+        if device['status'] == DEFINED_STATUS:
+            defined.append((entry['name'], cmd))
+        else:
+            configured.append((entry['name'], cmd + chtype_opt[chtype]))
+
+    rcs = {}
+
+    def run_chdev(operation):
+        name, cmd = operation
+        rcs[name] = module.run_command(cmd) + (cmd,)
+
+    run_parallel(run_chdev, defined, module.params['max_parallel'], name='ChdevThread')
+
+    for name, cmd in configured:
+        rcs[name] = module.run_command(cmd) + (cmd,)
+
+    summary = {'modified': [], 'failed': []}
+    failed = None
+    for name in names:
+        if name not in rcs:
+            continue
+        rc, stdout, stderr, cmd = rcs[name]
+        if rc == 0:
+            summary['modified'].append(name)
+            continue
+        summary['failed'].append(name)
+        if failed is None:
+            failed = dict(rc=rc, stdout=stdout, stderr=stderr, cmd=' '.join(cmd))
+
+    if failed:
+        msg = f"Modification of Device attributes failed for devices { ', '.join(summary['failed']) }. " \
+              f"cmd - { failed['cmd'] }"
+        module.fail_json(msg=msg, changed=bool(summary['modified']), devices=summary, **failed)
+
+    if summary['modified']:
+        msg = f"Modification of Device attributes completed for devices { ', '.join(summary['modified']) }"
+    else:
+        msg = "All the provided attributes are already at required level."
+    return bool(summary['modified']), msg, summary
+
+
 def main():
     module = AnsibleModule(
         supports_check_mode=False,
@@ -505,7 +697,13 @@ def main():
             chtype=dict(type='str', default='both', choices=['reboot', 'current', 'both', 'reset']),
             parent_device=dict(type='str'),
             rmtype=dict(type='str', default='unconfigure', choices=['unconfigure', 'stop']),
+            devices=dict(type='list', elements='dict', options=dict(
+                name=dict(type='str', required=True),
+                attributes=dict(type='dict', required=True),
+            )),
+            max_parallel=dict(type='int', default=1),
         ),
+        mutually_exclusive=[['device', 'devices'], ['attributes', 'devices'], ['parent_device', 'devices']],
     )
 
     changed = False
@@ -519,6 +717,11 @@ def main():
     attributes = module.params["attributes"]
     msg = ""
 
+    if module.params['devices'] is not None:
+        # Modify the attributes of several devices.
+        changed, msg, summary = chdev_devices(module)
+        module.exit_json(changed=changed, msg=msg, devices=summary)
+
     if attributes:
         # Modify Device attributes.
         changed, msg = chdev(module, device)
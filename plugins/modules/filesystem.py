@@ -6,6 +6,10 @@
 
 from __future__ import absolute_import, division, print_function
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.mount_table import (
+    MountTable, MountTableError, parse_lsfs_output
+)
+from ansible_collections.ibm.power_aix.plugins.module_utils.worker_pool import run_parallel
 
 __metaclass__ = type
 
@@ -31,8 +35,89 @@ options:
   filesystem:
     description:
     - Specifies the mount point that is the directory where the file system will be mounted.
+    - Mutually exclusive with I(filesystems).
     type: str
-    required: true
+  filesystems:
+    description:
+    - Specifies a list of filesystems to reconcile in one task.
+    - The defined filesystems are read once with C(lsfs -c), then only the filesystems that differ
+      are created, changed or removed.
+    - The operations on different volume groups run in parallel, see I(max_parallel). The
+      operations on a volume group, and on the NFS filesystems, run one after the other, the
+      removals first.
+    - Mutually exclusive with I(filesystem).
+    type: list
+    elements: dict
+    suboptions:
+      filesystem:
+        description:
+        - Specifies the mount point of the filesystem.
+        type: str
+        required: true
+      state:
+        description:
+        - C(present) creates the filesystem or changes its attributes.
+        - C(absent) removes the filesystem.
+        type: str
+        choices: [ present, absent ]
+        default: present
+      rm_mount_point:
+        description:
+        - Specifies to remove the mount directory, see I(rm_mount_point).
+        type: bool
+        default: false
+      attributes:
+        description:
+        - Specifies the attributes of the local filesystem, see I(attributes).
+        type: list
+        elements: str
+      device:
+        description:
+        - Specifies the logical volume or the remote export device, see I(device).
+        type: str
+      vg:
+        description:
+        - Specifies the volume group of the filesystem to create.
+        type: str
+      account_subsystem:
+        description:
+        - Specifies whether the local filesystem is processed by the accounting subsystem.
+        type: str
+        choices: ['yes', 'no']
+      fs_type:
+        description:
+        - Specifies the virtual filesystem type to create the local filesystem.
+        type: str
+        default: jfs2
+      nfs_soft_mount:
+        description:
+        - Creates a soft mount for a NFS filesystem.
+        type: bool
+        default: False
+      auto_mount:
+        description:
+        - Specifies whether to automatically mount the filesystem at system restart.
+        type: str
+        choices: ['yes', 'no']
+      permissions:
+        description:
+        - Specifies the filesystem permissions, see I(permissions).
+        type: str
+        choices: [ ro, rw ]
+      mount_group:
+        description:
+        - Specifies the mount group of the filesystem.
+        type: str
+      nfs_server:
+        description:
+        - Specifies the NFS server of a NFS filesystem.
+        type: str
+  max_parallel:
+    description:
+    - When I(filesystems) is used, specifies the maximum number of volume groups whose
+      filesystems are created, changed or removed at the same time.
+    type: int
+    default: 4
   state:
     description:
     - Specifies the action to be performed on the filesystem.
@@ -132,6 +217,20 @@ EXAMPLES = r'''
     filesystem: /mnt
     state: absent
     rm_mount_point: true
+- name: Reconcile a list of filesystems
+  ibm.power_aix.filesystem:
+    filesystems:
+      - filesystem: /db/data01
+        vg: datavg01
+        attributes: size=10G
+      - filesystem: /db/log01
+        vg: datavg02
+        attributes: size=2G
+        auto_mount: 'yes'
+      - filesystem: /db/old
+        state: absent
+        rm_mount_point: true
+    max_parallel: 2
 '''
 
 RETURN = r'''
@@ -151,12 +250,82 @@ stderr:
     description: The standard error.
     returned: If the command failed.
     type: str
+filesystems:
+    description:
+    - The mount points of the filesystems created, modified and removed, and of the filesystems
+      whose command failed.
+    returned: When I(filesystems) is used.
+    type: dict
+    sample: {"created": ["/db/data01"], "modified": ["/db/log01"], "removed": [], "failed": []}
 '''
 
 result = None
+mount_table = None
 crfs_specific_attributes = ["ag", "bf", "compress", "frag", "nbpi", "agblksize", "isnapshot"]
 
 
+def get_mount_table(module):
+    """
+    Returns the snapshot of the defined and mounted filesystems, shared by
+    the functions of the module and taken on first use.
+    param module: Ansible module argument spec.
+    return: MountTable
+    """
+    global mount_table
+    if mount_table is None:
+        mount_table = MountTable(module)
+    return mount_table
+
+
+def lookup_filesystem(module, filesystem):
+    """
+    Looks up a filesystem in the mount table snapshot.
+    param module: Ansible module argument spec.
+    param filesystem: filesystem name.
+    return: (lsfs entry or None if the filesystem does not exist,
+             True/False filesystem mounted)
+    note: Exits with fail_json in case of error
+    """
+    table = get_mount_table(module)
+    try:
+        entry = table.filesystem(filesystem)
+        if entry is None:
+            return None, False
+        return entry, table.is_mounted(entry['mount_point'])
+    except MountTableError as exc:
+        fail_mount_table(module, exc)
+
+
+def lookup_filesystems(module, filesystems):
+    """
+    Looks up filesystems in the defined filesystems of the mount table
+    snapshot, the mounted filesystems are not read.
+    param module: Ansible module argument spec.
+    param filesystems: list of filesystem names.
+    return: dict {filesystem: lsfs entry or None if the filesystem does not exist}
+    note: Exits with fail_json in case of error
+    """
+    table = get_mount_table(module)
+    try:
+        return {filesystem: table.filesystem(filesystem) for filesystem in filesystems}
+    except MountTableError as exc:
+        fail_mount_table(module, exc)
+
+
+def fail_mount_table(module, exc):
+    """
+    Exits with fail_json when the mount table snapshot cannot be taken.
+    param module: Ansible module argument spec.
+    param exc: the MountTableError raised.
+    """
+    result['cmd'] = exc.cmd
+    result['rc'] = exc.rc
+    result['stdout'] = exc.stdout
+    result['stderr'] = exc.stderr
+    result['msg'] = f"Command { exc.cmd } failed."
+    module.fail_json(**result)
+
+
 def is_nfs(module, filesystem):
     """
     Determines if a filesystem is NFS or not
@@ -164,37 +333,26 @@ def is_nfs(module, filesystem):
     param filesystem: filesystem name.
     return: True - filesystem is NFS type / False - filesystem is not NFS type
     """
-    cmd = f"lsfs -l { filesystem }"
-    rc, stdout = module.run_command(cmd)[:2]
-    if rc != 0:
+    entry = lookup_filesystem(module, filesystem)[0]
+    if entry is None:
         return None
+    return entry['vfs'] == "nfs"
 
-    ln = stdout.splitlines()[1:][0]
-    type = ln.split()[3]
 
-    if type == "nfs":
-        return True
-    return False
-
-
-def valid_attributes(module):
+def valid_attributes(attributes):
     """
     Returns list of valid attributes for chfs command
     param:
-        module - Ansible module argument spec.
+        attributes - List of 'attribute=value' provided.
     return:
         valid_attrs (list) - List of valid attributes among the provided ones.
     """
-    attr = module.params['attributes']
-    if attr is None:
-        return True
-
     valid_attrs = []
 
-    for attributes in attr:
-        if attributes.split("=")[0] in crfs_specific_attributes:
+    for attrs in attributes:
+        if attrs.split("=")[0] in crfs_specific_attributes:
             continue
-        valid_attrs.append(attributes)
+        valid_attrs.append(attrs)
 
     return valid_attrs
 
@@ -208,78 +366,20 @@ def fs_state(module, filesystem):
              None - filesystem does not exist
     """
 
-    cmd = f"lsfs -l { filesystem }"
-    rc = module.run_command(cmd)[0]
-    if rc != 0:
+    entry, mounted = lookup_filesystem(module, filesystem)
+    if entry is None:
         return None
+    return mounted
 
-    cmd = "df"
-    rc, stdout = module.run_command(cmd)[:2]
-    if rc != 0:
-        module.fail_json(f"Command { cmd } failed.")
-
-    if stdout:
-        mdirs = []
-        for ln in stdout.splitlines()[1:]:
-            mdirs.append(ln.split()[6])
-        if filesystem in mdirs:
-            return True
 
-    return False
-
-
-def compare_attrs(module):
+def parse_lsfs_query(stdout):
     """
-    Helper function to compare the provided and already existing attributes of a filesystem
-    params:
-        module - Ansible module argument spec.
-    return:
-        updated_attrs (list) - List of updated attributes and their values, that need to be changed
+    Parses the output of lsfs -q, a line per filesystem followed, for the
+    local filesystems, by a line with its characteristics between parentheses.
+    param stdout: output of lsfs -q.
+    return: dict {mount point: {attribute: value}}
     """
-
-    fs_mount_pt = module.params['filesystem']
-    cmd1 = f"lsfs -c {fs_mount_pt}"
-    cmd2 = f"lsfs -q {fs_mount_pt}"
-
-    rc1, stdout1, stderr1 = module.run_command(cmd1)
-
-    if rc1:
-        result['stdout'] = stdout1
-        result['cmd'] = cmd1
-        result['stderr'] = stderr1
-        result['msg'] = "Could not get information about the provided filesystem."
-        module.fail_json(**result)
-
-    rc2, stdout2, stderr2 = module.run_command(cmd2)
-
-    if rc2:
-        result['stdout'] = stdout2
-        result['cmd'] = cmd2
-        result['stderr'] = stderr2
-        result['msg'] = "Could not get information about the provided filesystem."
-        module.fail_json(**result)
-
-    current_attributes = {}
-
-    fs_attrs = ["mountpoint", "device", "vfs", "nodename", "type", "size", "options", "automount", "acct"]
-
-    lines1 = stdout1.splitlines()
-    line1 = lines1[1].replace("::", ":--:")
-    line1 = line1.split(":")
-
-    for it in range(9):
-        current_attributes[fs_attrs[it]] = line1[it]
-
-    lines2 = stdout2.splitlines()
-
     fs_attrs = ["name", "nodename", "mount pt", "vfs", "size", "options", "auto", "accounting"]
-
-    line2 = lines2[1].split()
-    for it in range(8):
-        if fs_attrs[it] in current_attributes.keys() and line2[it] == "--":
-            continue
-        current_attributes[fs_attrs[it]] = line2[it]
-
     mapped_key = {
         "dmapi": "managed",
         "fs size": "size",
@@ -287,53 +387,87 @@ def compare_attrs(module):
         "inline log size": "logsize"
     }
 
-    for it in lines2[2].split(","):
-        curr_attr = it.split(":")
-        attr_key = curr_attr[0].strip().lower()
-        if attr_key in mapped_key.keys():
-            attr_key = mapped_key[attr_key]
-        attr_val = curr_attr[1].strip()
-        if attr_key[0] == "(":
-            attr_key = attr_key[1:]
-        if attr_val[-1] == ")":
-            attr_val = attr_val[:-1]
-        current_attributes[attr_key] = attr_val
+    filesystems = {}
+    attributes = None
+    for line in stdout.splitlines()[1:]:
+        if not line.strip():
+            continue
+        if not line.lstrip().startswith("("):
+            line = line.split()
+            if len(line) < len(fs_attrs):
+                attributes = None
+                continue
+            attributes = dict(zip(fs_attrs, line))
+            filesystems[attributes["mount pt"]] = attributes
+            continue
+        if attributes is None:
+            continue
 
-    amount = module.params["auto_mount"]
-    perms = module.params["permissions"]
-    mgroup = module.params["mount_group"]
-    acct_sub_sys = module.params["account_subsystem"]
-    check_other_perms = 0
+        for it in line.split(","):
+            curr_attr = it.split(":")
+            if len(curr_attr) < 2:
+                continue
+            attr_key = curr_attr[0].strip().lower()
+            if attr_key[0] == "(":
+                attr_key = attr_key[1:]
+            if attr_key in mapped_key.keys():
+                attr_key = mapped_key[attr_key]
+            attr_val = curr_attr[1].strip()
+            if attr_val and attr_val[-1] == ")":
+                attr_val = attr_val[:-1]
+            attributes[attr_key] = attr_val
 
-    if not amount or amount == current_attributes['auto']:
-        module.params['auto_mount'] = ""
-        check_other_perms += 1
+    return filesystems
 
-    if not perms or perms == current_attributes['options']:
-        module.params['permissions'] = ""
-        check_other_perms += 1
 
-    if not mgroup or mgroup == current_attributes['type']:
-        module.params['mount_group'] = ""
-        check_other_perms += 1
+def current_attrs(entry, query=None):
+    """
+    Merges the characteristics of a filesystem given by lsfs -c and lsfs -q.
+    param entry: lsfs -c entry of the filesystem, see MountTable.filesystems.
+    param query: lsfs -q attributes of the filesystem, see parse_lsfs_query.
+    return: dict {attribute: value}
+    """
+    current_attributes = dict(entry)
+    current_attributes['auto'] = entry['automount']
+    current_attributes['accounting'] = entry['acct']
 
-    if not acct_sub_sys or acct_sub_sys == current_attributes['accounting']:
-        module.params['account_subsystem'] = ""
-        check_other_perms += 1
+    for attr, val in (query or {}).items():
+        if attr in current_attributes.keys() and val == "--":
+            continue
+        current_attributes[attr] = val
+
+    return current_attributes
 
-    updated_attrs = []
 
-    if module.params['attributes']:
-        module.params['attributes'] = valid_attributes(module)
-        provided_attributes = module.params['attributes']
+def diff_attrs(params, current_attributes):
+    """
+    Compares the provided and the current attributes of a filesystem.
+    params:
+        params - The filesystem parameters, module parameters or an entry of filesystems.
+        current_attributes - The current attributes, see current_attrs.
+    return:
+        options (dict) - auto_mount, permissions, mount_group and account_subsystem,
+                         set to "" when they need no change
+        updated_attrs (list) - List of updated attributes and their values, that need to be changed
+    """
+    options = {}
+    for option, attr in (("auto_mount", "auto"), ("permissions", "options"),
+                         ("mount_group", "type"), ("account_subsystem", "accounting")):
+        value = params[option]
+        if not value or value == current_attributes.get(attr):
+            value = ""
+        options[option] = value
 
-        for attrs in provided_attributes:
+    updated_attrs = []
+
+    if params['attributes']:
+        for attrs in valid_attributes(params['attributes']):
             attrs = attrs.split("=")
             attr = attrs[0].strip()
             val = attrs[1].strip()
             val = val.strip('\"')  # For case when variables are used while providing values to attributes
             if attr == "log" or attr == "logname":
-                if current_attributes['inline log'] and val != current_attributes['inline log']:
+                if current_attributes.get('inline log') and val != current_attributes['inline log']:
                     updated_attrs.append(f"{attr}={val}")
                 continue
 
@@ -352,21 +486,63 @@ def compare_attrs(module):
             if attr not in current_attributes.keys() or val != current_attributes[attr]:
                 updated_attrs.append(f"{attr}={val}")
 
-    if check_other_perms == 4 and len(updated_attrs) == 0:
+    return options, updated_attrs
+
+
+def compare_attrs(module):
+    """
+    Helper function to compare the provided and already existing attributes of a filesystem
+    params:
+        module - Ansible module argument spec.
+    return:
+        updated_attrs (list) - List of updated attributes and their values, that need to be changed
+    """
+
+    fs_mount_pt = module.params['filesystem']
+    cmd1 = f"lsfs -c {fs_mount_pt}"
+    cmd2 = f"lsfs -q {fs_mount_pt}"
+
+    rc1, stdout1, stderr1 = module.run_command(cmd1)
+
+    if rc1:
+        result['stdout'] = stdout1
+        result['cmd'] = cmd1
+        result['stderr'] = stderr1
+        result['msg'] = "Could not get information about the provided filesystem."
+        module.fail_json(**result)
+
+    rc2, stdout2, stderr2 = module.run_command(cmd2)
+
+    if rc2:
+        result['stdout'] = stdout2
+        result['cmd'] = cmd2
+        result['stderr'] = stderr2
+        result['msg'] = "Could not get information about the provided filesystem."
+        module.fail_json(**result)
+
+    entry = parse_lsfs_output(stdout1)[0]
+    query = next(iter(parse_lsfs_query(stdout2).values()), {})
+    current_attributes = current_attrs(entry, query)
+
+    options, updated_attrs = diff_attrs(module.params, current_attributes)
+    module.params.update(options)
+
+    if not any(options.values()) and len(updated_attrs) == 0:
         result['msg'] = "No modification is required, exiting!"
         module.exit_json(**result)
 
     module.params['attributes'] = updated_attrs
 
 
-def nfs_opts(module):
+def nfs_opts(params):
     """
     Helper function to build NFS parameters for mknfsmnt and chnfsmnt.
+    param params: The filesystem parameters, module parameters or an entry of filesystems.
     """
-    amount = module.params["auto_mount"]
-    perms = module.params["permissions"]
-    mgroup = module.params["mount_group"]
-    nfs_soft_mount = module.params["nfs_soft_mount"]
+    amount = params["auto_mount"]
+    perms = params["permissions"]
+    mgroup = params["mount_group"]
+    nfs_soft_mount = params["nfs_soft_mount"]
 
     opts = ""
     if amount == "yes":
@@ -386,15 +562,16 @@ def nfs_opts(module):
     return opts
 
 
-def fs_opts(module):
+def fs_opts(params):
     """
     Helper function to build filesystem parameters for crfs and chfs.
+    param params: The filesystem parameters, module parameters or an entry of filesystems.
     """
-    amount = module.params["auto_mount"]
-    perms = module.params["permissions"]
-    mgroup = module.params["mount_group"]
-    attrs = module.params["attributes"]
-    acct_sub_sys = module.params["account_subsystem"]
+    amount = params["auto_mount"]
+    perms = params["permissions"]
+    mgroup = params["mount_group"]
+    attrs = params["attributes"]
+    acct_sub_sys = params["account_subsystem"]
 
     opts = ""
     if amount:
@@ -417,6 +594,82 @@ def fs_opts(module):
     return opts
 
 
+def chfs_cmd(params, filesystem, nfs):
+    """
+    Builds the command changing the attributes of a filesystem.
+    param params: The filesystem parameters, module parameters or an entry of filesystems.
+    param filesystem: Filesystem name.
+    param nfs: True if the filesystem is NFS.
+    return: the chfs or chnfsmnt command
+    """
+    if nfs:
+        opts = nfs_opts(params)
+        device = params["device"]
+        nfs_server = params["nfs_server"]
+        return f"chnfsmnt { opts } -f { filesystem } -d { device } -h { nfs_server }"
+
+    opts = fs_opts(params)
+    return f"chfs { opts } { filesystem }"
+
+
+def mkfs_cmd(params, filesystem):
+    """
+    Builds the command creating a filesystem, a NFS filesystem when nfs_server is set.
+    param params: The filesystem parameters, module parameters or an entry of filesystems.
+    param filesystem: Filesystem name.
+    return: the crfs or mknfsmnt command
+    """
+    nfs_server = params['nfs_server']
+    device = params['device']
+    if device:
+        device = f"-d { device } "
+    else:
+        device = ""
+
+    if nfs_server:
+        # Create NFS Filesystem
+        opts = nfs_opts(params)
+
+        return f"mknfsmnt -f { filesystem } { device } -h { nfs_server } { opts } -w bg "
+
+    # Create a local filesystem
+    opts = fs_opts(params)
+
+    fs_type = params['fs_type']
+
+    vg = params['vg']
+    if vg:
+        vg = f"-g { vg } "
+    else:
+        vg = ""
+
+    return f"crfs -v { fs_type } { vg }{ device }-m {filesystem } { opts }"
+
+
+def rmfs_cmd(params, filesystem, nfs):
+    """
+    Builds the command removing a filesystem.
+    param params: The filesystem parameters, module parameters or an entry of filesystems.
+    param filesystem: Filesystem name.
+    param nfs: True if the filesystem is NFS.
+    return: the rmfs or rmnfsmnt command
+    """
+    rm_mount_point = params["rm_mount_point"]
+
+    if nfs:
+        if rm_mount_point:
+            cmd = "rmnfsmnt -B -f "
+        else:
+            cmd = "rmnfsmnt -I -f "
+    else:
+        if rm_mount_point:
+            cmd = "rmfs -r "
+        else:
+            cmd = "rmfs "
+
+    return cmd + filesystem
+
+
 def chfs(module, filesystem):
     """
     Changes the attributes of the filesystem.
@@ -434,17 +687,7 @@ def chfs(module, filesystem):
     if module.params['attributes'] or amount or perms or mgroup or acct_sub_sys:
         compare_attrs(module)
 
-    opts = ""
-    nfs = is_nfs(module, filesystem)
-    if nfs:
-        opts = nfs_opts(module)
-        device = module.params["device"]
-        nfs_server = module.params["nfs_server"]
-        cmd = f"chnfsmnt { opts } -f { filesystem } -d { device } -h { nfs_server }"
-    else:
-        opts = fs_opts(module)
-        cmd = f"chfs { opts } { filesystem }"
-
+    cmd = chfs_cmd(module.params, filesystem, is_nfs(module, filesystem))
     result["cmd"] = cmd
     rc, stdout, stderr = module.run_command(cmd)
     result["rc"] = rc
@@ -471,31 +714,7 @@ def mkfs(module, filesystem):
     """
 
     nfs_server = module.params['nfs_server']
-    device = module.params['device']
-    if device:
-        device = f"-d { device } "
-    else:
-        device = ""
-
-    if nfs_server:
-        # Create NFS Filesystem
-        opts = nfs_opts(module)
-
-        cmd = f"mknfsmnt -f { filesystem } { device } -h { nfs_server } { opts } -w bg "
-    else:
-        # Create a local filesystem
-        opts = fs_opts(module)
-
-        fs_type = module.params['fs_type']
-
-        vg = module.params['vg']
-        if vg:
-            vg = f"-g { vg } "
-        else:
-            vg = ""
-
-        cmd = f"crfs -v { fs_type } { vg }{ device }-m {filesystem } { opts }"
-
+    cmd = mkfs_cmd(module.params, filesystem)
     result["cmd"] = cmd
 
     rc, stdout, stderr = module.run_command(cmd)
@@ -527,20 +746,7 @@ def rmfs(module, filesystem):
             msg - message
     """
 
-    rm_mount_point = module.params["rm_mount_point"]
-
-    if is_nfs(module, filesystem):
-        if rm_mount_point:
-            cmd = "rmnfsmnt -B -f "
-        else:
-            cmd = "rmnfsmnt -I -f "
-    else:
-        if rm_mount_point:
-            cmd = "rmfs -r "
-        else:
-            cmd = "rmfs "
-
-    cmd += filesystem
+    cmd = rmfs_cmd(module.params, filesystem, is_nfs(module, filesystem))
     result["cmd"] = cmd
 
     rc, stdout, stderr = module.run_command(cmd)
@@ -557,8 +763,185 @@ def rmfs(module, filesystem):
     result["msg"] = msg
 
 
+def get_lv_vgs(module):
+    """
+    Maps the logical volumes of the varied on volume groups to their volume
+    group, with lsvg -o and a single lsvg -l for all the volume groups.
+    param module: Ansible module argument spec.
+    return: dict {logical volume: volume group}, empty if it cannot be built
+    """
+    rc, stdout, stderr = module.run_command(["lsvg", "-o"])
+    if rc != 0:
+        module.debug(f"Cannot list the volume groups: { stderr }")
+        return {}
+
+    rc, stdout, stderr = module.run_command(["lsvg", "-l", "-i"], data=stdout)
+    if rc != 0:
+        module.debug(f"Cannot list the logical volumes: { stderr }")
+        return {}
+
+    lv_vgs = {}
+    vg = None
+    for line in stdout.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if len(fields) == 1 and fields[0].endswith(":"):
+            vg = fields[0][:-1]
+        elif vg and fields[0] != "LV":
+            lv_vgs[fields[0]] = vg
+    return lv_vgs
+
+
+def plan_filesystems(module):
+    """
+    Compares the filesystems of the 'filesystems' option with the mount
+    table snapshot and builds the commands needed.
+    The lsfs -q characteristics are read with a single command, for the
+    existing local filesystems with attributes.
+    param module: Ansible module argument spec.
+    return: list of operations, dict with filesystem, action (create, modify
+            or remove), cmd, vg (None if not known or NFS) and device keys,
+            in the order of the 'filesystems' option
+    note: Exits with fail_json in case of error
+    """
+    params_list = module.params['filesystems']
+    current = lookup_filesystems(module, [params['filesystem'] for params in params_list])
+    entries = {params['filesystem']: (params, current[params['filesystem']]) for params in params_list}
+
+    query = {}
+    names = [entry['mount_point'] for params, entry in entries.values()
+             if entry and entry['vfs'] != "nfs" and params['state'] == 'present' and params['attributes']]
+    if names:
+        cmd = ["lsfs", "-q"] + names
+        rc, stdout, stderr = module.run_command(cmd)
+        if rc != 0:
+            result['cmd'] = ' '.join(cmd)
+            result['rc'] = rc
+            result['stdout'] = stdout
+            result['stderr'] = stderr
+            result['msg'] = "Could not get information about the provided filesystems."
+            module.fail_json(**result)
+        query = parse_lsfs_query(stdout)
+
+    operations = []
+    for filesystem, (params, entry) in entries.items():
+        if params['state'] == 'absent':
+            if entry is None:
+                continue
+            nfs = entry['vfs'] == "nfs"
+            operations.append({'filesystem': filesystem, 'action': 'remove', 'nfs': nfs,
+                               'device': entry['device'], 'cmd': rmfs_cmd(params, filesystem, nfs)})
+        elif entry is None:
+            operations.append({'filesystem': filesystem, 'action': 'create', 'nfs': bool(params['nfs_server']),
+                               'vg': params['vg'], 'device': params['device'] or '',
+                               'cmd': mkfs_cmd(params, filesystem)})
+        else:
+            current_attributes = current_attrs(entry, query.get(entry['mount_point']))
+            options, updated_attrs = diff_attrs(params, current_attributes)
+            if not any(options.values()) and not updated_attrs:
+                continue
+            nfs = entry['vfs'] == "nfs"
+            params = dict(params, attributes=updated_attrs, **options)
+            if nfs:
+                params['device'] = params['device'] or entry['device']
+                params['nfs_server'] = params['nfs_server'] or entry['nodename']
+            operations.append({'filesystem': filesystem, 'action': 'modify', 'nfs': nfs,
+                               'device': entry['device'], 'cmd': chfs_cmd(params, filesystem, nfs)})
+    return operations
+
+
+def run_operations(module, operations, max_parallel):
+    """
+    Runs the commands of the operations. The operations on a volume group
+    run one after the other, removals first then modifications and
+    creations, while the volume groups are processed in parallel. The NFS
+    filesystems and the filesystems whose volume group is not known are
+    processed together, as a volume group.
+    param module: Ansible module argument spec.
+    param operations: operations built by plan_filesystems.
+    param max_parallel: maximum number of volume groups processed at the same time.
+    return: the operations, with their rc, stdout and stderr
+    """
+    lv_vgs = {}
+    if max_parallel > 1 and len(operations) > 1:
+        lv_vgs = get_lv_vgs(module)
+
+    groups = {}
+    order = {'remove': 0, 'modify': 1, 'create': 2}
+    for operation in sorted(operations, key=lambda op: order[op['action']]):
+        vg = None
+        if not operation['nfs']:
+            vg = operation.get('vg') or lv_vgs.get(operation['device'].replace('/dev/', '', 1))
+        operation['vg'] = vg
+        groups.setdefault(vg, []).append(operation)
+
+    def run_group(group):
+        for operation in group:
+            rc, stdout, stderr = module.run_command(operation['cmd'])
+            operation.update(rc=rc, stdout=stdout, stderr=stderr)
+
+    run_parallel(run_group, groups.values(), max_parallel, name='FilesystemThread')
+    return operations
+
+
+def reconcile_filesystems(module):
+    """
+    Reconciles the filesystems of the 'filesystems' option with the system.
+    The defined and mounted filesystems are read once, then only the crfs,
+    chfs and rmfs (or mknfsmnt, chnfsmnt and rmnfsmnt) commands needed are
+    run.
+    param module: Ansible module argument spec.
+    note: Exits with fail_json in case of error
+    """
+    names = [params['filesystem'] for params in module.params['filesystems']]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        result['msg'] = f"Filesystems listed more than once: { ', '.join(duplicates) }"
+        module.fail_json(**result)
+
+    for params in module.params['filesystems']:
+        if params['attributes'] and params['fs_type'] == "nfs":
+            result['msg'] = f"Attributes are not supported with the filesystem { params['filesystem'] }."
+            module.fail_json(**result)
+        if params['fs_type'] != "nfs" and params['nfs_soft_mount']:
+            result['msg'] = f"Soft mount is not supported with the filesystem { params['filesystem'] }."
+            module.fail_json(**result)
+
+    operations = run_operations(module, plan_filesystems(module), module.params['max_parallel'])
+
+    summary = {'created': [], 'modified': [], 'removed': [], 'failed': []}
+    done = {'create': 'created', 'modify': 'modified', 'remove': 'removed'}
+    failed = []
+    for operation in operations:
+        if operation['rc'] == 0:
+            summary[done[operation['action']]].append(operation['filesystem'])
+            continue
+        summary['failed'].append(operation['filesystem'])
+        failed.append(operation)
+
+    result['filesystems'] = summary
+    result['changed'] = any(summary[key] for key in done.values())
+    if failed:
+        result['cmd'] = failed[0]['cmd']
+        result['rc'] = failed[0]['rc']
+        result['stdout'] = failed[0]['stdout']
+        result['stderr'] = failed[0]['stderr']
+        result['msg'] = "Failed to " + ", ".join(f"{ operation['action'] } { operation['filesystem'] }"
+                                                 for operation in failed) + \
+            f". cmd - { failed[0]['cmd'] }"
+        module.fail_json(**result)
+
+    if result['changed']:
+        result['msg'] = f"Filesystems created: { len(summary['created']) }, " \
+                        f"modified: { len(summary['modified']) }, removed: { len(summary['removed']) }"
+    else:
+        result['msg'] = "No modification is required."
+
+
 def main():
     global result
+    global mount_table
 
     module = AnsibleModule(
         supports_check_mode=False,
@@ -575,8 +958,26 @@ def main():
             nfs_soft_mount=dict(type='bool', default='False'),
             state=dict(type='str', default='present', choices=['absent', 'present']),
             rm_mount_point=dict(type='bool', default='false'),
-            filesystem=dict(type='str', required=True),
+            filesystem=dict(type='str'),
+            filesystems=dict(type='list', elements='dict', options=dict(
+                filesystem=dict(type='str', required=True),
+                state=dict(type='str', default='present', choices=['absent', 'present']),
+                rm_mount_point=dict(type='bool', default=False),
+                attributes=dict(type='list', elements='str'),
+                device=dict(type='str'),
+                vg=dict(type='str'),
+                account_subsystem=dict(type='str', choices=['yes', 'no']),
+                fs_type=dict(type='str', default='jfs2'),
+                nfs_soft_mount=dict(type='bool', default=False),
+                auto_mount=dict(type='str', choices=['yes', 'no']),
+                permissions=dict(type='str', choices=['rw', 'ro']),
+                mount_group=dict(type='str'),
+                nfs_server=dict(type='str'),
+            )),
+            max_parallel=dict(type='int', default=4),
         ),
+        mutually_exclusive=[['filesystem', 'filesystems']],
+        required_one_of=[['filesystem', 'filesystems']],
     )
 
     result = dict(
@@ -586,6 +987,11 @@ def main():
         stdout='',
         stderr='',
     )
+    mount_table = None
+
+    if module.params['filesystems'] is not None:
+        reconcile_filesystems(module)
+        module.exit_json(**result)
 
     attributes = module.params['attributes']
     fs_type = module.params['fs_type']
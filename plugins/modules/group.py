@@ -7,6 +7,9 @@
 from __future__ import absolute_import, division, print_function
 import re
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.stanza import (
+    parse_colon_listing, read_colon_file, read_stanza_file
+)
 __metaclass__ = type
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
@@ -22,6 +25,8 @@ short_description: Manage presence, attributes and member of AIX groups.
 description:
 - It allows to create new group, to change/remove attributes and administrators or members of a
   group, and to delete an existing group.
+- It can also reconcile a list of groups in one task with I(groups), reading all the groups once
+  and running only the commands needed.
 version_added: '1.0.0'
 requirements:
 - AIX >= 7.1 TL3
@@ -31,20 +36,61 @@ requirements:
   aix.security.group.create.admin,aix.security.group.create.normal,aix.security.group.list)'
 options:
   name:
-    description: Specifies the name of the group to manage.
+    description:
+    - Specifies the name of the group to manage.
+    - Mutually exclusive with I(groups), one of them is required.
     type: str
     aliases: [ group ]
-    required: true
   state:
     description:
     - Specifies the action to be performed.
     - C(present) specifies to create a group if it does not exist, otherwise it changes the
       attributes of the specified group.
     - C(absent) deletes an existing group. Users who are group members are not removed.
-
+    - Required when I(name) is used.
     type: str
     choices: [ present, absent ]
-    required: true
+  groups:
+    description:
+    - Specifies a list of groups to reconcile in one task.
+    - All the groups are read once with C(lsgroup -c ALL), then only the groups that differ are
+      created, changed with a single C(chgroup) command setting their attributes, members and
+      administrators, or removed.
+    - I(remove_keystore) and I(load_module) apply to all the groups.
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+        - Specifies the name of the group.
+        type: str
+        required: true
+      state:
+        description:
+        - C(present) creates the group or changes it.
+        - C(absent) deletes the group.
+        type: str
+        choices: [ present, absent ]
+        default: present
+      group_attributes:
+        description:
+        - Specifies the attributes of the group, see I(group_attributes).
+        type: dict
+      user_list_action:
+        description:
+        - Specifies to add or remove the I(users_list) to or from the members or admins of the group.
+        type: str
+        choices: [ add, remove ]
+      user_list_type:
+        description:
+        - Specifies if I(users_list) are members or admins of the group.
+        type: str
+        choices: [ members, admins ]
+      users_list:
+        description:
+        - Specifies the users to add or remove.
+        type: list
+        elements: str
   group_attributes:
     description:
     - Specifies the attributes for the group to be created or modified.
@@ -126,6 +172,19 @@ EXAMPLES = r'''
     state: modify
     name: ansible
     group_attributes: "admin=true"
+
+- name: Reconcile a list of groups
+  ibm.power_aix.group:
+    groups:
+    - name: ansible
+      user_list_action: 'add'
+      user_list_type: 'members'
+      users_list: ['test1', 'test2']
+    - name: dbadmin
+      group_attributes:
+        admin: false
+    - name: obsolete
+      state: absent
 '''
 
 RETURN = r'''
@@ -150,6 +209,11 @@ stderr':
     description: The standard error.
     returned: If the command failed.
     type: str
+groups:
+    description: The names of the groups created, modified and removed.
+    returned: When I(groups) is used.
+    type: dict
+    sample: {"created": ["dbadmin"], "modified": ["ansible"], "removed": ["obsolete"]}
 '''
 
 result = None
@@ -354,6 +418,12 @@ def group_exists(module):
         true if exists
         false otherwise
     """
+    if module.params['load_module'] == 'files':
+        try:
+            return module.params['name'] in read_colon_file('/etc/group')
+        except (OSError, UnicodeDecodeError) as exc:
+            module.debug(f"Cannot read /etc/group: { exc }, using lsgroup")
+
     cmd = ['lsgroup']
 
     cmd.append("-R")
@@ -371,14 +441,40 @@ def group_exists(module):
     return False
 
 
+def read_group_files(name):
+    """
+    Read the attributes of a group of the files load module from
+    /etc/group and /etc/security/group.
+    arguments:
+        name (str): The group name
+    return:
+        dict of the group attributes, None if the group does not exist
+    note:
+        Raises OSError if a file cannot be read
+    """
+    fields = read_colon_file('/etc/group').get(name)
+    if fields is None or len(fields) < 4:
+        return None
+    attrs = {'id': fields[2], 'users': fields[3]}
+    attrs.update(read_stanza_file('/etc/security/group').get(name) or {})
+    return attrs
+
+
 def get_group_attributes(module):
     """
     Retrieve all group attributes
     arguments:
         module(dict): The Ansible module
     return:
-        standard output of lsgroup <group name>
+        dict of the attributes read from the files for the files load
+        module, otherwise standard output of lsgroup <group name>
     """
+    if module.params['load_module'] == 'files':
+        try:
+            return read_group_files(module.params['name'])
+        except (OSError, UnicodeDecodeError) as exc:
+            module.debug(f"Cannot read the group files: { exc }, using lsgroup")
+
     cmd = ['lsgroup']
 
     cmd.append("-R")
@@ -391,6 +487,135 @@ def get_group_attributes(module):
     return out
 
 
+def get_all_groups(module):
+    """
+    Retrieve the attributes of all the groups with a single lsgroup command.
+    arguments:
+        module(dict): The Ansible module
+    note:
+        Exits with fail_json in case of error
+    return:
+        dict group name: group attributes
+    """
+    cmd = ['lsgroup', '-R', module.params['load_module'], '-c', 'ALL']
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        result['cmd'] = ' '.join(cmd)
+        result['rc'] = rc
+        result['stdout'] = stdout
+        result['stderr'] = stderr
+        result['msg'] = "Failed to list the groups."
+        module.fail_json(**result)
+    return parse_colon_listing(stdout)
+
+
+def group_changes(entry, current):
+    """
+    Compute the attributes to set on a group, the members or admins of the
+    user list action being set through the users or adms attribute.
+    arguments:
+        entry   (dict): The group of the 'groups' option
+        current (dict): The current group attributes, empty for a new group
+    return:
+        dict attribute: value of the attributes that differ
+    """
+    changes = {}
+    for attr, val in (entry['group_attributes'] or {}).items():
+        val = str(val).lower() if isinstance(val, bool) else str(val)
+        if current.get(attr, '') != val:
+            changes[attr] = val
+
+    if entry['user_list_action']:
+        attr = 'users' if entry['user_list_type'] == 'members' else 'adms'
+        value = changes.get(attr, current.get(attr, ''))
+        users = [user for user in value.split(',') if user]
+        if entry['user_list_action'] == 'add':
+            users += [user for user in entry['users_list'] if user not in users]
+        else:
+            users = [user for user in users if user not in entry['users_list']]
+        if ','.join(users) != current.get(attr, ''):
+            changes[attr] = ','.join(users)
+        else:
+            changes.pop(attr, None)
+    return changes
+
+
+def run_bulk_command(module, cmd, summary, msg):
+    """
+    Run a command of reconcile_groups.
+    note:
+        Exits with fail_json in case of error, the summary of the changes
+        already made is returned
+    """
+    rc, stdout, stderr = module.run_command(cmd)
+    result['cmd'] = ' '.join(cmd)
+    result['rc'] = rc
+    result['stdout'] = stdout
+    result['stderr'] = stderr
+    if rc != 0:
+        result['msg'] = msg
+        result['groups'] = summary
+        result['changed'] = any(summary.values())
+        module.fail_json(**result)
+
+
+def reconcile_groups(module):
+    """
+    Reconcile the list of groups of the 'groups' option with the system.
+    All the groups are read once, then at most one command is run for each
+    group.
+    arguments:
+        module  (dict): The Ansible module
+    note:
+        Exits with fail_json in case of error
+    return:
+        msg      (str): success message.
+    """
+    load_module = module.params['load_module']
+    names = [entry['name'] for entry in module.params['groups']]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        result['msg'] = f"Groups listed more than once: { ', '.join(duplicates) }"
+        module.fail_json(**result)
+    for entry in module.params['groups']:
+        if entry['user_list_action'] and (not entry['user_list_type'] or not entry['users_list']):
+            result['msg'] = f"Group { entry['name'] }: 'user_list_type' and 'users_list' are required with 'user_list_action'."
+            module.fail_json(**result)
+
+    current = get_all_groups(module)
+    summary = {'created': [], 'modified': [], 'removed': []}
+
+    for entry in module.params['groups']:
+        name = entry['name']
+        if entry['state'] == 'absent':
+            if name in current:
+                cmd = ['rmgroup', '-R', load_module]
+                if module.params['remove_keystore']:
+                    cmd.append('-p')
+                cmd.append(name)
+                run_bulk_command(module, cmd, summary, f"Unable to remove the group: { name }.")
+                summary['removed'].append(name)
+            continue
+
+        changes = group_changes(entry, current.get(name, {}))
+        attrs = [f"{ attr }={ val }" for attr, val in changes.items()]
+        if name not in current:
+            cmd = ['mkgroup', '-R', load_module] + attrs + [name]
+            run_bulk_command(module, cmd, summary, f"Failed to create group: { name }.")
+            summary['created'].append(name)
+        elif changes:
+            cmd = ['chgroup', '-R', load_module] + attrs + [name]
+            run_bulk_command(module, cmd, summary, f"Failed to modify attributes for group: { name }.")
+            summary['modified'].append(name)
+
+    result['groups'] = summary
+    result['changed'] = any(summary.values())
+    if not result['changed']:
+        return "No changes were made."
+    return f"Groups created: { len(summary['created']) }, modified: { len(summary['modified']) }, " \
+           f"removed: { len(summary['removed']) }"
+
+
 def main():
     """
     Main function
@@ -399,8 +624,16 @@ def main():
 
     module = AnsibleModule(
         argument_spec=dict(
-            state=dict(type='str', required=True, choices=['present', 'absent', 'modify']),
-            name=dict(type='str', required=True, aliases=['group']),
+            state=dict(type='str', choices=['present', 'absent', 'modify']),
+            name=dict(type='str', aliases=['group']),
+            groups=dict(type='list', elements='dict', options=dict(
+                name=dict(type='str', required=True),
+                state=dict(type='str', default='present', choices=['present', 'absent']),
+                group_attributes=dict(type='dict'),
+                user_list_action=dict(type='str', choices=['add', 'remove']),
+                user_list_type=dict(type='str', choices=['members', 'admins']),
+                users_list=dict(type='list', elements='str'),
+            )),
             group_attributes=dict(type='dict'),
             user_list_action=dict(type='str', choices=['add', 'remove']),
             user_list_type=dict(type='str', choices=['members', 'admins']),
@@ -408,6 +641,9 @@ def main():
             remove_keystore=dict(type='bool', default=True),
             load_module=dict(type='str', default='files', choices=['files', 'LDAP']),
         ),
+        mutually_exclusive=[['name', 'groups']],
+        required_one_of=[['name', 'groups']],
+        required_by={'name': 'state'},
         supports_check_mode=False
     )
 
@@ -421,6 +657,10 @@ def main():
     name = module.params['name']
     state = module.params['state']
 
+    if module.params['groups'] is not None:
+        result['msg'] = reconcile_groups(module)
+        module.exit_json(**result)
+
     if module.params['state'] == 'absent':
         if group_exists(module):
             result['msg'] = remove_group(module)
@@ -5,8 +5,14 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 from __future__ import absolute_import, division, print_function
+import queue
 import re
+import threading
+import time
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.hdcrypt import (
+    HDCRYPTMGR, conversion_rate, parse_table
+)
 
 __metaclass__ = type
 
@@ -70,6 +76,33 @@ options:
     - Password must also be encrypted.
     type: str
     required: true
+  max_parallel:
+    description:
+    - Specifies the maximum number of logical volumes converted at the same time.
+    - When greater than 1, the logical volumes are converted in parallel and the progress, throughput
+      and estimated remaining time of each conversion are reported in I(conversions).
+    type: int
+    default: 1
+  max_per_device:
+    description:
+    - When I(max_parallel) is greater than 1, specifies the maximum number of conversions running at
+      the same time on a physical volume, or on an adapter when I(placement=adapter).
+    type: int
+    default: 1
+  placement:
+    description:
+    - When I(max_parallel) is greater than 1, specifies the devices shared by the conversions.
+    - C(pv) limits the conversions on the physical volumes of the logical volumes.
+    - C(adapter) limits the conversions on the adapters of the paths to these physical volumes.
+    type: str
+    choices: [ pv, adapter ]
+    default: pv
+  poll_interval:
+    description:
+    - When I(max_parallel) is greater than 1, specifies the number of seconds between two polls of
+      the progress of the conversions with C(hdcryptmgr showconv).
+    type: int
+    default: 60
 notes:
   - You can refer to the IBM documentation for additional information on the commands used at
     U(https://www.ibm.com/docs/en/aix/7.2?topic=h-hdcryptmgr-command).
@@ -155,6 +188,16 @@ EXAMPLES = r'''
     device:
       pv: hdisk2, hdisk3
     password: abc
+
+- name: "Encrypt the LVs of datavg, four at a time and one per PV"
+  ibm.power_aix.hdcrypt_conv:
+    action: encrypt
+    device:
+      vg: datavg
+    password: abc
+    max_parallel: 4
+    max_per_device: 1
+    placement: pv
 '''
 
 RETURN = r'''
@@ -179,6 +222,25 @@ stderr:
     description: The standard error of the command.
     returned: always
     type: str
+conversions:
+    description:
+    - Progress of the conversion of each logical volume, with its state (queued, running, done or
+      failed), the devices it was scheduled on, its size in megabytes, the percentage converted, the
+      throughput in megabytes per second, the estimated remaining time and the elapsed time in seconds.
+    returned: When I(max_parallel) is greater than 1.
+    type: dict
+    sample:
+        {
+            "datalv01": {
+                "state": "done",
+                "devices": ["hdisk2"],
+                "size_mb": 10240,
+                "percent": 100,
+                "throughput_mb_s": 85.33,
+                "eta_seconds": 0,
+                "elapsed": 120
+            }
+        }
 '''
 
 result = None
@@ -268,6 +330,103 @@ expectPrompts = {
 ####################################################################################
 
 
+def convert_lv(module, name, action, status):
+    """
+    Runs the conversion of a Logical Volume, without failing the module so
+    that it can run in a thread.
+    arguments:
+        module: Ansible module argument spec.
+        name: Name of the logical volume to convert.
+        action: 'encrypt' or 'decrypt'.
+        status: Crypto status of the logical volume, given by hdcryptmgr showlv.
+    return:
+        dict with the cmd, rc, stdout and stderr of the last command, the
+        message, changed, failed (the conversion failed, the other
+        conversions can go on) and fatal (the module must fail).
+    """
+    password = module.params['password']
+    out = dict(cmd='', rc=0, stdout='', stderr='', msg='', changed=False, failed=False, fatal=False)
+
+    def run(cmd):
+        rc, stdout, stderr = module.run_command(cmd)
+        out.update(cmd=cmd, rc=rc, stdout=stdout, stderr=stderr)
+        return rc, stdout
+
+    if action == 'encrypt':
+        if status == "uninitialized":
+            if not check_password_strength(password):
+                cmd = expectPrompts['authinit_weak_pwd'] % (name, password, password)
+            else:
+                cmd = expectPrompts['authinit_strong_pwd'] % (name, password, password)
+        else:
+            if not check_password_strength(password):
+                cmd = expectPrompts['weak_pwd'] % (name, password, password, name)
+            else:
+                cmd = expectPrompts['strong_pwd'] % (name, password, password, name)
+
+        rc, stdout = run(cmd)
+        if rc != 0:
+            out['msg'] += f"Failed to encrypt logical volume {name}. Command '{cmd}' failed."
+            out['fatal'] = True
+        elif "0516-2038" in stdout:  # 0516-2038: hdcryptmgr plain2crypt error: Logical Volume of type paging, boot, and aio_cache are not able to be encrypted
+            out['msg'] += f"Logical volume {name} has type that is not supported for encryption, was not converted."
+        elif f"LV {name} is already encrypted." in stdout:
+            out['msg'] += f"LV {name} is already encrypted.\n"
+        else:
+            out['changed'] = True
+            out['msg'] += f"Successfully converted LV {name} to an encrypted LV.\n"
+        return out
+
+    cmd = expectPrompts['unlock'] % (name, password)
+    rc, stdout = run(cmd)
+    if "3020-0125" in stdout:
+        out['msg'] += f"Password to decrypt {name} was incorrect.\n"
+        out['failed'] = True
+        return out
+    if f"LV {name} is not encryption enabled." in stdout:
+        out['msg'] += f"LV {name} is already decrypted.\n"
+        return out
+    if rc != 0:
+        out['msg'] += f"Failed to unlock LV {name}. Command '{cmd}' failed."
+        out['fatal'] = True
+        return out
+    elif "Passphrase authentication succeeded." in stdout:
+        out['changed'] = True
+        out['msg'] += f"LV {name} was successfully unlocked.\n"
+
+    cmd = expectPrompts['decrypt'] % (name)
+    rc, stdout = run(cmd)
+    if rc != 0:
+        out['msg'] += f"Failed to decrypt logical volume {name}. Command '{cmd}' failed."
+        out['fatal'] = True
+    else:
+        out['changed'] = True
+        out['msg'] += f"Successfully converted LV {name} to a decrypted LV.\n"
+    return out
+
+
+def apply_conversion(module, out):
+    """
+    Reports the result of a conversion run by convert_lv in the module result.
+    arguments:
+        module: Ansible module argument spec.
+        out: Result of convert_lv.
+    note:
+        Exits with fail_json if the conversion failed and the module must fail.
+    """
+    global convert_failed
+
+    for key in ('cmd', 'rc', 'stdout', 'stderr'):
+        result[key] = out[key]
+    result['msg'] += out['msg']
+    if out['changed']:
+        result['changed'] = True
+    if out['failed']:
+        convert_failed = True
+    if out['fatal']:
+        module.fail_json(**result)
+
+
 def encrypt_lv(module, name):
     """
     Encrypts the Logical Volume it is passed
@@ -279,38 +438,12 @@ def encrypt_lv(module, name):
     return:
         None
     """
-    password = module.params['password']
     vg_name = get_vg_name(module, name)
 
     # Enable Encryption if not already enabled on the VG
     vg_encrypt_enabled(module, vg_name)
 
-    if crypto_status == "uninitialized":
-        if not check_password_strength(password):
-            cmd = expectPrompts['authinit_weak_pwd'] % (name, password, password)
-        else:
-            cmd = expectPrompts['authinit_strong_pwd'] % (name, password, password)
-    else:
-        if not check_password_strength(password):
-            cmd = expectPrompts['weak_pwd'] % (name, password, password, name)
-        else:
-            cmd = expectPrompts['strong_pwd'] % (name, password, password, name)
-
-    rc, stdout, stderr = module.run_command(cmd)
-    result['stdout'] = stdout
-    result['stderr'] = stderr
-    result['cmd'] = cmd
-    result['rc'] = rc
-    if rc != 0:
-        result['msg'] += f"Failed to encrypt logical volume {name}. Command '{cmd}' failed."
-        module.fail_json(**result)
-    elif "0516-2038" in stdout:  # 0516-2038: hdcryptmgr plain2crypt error: Logical Volume of type paging, boot, and aio_cache are not able to be encrypted
-        result['msg'] += f"Logical volume {name} has type that is not supported for encryption, was not converted."
-    elif f"LV {name} is already encrypted." in stdout:
-        result['msg'] += f"LV {name} is already encrypted.\n"
-    else:
-        result['changed'] = True
-        result['msg'] += f"Successfully converted LV {name} to an encrypted LV.\n"
+    apply_conversion(module, convert_lv(module, name, 'encrypt', crypto_status))
 
 
 def decrypt_lv(module, name):
@@ -322,39 +455,7 @@ def decrypt_lv(module, name):
     return:
         None
     """
-    global convert_failed
-
-    password = module.params['password']
-    cmd = expectPrompts['unlock'] % (name, password)
-    rc, stdout, stderr = module.run_command(cmd)
-    result['stdout'] = stdout
-    result['stderr'] = stderr
-    result['cmd'] = cmd
-    if "3020-0125" in stdout:
-        result['msg'] += f"Password to decrypt {name} was incorrect.\n"
-        convert_failed = True
-        return
-    if f"LV {name} is not encryption enabled." in stdout:
-        result['msg'] += f"LV {name} is already decrypted.\n"
-        return
-    if rc != 0:
-        result['msg'] += f"Failed to unlock LV {name}. Command '{cmd}' failed."
-        module.fail_json(**result)
-    elif "Passphrase authentication succeeded." in stdout:
-        result['changed'] = True
-        result['msg'] += f"LV {name} was successfully unlocked.\n"
-
-    cmd = expectPrompts['decrypt'] % (name)
-    rc, stdout, stderr = module.run_command(cmd)
-    result['stdout'] = stdout
-    result['stderr'] = stderr
-    result['cmd'] = cmd
-    if rc != 0:
-        result['msg'] += f"Failed to decrypt logical volume {name}. Command '{cmd}' failed."
-        module.fail_json(**result)
-    else:
-        result['changed'] = True
-        result['msg'] += f"Successfully converted LV {name} to a decrypted LV.\n"
+    apply_conversion(module, convert_lv(module, name, 'decrypt', crypto_status))
 
 
 def encrypt_pv(module, name):
@@ -647,6 +748,244 @@ def check_password_strength(password):
     return 1
 
 
+def get_lv_size(lv_props):
+    """
+    Gets the size of a Logical Volume from its properties.
+    arguments:
+        lv_props: The properties of the Logical Volume, output of lslv.
+    return:
+        size: The size of the logical volume in megabytes, 0 if it is not found
+    """
+    lps = re.search(r"^LPs:\s+(\d+)", lv_props, re.MULTILINE)
+    pp_size = re.search(r"PP SIZE:\s+(\d+)", lv_props)
+    if not lps or not pp_size:
+        return 0
+    return int(lps.group(1)) * int(pp_size.group(1))
+
+
+def get_lv_pvs(module, name):
+    """
+    Gets the Physical Volumes a Logical Volume is placed on.
+    arguments:
+        module: Ansible module argument spec.
+        name: Name of the logical volume.
+    return:
+        pv_list: The physical volumes of the logical volume, empty if they cannot be found
+    """
+    cmd = f"/usr/sbin/lslv -l {name}"
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        module.debug(f"Command '{cmd}' failed: {stderr}")
+        return []
+    return [line.split()[0] for line in stdout.splitlines()[2:] if line.strip()]
+
+
+def get_pv_adapters(module):
+    """
+    Gets the adapters of all the Physical Volumes with a single lspath command.
+    arguments:
+        module: Ansible module argument spec.
+    return:
+        adapters: dict {physical volume: set of the parent adapters of its paths}
+    """
+    cmd = ["/usr/sbin/lspath", "-F", "name:parent"]
+    rc, stdout, stderr = module.run_command(cmd)
+    adapters = {}
+    if rc != 0:
+        module.debug(f"Command '{' '.join(cmd)}' failed: {stderr}")
+        return adapters
+    for line in stdout.splitlines():
+        fields = line.split(':')
+        if len(fields) == 2:
+            adapters.setdefault(fields[0], set()).add(fields[1])
+    return adapters
+
+
+def get_percent(value):
+    """
+    return: the numeric value of a %_ENCRYPTED column, 0 if it is not a number
+    """
+    try:
+        return float(value.rstrip('%'))
+    except ValueError:
+        return 0.0
+
+
+class ConversionThread(threading.Thread):
+    """
+    Run the conversion of a Logical Volume in a thread.
+
+    The thread reports its end in the done queue of the scheduler.
+    """
+
+    def __init__(self, module, name, action, status, done):
+        self.module = module
+        self.lv = name
+        self.action = action
+        self.status = status
+        self.done = done
+        self.out = None
+        threading.Thread.__init__(self, name=f'ConversionThread({name})')
+
+    def run(self):
+        try:
+            self.out = convert_lv(self.module, self.lv, self.action, self.status)
+        except Exception as exc:
+            self.out = dict(cmd='', rc=1, stdout='', stderr='', msg=f"Unexpected error converting LV {self.lv}: {exc}\n",
+                            changed=False, failed=False, fatal=True)
+        finally:
+            self.done.put(self)
+
+
+def poll_conversions(module, action, conversions, samples, running):
+    """
+    Updates the progress, throughput and remaining time of the running
+    conversions with a single hdcryptmgr showconv command.
+    arguments:
+        module: Ansible module argument spec.
+        action: 'encrypt' or 'decrypt'.
+        conversions: Progress of the conversions, reported in the result.
+        samples: (start time, start progress) of the conversions.
+        running: Names of the logical volumes being converted.
+    """
+    cmd = [HDCRYPTMGR, "showconv"]
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        module.debug(f"Cannot get the conversions progress, command '{' '.join(cmd)}' failed: {stderr}")
+        return
+    now = time.time()
+    table = parse_table('conv', stdout)
+    for name in running:
+        if name not in table:
+            continue
+        percent = get_percent(table[name]['%_ENCRYPTED'])
+        if action == 'decrypt':
+            percent = 100 - percent
+        conversion = conversions[name]
+        throughput, eta = conversion_rate(conversion['size_mb'], samples[name][1], samples[name][0], percent, now)
+        conversion.update(percent=percent, throughput_mb_s=throughput, eta_seconds=eta,
+                          elapsed=int(now - samples[name][0]))
+        module.log(f"hdcrypt_conv - LV {name} {action}: {percent}% converted, "
+                   f"{throughput} MB/s, ETA {eta if eta is not None else 'unknown'} seconds")
+
+
+def schedule_lv_conversions(module, lvs, action):
+    """
+    Converts Logical Volumes in parallel. At most max_parallel conversions
+    run at the same time, and at most max_per_device on each physical
+    volume, or on each adapter when placement is 'adapter'. The progress
+    of the running conversions is polled every poll_interval seconds with a
+    single hdcryptmgr showconv command.
+    arguments:
+        module: Ansible module argument spec.
+        lvs: Names of the logical volumes to convert.
+        action: 'encrypt' or 'decrypt'.
+    note:
+        Exits with fail_json if a conversion failed and the module must fail,
+        after the other conversions end.
+    return:
+        None
+    """
+    global convert_failed
+
+    max_parallel = max(module.params['max_parallel'], 1)
+    max_per_device = max(module.params['max_per_device'], 1)
+
+    # crypto status of all the logical volumes at once
+    cmd = [HDCRYPTMGR, "showlv"] + lvs
+    rc, stdout, stderr = module.run_command(cmd)
+    table = parse_table('lv', stdout)
+    adapters = get_pv_adapters(module) if module.params['placement'] == 'adapter' else None
+
+    conversions = {}
+    samples = {}
+    resources = {}
+    vgs = set()
+    for name in lvs:
+        if name not in table:
+            convert_failed = True
+            result['msg'] += f"Logical volume {name} could not be found.\n"
+            continue
+        lv_props = get_lv_props(module, name)
+        if action == 'encrypt':
+            vg_name = re.search(r"VOLUME GROUP:\s+(\w+)", lv_props, re.MULTILINE).group(1)
+            if vg_name not in vgs:
+                # Enable Encryption if not already enabled on the VG
+                vg_encrypt_enabled(module, vg_name)
+                vgs.add(vg_name)
+        devices = set(get_lv_pvs(module, name))
+        if adapters is not None:
+            devices = set().union(*[adapters.get(pv, {pv}) for pv in devices])
+        resources[name] = devices
+        percent = get_percent(table[name]['%_ENCRYPTED'])
+        conversions[name] = dict(state='queued', devices=sorted(devices), size_mb=get_lv_size(lv_props),
+                                 percent=percent if action == 'encrypt' else 100 - percent,
+                                 throughput_mb_s=0.0, eta_seconds=None, elapsed=0)
+    result['conversions'] = conversions
+
+    done = queue.Queue()
+    todo = list(conversions)
+    running = {}
+    busy = {}
+    outs = {}
+    while todo or running:
+        for name in list(todo):
+            if len(running) >= max_parallel:
+                break
+            if any(busy.get(device, 0) >= max_per_device for device in resources[name]):
+                continue
+            todo.remove(name)
+            for device in resources[name]:
+                busy[device] = busy.get(device, 0) + 1
+            samples[name] = (time.time(), conversions[name]['percent'])
+            conversions[name]['state'] = 'running'
+            th = ConversionThread(module, name, action, table[name]['CRYPTO_STATUS'], done)
+            th.start()
+            running[name] = th
+
+        try:
+            th = done.get(timeout=module.params['poll_interval'])
+        except queue.Empty:
+            poll_conversions(module, action, conversions, samples, list(running))
+            continue
+
+        th.join()
+        del running[th.lv]
+        for device in resources[th.lv]:
+            busy[device] -= 1
+        outs[th.lv] = th.out
+        conversion = conversions[th.lv]
+        elapsed = time.time() - samples[th.lv][0]
+        if th.out['failed'] or th.out['fatal']:
+            conversion['state'] = 'failed'
+        else:
+            conversion['state'] = 'done'
+            throughput, eta = conversion_rate(conversion['size_mb'], samples[th.lv][1], samples[th.lv][0],
+                                              100, samples[th.lv][0] + elapsed)
+            conversion.update(percent=100, throughput_mb_s=throughput, eta_seconds=0)
+        conversion['elapsed'] = int(elapsed)
+        module.log(f"hdcrypt_conv - {action} progress: {len(outs)}/{len(conversions)} ended, "
+                   f"{len(running)} running, {len(todo)} queued")
+
+    fatal = None
+    last = None
+    for name in conversions:
+        out = last = outs[name]
+        result['msg'] += out['msg']
+        if out['changed']:
+            result['changed'] = True
+        if out['failed']:
+            convert_failed = True
+        if out['fatal'] and fatal is None:
+            fatal = out
+    last = fatal or last
+    if last:
+        for key in ('cmd', 'rc', 'stdout', 'stderr'):
+            result[key] = last[key]
+    if fatal:
+        module.fail_json(**result)
+
+
 ####################################################################################
 # Main Function
 ####################################################################################
@@ -668,6 +1007,10 @@ def main():
             action=dict(type='str', choices=['encrypt', 'decrypt'], required=True),
             device=dict(type='dict', required=True, options=device_spec),
             password=dict(type='str', required=True, no_log=True),
+            max_parallel=dict(type='int', default=1),
+            max_per_device=dict(type='int', default=1),
+            placement=dict(type='str', default='pv', choices=['pv', 'adapter']),
+            poll_interval=dict(type='int', default=60),
         ),
     )
 
@@ -693,12 +1036,17 @@ def main():
     for vg in vgs:
         lvs += get_lvs_of_vg(module, vg)
 
-    for lv in lvs:
-        if lv not in except_lvs and lv_exists(module, lv):
-            if action == 'encrypt':
-                encrypt_lv(module, lv)
-            elif action == 'decrypt':
-                decrypt_lv(module, lv)
+    if module.params['max_parallel'] > 1:
+        lvs = [lv for lv in dict.fromkeys(lvs) if lv not in except_lvs]
+        if lvs:
+            schedule_lv_conversions(module, lvs, action)
+    else:
+        for lv in lvs:
+            if lv not in except_lvs and lv_exists(module, lv):
+                if action == 'encrypt':
+                    encrypt_lv(module, lv)
+                elif action == 'decrypt':
+                    decrypt_lv(module, lv)
 
     if module.params['device']['pv'] is not None:
         for pv in module.params['device']['pv']:
@@ -33,8 +33,10 @@ options:
       C(pv) displays physical volume encryption capability;
       C(meta) displays encryption metadata related to devices;
       C(conv) displays status of all the active and stopped conversions;
+      C(all) displays the encryption status of all the volume groups, logical volumes and physical
+      volumes, or of the I(devices), with a single query per kind of device;
     type: str
-    choices: [ fact, meta, conv ]
+    choices: [ lv, vg, pv, meta, conv, all ]
     required: true
   device:
     description:
@@ -42,6 +44,13 @@ options:
     - Required for I(action=lv), I(action=pv) and I(action=meta).
     type: str
     required: true
+  devices:
+    description:
+    - When I(action=all), specifies the volume groups, logical volumes and physical volumes whose
+      encryption status is returned.
+    - The devices not found are listed in I(encryption_facts.missing), the module does not fail.
+    type: list
+    elements: str
 notes:
   - You can refer to the IBM documentation for additional information on the commands used at
     U(https://www.ibm.com/docs/en/aix/7.2?topic=h-hdcryptmgr-command).
@@ -79,6 +88,18 @@ EXAMPLES = r'''
 - name: Display all active and stopped conversions
   ibm.power_aix.hdcrypt_facts:
     action: conv
+
+- name: Display the encryption status of all the VGs, LVs and PVs
+  ibm.power_aix.hdcrypt_facts:
+    action: all
+
+- name: Display the encryption status of some devices
+  ibm.power_aix.hdcrypt_facts:
+    action: all
+    devices:
+      - datavg
+      - testlv
+      - hdisk1
 '''
 
 RETURN = r'''
@@ -127,10 +148,24 @@ conv_facts:
     description: Contains information about all the active and stopped conversions.
     returned: For I(action=conv)
     type: str(If no information is available) or list(If information is available)
+encryption_facts:
+    description:
+    - Encryption status of the volume groups, logical volumes and physical volumes indexed by name,
+      the devices not found and the error lines of the hdcryptmgr commands.
+    returned: For I(action=all)
+    type: dict
+    sample:
+        {
+            "vg": {"datavg": {"VG NAME / ID": "datavg", "ENCRYPTION ENABLED": "yes"}},
+            "lv": {"testlv": {"NAME": "testlv", "CRYPTO_STATUS": "encrypted", "%_ENCRYPTED": "100", "NOTE": ""}},
+            "pv": {"hdisk1": {"NAME": "hdisk1", "CRYPTO_STATUS": "disabled", "%_ENCRYPTED": "0", "NOTE": ""}},
+            "missing": [],
+            "errors": []
+        }
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import re
+from ansible_collections.ibm.power_aix.plugins.module_utils.hdcrypt import collect_status, parse_table
 
 results = dict(
     changed=False,
@@ -144,6 +179,7 @@ results = dict(
     pv_facts='',
     meta_facts='',
     conv_facts='',
+    encryption_facts={},
 )
 
 
@@ -229,32 +265,10 @@ def parse_facts(action, stdout):
     returns:
         parsed_output: Parsed standard output.
     """
-    stdout = stdout.splitlines()
-
-    parsed_output = {}
-    keys = {}
-
-    keys['vg'] = ["VG NAME / ID", "ENCRYPTION ENABLED"]
-    keys['lv'] = ["NAME", "CRYPTO_STATUS", "%_ENCRYPTED", "NOTE"]
-    keys['pv'] = ["NAME", "CRYPTO_STATUS", "%_ENCRYPTED", "NOTE"]
-    keys['conv'] = ["NAME", "TID/STATUS", "%_ENCRYPTED", "DIRECTION", "START_TIME"]
-
-    if len(stdout) == 1:
-        parsed_output = "No information was present on the system for your request."
-    else:
-        for line in stdout[1:]:
-            line = re.split(r"\s+", line)
-            key = line[0]
-            parsed_output[key] = {}
-            for it in range(len(keys[action])):
-                if it >= len(line):
-                    value = ""
-                else:
-                    value = line[it]
-
-                parsed_output[key][keys[action][it]] = value
+    if len(stdout.splitlines()) == 1:
+        return "No information was present on the system for your request."
 
-    return parsed_output
+    return parse_table(action, stdout)
 
 
 ####################################################################################
@@ -436,6 +450,25 @@ def disp_conv(module):
     return success_msg
 
 
+def get_all_facts(module, devices):
+    """
+    Displays the encryption status of all the VGs, LVs and PVs.
+    arguments:
+        module: Ansible module argument spec.
+        devices: Names of the devices to display, all the devices if None.
+    returns:
+        success message.
+    """
+    results['encryption_facts'] = collect_status(module, devices)
+    results['cmd'] = "hdcryptmgr showvg; hdcryptmgr showlv; hdcryptmgr showpv"
+    results['rc'] = 0
+
+    missing = results['encryption_facts']['missing']
+    if missing:
+        return f"Fetched encryption facts, the following devices were not found: {', '.join(missing)}"
+    return "Successfully fetched encryption facts, check 'encryption_facts' for more information."
+
+
 ####################################################################################
 # Main Function
 ####################################################################################
@@ -446,8 +479,9 @@ def main():
     module = AnsibleModule(
         supports_check_mode=True,
         argument_spec=dict(
-            action=dict(type='str', choices=['lv', 'vg', 'pv', 'meta', 'conv'], required=True),
+            action=dict(type='str', choices=['lv', 'vg', 'pv', 'meta', 'conv', 'all'], required=True),
             device=dict(type='str', default=""),
+            devices=dict(type='list', elements='str'),
         ),
     )
 
@@ -469,6 +503,10 @@ def main():
         results['pv_facts'] = parse_facts("pv", results['stdout'])
         module.exit_json(**results)
 
+    elif action == "all":
+        results['msg'] = get_all_facts(module, module.params['devices'])
+        module.exit_json(**results)
+
     elif action == "meta":
         results['msg'] = disp_meta(module, device)
         facts = results['stdout'].splitlines()
@@ -6,6 +6,7 @@
 
 from __future__ import absolute_import, division, print_function
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.stanza import read_colon_file
 __metaclass__ = type
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
@@ -222,6 +223,11 @@ def entry_exists(module):
         true if exists
         false otherwise
     """
+    try:
+        return module.params['name'] in read_colon_file('/etc/inittab')
+    except (OSError, UnicodeDecodeError) as exc:
+        module.debug(f"Cannot read /etc/inittab: { exc }, using lsitab")
+
     cmd = ["lsitab"]
     cmd.append(module.params['name'])
 
@@ -5,6 +5,7 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 from __future__ import absolute_import, division, print_function
+import difflib
 from ansible.module_utils.basic import AnsibleModule
 __metaclass__ = type
 
@@ -36,8 +37,11 @@ options:
     - C(change) to change filter rules.
     - C(import) to import filter rules from an export file.
     - C(export) to export filter rules to an export file.
+    - C(ruleset) to make the filter rules match the rules of I(ipv4) and I(ipv6), in their order.
+      Only the rules that differ are added, changed or removed, and the rules are activated once.
+      The auto-generated filter rules are left out of the ruleset.
     type: str
-    choices: [ add, check, change, import, export ]
+    choices: [ add, check, change, import, export, ruleset ]
     default: add
   directory:
     description:
@@ -73,6 +77,8 @@ options:
       rules:
         description:
         - Specifies the list of filter rules.
+        - When I(action=ruleset), specifies all the user-defined filter rules, in their order. The
+          addresses must be IP addresses and the actions C(remove) and C(move) are not supported.
         type: list
         elements: dict
         suboptions:
@@ -263,6 +269,25 @@ EXAMPLES = r'''
         - action: remove
           id: all
 
+- name: Make the IPv4 filter rules match a ruleset
+  mkfilt:
+    action: ruleset
+    ipv4:
+      default: deny
+      rules:
+        - action: permit
+          direction: inbound
+          d_opr: eq
+          d_port: 22
+          interface: en0
+          description: permit SSH requests from any clients
+        - action: permit
+          direction: outbound
+          s_opr: eq
+          s_port: 22
+          interface: en0
+          description: permit SSH answers to any clients
+
 - name: Export filter rules as is into export text files
   mkfilt:
     action: export
@@ -288,10 +313,28 @@ filter:
     description: The current filter settings
     returned: always
     type: dict
+ruleset:
+    description: Number of filter rules added, changed and removed per IP version.
+    returned: When I(action=ruleset).
+    type: dict
+    sample: {"ipv4": {"added": 1, "changed": 2, "removed": 0}}
 '''
 
 results = None
 
+ACTION_FLAGS = {
+    'permit': '-aP',
+    'deny': '-aD',
+    'shun_host': '-aH',
+    'shun_port': '-aS',
+    'if': '-aI',
+    'else': '-aL',
+    'endif': '-aE',
+}
+
+# Description of the auto-generated filter rules, left out of a ruleset
+AUTO_RULE_DESCRIPTION = 'Default Rule'
+
 
 def list_rules(module, version):
     """
@@ -394,6 +437,147 @@ def list_rules(module, version):
     return rules
 
 
+def rule_flags(rule, version):
+    """
+    Builds the genfilt/chfilt flags of a filter rule, except its action and ID.
+    """
+
+    flags = []
+
+    if rule['direction']:
+        if rule['direction'] == 'inbound':
+            flags += ['-wI']
+        elif rule['direction'] == 'outbound':
+            flags += ['-wO']
+        else:
+            flags += ['-wB']
+
+    if rule['icmp_type_opr'] and not rule['s_opr']:
+        flags += ['-o', rule['icmp_type_opr']]
+    if rule['icmp_type'] and not rule['s_port']:
+        flags += ['-p', rule['icmp_type']]
+    if rule['icmp_code_opr'] and not rule['d_opr']:
+        flags += ['-O', rule['icmp_code_opr']]
+    if rule['icmp_code'] and not rule['d_port']:
+        flags += ['-P', rule['icmp_code']]
+
+    # genfilt -s and -m flags are mandatory
+    if rule['s_addr']:
+        flags += ['-s', rule['s_addr']]
+    elif version == 'ipv4':
+        flags += ['-s', '0.0.0.0']
+    else:
+        flags += ['-s', '::']
+    if rule['s_mask']:
+        flags += ['-m', rule['s_mask']]
+    elif version == 'ipv4':
+        if rule['s_addr']:
+            flags += ['-m', '255.255.255.255']
+        else:
+            flags += ['-m', '0.0.0.0']
+    else:
+        if rule['s_addr']:
+            flags += ['-m', '128']
+        else:
+            flags += ['-m', '0']
+    if rule['s_opr']:
+        flags += ['-o', rule['s_opr']]
+    if rule['s_port']:
+        flags += ['-p', rule['s_port']]
+
+    if rule['d_addr']:
+        flags += ['-d', rule['d_addr']]
+    if rule['d_mask']:
+        flags += ['-M', rule['d_mask']]
+    elif version == 'ipv4':
+        # If -M not specified, it would be set to 255.255.255.255
+        if not rule['d_addr']:
+            flags += ['-M', '0.0.0.0']
+    else:
+        if not rule['d_addr']:
+            flags += ['-M', '0']
+    if rule['d_opr']:
+        flags += ['-O', rule['d_opr']]
+    if rule['d_port']:
+        flags += ['-P', rule['d_port']]
+
+    if rule['protocol']:
+        flags += ['-c', rule['protocol']]
+    if rule['description']:
+        flags += ['-D', rule['description']]
+    if rule['timeout']:
+        flags += ['-e', rule['timeout']]
+    if rule['fragment']:
+        flags += ['-f', rule['fragment']]
+    if rule['interface']:
+        flags += ['-i', rule['interface']]
+    if not rule['source_routing']:
+        flags += ['-gN']
+
+    if rule['routing']:
+        if rule['routing'] == 'route':
+            flags += ['-rR']
+        elif rule['routing'] == 'local':
+            flags += ['-rL']
+        else:
+            flags += ['-rB']
+
+    if rule['tunnel']:
+        flags += ['-t', rule['tunnel']]
+
+    if rule['antivirus']:
+        flags += ['-C', rule['antivirus']]
+    elif rule['pattern']:
+        flags += ['-x', rule['pattern']]
+    elif rule['pattern_filename']:
+        flags += ['-X', rule['pattern_filename']]
+
+    if rule['log']:
+        flags += ['-lY']
+
+    return flags
+
+
+def activate_rules(module, params, version):
+    """
+    Activates the filter rules and changes the default rule and the log
+    setting of the filter rule module.
+    """
+
+    vopt = '-v4' if version == 'ipv4' else '-v6'
+
+    cmd = ['mkfilt', vopt, '-u']
+    if params[version]['default'] is not None:
+        # Change the default rule
+        if params[version]['default'] == 'deny':
+            cmd += ['-zD']
+        else:
+            cmd += ['-zP']
+    ret, stdout, stderr = module.run_command(cmd)
+    results['stdout'] += stdout
+    results['stderr'] += stderr
+    if ret != 0:
+        msg_cmd = ' '.join(cmd)
+        results['msg'] = f'Could not activate filter: command \'{msg_cmd}\' \
+          failed with return code {ret}.'
+        module.fail_json(**results)
+
+    if params[version]['log'] is not None:
+        # Change the log setting of the filter rule module
+        logaction = 'start' if params[version]['log'] else 'stop'
+        cmd = ['mkfilt', vopt, '-g', logaction]
+        ret, stdout, stderr = module.run_command(cmd)
+        results['stdout'] += stdout
+        results['stderr'] += stderr
+        if ret != 0:
+            msg_cmd = ' '.join(cmd)
+            results['msg'] = f'Could not change logging: command \'{msg_cmd}\' \
+              failed with return code {ret}.'
+            module.fail_json(**results)
+        results['msg'] = "Changed log settings successfully."
+        results['changed'] = True
+
+
 def add_change_rules(module, params, version):
     """
     Adds a new filter rule or changes an existing one.
@@ -417,20 +601,8 @@ def add_change_rules(module, params, version):
             cmd = ['genfilt']
         cmd += [vopt]
 
-        if rule['action'] == 'permit':
-            cmd += ['-aP']
-        elif rule['action'] == 'deny':
-            cmd += ['-aD']
-        elif rule['action'] == 'shun_host':
-            cmd += ['-aH']
-        elif rule['action'] == 'shun_port':
-            cmd += ['-aS']
-        elif rule['action'] == 'if':
-            cmd += ['-aI']
-        elif rule['action'] == 'else':
-            cmd += ['-aL']
-        elif rule['action'] == 'endif':
-            cmd += ['-aE']
+        if rule['action'] in ACTION_FLAGS:
+            cmd += [ACTION_FLAGS[rule['action']]]
         elif rule['action'] == 'remove':
             if not rule['id']:
                 results['msg'] = 'action remove requires id'
@@ -469,96 +641,7 @@ def add_change_rules(module, params, version):
         if rule['id']:
             cmd += ['-n', rule['id']]
 
-        if rule['direction']:
-            if rule['direction'] == 'inbound':
-                cmd += ['-wI']
-            elif rule['direction'] == 'outbound':
-                cmd += ['-wO']
-            else:
-                cmd += ['-wB']
-
-        if rule['icmp_type_opr'] and not rule['s_opr']:
-            cmd += ['-o', rule['icmp_type_opr']]
-        if rule['icmp_type'] and not rule['s_port']:
-            cmd += ['-p', rule['icmp_type']]
-        if rule['icmp_code_opr'] and not rule['d_opr']:
-            cmd += ['-O', rule['icmp_code_opr']]
-        if rule['icmp_code'] and not rule['d_port']:
-            cmd += ['-P', rule['icmp_code']]
-
-        # genfilt -s and -m flags are mandatory
-        if rule['s_addr']:
-            cmd += ['-s', rule['s_addr']]
-        elif version == 'ipv4':
-            cmd += ['-s', '0.0.0.0']
-        else:
-            cmd += ['-s', '::']
-        if rule['s_mask']:
-            cmd += ['-m', rule['s_mask']]
-        elif version == 'ipv4':
-            if rule['s_addr']:
-                cmd += ['-m', '255.255.255.255']
-            else:
-                cmd += ['-m', '0.0.0.0']
-        else:
-            if rule['s_addr']:
-                cmd += ['-m', '128']
-            else:
-                cmd += ['-m', '0']
-        if rule['s_opr']:
-            cmd += ['-o', rule['s_opr']]
-        if rule['s_port']:
-            cmd += ['-p', rule['s_port']]
-
-        if rule['d_addr']:
-            cmd += ['-d', rule['d_addr']]
-        if rule['d_mask']:
-            cmd += ['-M', rule['d_mask']]
-        elif version == 'ipv4':
-            # If -M not specified, it would be set to 255.255.255.255
-            if not rule['d_addr']:
-                cmd += ['-M', '0.0.0.0']
-        else:
-            if not rule['d_addr']:
-                cmd += ['-M', '0']
-        if rule['d_opr']:
-            cmd += ['-O', rule['d_opr']]
-        if rule['d_port']:
-            cmd += ['-P', rule['d_port']]
-
-        if rule['protocol']:
-            cmd += ['-c', rule['protocol']]
-        if rule['description']:
-            cmd += ['-D', rule['description']]
-        if rule['timeout']:
-            cmd += ['-e', rule['timeout']]
-        if rule['fragment']:
-            cmd += ['-f', rule['fragment']]
-        if rule['interface']:
-            cmd += ['-i', rule['interface']]
-        if not rule['source_routing']:
-            cmd += ['-gN']
-
-        if rule['routing']:
-            if rule['routing'] == 'route':
-                cmd += ['-rR']
-            elif rule['routing'] == 'local':
-                cmd += ['-rL']
-            else:
-                cmd += ['-rB']
-
-        if rule['tunnel']:
-            cmd += ['-t', rule['tunnel']]
-
-        if rule['antivirus']:
-            cmd += ['-C', rule['antivirus']]
-        elif rule['pattern']:
-            cmd += ['-x', rule['pattern']]
-        elif rule['pattern_filename']:
-            cmd += ['-X', rule['pattern_filename']]
-
-        if rule['log']:
-            cmd += ['-lY']
+        cmd += rule_flags(rule, version)
 
         ret, stdout, stderr = module.run_command(cmd)
         results['stdout'] += stdout
@@ -571,39 +654,164 @@ def add_change_rules(module, params, version):
         results['msg'] = "Added the rules successfully."
         results['changed'] = True
 
-    # Activate the rules
-    cmd = ['mkfilt', vopt, '-u']
-    if params[version]['default'] is not None:
-        # Change the default rule
-        if params[version]['default'] == 'deny':
-            cmd += ['-zD']
-        else:
-            cmd += ['-zP']
-    ret, stdout, stderr = module.run_command(cmd)
-    results['stdout'] += stdout
-    results['stderr'] += stderr
-    if ret != 0:
-        msg_cmd = ' '.join(cmd)
-        results['msg'] = f'Could not activate filter: command \'{msg_cmd}\' \
-          failed with return code {ret}.'
-        module.fail_json(**results)
+    activate_rules(module, params, version)
 
-    if params[version]['log'] is not None:
-        # Change the log setting of the filter rule module
-        logaction = 'start' if params[version]['log'] else 'stop'
-        cmd = ['mkfilt', vopt, '-g', logaction]
+    return True
+
+
+def normalize_rule(rule, version):
+    """
+    Converts a filter rule of the module parameters into the form reported
+    by list_rules, the fields set to their default value being omitted.
+    """
+
+    any_addr, any_mask, host_mask = ('0.0.0.0', '0.0.0.0', '255.255.255.255') if version == 'ipv4' else ('::', '0', '128')
+
+    norm = {'action': rule['action']}
+    for addr, mask in (('s_addr', 's_mask'), ('d_addr', 'd_mask')):
+        if rule[addr] and rule[addr] != any_addr:
+            norm[addr] = rule[addr]
+        value = rule[mask] or (host_mask if rule[addr] else any_mask)
+        if value != any_mask:
+            norm[mask] = value
+
+    if rule['source_routing']:
+        norm['source_routing'] = True
+    if rule['protocol'] and rule['protocol'] != 'all':
+        norm['protocol'] = rule['protocol']
+    # genfilt uses the same flags for the ports and the ICMP type and code
+    s_opr, s_port = rule['s_opr'] or rule['icmp_type_opr'], rule['s_port'] or rule['icmp_type']
+    d_opr, d_port = rule['d_opr'] or rule['icmp_code_opr'], rule['d_port'] or rule['icmp_code']
+    s_keys, d_keys = (('icmp_type_opr', 'icmp_type'), ('icmp_code_opr', 'icmp_code')) \
+        if rule['protocol'] == 'icmp' else (('s_opr', 's_port'), ('d_opr', 'd_port'))
+    if s_opr:
+        norm[s_keys[0]], norm[s_keys[1]] = s_opr, s_port or '0'
+    if d_opr:
+        norm[d_keys[0]], norm[d_keys[1]] = d_opr, d_port or '0'
+
+    if rule['routing'] and rule['routing'] != 'both':
+        norm['routing'] = rule['routing']
+    if rule['direction'] and rule['direction'] != 'both':
+        norm['direction'] = rule['direction']
+    if rule['log']:
+        norm['log'] = True
+    if rule['fragment'] and rule['fragment'] != 'Y':
+        norm['fragment'] = rule['fragment']
+    if rule['tunnel'] and rule['tunnel'] != '0':
+        norm['tunnel'] = rule['tunnel']
+    if rule['interface'] and rule['interface'] != 'all':
+        norm['interface'] = rule['interface']
+    if rule['timeout'] and rule['timeout'] != '0':
+        norm['timeout'] = rule['timeout']
+    for key in ('antivirus', 'pattern', 'pattern_filename'):
+        if rule[key]:
+            norm[key] = rule[key]
+            break
+    norm['description'] = rule['description'] or ''
+    return norm
+
+
+def rule_key(rule):
+    """
+    Returns the hashable key of a rule in the form reported by list_rules,
+    its ID excluded.
+    """
+
+    return tuple(sorted((k, v) for k, v in rule.items() if k != 'id'))
+
+
+def diff_rules(current, desired):
+    """
+    Computes the minimal set of operations turning the current rules into
+    the desired ones, in their order. The rules are compared through their
+    hashed keys.
+
+    The operations are returned in the order they must be run, from the
+    end of the table, so that the IDs of the rules not processed yet do not
+    change:
+        ('change', rule id, index of the desired rule)
+        ('remove', rule id, None)
+        ('add', id of the rule to insert before or None to append, index of the desired rule)
+    """
+
+    matcher = difflib.SequenceMatcher(None, [rule_key(r) for r in current], [rule_key(r) for r in desired],
+                                      autojunk=False)
+
+    def position(i):
+        return current[i]['id'] if i < len(current) else None
+
+    def inserts(i, j1, j2):
+        before = position(i)
+        if before is None:
+            return [('add', None, j) for j in range(j1, j2)]
+        return [('add', str(int(before) + k), j1 + k) for k in range(j2 - j1)]
+
+    ops = []
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag == 'equal':
+            continue
+        count = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+        ops += [('remove', current[i]['id'], None) for i in reversed(range(i1 + count, i2))]
+        ops += [('change', current[i1 + k]['id'], j1 + k) for k in range(count)]
+        if j2 - j1 > count:
+            ops += inserts(i2, j1 + count, j2)
+    return ops
+
+
+def apply_ruleset(module, params, version):
+    """
+    Makes the filter rules match the ruleset: the rules are listed once,
+    then only the rules that differ are added, changed or removed, and the
+    rules are activated once.
+
+    Returns the rules when they were not modified, None otherwise.
+    """
+
+    vopt = '-v4' if version == 'ipv4' else '-v6'
+
+    if not params[version] or params[version]['rules'] is None:
+        return None
+
+    for rule in params[version]['rules']:
+        if rule['action'] not in ACTION_FLAGS:
+            results['msg'] = f'Action {rule["action"]} is not supported in a ruleset'
+            module.fail_json(**results)
+
+    rules = list_rules(module, version)
+    if rules is None:
+        module.fail_json(**results)
+    # Auto-generated rules are not part of the ruleset
+    current = [rule for rule in rules if rule['description'] != AUTO_RULE_DESCRIPTION]
+    desired = [normalize_rule(rule, version) for rule in params[version]['rules']]
+    ops = diff_rules(current, desired)
+
+    summary = {'added': 0, 'changed': 0, 'removed': 0}
+    for op, rule_id, index in ops:
+        if op == 'remove':
+            cmd = ['rmfilt', vopt, '-n', rule_id]
+        else:
+            rule = params[version]['rules'][index]
+            cmd = ['chfilt' if op == 'change' else 'genfilt', vopt, ACTION_FLAGS[rule['action']]]
+            if rule_id is not None:
+                cmd += ['-n', rule_id]
+            cmd += rule_flags(rule, version)
         ret, stdout, stderr = module.run_command(cmd)
         results['stdout'] += stdout
         results['stderr'] += stderr
         if ret != 0:
             msg_cmd = ' '.join(cmd)
-            results['msg'] = f'Could not change logging: command \'{msg_cmd}\' \
+            results['msg'] = f'Could not apply ruleset: command \'{msg_cmd}\' \
               failed with return code {ret}.'
             module.fail_json(**results)
-        results['msg'] = "Changed log settings successfully."
-        results['changed'] = True
+        summary[{'remove': 'removed', 'change': 'changed', 'add': 'added'}[op]] += 1
+    results.setdefault('ruleset', {})[version] = summary
 
-    return True
+    if ops:
+        results['msg'] = "Applied the ruleset successfully."
+        results['changed'] = True
+    if ops or params[version]['default'] is not None or params[version]['log'] is not None:
+        activate_rules(module, params, version)
+    return None if ops else rules
 
 
 def import_rules(module, params):
@@ -699,7 +907,7 @@ def main():
 
     module = AnsibleModule(
         argument_spec=dict(
-            action=dict(type='str', choices=['add', 'check', 'change', 'import', 'export'], default='add'),
+            action=dict(type='str', choices=['add', 'check', 'change', 'import', 'export', 'ruleset'], default='add'),
             directory=dict(type='str'),
             rawexport=dict(type='bool', default=False),
             ipv4=ipcommon,
@@ -721,10 +929,16 @@ def main():
     make_devices(module)
 
     action = module.params['action']
+    listed = {}
 
     if action == 'add' or action == 'change':
         add_change_rules(module, module.params, 'ipv4')
         add_change_rules(module, module.params, 'ipv6')
+    elif action == 'ruleset':
+        for version in ['ipv4', 'ipv6']:
+            rules = apply_ruleset(module, module.params, version)
+            if rules is not None:
+                listed[version] = rules
     elif action == 'import':
         import_rules(module, module.params)
     elif action == 'export':
@@ -733,10 +947,12 @@ def main():
         check_rules(module)
 
     results['filter'] = {}
-    rules = list_rules(module, 'ipv4')
-    results['filter']['ipv4'] = rules
-    rules = list_rules(module, 'ipv6')
-    results['filter']['ipv6'] = rules
+    for version in ['ipv4', 'ipv6']:
+        # Rules listed by the ruleset and not modified since
+        if version in listed:
+            results['filter'][version] = listed[version]
+        else:
+            results['filter'][version] = list_rules(module, version)
 
     if results['msg'] != '':
         results['msg'] += ' mkfilt completed successfully'
@@ -7,6 +7,9 @@
 from __future__ import absolute_import, division, print_function
 import re
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.mount_table import (
+    MountTable, MountTableError
+)
 
 __metaclass__ = type
 
@@ -89,6 +92,8 @@ options:
     description:
     - It specifies the name of the group to mount. It mounts/unmounts stanzas in the
       B(/etc/filesystems) file that contain the type=C(fs_type) attribute.
+    - The mount table is read once before and once after the whole group is mounted or unmounted
+      with a single command, which is not run if there is nothing to do.
     type: str
   vfsname:
     description:
@@ -180,58 +185,65 @@ stderr:
 result = None
 
 
-def is_mount_group_mounted(module, mount_group):
+def get_mount_table(module):
+    """
+    Takes a snapshot of the mounted filesystems
+    arguments:
+        module         (dict): Ansible module argument spec.
+    note:
+        Exits with fail_json in case of error
+    return:
+        MountTable with the mounted filesystems loaded
+    """
+    table = MountTable(module)
+    try:
+        table.mounted()
+    except MountTableError as exc:
+        result['msg'] = f"Failed to get the filesystem name. Command '{exc.cmd}' failed."
+        result['cmd'] = exc.cmd
+        result['rc'] = exc.rc
+        result['stdout'] = exc.stdout
+        result['stderr'] = exc.stderr
+        module.fail_json(**result)
+    return table
+
+
+def is_mount_group_mounted(module, mount_group, mount_points=None):
     """
     Determines which FS are already mounted in a mount group
     arguments:
         module         (dict): Ansible module argument spec.
         mount_group    (str): Name of the mount group/type.
+        mount_points  (list): Mount points of the mount group, fetched
+                              with lsfs if None.
     return:
         returns a dictionary where the keys are the mount
         point of the FS and the values are boolean values.
         True if the mount point is mounted, else False.
     """
 
-    # Fetch all FS in the mount_group
-    cmd = f"/usr/sbin/lsfs -u {mount_group}"
-    rc, stdout, stderr = module.run_command(cmd)
+    if mount_points is None:
+        # Fetch all FS in the mount_group
+        cmd = f"/usr/sbin/lsfs -u {mount_group}"
+        rc, stdout, stderr = module.run_command(cmd)
 
-    if rc != 0:
-        result['msg'] = f"Failed to fetch filesystem name in mount group '{mount_group}'"
-        result['cmd'] = cmd
-        result['rc'] = rc
-        result['stdout'] = stdout
-        result['stderr'] = stderr
-        module.fail_json(**result)
-    elif stdout == "":
-        result['msg'] = f"There are no filesytems in '{mount_group}' mount group."
-        module.fail_json(**result)
-
-    # parse results - retain only the mount points
-    mnt_grp_mounted = {}
-    lines = stdout.splitlines()[1:]
-    for line in lines:
-        mnt_pt = line.split()[2]
-        mnt_grp_mounted[mnt_pt] = False
-
-    # fetch all mounted FS
-    cmd = "/usr/bin/df"
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        result['msg'] = f"Failed to get the filesystem name. Command '{cmd}' failed."
-        result['cmd'] = cmd
-        result['rc'] = rc
-        result['stdout'] = stdout
-        result['stderr'] = stderr
-        module.fail_json(**result)
+        if rc != 0:
+            result['msg'] = f"Failed to fetch filesystem name in mount group '{mount_group}'"
+            result['cmd'] = cmd
+            result['rc'] = rc
+            result['stdout'] = stdout
+            result['stderr'] = stderr
+            module.fail_json(**result)
+        elif stdout == "":
+            result['msg'] = f"There are no filesytems in '{mount_group}' mount group."
+            module.fail_json(**result)
 
-    # check if FS (in mount group) is mounted
-    for mnt_pt in mnt_grp_mounted.keys():
-        found = re.search(mnt_pt, stdout, re.MULTILINE)
-        if found:
-            mnt_grp_mounted[mnt_pt] = True
+        # parse results - retain only the mount points
+        lines = stdout.splitlines()[1:]
+        mount_points = [line.split()[2] for line in lines if len(line.split()) > 2]
 
-    return mnt_grp_mounted
+    # check if FS (in mount group) is mounted, on the exact mount point
+    return get_mount_table(module).mounted_status(mount_points)
 
 
 def is_fspath_mounted(module):
@@ -260,34 +272,7 @@ def is_fspath_mounted(module):
         result['msg'] += ','.join(['mount_dir', 'mount_over_dir'])
         module.fail_json(**result)
 
-    cmd = "/usr/sbin/mount"
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        result['msg'] = f"Failed to get the filesystem name. Command '{cmd}' failed."
-        result['cmd'] = cmd
-        result['rc'] = rc
-        result['stdout'] = stdout
-        result['stderr'] = stderr
-        module.fail_json(**result)
-
-    fdirs = []
-    if stdout:
-        for ln in stdout.splitlines()[2:]:
-            ln = ln.split()
-            slash = 0
-            for value in ln:
-                if "/" in value:
-                    slash += 1
-                if slash == 2:
-                    fdirs.append(value)
-                    break
-
-    for fdir in fdirs:
-        found = re.search('^' + fs_name + '$', fdir)
-        if found:
-            return True
-
-    return False
+    return get_mount_table(module).is_mounted(fs_name)
 
 
 def fs_list(module):
@@ -346,6 +331,10 @@ def mount(module):
     if fs_type:
         cmd += f"-t {fs_type} "
         init_mnt_grp_mounted = is_mount_group_mounted(module, mount_group=fs_type)
+        if all(init_mnt_grp_mounted.values()):
+            for mnt_pt in init_mnt_grp_mounted:
+                result['msg'] += f"Filesystem/Mount point '{mnt_pt}' already mounted\n"
+            return
     elif module.params['mount_all'] == 'all':
         cmd += "all"
     else:
@@ -373,7 +362,8 @@ def mount(module):
 
     # if attempting to mount a mount group. may need to mount multiple FS
     if fs_type:
-        final_mnt_grp_mounted = is_mount_group_mounted(module, mount_group=fs_type)
+        final_mnt_grp_mounted = is_mount_group_mounted(module, mount_group=fs_type,
+                                                       mount_points=list(init_mnt_grp_mounted))
         num_mounted = 0
         for mnt_pt, mounted in init_mnt_grp_mounted.items():
             if mounted:
@@ -432,6 +422,11 @@ def umount(module):
     if cmd == "/usr/sbin/umount " and not mount_over_dir:
         result['msg'] = "Unmount failed, Please provide mount_over_dir value to unmount."
         module.fail_json(**result)
+    if fs_type and not (mount_all or node or mount_over_dir):
+        init_mnt_grp_mounted = is_mount_group_mounted(module, mount_group=fs_type)
+        if not any(init_mnt_grp_mounted.values()):
+            result['msg'] = f"There are no filesystems to unmount in '{fs_type}' mount group."
+            return
     if mount_over_dir:
         if is_fspath_mounted(module) is False:
             # if both mount_dir and mount_over_dir is given then check for
@@ -447,6 +442,21 @@ def umount(module):
     result['stdout'] = stdout
     result['stderr'] = stderr
 
+    if fs_type and not (mount_all or node or mount_over_dir):
+        final_mnt_grp_mounted = is_mount_group_mounted(module, mount_group=fs_type,
+                                                       mount_points=list(init_mnt_grp_mounted))
+        for mnt_pt, mounted in init_mnt_grp_mounted.items():
+            if not mounted:
+                result['msg'] += f"Filesystem/Mount point '{mnt_pt}' not mounted\n"
+            elif final_mnt_grp_mounted[mnt_pt]:
+                result['msg'] += f"Unmount failed - '{mnt_pt}'\n"
+                module.fail_json(**result)
+            else:
+                result['msg'] += f"Unmount successful - '{mnt_pt}'\n"
+        result['changed'] = True
+        result['rc'] = 0
+        return
+
     if mount_all == 'remote' or node or fs_type:
         # cannot find anything to umount
         pattern = r"0506-347"
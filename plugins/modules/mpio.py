@@ -6,6 +6,7 @@
 
 from __future__ import absolute_import, division, print_function
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils import mpio_paths
 __metaclass__ = type
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
@@ -35,6 +36,31 @@ options:
     - Indicates the logical device name of the parent device whose
       paths are to be returned.
     type: str
+  index:
+    description:
+    - Returns in I(mpio_facts.index) the number of paths by status of each device and of each
+      parent device.
+    type: bool
+    default: false
+  delta:
+    description:
+    - Returns in I(mpio_facts.delta) only the paths added, removed or whose status changed since the
+      previous run, instead of all the paths in I(mpio_facts.paths).
+    - The paths are saved on the target in I(snapshot_file) for the next run. All the paths are
+      reported as added when there is no snapshot taken with the same I(device) and I(parent).
+    type: bool
+    default: false
+  snapshot_file:
+    description:
+    - Specifies the file where the paths are saved when I(delta=true).
+    type: path
+    default: /var/adm/ansible/mpio_paths.json
+  drivers:
+    description:
+    - Specifies whether to return the drivers information in I(mpio_facts.drivers), it requires
+      running C(manage_disk_drivers).
+    type: bool
+    default: true
 '''
 
 EXAMPLES = r'''
@@ -44,6 +70,12 @@ EXAMPLES = r'''
 - name: Print the paths
   debug:
     var: mpio_info.mpio_facts.paths
+- name: Monitor the paths whose status changed since the last run
+  mpio:
+    index: true
+    delta: true
+    drivers: false
+  register: mpio_info
 '''
 
 RETURN = r'''
@@ -114,7 +146,7 @@ mpio_facts:
         paths:
           description:
           - Maps device name to parent devices and connections.
-          returned: always
+          returned: When I(delta=false).
           type: dict
           elements: dict
           sample:
@@ -134,27 +166,70 @@ mpio_facts:
                     }
                 }
             }
+        index:
+          description:
+          - Number of paths by status of each device, in total and per parent device, and of each
+            parent device. The status of a path is its path_status when its status is not
+            applicable.
+          returned: When I(index=true).
+          type: dict
+          sample:
+            "index": {
+                "disks": {
+                    "hdisk0": {
+                        "paths": 2,
+                        "status": {"Enabled": 1, "Failed": 1},
+                        "parents": {"fscsi0": {"Enabled": 1}, "fscsi1": {"Failed": 1}}
+                    }
+                },
+                "parents": {
+                    "fscsi0": {"disks": 1, "paths": 1, "status": {"Enabled": 1}},
+                    "fscsi1": {"disks": 1, "paths": 1, "status": {"Failed": 1}}
+                }
+            }
+        delta:
+          description:
+          - Paths added, removed and whose status changed since the previous run, a changed
+            path having its previous path_status and status in I(previous).
+          returned: When I(delta=true).
+          type: dict
+          sample:
+            "delta": {
+                "added": [],
+                "removed": [],
+                "changed": [
+                    {
+                        "name": "hdisk0",
+                        "parent": "fscsi1",
+                        "connection": "500507680b215661,0",
+                        "path_id": 1,
+                        "path_status": "Available",
+                        "status": "Failed",
+                        "previous": {"path_status": "Available", "status": "Enabled"}
+                    }
+                ]
+            }
 '''
 
 results = None
 
 
 def gather_facts(module):
-    paths = {}
+    facts = {}
     drivers = {}
 
     lspath_path = module.get_bin_path('lspath', required=True)
-    cmd = [lspath_path, '-F', 'name:parent:connection:path_id:path_status:status']
+    cmd = [lspath_path, '-F', mpio_paths.LSPATH_FORMAT]
     if module.params['device']:
         cmd += ['-l', module.params['device']]
     if module.params['parent']:
         cmd += ['-p', module.params['parent']]
 
     rc, stdout, stderr = module.run_command(cmd)
-    results['stdout'] = stdout
     results['cmd'] = ' '.join(cmd)
 
     if rc:
+        results['stdout'] = stdout
         results['stderr'] = stderr
         results['rc'] = 1
         results['msg'] = f"The following command failed: {' '.join(cmd)}."
@@ -162,26 +237,27 @@ def gather_facts(module):
             results['msg'] += " Invalid device provided."
         module.fail_json(**results)
 
-    for line in stdout.splitlines():
-        fields = line.split(':')
-        if len(fields) != 6:
-            continue
-        name = fields[0]
-        if name not in paths:
-            paths[name] = {}
-        parent = fields[1]
-        if parent not in paths[name]:
-            paths[name][parent] = {}
-        connection = fields[2]
-        if connection not in paths[name][parent]:
-            paths[name][parent][connection] = dict(path_id=int(fields[3]),
-                                                   path_status=fields[4])
-            if fields[5] != 'N/A':
-                paths[name][parent][connection]['status'] = fields[5]
+    entries = mpio_paths.parse_lspath(stdout)
+    if module.params['delta']:
+        # the output of lspath is not returned, only the paths that changed
+        scope = [module.params['device'], module.params['parent']]
+        current = mpio_paths.snapshot(entries)
+        previous = mpio_paths.load_snapshot(module, module.params['snapshot_file'], scope)
+        facts['delta'] = mpio_paths.compute_delta(previous, current)
+        mpio_paths.save_snapshot(module, module.params['snapshot_file'], scope, current)
+    else:
+        results['stdout'] = stdout
+        facts['paths'] = mpio_paths.build_paths(entries)
+    if module.params['index']:
+        facts['index'] = mpio_paths.build_index(entries)
+
+    facts['drivers'] = drivers
+    if not module.params['drivers']:
+        return facts
 
     manage_disk_drivers_path = module.get_bin_path('manage_disk_drivers')
     if not manage_disk_drivers_path:
-        return dict(paths=paths, drivers=drivers)
+        return facts
 
     cmd = [manage_disk_drivers_path, '-l']
 
@@ -206,7 +282,7 @@ def gather_facts(module):
         driver['options'] = options
         drivers[fields[0]] = driver
 
-    return dict(paths=paths, drivers=drivers)
+    return facts
 
 
 def main():
@@ -214,7 +290,11 @@ def main():
     module = AnsibleModule(
         argument_spec=dict(
             device=dict(type='str'),
-            parent=dict(type='str')
+            parent=dict(type='str'),
+            index=dict(type='bool', default=False),
+            delta=dict(type='bool', default=False),
+            snapshot_file=dict(type='path', default=mpio_paths.SNAPSHOT_FILE),
+            drivers=dict(type='bool', default=True),
         )
     )
 
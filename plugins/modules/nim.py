@@ -121,6 +121,23 @@ options:
     description:
     - Specifies name of the alternate disk where installation takes place
     type: str
+  oslevel_cache_ttl:
+    description:
+    - Specifies the number of seconds the oslevel of the targets is cached. The cache is shared
+      with the M(ibm.power_aix.nim_suma) module.
+    - The oslevel of the targets is removed from the cache when I(action=update) or
+      I(action=bos_inst).
+    - C(0) disables the cache, the oslevel is then retrieved on every run.
+    type: int
+    default: 300
+  max_parallel:
+    description:
+    - Specifies the maximum number of NIM clients updated at the same time when I(action=update)
+      in synchronous mode, and the maximum number of NIM clients whose interim fixes are removed at
+      the same time when I(force=yes).
+    - The progress of the operation on each target is reported in I(meta.<target>.progress).
+    type: int
+    default: 1
 notes:
   - You can refer to the IBM documentation for additional information on the NIM concept and command
     at U(https://www.ibm.com/support/knowledgecenter/ssw_aix_72/install/nim_concepts.html),
@@ -233,6 +250,15 @@ meta:
                     description: Standard error of the last command.
                     returned: If the command was run.
                     type: str
+                progress:
+                    description:
+                    - Progress of the last operation on the target, with its C(step), C(state) (queued,
+                      running, done or failed), C(elapsed) seconds and the last NIM C(info).
+                    - The interim fixes removal also reports the number of C(fixes) processed.
+                    returned: if I(action=update)
+                    type: dict
+                    sample: {"step": "customization", "state": "running", "elapsed": 754,
+                             "info": "Filesets processed: 112 of 420"}
         query:
             description: Queried information of all NIM objects of the specified type.
             returned: only for show action
@@ -311,11 +337,16 @@ nim_node:
         }
 '''
 
+import queue
 import re
-import threading
 import socket
+import threading
+import time
 # pylint: disable=wildcard-import,unused-wildcard-import,redefined-builtin
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_oslevel
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_state import parse_lsnim_state
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_targets
 
 results = None
 
@@ -493,20 +524,12 @@ def get_oslevels(module, targets):
         oslevels (dict): The oslevel of each target
     """
 
-    # Launch threads to collect information on targets
-    threads = []
-    oslevels = {}
-
-    for target in targets:
-        process = threading.Thread(target=run_oslevel_cmd,
-                                   args=(module, target, oslevels))
-        process.start()
-        threads.append(process)
-
-    for process in threads:
-        process.join(300)  # wait 5 min for c_rsh to timeout
-        if process.is_alive():
-            module.log(f'NIM - WARNING: { process } Not responding')
+    oslevels, errors = nim_oslevel.get_oslevels(module, targets, ttl=module.params['oslevel_cache_ttl'],
+                                                resolve=lambda target: get_target_ipaddr(module, target))
+    for target, error in errors.items():
+        msg = f'Failed to get oslevel on { target }. { error }'
+        results['meta']['messages'].append(msg)
+        module.log('NIM - Error: ' + msg)
 
     module.log(f'NIM - oslevels: { oslevels }')
     return oslevels
@@ -552,41 +575,6 @@ def check_if_allocated(module, provided_lpp_source, targets):
     return new_targets
 
 
-def run_oslevel_cmd(module, target, levels):
-    """
-    Run the oslevel command on target target.
-    Stores the output in the levels dictionary.
-
-    arguments:
-        target  (str): The NIM target name, can be 'master'
-        levels (dict): The results of the oslevel command
-    """
-
-    levels[target] = 'timedout'
-
-    cmd = ['/usr/bin/oslevel', '-s']
-    if target == 'master':
-        rc, stdout, stderr = module.run_command(cmd)
-    else:
-        rc, stdout, stderr = nim_exec(module, target, cmd)
-
-    if rc == 0:
-        module.debug(f'{ target } oslevel stdout: { stdout }')
-        if stderr.rstrip():
-            module.log(f'NIM command stderr: { stderr }')
-
-        # return stdout only ... stripped!
-        levels[target] = stdout.rstrip()
-    else:
-        command = ' '.join(cmd)
-        msg = f'Failed to get oslevel on { target }. Command \'{ command }\' failed'
-        results['meta']['messages'].append(msg + f', stderr: \'{ stderr }\'')
-        module.log('NIM - Error: ' + msg)
-        module.log(f'rc: { rc }')
-        module.log(f'stdout: { stdout }')
-        module.log(f'stderr: { stderr }')
-
-
 def get_nim_lpp_source(module):
     """
     Get the list of lpp_source defined on the nim master.
@@ -673,58 +661,8 @@ def expand_targets(targets):
         the list of existing machines matching the target patterns
     """
 
-    # Build clients list
-    clients = []
-    for target in targets:
-        # Build target(s) from keywords: all or *
-        if target.upper() == 'ALL' or target == '*':
-            clients = list(results['nim_node']['standalone'])
-            clients.extend(list(results['nim_node']['vios']))
-            continue
-
-        # Build target(s) from keywords: standalone or vios
-        if target.lower() == 'standalone' or target.lower() == 'vios':
-            clients.extend(list(results['nim_node'][target.lower()]))
-            continue
-
-        # Build target(s) from: range i.e. quimby[7:12]
-        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
-        if rmatch:
-            name = rmatch.group(1)
-            start = rmatch.group(2)
-            end = rmatch.group(3)
-
-            for i in range(int(start), int(end) + 1):
-                # target_results.append('{0}{1:02}'.format(name, i))
-                curr_name = name + str(i)
-                if curr_name in results['nim_node']['standalone']:
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: val*. i.e. quimby*
-        rmatch = re.match(r"(\w+)\*$", target)
-        if rmatch:
-
-            name = rmatch.group(1)
-
-            for curr_name in results['nim_node']['standalone']:
-                if re.match(rf"^{name}\.*", curr_name):
-                    clients.append(curr_name)
-            for curr_name in results['nim_node']['vios']:
-                if re.match(rf"^{name}\.*", curr_name):
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: all or *
-        if target.upper() == 'ALL' or target == '*':
-            clients = list(results['nim_node']['standalone'])
-            continue
-
-        # Build target(s)
-        if target in results['nim_node']['standalone'] or target in results['nim_node']['vios'] or target == 'master':
-            clients.append(target)
-
-    return list(set(clients))
+    groups = {'standalone': results['nim_node']['standalone'], 'vios': results['nim_node']['vios']}
+    return nim_targets.expand_targets(targets, groups=groups, extra=['master'])
 
 
 def perform_customization(module, lpp_source, target, is_async):
@@ -889,12 +827,12 @@ def remove_fix(module, target, fix):
 
     if rc != 0:
         msg = f'Failed to remove fix: {fix}. Command: {cmd} failed.'
-        results['meta']['target']['messages'].append(msg)
-        results['meta']['target']['messages'].append(f'stdout: {stdout}')
-        results['meta']['target']['messages'].append(f'stderr: {stderr}')
+        results['meta'][target]['messages'].append(msg)
+        results['meta'][target]['messages'].append(f'stdout: {stdout}')
+        results['meta'][target]['messages'].append(f'stderr: {stderr}')
     else:
         msg = f'Fix successfully removed: {fix}.'
-        results['meta']['target']['messages'].append(msg)
+        results['meta'][target]['messages'].append(msg)
         results['changed'] = True
 
     module.log(f'stdout: { stdout }')
@@ -979,6 +917,172 @@ def check_alt_disk(module, alt_disk_update_name, target_list):
     return target_miss
 
 
+PROGRESS_INTERVAL = 30
+progress_lock = threading.Lock()
+
+
+def set_progress(module, target, step, state, **kwargs):
+    """
+    Record the progress of an operation on a target in results['meta'].
+
+    arguments:
+        module  (dict): The Ansible module.
+        target   (str): The target name, can be 'master'.
+        step     (str): The operation, 'remove fixes' or 'customization'.
+        state    (str): queued, running, done or failed.
+        kwargs  (dict): Additional progress information, such as info.
+    """
+    with progress_lock:
+        progress = results['meta'][target].setdefault('progress', {})
+        now = time.time()
+        if progress.get('step') != step or (state == 'running' and progress.get('state') != 'running'):
+            progress.clear()
+            progress.update({'step': step, 'start': int(now)})
+        changed = progress.get('state') != state
+        progress['state'] = state
+        progress['elapsed'] = int(now - progress['start'])
+        progress.update(kwargs)
+        if changed and state != 'queued':
+            msg = f'{step} {state}'
+            if state != 'running':
+                msg += f' after {progress["elapsed"]} seconds'
+            results['meta'][target]['messages'].append(msg)
+            module.log(f'NIM - On {target} {msg}')
+
+
+def poll_progress(module, targets, step):
+    """
+    Record the NIM info of the targets with a single lsnim command, it
+    shows the progress of the NIM operation running on each target.
+
+    arguments:
+        module  (dict): The Ansible module.
+        targets (list): The NIM clients running the operation.
+        step     (str): The operation.
+    """
+    names = [target for target in targets if target != 'master']
+    if not names:
+        return
+    cmd = ['lsnim', '-Z', '-a', 'Cstate', '-a', 'info', '-a', 'Cstate_result'] + names
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        module.debug(f'NIM - cannot get progress, command {cmd} failed: {stderr}')
+        return
+    for name, state in parse_lsnim_state(stdout, names).items():
+        info = state['info'] or state['Cstate']
+        with progress_lock:
+            progress = results['meta'][name].get('progress', {})
+            if progress.get('state') != 'running' or progress.get('info') == info:
+                continue
+            progress['info'] = info
+            progress['elapsed'] = int(time.time() - progress['start'])
+        module.log(f'NIM - On {name} {step}: {info}')
+
+
+class NimTargetThread(threading.Thread):
+    """
+    Run an operation on a NIM client in a thread.
+
+    The thread reports its end in the done queue of the scheduler.
+    """
+
+    def __init__(self, module, target, func, done):
+        self.module = module
+        self.target = target
+        self.func = func
+        self.done = done
+        self.rc = None
+        threading.Thread.__init__(self, name=f'NimTargetThread({target})')
+
+    def run(self):
+        try:
+            self.rc = self.func(self.module, self.target)
+        except Exception as exc:
+            self.rc = 1
+            msg = f'Unexpected error: {exc}'
+            results['meta'][self.target]['messages'].append(msg)
+            self.module.log(f'NIM - Error: On {self.target} {msg}')
+        finally:
+            self.done.put(self)
+
+
+def run_parallel(module, targets, func, step, max_parallel, poll=False):
+    """
+    Run func(module, target) on each target, with at most
+    max_parallel operations at a time, in the order of targets.
+
+    While the operations run, their progress is recorded in
+    results['meta'][target]['progress'] and logged. When poll is set, the
+    NIM info of the running targets is polled every PROGRESS_INTERVAL
+    seconds with a single lsnim command.
+
+    arguments:
+        module       (dict): The Ansible module.
+        targets      (list): The NIM clients, can contain 'master'.
+        func     (function): The operation, returns a return code.
+        step          (str): The name of the operation.
+        max_parallel  (int): Maximum number of concurrent operations.
+        poll         (bool): Poll the NIM info of the targets.
+    return:
+        dictionary with the return code of each target
+    """
+    max_parallel = max(max_parallel or 1, 1)
+    done = queue.Queue()
+    todo = list(targets)
+    running = {}
+    rcs = {}
+    for target in todo:
+        set_progress(module, target, step, 'queued')
+
+    while todo or running:
+        while todo and len(running) < max_parallel:
+            target = todo.pop(0)
+            set_progress(module, target, step, 'running')
+            th = NimTargetThread(module, target, func, done)
+            th.start()
+            running[target] = th
+
+        try:
+            th = done.get(timeout=PROGRESS_INTERVAL)
+        except queue.Empty:
+            if poll:
+                poll_progress(module, list(running), step)
+            continue
+
+        th.join()
+        del running[th.target]
+        rcs[th.target] = th.rc
+        set_progress(module, th.target, step, 'done' if th.rc == 0 else 'failed')
+        module.log(f'NIM - {step} progress: {len(rcs)}/{len(targets)} ended, '
+                   f'{len(running)} running, {len(todo)} queued')
+
+    return rcs
+
+
+def remove_fixes(module, target):
+    """
+    Remove the interim fixes of a nim client, one after the other.
+
+    arguments:
+        module  (dict): The Ansible module.
+        target   (str): The target name, can be 'master'.
+    return:
+        the return code of the emgr list command
+    """
+
+    rc, fixes = list_fixes(module, target)
+    msg = f'Will remove as many interim fixes we can: {fixes}'
+    results['meta']['messages'].append(f'{target}: {msg}')
+    results['meta'][target]['messages'].append(msg)
+
+    removed = 0
+    for i, fix in enumerate(fixes):
+        if remove_fix(module, target, fix) == 0:
+            removed += 1
+        set_progress(module, target, 'remove fixes', 'running', fixes=f'{i + 1}/{len(fixes)}', removed=removed)
+    return rc
+
+
 def nim_update(module, params):
     """
     Update nim clients (targets) with a specified lpp_source.
@@ -1053,12 +1157,8 @@ def nim_update(module, params):
         msg = 'Force automatic removal of installed fixes: best effort'
         results['meta']['messages'].append(msg)
         module.log('NIM - ' + msg)
-        for target in target_list:
-            rc, fixes = list_fixes(module, target)
-            msg = f'Will remove as many interim fixes we can: {fixes}'
-            results['meta']['messages'].append(msg)
-            for fix in fixes:
-                remove_fix(module, target, fix)
+        # the fixes of the clients are removed concurrently
+        run_parallel(module, target_list, remove_fixes, 'remove fixes', params['max_parallel'])
 
     if async_update == 'yes':   # async update
         if lpp_source not in results['nim_node']['lpp_source']:
@@ -1072,6 +1172,8 @@ def nim_update(module, params):
         results['meta']['messages'].append(msg)
         module.log('NIM - ' + msg)
 
+        # the oslevel of the targets is about to change
+        nim_oslevel.invalidate_oslevels(module, target_list)
         rc = perform_customization(module, lpp_source, target_list, True)
         if rc:
             results['msg'] = 'Asynchronous software customization operation failed. See status and meta for details.'
@@ -1087,6 +1189,7 @@ def nim_update(module, params):
             else:
                 results['nim_node']['master']['oslevel'] = val
 
+        cust_lpp_sources = {}
         for target in target_list:
             # get current oslevel
             cur_oslevel = ''
@@ -1155,10 +1258,20 @@ def nim_update(module, params):
             msg = f'Synchronous software customization from {cur_oslevel} to {full_elts}.'
             results['meta'][target]['messages'].append(msg)
             module.log(f'NIM - On {target} ' + msg)
-
-            rc = perform_customization(module, new_lpp_source, target, False)
+            cust_lpp_sources[target] = new_lpp_source
+
+        # the oslevel of the targets is about to change, the cache is updated
+        # from this thread only, before and after the customizations, as an
+        # oslevel of a target can be saved by another module in the meantime
+        nim_oslevel.invalidate_oslevels(module, list(cust_lpp_sources))
+        # run the synchronous customizations concurrently
+        rcs = run_parallel(module, list(cust_lpp_sources),
+                           lambda module, target: perform_customization(module, cust_lpp_sources[target], target, False),
+                           'customization', params['max_parallel'], poll=True)
+        nim_oslevel.invalidate_oslevels(module, list(cust_lpp_sources))
+        for target in cust_lpp_sources:
             results['msg'] += f"{target} - {results['meta'][target]['messages']}"
-            if rc:
+            if rcs[target]:
                 results['status'][target] = 'FAILURE'
             else:
                 results['status'][target] = 'SUCCESS'
@@ -1398,6 +1511,7 @@ def nim_script(module, params):
     cmd += results['targets']
     cmd = ' '.join(cmd)
 
+    nim_oslevel.invalidate_oslevels(module, results['targets'])
     rc, stdout, stderr = module.run_command(cmd)
 
     results['cmd'] = cmd
@@ -1570,6 +1684,7 @@ def nim_bos_inst(module, params):
     cmd += results['targets']
     cmd = ' '.join(cmd)
 
+    nim_oslevel.invalidate_oslevels(module, results['targets'])
     rc, stdout, stderr = module.run_command(cmd)
 
     results['cmd'] = cmd
@@ -2026,6 +2141,8 @@ def main():
             boot_client=dict(type='bool', default=True),
             object_type=dict(type='str', default='all'),
             alt_disk_update_name=dict(type='str'),
+            oslevel_cache_ttl=dict(type='int', default=300),
+            max_parallel=dict(type='int', default=1),
         ),
         required_if=[
             ['action', 'update', ['targets', 'lpp_source']],
@@ -2108,6 +2225,7 @@ def main():
         params['asynchronous'] = asynchronous
         params['force'] = force
         params['alt_disk_update_name'] = alt_disk_update_name
+        params['max_parallel'] = module.params['max_parallel']
         nim_update(module, params)
 
     elif action == 'maintenance':
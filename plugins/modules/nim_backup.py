@@ -37,8 +37,11 @@ options:
     - C(restore) restores a backup on targets trough the NIM master.
     - C(view) displays the content of a VIOS backup, only for I(type=backup).
     - C(list) lists backups for targets on the NIM master.
+    - C(verify) computes the checksum of the backup images on the NIM master and compares it with
+      the checksum recorded in the I(catalog). The checksum of an image is recorded by its first
+      verification, if the image did not change since its creation.
     type: str
-    choices: [ create, restore, view, list ]
+    choices: [ create, restore, view, list, verify ]
     required: true
   type:
     description:
@@ -64,8 +67,8 @@ options:
     - C(*) or C(ALL) specifies all the NIM clients.
     - C(vios) or C(standalone) specifies all the NIM clients of this type.
     - Required when I(action=create) and I(action=restore).
-    - When I(action=list) it filters the results on the B(source_image) attribute of the NIM
-      resource.
+    - When I(action=list) or I(action=verify) it filters the results on the B(source_image)
+      attribute of the NIM resource.
     type: list
     elements: str
     required: false
@@ -211,6 +214,79 @@ options:
     - Can be used when I(action=restore) and I(type=savevg).
     type: bool
     default: no
+  max_parallel:
+    description:
+    - Specifies the maximum number of backup images created or verified at the same time.
+    - The next creation or verification starts as soon as one ends.
+    - Can be used when I(action=create) or I(action=verify).
+    type: int
+    default: 8
+  max_parallel_per_fs:
+    description:
+    - Specifies the maximum number of backup images written at the same time in the file system
+      holding I(location).
+    - It limits the load on the NIM master disk or NFS path of that file system.
+    - Can be used when I(action=create).
+    type: int
+    default: 4
+  space_check:
+    description:
+    - Specifies to estimate the size of each C(mksysb), C(ios_mksysb) or C(savevg) image from the used
+      size of the client volume group, and to start its creation only when the file system holding
+      I(location) has enough free space for it and for the creations in progress.
+    - A creation that cannot fit even when no other creation is in progress fails without being
+      started.
+    - Can be used when I(action=create).
+    type: bool
+    default: yes
+  catalog:
+    description:
+    - Specifies the path of the backup catalog on the NIM master.
+    - The catalog records the name, type, source client, oslevel, location, size, creation time,
+      inode and checksum of the backup resources. It is updated when backups are created and
+      restored, the images are not read at creation, their checksum is recorded by I(action=verify).
+    - When I(action=list) or I(action=view), the backups are looked up in the catalog instead of
+      querying NIM and reading the images.
+    - The catalog is built from the NIM resources when it does not exist. Otherwise it is checked
+      against the list of the backup NIM resources, the backups created, removed or renamed outside
+      of this module and the images that changed are updated in the catalog.
+    type: path
+    default: /var/adm/ansible/nim_backup_catalog.json
+  refresh_catalog:
+    description:
+    - Specifies to rebuild the catalog from the NIM resources, reading the attributes of all the
+      backups instead of the ones missing from the catalog.
+    - The checksums of the backups whose location, size, creation time and inode did not change are
+      kept.
+    type: bool
+    default: no
+  max_age:
+    description:
+    - Specifies to list only the backups created less than I(max_age) days ago.
+    - Can be used when I(action=list).
+    type: int
+  min_age:
+    description:
+    - Specifies to list only the backups created more than I(min_age) days ago.
+    - Can be used when I(action=list).
+    type: int
+  dedup_store:
+    description:
+    - Specifies the path of a deduplication store on the NIM master.
+    - When I(action=create) and I(type=mksysb), I(type=ios_mksysb) or I(type=savevg), the image created
+      is cut in content-defined chunks and only the chunks not already in the store are saved.
+    - When I(action=restore), an image missing from the I(location) of its NIM resource is rebuilt
+      from the store before the restore operation.
+    - When I(action=list), the backups in the store are reported with their deduplication information.
+    type: path
+  dedup_keep_image:
+    description:
+    - Specifies to keep the image created in I(location) once it is saved in I(dedup_store).
+    - When C(no), the image file is removed after it is saved, the NIM resource is kept and the image
+      is rebuilt when it is restored.
+    - Can be used when I(action=create) and I(dedup_store) is set.
+    type: bool
+    default: yes
   nim_node:
     description:
     - Allows to pass along NIM node info from a previous task to another so that it discovers NIM
@@ -237,6 +313,33 @@ EXAMPLES = r'''
     targets: nimclient1
     name_postfix: _mksysb
 
+- name: Create mksysb backups of all LPARs, four at a time
+  nim_backup:
+    action: create
+    targets: standalone
+    max_parallel: 4
+    max_parallel_per_fs: 4
+
+- name: Create mksysb backups of all LPARs and keep them only in a deduplication store
+  nim_backup:
+    action: create
+    targets: standalone
+    dedup_store: /export/nim/dedup
+    dedup_keep_image: no
+
+- name: List the mksysb backups of the LPARs older than 30 days
+  nim_backup:
+    action: list
+    type: mksysb
+    targets: standalone
+    min_age: 30
+
+- name: Verify the checksum of all mksysb backups, 16 images at a time
+  nim_backup:
+    action: verify
+    type: mksysb
+    max_parallel: 16
+
 - name: Restore a mksysb backup on a LPAR
   nim_backup:
     action: restore
@@ -312,8 +415,10 @@ status:
             sample: 'SUCCESS'
     sample: "{ nimclient01: 'SUCCESS', nimclient02: 'FAILURE' }"
 backup_info:
-    description: The backup NIM resource information.
-    returned: if I(action=list)
+    description:
+    - The backup NIM resource information.
+    - When the backup is found in the catalog, the information comes from the catalog.
+    returned: if I(action=list) or I(action=view)
     type: dict
     contains:
         <backup_name>:
@@ -323,6 +428,43 @@ backup_info:
                 <attribute>:
                     description: attribute of the <backup_name> resource
                     type: str
+                type:
+                    description: Type of the NIM resource.
+                    type: str
+                source_image:
+                    description: NIM client the backup has been created from.
+                    type: str
+                oslevel_s:
+                    description: Service pack level of the backup.
+                    type: str
+                location:
+                    description: Location of the backup image.
+                    type: str
+                size:
+                    description: Size in bytes of the backup image, from the catalog.
+                    type: int
+                ctime:
+                    description: Creation time of the backup image in seconds since the Epoch, from the catalog.
+                    type: int
+                inode:
+                    description: Inode of the backup image at creation, from the catalog.
+                    type: int
+                checksum:
+                    description: sha256 of the backup image computed by its first verification, from the catalog.
+                    type: str
+                restored:
+                    description: Last restore of the backup, with its target and time, from the catalog.
+                    type: dict
+                verify:
+                    description:
+                    - Result of the verification with the status, checksum, expected checksum, size,
+                      elapsed time and throughput in MB/s.
+                    - The status is C(OK), C(MISMATCH), C(MISSING) or C(RECORDED) when no checksum
+                      was recorded, the checksum computed is then recorded in the catalog. The status
+                      is C(MISMATCH) when no checksum was recorded and the size, modification time or
+                      inode of the image changed since its creation.
+                    returned: if I(action=verify)
+                    type: dict
     sample:
         "backup_info": {
             "ansible_img": {
@@ -360,6 +502,59 @@ backup_info:
                 "server"       : "master",
             }
         }
+verify:
+    description: Summary of the verification.
+    returned: if I(action=verify)
+    type: dict
+    contains:
+        images:
+            description: Number of images verified.
+            type: int
+        size:
+            description: Total size in bytes of the images verified.
+            type: int
+        elapsed:
+            description: Duration of the verification in seconds.
+            type: float
+        throughput:
+            description: Aggregated throughput in MB/s.
+            type: float
+        failed:
+            description: Backups whose image is missing or does not match its checksum.
+            type: list
+            elements: str
+    sample:
+        "verify": {
+            "images": 300,
+            "size": 3221225472000,
+            "elapsed": 5120.4,
+            "throughput": 600.0,
+            "failed": ["lpar12_sysb"]
+        }
+dedup:
+    description: Deduplication store information.
+    returned: if I(dedup_store) is set and I(action=list)
+    type: dict
+    contains:
+        images:
+            description: Number of images in the store.
+            type: int
+        size:
+            description: Total size in bytes of the images in the store.
+            type: int
+        stored_bytes:
+            description: Size in bytes of the chunks saved in the store.
+            type: int
+        dedup_ratio:
+            description: Ratio of the size of the images to the size of the chunks saved.
+            type: float
+    sample:
+        "dedup": {
+            "images": 150,
+            "size": 1932735283200,
+            "stored_bytes": 214748364800,
+            "dedup_ratio": 9.0
+        }
 nim_node:
     description: NIM node info. It can contains more information if passed as option I(nim_node).
     returned: always
@@ -431,6 +626,19 @@ meta:
                     returned: always
                     type: list
                     elements: str
+                estimated_size:
+                    description: Estimated size in bytes of the backup image used for the space check.
+                    returned: if I(action=create) and the size could be estimated
+                    type: int
+                dedup:
+                    description:
+                    - Deduplication information of the image saved in I(dedup_store).
+                    - Contains size, new_bytes, chunks, new_chunks, dedup_ratio, elapsed and throughput
+                      in MB/s when I(action=create).
+                    - Contains size, elapsed and throughput in MB/s when I(action=restore) and the image
+                      has been rebuilt.
+                    returned: if I(dedup_store) is set
+                    type: dict
                 res_name:
                     description:
                     - Name of the NIM resource created.
@@ -448,15 +656,27 @@ meta:
                     type: str
 '''
 
+import hashlib
+import json
 import os
 import re
+import tempfile
 import threading
+import time
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.dedup_store import DedupStore
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_targets
+from ansible_collections.ibm.power_aix.plugins.module_utils.worker_pool import run_parallel
 
 module = None
 results = None
 THRDS = []
+dedup_store = None
+CATALOG = {}
+catalog_lock = threading.Lock()
+BACKUP_TYPES = ['mksysb', 'ios_mksysb', 'ios_backup', 'savevg']
+READ_BUFSIZE = 1024 * 1024
 
 
 def start_threaded(thds):
@@ -619,49 +839,8 @@ def expand_targets(targets):
     return: the list of existing machines matching the target patterns
     """
 
-    clients = []
-    for target in targets:
-        # Build target(s) from keywords: all or *
-        if target.upper() == 'ALL' or target == '*':
-            clients = list(results['nim_node']['standalone'])
-            clients.extend(list(results['nim_node']['vios']))
-            break   # no need to continue because 'master' cannot be specified
-
-        # Build target(s) from keywords: standalone or vios
-        if target.lower() == 'standalone' or target.lower() == 'vios':
-            clients.extend(list(results['nim_node'][target.lower()]))
-            continue
-
-        # Build target(s) from: range i.e. quimby[7:12]
-        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
-        if rmatch:
-            name = rmatch.group(1)
-            start = rmatch.group(2)
-            end = rmatch.group(3)
-            for i in range(int(start), int(end) + 1):
-                # target_results.append('{0}{1:02}'.format(name, i))
-                curr_name = name + str(i)
-                if curr_name in results['nim_node']['standalone'] or curr_name in results['nim_node']['vios']:
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: val*. i.e. quimby*
-        rmatch = re.match(r"(\w+)\*$", target)
-        if rmatch:
-            name = rmatch.group(1)
-            for curr_name in results['nim_node']['standalone']:
-                if re.match(rf"^{name}\.*", curr_name):
-                    clients.append(curr_name)
-            for curr_name in results['nim_node']['vios']:
-                if re.match(rf"^{name}\.*", curr_name):
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: quimby05 quimby08 quimby12
-        if target in results['nim_node']['standalone'] or target in results['nim_node']['vios']:
-            clients.append(target)
-
-    return list(set(clients))
+    groups = {'standalone': results['nim_node']['standalone'], 'vios': results['nim_node']['vios']}
+    return nim_targets.expand_targets(targets, groups=groups)
 
 
 def build_name(target, name, prefix, postfix):
@@ -689,7 +868,695 @@ def build_name(target, name, prefix, postfix):
     return name
 
 
-@start_threaded(THRDS)
+def nim_exec(module, target, command):
+    """
+    Execute the specified command on the specified nim client using c_rsh.
+
+    arguments:
+        module  (dict): the module variable
+        target   (str): the NIM Client
+        command (list): command to execute
+    return:
+        rc      (int) return code of the command
+        stdout  (str) stdout of the command
+        stderr  (str) stderr of the command
+    """
+
+    node = target
+    for type in ['standalone', 'vios']:
+        if target in results['nim_node'][type] and 'if1' in results['nim_node'][type][target]:
+            fields = results['nim_node'][type][target]['if1'].split()
+            if len(fields) > 1:
+                node = fields[1]
+
+    cmd = ' '.join(command)
+    rcmd = f'( LC_ALL=C {cmd} ); echo rc=$?'
+    cmd = ['/usr/lpp/bos.sysmgt/nim/methods/c_rsh', node, rcmd]
+
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        return (rc, stdout, stderr)
+
+    s = re.search(r'rc=([-\d]+)$', stdout)
+    if s:
+        rc = int(s.group(1))
+        # remove the rc of c_rsh with echo $?
+        stdout = re.sub(r'rc=[-\d]+\n$', '', stdout)
+    module.debug(f'nim_exec command \'{cmd}\': rc:{rc}, output:{stdout}, stderr:{stderr}')
+
+    return (rc, stdout, stderr)
+
+
+def get_vg_used_size(module, target, vg):
+    """
+    Get the used size of a volume group of a NIM client, it gives an
+    estimation of the size of its backup image.
+
+    arguments:
+        module  (dict): the module variable
+        target   (str): the NIM Client
+        vg       (str): the volume group name
+    return:
+        the used size in bytes
+        None if it cannot be retrieved
+    """
+
+    rc, stdout, stderr = nim_exec(module, target, ['/usr/sbin/lsvg', vg])
+    if rc != 0:
+        module.log(f'Cannot get {vg} size on {target}, rc:{rc}, stdout:{stdout}, stderr:{stderr}')
+        return None
+
+    # VG STATE:           active                   USED PPs:       270 (17280 megabytes)
+    match_key = re.search(r"USED PPs:\s+\d+\s+\((\d+)\s+megabytes\)", stdout)
+    if not match_key:
+        module.log(f'Cannot get {vg} size on {target}, parsing error')
+        return None
+    return int(match_key.group(1)) * 1024 * 1024
+
+
+def estimate_backup_sizes(module, target_vgs, max_parallel):
+    """
+    Get the used size of the volume group to backup of each target in
+    parallel.
+
+    arguments:
+        module      (dict): the module variable
+        target_vgs  (dict): volume group to backup per target
+        max_parallel (int): maximum number of c_rsh run at the same time
+    return:
+        dictionary of target and estimated size in bytes, targets whose
+        size cannot be estimated are not in the dictionary
+    """
+    sizes = {}
+    sem = threading.Semaphore(max(max_parallel, 1))
+
+    def estimate(target, vg):
+        with sem:
+            size = get_vg_used_size(module, target, vg)
+        if size is not None:
+            sizes[target] = size
+
+    threads = []
+    for target, vg in target_vgs.items():
+        thd = threading.Thread(target=estimate, args=(target, vg))
+        thd.start()
+        threads.append(thd)
+    for thd in threads:
+        thd.join(300)
+    return sizes
+
+
+class BackupScheduler(object):
+    """
+    Schedule the backup image creations.
+
+    At most max_parallel creations run at the same time, and at most
+    max_parallel_per_fs of them write to the same file system. When the
+    estimated size of an image is known, its creation only starts when
+    the free space of the file system covers it and the part of the
+    estimated size of the creations in progress in this file system that
+    is not written yet. A job that cannot
+    fit in an idle file system fails without being started.
+    The next job starts as soon as a running one ends.
+    """
+
+    def __init__(self, module, max_parallel, max_parallel_per_fs):
+        self.module = module
+        self.max_parallel = max(max_parallel or 1, 1)
+        self.max_parallel_per_fs = max(max_parallel_per_fs or 1, 1)
+        self.pending = []
+        self.running = []
+        self._cond = threading.Condition()
+
+    def submit(self, target, func, args, location, size=None, image=None):
+        """
+        Queue a backup creation.
+
+        arguments:
+            target   (str): the NIM Client to backup
+            func    (func): the function creating the backup
+            args   (tuple): the arguments of func
+            location (str): the directory of the backup image
+            size     (int): the estimated size in bytes of the image or None
+            image    (str): the path of the backup image written by func
+        """
+        path = os.path.abspath(location)
+        if not os.path.exists(path):
+            if self.module.check_mode:
+                # the directory would be created in the file system of its parent
+                while not os.path.exists(path):
+                    path = os.path.dirname(path)
+            else:
+                os.makedirs(path)
+        self.pending.append({'target': target, 'func': func, 'args': args,
+                             'fs': os.stat(path).st_dev, 'location': location,
+                             'size': size or 0, 'image': image, 'initial': None})
+
+    def _fs_free(self, job):
+        stat = os.statvfs(job['location'])
+        return stat.f_bavail * stat.f_frsize
+
+    def _image_stat(self, job):
+        try:
+            return os.stat(job['image']) if job['image'] else None
+        except OSError:
+            return None
+
+    def _remaining(self, job):
+        """
+        Estimated size of a running creation not written yet, the free
+        space of the file system already accounts for the written part.
+        The size of an image that existed before the creation started,
+        and is written again in place, is not counted as written.
+        """
+        stat = self._image_stat(job)
+        written = 0
+        if stat is not None:
+            written = stat.st_size
+            if job['initial'] and job['initial'][0] == stat.st_ino:
+                written = max(stat.st_size - job['initial'][1], 0)
+        return max(job['size'] - written, 0)
+
+    def _run_job(self, job):
+        try:
+            job['func'](*job['args'])
+        except Exception as exc:
+            target = job['target']
+            results['meta'][target]['messages'].append(f'Backup creation failed: {exc}')
+            results['status'][target] = 'FAILURE'
+        finally:
+            with self._cond:
+                self.running.remove(job)
+                self._cond.notify_all()
+
+    def run(self):
+        """
+        Run the queued backup creations and wait for their end.
+        """
+        with self._cond:
+            while self.pending or self.running:
+                for job in list(self.pending):
+                    if len(self.running) >= self.max_parallel:
+                        break
+                    fs_jobs = [cur for cur in self.running if cur['fs'] == job['fs']]
+                    if len(fs_jobs) >= self.max_parallel_per_fs:
+                        continue
+                    if job['size']:
+                        in_progress = sum(self._remaining(cur) for cur in fs_jobs)
+                        free = self._fs_free(job)
+                        if job['size'] + in_progress > free:
+                            if fs_jobs:
+                                # wait for a creation in this file system to end
+                                continue
+                            target = job['target']
+                            msg = f'Not enough space in {job["location"]} to create the backup: '\
+                                  f'estimated size {job["size"]} bytes, free {free} bytes.'
+                            results['meta'][target]['messages'].append(msg)
+                            results['status'][target] = 'FAILURE'
+                            self.pending.remove(job)
+                            continue
+
+                    self.pending.remove(job)
+                    stat = self._image_stat(job)
+                    if stat is not None:
+                        job['initial'] = (stat.st_ino, stat.st_size)
+                    self.running.append(job)
+                    thd = threading.Thread(target=self._run_job, args=(job,))
+                    self.module.debug(f'Start backup creation thread for {job["target"]}')
+                    thd.start()
+
+                if self.running:
+                    self._cond.wait()
+
+
+def file_checksum(path, buf=None):
+    """
+    Compute the sha256 of a file by reading it by chunks.
+
+    arguments:
+        path      (str): the file path
+        buf (bytearray): the read buffer, allocated if not provided
+    return:
+        the hexadecimal digest
+        None if the file cannot be read
+    """
+
+    if buf is None:
+        buf = bytearray(READ_BUFSIZE)
+    view = memoryview(buf)
+    sha = hashlib.sha256()
+    try:
+        with open(path, 'rb', buffering=0) as fobj:
+            while True:
+                size = fobj.readinto(buf)
+                if not size:
+                    break
+                sha.update(view[:size])
+    except (IOError, OSError):
+        return None
+    return sha.hexdigest()
+
+
+def load_catalog(module, catalog_file):
+    """
+    Load the backup catalog from the NIM master.
+
+    arguments:
+        module        (dict): the module variable
+        catalog_file   (str): path of the catalog file
+    return:
+        a dictionary of catalog entries
+        None if the catalog does not exist or cannot be read
+    """
+
+    if not os.path.exists(catalog_file):
+        return None
+    try:
+        with open(catalog_file, 'r') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError) as exc:
+        module.log(f'[WARNING] Ignoring backup catalog {catalog_file}: {exc}')
+        return None
+    if not isinstance(catalog, dict):
+        module.log(f'[WARNING] Ignoring backup catalog {catalog_file}: bad format')
+        return None
+    return catalog
+
+
+def save_catalog(module, catalog_file):
+    """
+    Atomically write the backup catalog on the NIM master.
+    Failures are only logged, the catalog is rebuilt when it is missing.
+    """
+
+    catalog_dir = os.path.dirname(catalog_file) or '.'
+    try:
+        if not os.path.exists(catalog_dir):
+            os.makedirs(catalog_dir)
+        fd, tmp_file = tempfile.mkstemp(dir=catalog_dir, prefix='.nim_backup_')
+        with catalog_lock, os.fdopen(fd, 'w') as f:
+            json.dump(CATALOG, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, catalog_file)
+    except OSError as exc:
+        module.log(f'[WARNING] Failed to save backup catalog {catalog_file}: {exc}')
+
+
+def catalog_entry(info, previous=None):
+    """
+    Build a catalog entry from the attributes of a backup NIM resource.
+
+    arguments:
+        info      (dict): the NIM resource attributes
+        previous  (dict): the previous catalog entry of the resource
+    return:
+        the catalog entry
+    """
+
+    entry = {key: info[key] for key in ['type', 'source_image', 'oslevel_s', 'location'] if key in info}
+    entry['size'] = None
+    entry['ctime'] = None
+    entry['inode'] = None
+    entry['checksum'] = None
+    location = entry.get('location')
+    if location and os.path.isfile(location):
+        stat = os.stat(location)
+        entry['size'] = stat.st_size
+        entry['ctime'] = int(stat.st_mtime)
+        entry['inode'] = stat.st_ino
+    elif 'creation_date' in info:
+        try:
+            entry['ctime'] = int(time.mktime(time.strptime(info['creation_date'], '%a %b %d %H:%M:%S %Y')))
+        except ValueError:
+            pass
+
+    if previous:
+        if previous.get('location') == location and previous.get('size') == entry['size'] \
+                and previous.get('ctime') == entry['ctime'] and previous.get('inode') in (None, entry['inode']):
+            entry['checksum'] = previous.get('checksum')
+        if 'restored' in previous:
+            entry['restored'] = previous['restored']
+    return entry
+
+
+def rebuild_catalog(module):
+    """
+    Build the catalog from the backup NIM resources with a single lsnim.
+
+    arguments:
+        module  (dict): the module variable
+    note:
+        Exits with fail_json in case of error
+    """
+
+    cmd = ['lsnim', '-c', 'resources', '-l']
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        results['stdout'] = stdout
+        results['stderr'] = stderr
+        cmd = ' '.join(cmd)
+        results['msg'] = f'Cannot build the backup catalog. Command \'{cmd}\' failed with return code {rc}.'
+        module.fail_json(**results)
+
+    with catalog_lock:
+        previous = dict(CATALOG)
+        CATALOG.clear()
+        for name, info in build_dict(module, stdout).items():
+            if info.get('type') in BACKUP_TYPES:
+                CATALOG[name] = catalog_entry(info, previous.get(name))
+
+
+def validate_catalog(module):
+    """
+    Check the catalog against the backup NIM resources with a single
+    lsnim, for the backups created, removed or renamed outside of this
+    module. The entries of the resources that no longer exist are removed,
+    the resources missing from the catalog and the entries whose image
+    changed are read with one lsnim -l.
+
+    arguments:
+        module  (dict): the module variable
+    note:
+        Exits with fail_json in case of error
+    """
+
+    cmd = ['lsnim', '-c', 'resources']
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        results['stdout'] = stdout
+        results['stderr'] = stderr
+        cmd = ' '.join(cmd)
+        results['msg'] = f'Cannot check the backup catalog. Command \'{cmd}\' failed with return code {rc}.'
+        module.fail_json(**results)
+
+    names = set()
+    for line in stdout.splitlines():
+        fields = line.split()
+        if len(fields) >= 3 and fields[2] in BACKUP_TYPES:
+            names.add(fields[0])
+
+    with catalog_lock:
+        for name in set(CATALOG) - names:
+            module.debug(f'{name} is no longer a NIM resource, removed from the catalog')
+            del CATALOG[name]
+        stale = sorted(name for name in names if name not in CATALOG or image_changed(CATALOG[name]))
+    if not stale:
+        return
+
+    cmd = ['lsnim', '-l'] + stale
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        module.log(f'[WARNING] Cannot update the backup catalog, command \'{" ".join(cmd)}\' failed: {stderr}')
+        return
+    with catalog_lock:
+        for name, info in build_dict(module, stdout).items():
+            if info.get('type') in BACKUP_TYPES:
+                CATALOG[name] = catalog_entry(info, CATALOG.get(name))
+
+
+def image_changed(entry):
+    """
+    Check if the image of a catalog entry changed since it was recorded.
+
+    arguments:
+        entry  (dict): the catalog entry
+    return:
+        True if the image size, modification time or inode differs from the
+        entry, a missing image can be kept in the deduplication store only
+    """
+
+    location = entry.get('location')
+    if not location or entry.get('size') is None:
+        return False
+    try:
+        stat = os.stat(location)
+    except OSError:
+        return False
+    return stat.st_size != entry['size'] or int(stat.st_mtime) != entry.get('ctime') \
+        or entry.get('inode') not in (None, stat.st_ino)
+
+
+def catalog_add(module, target, name):
+    """
+    Add a backup that has just been created to the catalog. The image is
+    not read, its size, modification time and inode are recorded and its
+    checksum is computed by its first verification, unless it is taken
+    from the deduplication store.
+
+    arguments:
+        module  (dict): the module variable
+        target   (str): the NIM Client of the backup
+        name     (str): the backup NIM resource name
+    """
+
+    cmd = ['lsnim', '-l', name]
+    rc, stdout, stderr = module.run_command(cmd)
+    info = build_dict(module, stdout).get(name) if rc == 0 else None
+    if not info:
+        results['meta'][target]['messages'].append(f'Warning: cannot add {name} to the backup catalog.')
+        return
+
+    entry = catalog_entry(info)
+    entry.setdefault('source_image', target)
+    recipe = dedup_store.recipe(name) if dedup_store else None
+    if recipe:
+        entry['checksum'] = recipe['sha256']
+        entry['size'] = recipe['size']
+        entry['ctime'] = recipe['ctime']
+    with catalog_lock:
+        CATALOG[name] = entry
+
+
+def catalog_restored(name, target, removed=False):
+    """
+    Record the restore of a backup in the catalog.
+
+    arguments:
+        name     (str): the backup NIM resource name
+        target   (str): the NIM Client the backup has been restored on
+        removed (bool): the backup resource has been removed
+    """
+
+    with catalog_lock:
+        if removed:
+            CATALOG.pop(name, None)
+        elif name in CATALOG:
+            CATALOG[name]['restored'] = {'target': target, 'time': int(time.time())}
+
+
+def verify_backup(module, name, entry, buf):
+    """
+    Compute the checksum of a backup image and compare it with the
+    checksum recorded in the catalog.
+
+    arguments:
+        module     (dict): the module variable
+        name        (str): the backup NIM resource name
+        entry      (dict): the catalog entry of the backup
+        buf   (bytearray): the read buffer of the calling thread
+    return:
+        dictionary with the status, checksum, expected, size, elapsed
+        and throughput of the verification
+    """
+
+    start = time.time()
+    location = entry.get('location')
+    verify = {'status': 'MISSING', 'checksum': None, 'expected': entry.get('checksum'), 'size': entry.get('size')}
+    changed = False
+    if location and os.path.isfile(location):
+        verify['size'] = os.path.getsize(location)
+        # the checksum recorded by the first verification must be the one
+        # of the image created
+        changed = verify['expected'] is None and image_changed(entry)
+        if not changed:
+            verify['checksum'] = file_checksum(location, buf)
+    elif dedup_store and dedup_store.recipe(name):
+        # image only kept in the deduplication store
+        try:
+            verify['checksum'] = dedup_store.verify(name)[0]
+        except ValueError as exc:
+            module.log(f'Cannot verify {name} in deduplication store: {exc}')
+
+    if changed:
+        verify['status'] = 'MISMATCH'
+    elif verify['checksum'] is not None:
+        if verify['expected'] is None:
+            verify['status'] = 'RECORDED'
+        elif verify['checksum'] == verify['expected']:
+            verify['status'] = 'OK'
+        else:
+            verify['status'] = 'MISMATCH'
+
+    elapsed = time.time() - start
+    verify['elapsed'] = round(elapsed, 3)
+    size = verify['size'] or 0
+    verify['throughput'] = round(size / (1024 * 1024) / elapsed, 2) if elapsed and verify['checksum'] else None
+    return verify
+
+
+def nim_verify_backup(module, target, objtype, params):
+    """
+    Verify the backup images of the catalog in parallel.
+
+    arguments:
+        module  (dict): the module variable
+        target  (list): the NIM Clients to filter the backups
+        objtype  (str): the type of the backups to verify
+        params  (dict): the NIM command parameters
+    note:
+        Set results['status'][source] with the status of the backups of
+        each source client
+    return:
+        backup_info (dict): the backups information with their verification
+    """
+
+    with catalog_lock:
+        if params['name']:
+            backup_info = {params['name']: dict(CATALOG[params['name']])} if params['name'] in CATALOG else {}
+        else:
+            backup_info = {name: dict(entry) for name, entry in CATALOG.items()
+                           if entry.get('type') == objtype and (not target or entry.get('source_image') in target)}
+    if params['name'] and not backup_info:
+        results['msg'] = f'Backup {params["name"]} not found in the catalog.'
+        module.fail_json(**results)
+
+    # each thread reuses its read buffer for all its images
+    local = threading.local()
+
+    def verify_image(name):
+        if not hasattr(local, 'buf'):
+            local.buf = bytearray(READ_BUFSIZE)
+        backup_info[name]['verify'] = verify_backup(module, name, backup_info[name], local.buf)
+
+    start = time.time()
+    run_parallel(verify_image, sorted(backup_info), params['max_parallel'], name='VerifyThread')
+    elapsed = time.time() - start
+
+    failed = []
+    size = 0
+    for name in sorted(backup_info):
+        verify = backup_info[name]['verify']
+        source = backup_info[name].get('source_image', name)
+        results['meta'].setdefault(source, {'messages': []})
+        if verify['status'] in ['MISSING', 'MISMATCH']:
+            failed.append(name)
+            results['status'][source] = 'FAILURE'
+            results['meta'][source]['messages'].append(f'Backup {name} verification failed: {verify["status"]}.')
+            continue
+        size += verify['size'] or 0
+        if results['status'].get(source) != 'FAILURE':
+            results['status'][source] = 'SUCCESS'
+        results['meta'][source]['messages'].append(f'Backup {name} verification: {verify["status"]}.')
+        if verify['status'] == 'RECORDED':
+            with catalog_lock:
+                if name in CATALOG:
+                    CATALOG[name]['checksum'] = verify['checksum']
+
+    results['verify'] = {
+        'images': len(backup_info),
+        'size': size,
+        'elapsed': round(elapsed, 3),
+        'throughput': round(size / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        'failed': failed,
+    }
+    return backup_info
+
+
+def get_resource_location(module, name):
+    """
+    Get the location attribute of a NIM resource.
+
+    arguments:
+        module  (dict): the module variable
+        name     (str): the NIM resource name
+    return:
+        the location
+        None if it cannot be retrieved
+    """
+
+    cmd = ['lsnim', '-a', 'location', name]
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        return None
+    match_key = re.search(r"^\s*location\s+=\s+(\S+)", stdout, re.MULTILINE)
+    if not match_key:
+        return None
+    return match_key.group(1)
+
+
+def dedup_ingest(module, target, objtype, name, location, params):
+    """
+    Save a backup image in the deduplication store.
+
+    arguments:
+        module  (dict): the module variable
+        target   (str): the NIM Client of the backup
+        objtype  (str): the type of the backup
+        name     (str): the backup NIM resource name
+        location (str): the backup image file
+        params  (dict): the NIM command parameters
+    note:
+        the backup is still usable if the ingest fails, only a message
+        is added in that case
+    return:
+        True if the image has been saved
+        False otherwise
+    """
+
+    try:
+        stats = dedup_store.ingest(location, name, source=target, type=objtype, location=location)
+    except (IOError, OSError) as exc:
+        results['meta'][target]['messages'].append(f'Warning: cannot save {name} in deduplication store {dedup_store.path}: {exc}')
+        return False
+
+    results['meta'][target]['dedup'] = stats
+    throughput = stats['throughput']
+    results['meta'][target]['messages'].append(f'{name} saved in deduplication store {dedup_store.path}: '
+                                               f'dedup ratio {stats["dedup_ratio"]}, {throughput} MB/s.')
+    if not params['dedup_keep_image']:
+        os.remove(location)
+        results['meta'][target]['messages'].append(f'Image {location} removed, it is kept in the deduplication store.')
+    return True
+
+
+def dedup_reconstitute(module, target, name):
+    """
+    Rebuild the image of a backup NIM resource from the deduplication store
+    if it is missing from its location.
+
+    arguments:
+        module  (dict): the module variable
+        target   (str): the NIM Client to restore the backup on
+        name     (str): the backup NIM resource name
+    note:
+        set results['status'][target] in case of failure
+    return:
+        True if the image is present or has been rebuilt
+        False otherwise
+    """
+
+    location = get_resource_location(module, name)
+    if location is None or os.path.exists(location):
+        return True
+    if dedup_store.recipe(name) is None:
+        results['meta'][target]['messages'].append(f'Image {location} of {name} is missing and not in deduplication store {dedup_store.path}.')
+        results['status'][target] = 'FAILURE'
+        return False
+    if module.check_mode:
+        results['meta'][target]['messages'].append(f'Image {location} of {name} would be rebuilt from deduplication store {dedup_store.path}.')
+        return True
+
+    try:
+        stats = dedup_store.reconstitute(name, location)
+    except (IOError, OSError, ValueError) as exc:
+        results['meta'][target]['messages'].append(f'Cannot rebuild {location} from deduplication store {dedup_store.path}: {exc}')
+        results['status'][target] = 'FAILURE'
+        return False
+
+    results['meta'][target]['dedup'] = stats
+    results['meta'][target]['messages'].append(f'Image {location} of {name} rebuilt from deduplication store: {stats["throughput"]} MB/s.')
+    return True
+
+
 def nim_mksysb_create(module, target, objtype, params):
     """
     Perform a NIM define operation to create a mksysb
@@ -746,6 +1613,10 @@ def nim_mksysb_create(module, target, objtype, params):
         results['meta'][target]['res_name'] = name
         results['status'][target] = 'SUCCESS'
         results['changed'] = True
+
+        if dedup_store:
+            dedup_ingest(module, target, objtype, name, location, params)
+        catalog_add(module, target, name)
     else:
         cmd = ' '.join(cmd)
         results['meta'][target]['messages'].append(f'Command \'{cmd}\' has no preview mode, execution skipped.')
@@ -773,6 +1644,9 @@ def nim_mksysb_restore(module, target, params):
     name = build_name(target, params['name'], params['name_prefix'], params['name_postfix'])
     spot_name = build_name(target, params['spot_name'], params['spot_prefix'], params['spot_postfix'])
 
+    if dedup_store and not dedup_reconstitute(module, target, name):
+        return False
+
     cmd = ['lsnim', spot_name]
     rc, stdout, stderr = module.run_command(cmd)
     if rc == 0:
@@ -835,6 +1709,7 @@ def nim_mksysb_restore(module, target, params):
             return False
 
         results['meta'][target]['messages'].append(f'Backup {name} has been restored.')
+        catalog_restored(name, target)
         results['status'][target] = 'SUCCESS'
         results['changed'] = True
     else:
@@ -870,13 +1745,13 @@ def nim_mksysb_restore(module, target, params):
                 return False
 
             results['meta'][target]['messages'].append(f'Backup {name} has been removed.')
+            catalog_restored(name, target, removed=True)
         else:
             results['meta'][target]['messages'].append(f'Command \'{cmd}\' has no preview mode, execution skipped.')
 
     return True
 
 
-@start_threaded(THRDS)
 def nim_iosbackup_create(module, target, params):
     """
     Perform a define NIM operation to create a backup of a VIOS (ios_backup)
@@ -922,6 +1797,7 @@ def nim_iosbackup_create(module, target, params):
         results['meta'][target]['res_name'] = name
         results['status'][target] = 'SUCCESS'
         results['changed'] = True
+        catalog_add(module, target, name)
     else:
         results['meta'][target]['messages'].append(f'Command \'{cmd}\' has no preview mode, execution skipped.')
 
@@ -964,6 +1840,7 @@ def nim_iosbackup_restore(module, target, params):
             return False
 
         results['meta'][target]['messages'].append(f'Backup {name} has been restored.')
+        catalog_restored(name, target)
         results['status'][target] = 'SUCCESS'
         results['changed'] = True
     else:
@@ -982,6 +1859,7 @@ def nim_iosbackup_restore(module, target, params):
                 return False
 
             results['meta'][target]['messages'].append(f'Backup {name} has been removed.')
+            catalog_restored(name, target, removed=True)
         else:
             results['meta'][target]['messages'].append(f'Command \'{cmd}\' has no preview mode, execution skipped.')
 
@@ -990,7 +1868,7 @@ def nim_iosbackup_restore(module, target, params):
 
 def nim_list_backup(module, target, objtype, params):
     """
-    Perform a viosbr NIM operation to resote a VIOS backup
+    List the backups from the catalog and filter them
 
     arguments:
         module  (dict): the module variable
@@ -1002,7 +1880,15 @@ def nim_list_backup(module, target, objtype, params):
     """
 
     backup_info = {}
-    if module.params['name']:
+    with catalog_lock:
+        if module.params['name']:
+            if module.params['name'] in CATALOG:
+                backup_info[module.params['name']] = dict(CATALOG[module.params['name']])
+        else:
+            backup_info = {name: dict(entry) for name, entry in CATALOG.items() if entry.get('type') == objtype}
+
+    if module.params['name'] and not backup_info:
+        # not created by this module, query NIM
         cmd = ['lsnim', '-l', module.params['name']]
         cmd = ' '.join(cmd)
         rc, stdout, stderr = module.run_command(cmd)
@@ -1016,12 +1902,10 @@ def nim_list_backup(module, target, objtype, params):
         backup_info.update(build_dict(module, stdout))
         return backup_info
 
-    backup_info.update(get_nim_type_info(module, objtype))
-
-    # Filter results
+    now = time.time()
     for backup in backup_info.copy():
         # Filter results based on targets
-        if target and 'source_image' not in backup_info[backup] or backup_info[backup]['source_image'] not in target:
+        if target and backup_info[backup].get('source_image') not in target:
             del backup_info[backup]
             continue
 
@@ -1038,6 +1922,22 @@ def nim_list_backup(module, target, objtype, params):
             del backup_info[backup]
             continue
 
+        # Filter results based on age
+        ctime = backup_info[backup].get('ctime')
+        if params['max_age'] is not None and (ctime is None or now - ctime > params['max_age'] * 86400):
+            del backup_info[backup]
+            continue
+        if params['min_age'] is not None and (ctime is None or now - ctime < params['min_age'] * 86400):
+            del backup_info[backup]
+            continue
+
+    if dedup_store:
+        for backup in backup_info:
+            recipe = dedup_store.recipe(backup)
+            if recipe is not None:
+                backup_info[backup]['dedup'] = {'size': recipe['size'], 'sha256': recipe['sha256'], 'ctime': recipe['ctime']}
+        results['dedup'] = dedup_store.stats()
+
     return backup_info
 
 
@@ -1053,16 +1953,21 @@ def nim_view_backup(module, params):
         Exits with fail_json in case of error
     """
 
-    cmd = ['lsnim', '-l', params['name']]
-    rc, stdout, stderr = module.run_command(cmd)
-    results['stdout'] = stdout
-    results['stderr'] = stderr
     params_name = params['name']
-    if rc != 0:
-        results['msg'] = f'NIM resource \'{params_name}\' not found.'
-        module.fail_json(**results)
+    with catalog_lock:
+        entry = dict(CATALOG[params_name]) if params_name in CATALOG else None
+    if entry and 'source_image' in entry:
+        results['backup_info'] = {params_name: entry}
+    else:
+        cmd = ['lsnim', '-l', params['name']]
+        rc, stdout, stderr = module.run_command(cmd)
+        results['stdout'] = stdout
+        results['stderr'] = stderr
+        if rc != 0:
+            results['msg'] = f'NIM resource \'{params_name}\' not found.'
+            module.fail_json(**results)
 
-    results.update({'backup_info': build_dict(module, stdout)})
+        results.update({'backup_info': build_dict(module, stdout)})
 
     if 'source_image' not in results['backup_info'][params['name']]:
         results['msg'] = f'Attribute \'source_image\' not found in ios_backup resource {params_name}.'
@@ -1086,7 +1991,6 @@ def nim_view_backup(module, params):
     results['status'][target] = 'SUCCESS'
 
 
-@start_threaded(THRDS)
 def nim_savevg_create(module, target, params):
     """
     Perform a define NIM operation to create a savevg of a LPAR
@@ -1144,6 +2048,9 @@ def nim_savevg_create(module, target, params):
     results['status'][target] = 'SUCCESS'
     if not module.check_mode:
         results['changed'] = True
+        if dedup_store:
+            dedup_ingest(module, target, 'savevg', name, location, params)
+        catalog_add(module, target, name)
 
     return True
 
@@ -1166,6 +2073,9 @@ def nim_savevg_restore(module, target, params):
 
     name = build_name(target, params['name'], params['name_prefix'], params['name_postfix'])
 
+    if dedup_store and not dedup_reconstitute(module, target, name):
+        return False
+
     # nim -o restvg -a savevg=savevg_res_name -a shrink=<yes|no> lpar_name
     cmd = ['nim', '-o', 'restvg']
     cmd += ['-a', f'savevg={name}']
@@ -1185,6 +2095,7 @@ def nim_savevg_restore(module, target, params):
             return False
 
         results['meta'][target]['messages'].append(f'Backup {name} has been restored.')
+        catalog_restored(name, target)
         results['status'][target] = 'SUCCESS'
         results['changed'] = True
     else:
@@ -1203,6 +2114,7 @@ def nim_savevg_restore(module, target, params):
                 return False
 
             results['meta'][target]['messages'].append(f'Backup {name} has been removed.')
+            catalog_restored(name, target, removed=True)
         else:
             results['meta'][target]['messages'].append(f'Command \'{cmd}\' has no preview mode, execution skipped.')
 
@@ -1212,11 +2124,12 @@ def nim_savevg_restore(module, target, params):
 def main():
     global module
     global results
+    global dedup_store
 
     module = AnsibleModule(
         supports_check_mode=True,
         argument_spec=dict(
-            action=dict(required=True, type='str', choices=['create', 'restore', 'view', 'list']),
+            action=dict(required=True, type='str', choices=['create', 'restore', 'view', 'list', 'verify']),
             type=dict(type='str', choices=['mksysb', 'ios_mksysb', 'ios_backup', 'savevg'], default='mksysb'),
             targets=dict(type='list', elements='str'),
             nim_node=dict(type='dict'),
@@ -1244,7 +2157,16 @@ def main():
             volume_group=dict(type='str'),
             exclude_files=dict(type='str'),
             shrink_fs=dict(type='bool', default=False),
-
+            # arguments for create operations
+            max_parallel=dict(type='int', default=8),
+            max_parallel_per_fs=dict(type='int', default=4),
+            space_check=dict(type='bool', default=True),
+            dedup_store=dict(type='path'),
+            dedup_keep_image=dict(type='bool', default=True),
+            catalog=dict(type='path', default='/var/adm/ansible/nim_backup_catalog.json'),
+            refresh_catalog=dict(type='bool', default=False),
+            max_age=dict(type='int'),
+            min_age=dict(type='int'),
         ),
         required_if=[
             ['action', 'view', ['name']],
@@ -1263,6 +2185,7 @@ def main():
         #   target_name:{
         #       'messages': [],     detail execution messages
         #       'res_name': '',     resource name create for backup creation
+        #       'estimated_size': 0, estimated backup size for the space check
         #       'stdout': '',
         #       'stderr': '',
         #   }
@@ -1289,7 +2212,7 @@ def main():
     params_targets = module.params['targets']
     if module.params['targets']:
         targets = expand_targets(params_targets)
-    if not targets and action != 'list' and action != 'view':
+    if not targets and action not in ['list', 'view', 'verify']:
         results['msg'] = f'No matching target found for targets \'{params_targets}\'.'
         module.log(f'Warning: Empty target list: "{targets}"')
         module.exit_json(**results)
@@ -1305,6 +2228,9 @@ def main():
     params['location'] = module.params['location']
     params['other_attributes'] = module.params['other_attributes']
     params['flags'] = module.params['flags']
+    params['dedup_keep_image'] = module.params['dedup_keep_image']
+    if module.params['dedup_store'] and objtype != 'ios_backup':
+        dedup_store = DedupStore(module.params['dedup_store'])
 
     if objtype != 'vg':
         params['name_prefix'] = module.params['name_prefix']
@@ -1334,23 +2260,43 @@ def main():
         if not params['location']:
             params['location'] = '/export/nim/savevg'
 
+    catalog = load_catalog(module, module.params['catalog'])
+    if catalog is not None:
+        CATALOG.update(catalog)
+    if catalog is None or module.params['refresh_catalog']:
+        rebuild_catalog(module)
+    else:
+        validate_catalog(module)
+
     # perform the operation
     if action == 'list':
         params['oslevel'] = module.params['oslevel']
-        nim_list_backup(module, targets, objtype, params)
+        params['max_age'] = module.params['max_age']
+        params['min_age'] = module.params['min_age']
+        results['backup_info'] = nim_list_backup(module, targets, objtype, params)
 
     elif action == 'view':
         nim_view_backup(module, params)
 
+    elif action == 'verify':
+        params['max_parallel'] = module.params['max_parallel']
+        results['backup_info'] = nim_verify_backup(module, targets, objtype, params)
+
     elif action == 'create':
+        scheduler = BackupScheduler(module, module.params['max_parallel'], module.params['max_parallel_per_fs'])
+        jobs = []
+        target_vgs = {}
         for target in targets:
+            vg = None
             if target in results['nim_node']['standalone']:
                 if objtype == 'mksysb':
-                    nim_mksysb_create(module, target, objtype, params)
+                    func, args = nim_mksysb_create, (module, target, objtype, params)
+                    vg = 'rootvg'
                 elif objtype == 'savevg':
                     params['volume_group'] = module.params['volume_group']
                     params['exclude_files'] = module.params['exclude_files']
-                    nim_savevg_create(module, target, params)
+                    func, args = nim_savevg_create, (module, target, params)
+                    vg = params['volume_group']
                 else:
                     meta_msg = f'Operation {action} {objtype} not supported on a standalone machine. You may want to select mksysb.'
                     results['meta'][target]['messages'] = meta_msg
@@ -1359,14 +2305,32 @@ def main():
 
             elif target in results['nim_node']['vios']:
                 if objtype == 'ios_mksysb':
-                    nim_mksysb_create(module, target, objtype, params)
+                    func, args = nim_mksysb_create, (module, target, objtype, params)
+                    vg = 'rootvg'
                 elif objtype == 'ios_backup':
-                    nim_iosbackup_create(module, target, params)
+                    func, args = nim_iosbackup_create, (module, target, params)
                 else:
                     results['meta'][target]['messages'].append(f'Operation {action} {objtype} not supported on a VIOS. You may want to select ios_mksysb.')
                     results['status'][target] = 'FAILURE'
                     continue
-        wait_all()
+
+            jobs.append((target, func, args))
+            if vg:
+                target_vgs[target] = vg
+
+        sizes = {}
+        if module.params['space_check'] and not module.check_mode:
+            sizes = estimate_backup_sizes(module, target_vgs, module.params['max_parallel'])
+        for target, func, args in jobs:
+            if target in sizes:
+                results['meta'][target]['estimated_size'] = sizes[target]
+            image = os.path.join(params['location'],
+                                 build_name(target, params['name'], params['name_prefix'], params['name_postfix']))
+            scheduler.submit(target, func, args, params['location'], sizes.get(target), image)
+
+        start = time.time()
+        scheduler.run()
+        module.debug(f'Backup creations done in {time.time() - start:.1f} seconds')
 
     elif action == 'restore':
         for target in targets:
@@ -1381,6 +2345,7 @@ def main():
                 results['status'][target] = 'FAILURE'
                 continue
 
+            params['remove_backup'] = module.params['remove_backup']
             if 'mksysb' in objtype:
                 params['group'] = module.params['group']
                 params['bosinst_data'] = module.params['bosinst_data']
@@ -1395,7 +2360,6 @@ def main():
                 params['remove_spot'] = module.params['remove_spot']
                 params['accept_licenses'] = module.params['accept_licenses']
                 params['boot_target'] = module.params['boot_target']
-                params['remove_backup'] = module.params['remove_backup']
 
                 nim_mksysb_restore(module, target, params)
 
@@ -1408,6 +2372,9 @@ def main():
 
         wait_all()
 
+    if not module.check_mode:
+        save_catalog(module, module.params['catalog'])
+
     # Exit
     target_errored = [key for key, val in results['status'].items() if 'FAILURE' in val]
     if len(target_errored):
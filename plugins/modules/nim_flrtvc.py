@@ -304,6 +304,7 @@ import calendar
 from collections import OrderedDict
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.urls import open_url
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_targets
 
 module = None
 results = None
@@ -1425,44 +1426,7 @@ def expand_targets(module, targets, nim_clients):
 
     return: the list of the existing NIM client matching the target list
     """
-    clients = []
-
-    for target in targets:
-
-        # Build target(s) from: range i.e. quimby[7:12]
-        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
-        if rmatch:
-            name = rmatch.group(1)
-            start = rmatch.group(2)
-            end = rmatch.group(3)
-
-            for i in range(int(start), int(end) + 1):
-                # target_results.append('{0}{1:02}'.format(name, i))
-                curr_name = name + str(i)
-                if curr_name in nim_clients:
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: val*. i.e. quimby*
-        rmatch = re.match(r"(\w+)\*$", target)
-        if rmatch:
-            name = rmatch.group(1)
-
-            for curr_name in nim_clients:
-                if re.match(rf"^{name}\.*", curr_name):
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: all or *
-        if target.upper() == 'ALL' or target == '*':
-            clients = nim_clients
-            continue
-
-        # Build target(s) from: quimby05 quimby08 quimby12
-        if (target in nim_clients) or (target == 'master'):
-            clients.append(target)
-
-    return list(set(clients))
+    return nim_targets.expand_targets(targets, nim_clients, extra=['master'])
 
 
 def check_targets(module, output, targets, nim_clients):
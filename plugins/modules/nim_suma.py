@@ -99,6 +99,43 @@ options:
       example I(oslevel=Latest).
     type: path
     default: /var/adm/ansible/metadata
+  fileset_store:
+    description:
+    - Specifies to share the filesets of the lpp_sources created in I(download_dir).
+    - The filesets are stored once in a content-addressed store in I(download_dir)/.filesets, the
+      filesets already downloaded in the store or in another lpp_source of I(download_dir) are
+      hard linked (or symbolic linked across file systems) in the new lpp_source instead of being
+      downloaded again.
+    - This changes the files of the lpp_sources on disk, every fileset of I(download_dir) is read
+      once to compute its checksum and the downloaded filesets already in the store are replaced
+      by links to the store. The symbolic links point outside of the lpp_source, a NIM client
+      mounting the lpp_source with NFS cannot resolve them, keep the store in the file system of
+      the lpp_sources to only get hard links.
+    - The preview reports the filesets already on hand.
+    - Can be used if I(action=download) or I(action=preview) when I(download_dir) is set.
+    type: bool
+    default: no
+  oslevel_timeout:
+    description:
+    - Specifies the number of seconds to wait for the oslevel of the targets.
+    - The targets that do not answer in time are ignored.
+    type: int
+    default: 300
+  oslevel_cache_ttl:
+    description:
+    - Specifies the number of seconds the oslevel of the targets is cached. The cache is shared
+      with the M(ibm.power_aix.nim) module.
+    - C(0) disables the cache, the oslevel is then retrieved on every run.
+    type: int
+    default: 300
+  metadata_ttl:
+    description:
+    - Specifies the number of seconds the SP levels found in the SUMA metadata are cached in
+      I(metadata_dir).
+    - The metadata is downloaded again when a requested level is not in the cache.
+    - C(0) disables the cache, the metadata is then downloaded on every run.
+    type: int
+    default: 86400
 notes:
   - The B(/var/adm/ras/suma.log) file on your system contains detailed results from running the SUMA
     command.
@@ -170,6 +207,15 @@ meta:
             type: list
             elements: str
             sample: "Unavailable client: nimclient02"
+        fileset_store:
+            description:
+            - Filesets found in the fileset store or in another lpp_source of I(download_dir).
+            - C(filesets) and C(size) are the number and bytes of filesets not downloaded.
+            - C(stored) is the number of filesets of the lpp_source in the store, C(freed) the bytes
+              of the filesets removed from the store that are no more in any lpp_source.
+            returned: if I(fileset_store=yes) and I(download_dir) is set
+            type: dict
+            sample: {"filesets": 412, "size": 1843264512, "stored": 436, "freed": 0}
     sample:
         "meta": {
             "messages": [
@@ -182,114 +228,18 @@ meta:
 
 import os
 import re
-import glob
-import shutil
-import threading
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.fileset_store import FilesetStore
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_oslevel import (
+    get_oslevels, max_oslevel, min_oslevel, oslevel_key)
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_targets
+from ansible_collections.ibm.power_aix.plugins.module_utils.suma_metadata import (
+    SumaMetadata, SumaMetadataError)
 
 results = None
 
 
-def min_oslevel(dic):
-    """
-    Find the minimun value of a dictionary.
-
-    arguments:
-        dict - Dictionary {machine: oslevel}
-    return:
-        minimun oslevel from the dictionary
-    """
-    oslevel_min = None
-
-    for key, value in iter(dic.items()):
-        if oslevel_min is None or value < oslevel_min:
-            oslevel_min = value
-
-    return oslevel_min
-
-
-def max_oslevel(dic):
-    """
-    Find the maximum value of a the oslevel dictionary.
-
-    arguments:
-        dic - Dictionary {client: oslevel}
-    return:
-        maximum oslevel from the dictionary
-    """
-    oslevel_max = None
-
-    for key, value in iter(dic.items()):
-        if oslevel_max is None or value > oslevel_max:
-            oslevel_max = value
-
-    return oslevel_max
-
-
-def nim_exec(module, node, command):
-    """
-    Execute the specified command on the specified nim client using c_rsh.
-
-    return
-        - rc      return code of the command
-        - stdout  stdout of the command
-        - stderr  stderr of the command
-    """
-
-    cmd_f = ' '.join(command)
-    rcmd = f'( LC_ALL=C {cmd_f} ); echo rc=$?'
-    cmd = ['/usr/lpp/bos.sysmgt/nim/methods/c_rsh', node, rcmd]
-
-    module.debug(f'exec command:{cmd}')
-
-    rc, stdout, stderr = module.run_command(cmd)
-    if rc != 0:
-        return (rc, stdout, stderr)
-
-    s = re.search(r'rc=([-\d]+)$', stdout)
-    if s:
-        rc = int(s.group(1))
-        # remove the rc of c_rsh with echo $?
-        stdout = re.sub(r'rc=[-\d]+\n$', '', stdout)
-    module.debug('exec command rc:{rc}, output:{stdout}, stderr:{stderr}')
-
-    return (rc, stdout, stderr)
-
-
-def run_oslevel_cmd(module, machine, oslevels):
-    """
-    Run the oslevel command on target machine.
-
-    Stores the output in the dedicated slot of the oslevels dictionary.
-
-    arguments:
-        module      (dict): The Ansible module
-        machine      (str): The name machine
-        oslevels    (dict): The results of the command
-    """
-    oslevels[machine] = 'timedout'
-
-    cmd = ['/usr/bin/oslevel', '-s']
-
-    if machine == 'master':
-        rc, stdout, stderr = module.run_command(cmd)
-    else:
-        rc, stdout, stderr = nim_exec(module, machine, cmd)
-
-    if rc == 0:
-        module.debug(f'{machine} oslevel stdout: "{stdout}"')
-        if stderr.rstrip():
-            log_cmd = ' '.join(cmd)
-            module.log(f'[WARNING] "{log_cmd}" command stderr: {stderr}')
-        # return stdout only ... stripped!
-        oslevels[machine] = stdout.rstrip()
-    else:
-        msg_cmd = ' '.join(cmd)
-        msg = f'Command: {msg_cmd} failed with return code {rc}.'
-        module.log(f'Failed to get oslevel for {machine}: {msg}')
-
-
 def expand_targets(module, targets, nim_clients):
     """
     Expand the list of target patterns.
@@ -311,45 +261,7 @@ def expand_targets(module, targets, nim_clients):
 
     return: clients: the list of the existing machines matching the target list
     """
-    clients = []
-    if len(targets) == 0:
-        return clients
-
-    for target in targets:
-
-        # Build target(s) from: range i.e. quimby[7:12]
-        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
-        if rmatch:
-            name = rmatch.group(1)
-            start = rmatch.group(2)
-            end = rmatch.group(3)
-
-            for i in range(int(start), int(end) + 1):
-                curr_name = name + str(i)
-                if curr_name in nim_clients:
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: val*. i.e. quimby*
-        rmatch = re.match(r"(\w+)\*$", target)
-        if rmatch:
-            name = rmatch.group(1)
-
-            for curr_name in nim_clients:
-                if re.match(rf"^{name}\.*" % name, curr_name):
-                    clients.append(curr_name)
-            continue
-
-        # Build target(s) from: all or *
-        if target.upper() == 'ALL' or target == '*':
-            clients = nim_clients
-            continue
-
-        # Build target(s) from full name: quimby05
-        if (target in nim_clients) or (target == 'master'):
-            clients.append(target)
-
-    return list(set(clients))
+    return nim_targets.expand_targets(targets, nim_clients, extra=['master'])
 
 
 def get_nim_clients(module):
@@ -382,33 +294,6 @@ def get_nim_clients(module):
     return clients_list
 
 
-def get_oslevels(module, targets):
-    """
-    Get the oslevel of the specified targets.
-
-    arguments:
-        module  (dict): The Ansible module
-    return a dictionary of the oslevels
-    """
-
-    # Launch threads to collect information on targets
-    threads = []
-    oslevels = {}
-
-    for machine in targets:
-        process = threading.Thread(target=run_oslevel_cmd,
-                                   args=(module, machine, oslevels))
-        process.start()
-        threads.append(process)
-
-    for process in threads:
-        process.join(300)  # wait 5 min for c_rsh to timeout
-        if process.is_alive():
-            module.log(f'[WARNING] {process} Not responding')
-
-    return oslevels
-
-
 def get_nim_lpp_source(module):
     """
     Get the list of the lpp_source defined on the NIM master.
@@ -476,32 +361,31 @@ def compute_rq_type(module, oslevel, targets_list):
     return 'ERROR'
 
 
-def find_sp_version(module, file):
+def get_metadata(module, suma_params, metadata_filter_ml, lookup):
     """
-    Open and parse the provided file to find higher SP version
+    Look up a SP level in the SUMA metadata cache.
+
     arguments:
-        module  (dict): The Ansible module
-        file     (str): path of the file to parse
+        module              (dict): The Ansible module
+        suma_params         (dict): parameters to build the suma command
+        metadata_filter_ml   (str): the FilterML of the metadata request
+        lookup          (function): the lookup to perform on the cache
+    note:
+        Exits with fail_json in case of error
     return:
-       sp_version   value found or None
+        the SP level found or None
     """
-    sp_version = None
-    module.debug(f"opening file: {file}")
-    with open(file, mode="r", encoding="utf-8") as myfile:
-        for line in myfile:
-            # module.debug("line: {0}".format(line.rstrip()))
-            match_item = re.match(
-                r"^<SP name=\"([0-9]{4}-[0-9]{2}-[0-9]{2}-[0-9]{4})\">$",
-                line.rstrip())
-            if match_item:
-                version = match_item.group(1)
-                debug_line = line.rstrip()
-                module.debug(f"matched line: {debug_line}, version={version}")
-                if sp_version is None or version > sp_version:
-                    sp_version = version
-                break
-
-    return sp_version
+    metadata = SumaMetadata(module, suma_params['metadata_dir'], suma_params['description'],
+                            suma_params['metadata_ttl'])
+    try:
+        return lookup(metadata)
+    except SumaMetadataError as exc:
+        module.log(exc.msg + f", stderr: {exc.stderr}, stdout:{exc.stdout}")
+        results['cmd'] = exc.cmd
+        results['stdout'] = exc.stdout
+        results['stderr'] = exc.stderr
+        results['msg'] = exc.msg
+        module.fail_json(**results)
 
 
 def compute_rq_name(module, suma_params, rq_type, oslevel, clients_target_oslevel):
@@ -564,43 +448,9 @@ def compute_rq_name(module, suma_params, rq_type, oslevel, clients_target_osleve
             results['msg'] = msg
             module.fail_json(**results)
 
-        if not os.path.exists(suma_params['metadata_dir']):
-            os.makedirs(suma_params['metadata_dir'])
-
-        # Build suma command to get metadata
-        cmd_DLTarget = suma_params['metadata_dir']
-        cmd_DisplayName = suma_params['description']
-        cmd_FilterDdir = suma_params['metadata_dir']
-        cmd = ['/usr/sbin/suma', '-x', '-a', 'Action=Metadata', '-a', 'RqType=Latest']
-        cmd += ['-a', f'DLTarget={cmd_DLTarget}']
-        cmd += ['-a', f'FilterML={metadata_filter_ml}']
-        cmd += ['-a', f'DisplayName="{cmd_DisplayName}"']
-        cmd += ['-a', f'FilterDir={cmd_FilterDdir}']
-
-        rc, stdout, stderr = module.run_command(cmd)
-        if rc != 0:
-            msg_cmd = ' '.join(cmd)
-            msg = f"Suma metadata command '{msg_cmd}' failed with return code {rc}"
-            results['cmd'] = ' '.join(cmd)
-            results['stdout'] = stdout
-            results['stderr'] = stderr
-            results['msg'] = msg
-            module.fail_json(**results)
-        module.debug(f"SUMA command '{msg_cmd}' rc:{rc}, stdout:{stdout}")
-
         # find latest SP build number for the highest TL
-        sp_version = None
-        file_name = suma_params['metadata_dir'] + "/installp/ppc/" + metadata_filter_ml + "*.xml"
-        module.debug(f"searched files: {file_name}")
-        files = glob.glob(file_name)
-        module.debug(f"searching SP in files: {files}")
-        for cur_file in files:
-            version = find_sp_version(module, cur_file)
-            if sp_version is None or version > sp_version:
-                sp_version = version
-
-        rq_name = sp_version
-        shutil.rmtree(suma_params['metadata_dir'])
+        rq_name = get_metadata(module, suma_params, metadata_filter_ml,
+                               lambda metadata: metadata.latest_sp(metadata_filter_ml, tl=metadata_filter_ml))
 
     elif rq_type == 'TL':
         # target verstion = TL part of the requested version
@@ -614,38 +464,9 @@ def compute_rq_name(module, suma_params, rq_type, oslevel, clients_target_osleve
             metadata_filter_ml = re.match(r"^([0-9]{4}-[0-9]{2})-[0-9]{2}$",
                                           oslevel).group(1)
 
-            if not os.path.exists(suma_params['metadata_dir']):
-                os.makedirs(suma_params['metadata_dir'])
-
-            # Build suma command to get metadata
-            cmd_metadata_dir = suma_params['metadata_dir']
-            cmd_DisplayName = suma_params['description']
-            cmd = ['/usr/sbin/suma', '-x', '-a', 'Action=Metadata', '-a', 'RqType=Latest']
-            cmd += ['-a', f'DLTarget={cmd_metadata_dir}']
-            cmd += ['-a', f'FilterML={metadata_filter_ml}']
-            cmd += ['-a', f'DisplayName="{cmd_DisplayName}"']
-            cmd += ['-a', f'FilterDir={cmd_metadata_dir}']
-
-            rc, stdout, stderr = module.run_command(cmd)
-            if rc != 0:
-                msg_cmd = ' '.join(cmd)
-                msg = f"Suma metadata command '{msg_cmd}' failed with return code {rc}"
-                module.log(msg + f", stderr: {stderr}, stdout:{stdout}")
-                results['cmd'] = ' '.join(cmd)
-                results['stdout'] = stdout
-                results['stderr'] = stderr
-                results['msg'] = msg
-                module.fail_json(**results)
-            debug_cmd = ' '.join(cmd)
-            module.debug(f"SUMA command '{debug_cmd}' rc:{rc}, stdout:{stdout}")
-
             # find SP build number
-            sp_version = None
-            cur_file = suma_params['metadata_dir'] + "/installp/ppc/" + oslevel + ".xml"
-            sp_version = find_sp_version(module, cur_file)
-
-            rq_name = sp_version
-            shutil.rmtree(suma_params['metadata_dir'])
+            rq_name = get_metadata(module, suma_params, metadata_filter_ml,
+                                   lambda metadata: metadata.sp_build(metadata_filter_ml, oslevel))
 
     if not rq_name or not rq_name.strip():  # should never happen
         msg = f"OS level {oslevel} does not match any fixes"
@@ -676,11 +497,10 @@ def compute_filter_ml(module, clients_target_oslevel, rq_name):
         if len(filter_ml) == 4:
             filter_ml += "-00"
     else:
-        for key, value in iter(clients_target_oslevel.items()):
-            if re.match(r"^([0-9]{4})", value).group(1) == rq_name[:4] \
-               and re.match(r"^([0-9]{4}-[0-9]{2}-[0-9]{2})", value).group(1) < rq_name[:10] \
-               and (minimum_oslevel is None or value < minimum_oslevel):
-                minimum_oslevel = value
+        # clients of the same release at a lower SP than the request
+        rq_key = oslevel_key(rq_name[:10])
+        minimum_oslevel = min_oslevel({key: value for key, value in clients_target_oslevel.items()
+                                       if value[:4] == rq_name[:4] and oslevel_key(value[:10]) < rq_key})
 
         if minimum_oslevel is not None:
             filter_ml = minimum_oslevel[:7]
@@ -799,6 +619,44 @@ def suma_command(module, action, suma_params):
     return stdout
 
 
+def link_filesets(module, store, dl_target, stdout, link):
+    """
+    Find the filesets listed in the SUMA preview output that are already on
+    hand, in the fileset store or in a sibling lpp_source, and link them in
+    the download target so that SUMA skips them.
+
+    arguments:
+        module    (dict): The Ansible module
+        store   (object): FilesetStore of the download directory
+        dl_target  (str): suma download target directory
+        stdout     (str): suma preview command output
+        link      (bool): link the filesets, or only account them
+    return:
+        dictionary with the number of filesets and bytes on hand
+    """
+    on_hand = {'filesets': 0, 'size': 0}
+    siblings = None
+    for line in stdout.splitlines():
+        matched = re.match(r"^Download SUCCEEDED:\s+(\S+)$", line.strip())
+        if not matched:
+            continue
+        path = matched.group(1)
+        relname = os.path.relpath(path, dl_target)
+        if relname.startswith('..') or os.path.exists(path):
+            continue
+        if siblings is None:
+            siblings = store.lpp_sources(exclude=dl_target)
+        src, size = store.find(relname, siblings)
+        if src is None:
+            continue
+        if link and not store.link(src, path, relname):
+            continue
+        module.debug(f"Fileset {relname} on hand in {src}")
+        on_hand['filesets'] += 1
+        on_hand['size'] += size
+    return on_hand
+
+
 def suma_download(module, suma_params):
     """
     Dowload (or preview) action
@@ -855,12 +713,15 @@ def suma_download(module, suma_params):
     module.debug(f'Target list: {target_clients}')
 
     # Get the oslevels of the specified targets only
-    clients_oslevel = get_oslevels(module, target_clients)
+    clients_oslevel, errors = get_oslevels(module, target_clients, timeout=suma_params['oslevel_timeout'],
+                                           ttl=suma_params['oslevel_cache_ttl'])
     module.debug(f"client oslevel dict: {clients_oslevel}")
+    for client, error in errors.items():
+        module.log(f'Failed to get oslevel for {client}: {error}')
 
     # Delete clients with no oslevel value
     removed_oslevel = []
-    for key in [k for (k, v) in clients_oslevel.items() if not v]:
+    for key in [k for (k, v) in clients_oslevel.items() if not oslevel_key(v)]:
         removed_oslevel.append(key)
         del clients_oslevel[key]
 
@@ -953,13 +814,26 @@ def suma_download(module, suma_params):
             skipped = int(matched.group(1))
 
     msg = f"Preview summary : {downloaded} to download, {failed} failed, {skipped} skipped"
+
+    # Reuse the filesets already downloaded in the lpp_sources of download_dir
+    store = None
+    on_hand = {'filesets': 0, 'size': 0}
+    if suma_params['fileset_store'] and suma_params['download_dir']:
+        store = FilesetStore(module, suma_params['download_dir'])
+        on_hand = link_filesets(module, store, dl_target, stdout, suma_params['action'] == 'download')
+        results['meta']['fileset_store'] = dict(on_hand)
+        if on_hand['filesets']:
+            downloaded -= on_hand['filesets']
+            msg += f", {on_hand['filesets']} filesets ({on_hand['size']} bytes) already on hand"
+            if suma_params['action'] == 'download':
+                results['changed'] = True
     module.log(msg)
 
     # If action is preview or nothing is available to download, we are done
     if suma_params['action'] == 'preview':
         results['meta']['messages'].append(msg)
         return
-    if downloaded == 0 and skipped == 0:
+    if downloaded == 0 and skipped == 0 and not on_hand['filesets']:
         return
     # else continue
     results['meta']['messages'].extend(stdout.rstrip().splitlines())
@@ -1003,6 +877,14 @@ def suma_download(module, suma_params):
         if downloaded != 0:
             results['changed'] = True
 
+    if store:
+        # Share the downloaded filesets with the next lpp_sources
+        stored = store.ingest_dir(dl_target)
+        freed = store.prune()
+        store.save()
+        results['meta']['fileset_store'].update({'stored': stored['filesets'], 'freed': freed})
+        module.debug(f"Fileset store: {stored}, {freed} bytes freed")
+
     # Create the associated NIM resource if necessary
     if not suma_params['download_only'] and lpp_source not in nim_lpp_sources:
         # nim -o define command
@@ -1048,6 +930,10 @@ def main():
             extend_fs=dict(required=False, type='bool', default=True),
             description=dict(required=False, type='str'),
             metadata_dir=dict(required=False, type='path', default='/var/adm/ansible/metadata'),
+            metadata_ttl=dict(required=False, type='int', default=86400),
+            fileset_store=dict(required=False, type='bool', default=False),
+            oslevel_timeout=dict(required=False, type='int', default=300),
+            oslevel_cache_ttl=dict(required=False, type='int', default=300),
         ),
         supports_check_mode=True
     )
@@ -1084,6 +970,10 @@ def main():
         assign_req_oslevel = suma_params['req_oslevel']
         suma_params['description'] = f"{action} request for oslevel {assign_req_oslevel}"
     suma_params['metadata_dir'] = module.params['metadata_dir']
+    suma_params['metadata_ttl'] = module.params['metadata_ttl']
+    suma_params['fileset_store'] = module.params['fileset_store']
+    suma_params['oslevel_timeout'] = module.params['oslevel_timeout']
+    suma_params['oslevel_cache_ttl'] = module.params['oslevel_cache_ttl']
 
     # Run Suma preview or download
     suma_download(module, suma_params)
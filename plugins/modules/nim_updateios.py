@@ -87,7 +87,17 @@ options:
       value; if it is greater then the task is stopped.
     - The format is C(mm/dd/yyyy hh:mm).
     - The resulting status for tuples in this case will be I(SKIPPED-TIMEOUT).
+    - The limit applies to all the tuples, including when they are updated concurrently.
     type: str
+  max_parallel:
+    description:
+    - Specifies the maximum number of VIOS tuples to update concurrently.
+    - The VIOSes of a tuple are always updated one after the other.
+    - Tuples with VIOSes on the same managed system are never updated concurrently.
+    - A tuple with a VIOS whose managed system is not known (C(mgmt_profile1) NIM attribute not
+      set) is updated alone.
+    type: int
+    default: 1
   vios_status:
     description:
     - Specifies the result of a previous operation.
@@ -123,6 +133,19 @@ EXAMPLES = r'''
     time_limit: '07/21/2020 17:02'
     manage_cluster: false
     preview: false
+- name: Update four VIOS pairs located on different managed systems, two pairs at a time
+  nim_updateios:
+    targets:
+      - nimvios01,nimvios02
+      - nimvios03,nimvios04
+      - nimvios05,nimvios06
+      - nimvios07,nimvios08
+    action: install
+    lpp_source: 723lpp_res
+    max_parallel: 2
+    time_limit: '07/21/2020 23:00'
+    manage_cluster: true
+    preview: false
 - name: Remove a fileset of a VIOS
   nim_updateios:
     targets: 'nimvios01'
@@ -263,13 +286,19 @@ meta:
                             type: str
 '''
 
+import copy
+import queue
 import re
+import threading
 import time
 
 from ansible.module_utils.basic import AnsibleModule
 
 module = None
 results = None
+cluster_cache = {}
+# managed system of a VIOS without mgmt_profile1, conflicting with all the others
+UNKNOWN_FRAME = '<unknown>'
 
 
 def param_one_of(one_of_list, required=True, exclusive=True):
@@ -568,6 +597,106 @@ def tuple_str(tuple_list):
     return tuple_str
 
 
+def get_vios_cluster_status(module, vios):
+    """
+    Get the SSP cluster status of a VIOS and store it in the cluster cache.
+
+    arguments:
+        module  (dict): The Ansible module
+        vios     (str): The VIOS name
+    note:
+        Set cluster_cache[vios] with the following keys:
+            cluster (dict): the cluster name, state and nodes status
+            error    (str): the error message if the status cannot be read
+            stdout   (str): the command output in case of error
+            stderr   (str): the command error in case of error
+    return:
+        none
+    """
+
+    cluster = {}
+    status = {'cluster': cluster, 'error': None}
+
+    cmd = ['/usr/ios/cli/ioscli cluster -list && /usr/ios/cli/ioscli cluster -status -fmt :']
+    rc, stdout, stderr = nim_exec(module, results['nim_node']['vios'][vios]['hostname'], cmd)
+    if rc != 0:
+        # Check a cluster is configured
+        stdout = stdout.rstrip()
+        if stdout.find('Cluster does not exist') != -1:
+            msg = f'There is no cluster on vios {vios}'
+            module.log(msg)
+        else:
+            # the command failed and stdout contains command's stderr
+            cmd = ' '.join(cmd)
+            status['error'] = f'Cannot get cluster status on {vios}: command \'{cmd}\', rc:{rc}, stderr:{stdout}'
+            status['stdout'] = stdout
+            status['stderr'] = stderr
+        cluster_cache[vios] = status
+        return
+
+    # stdout is like:
+    # CLUSTER_NAME:    porthos_cl1
+    # CLUSTER_ID:      adf01bd81de611ea8012be6aa4a49d02
+    #
+    # porthos_cl1:OK:porthos-vios1:8286-42A02103341V:2:OK:OK
+    # porthos_cl1:OK:porthos-vios2:8286-42A02103341V:3:OK:OK
+    #
+    # with the following:
+    # Cluster Name:Cluster State:Node Name:Node MTM:Node Partition Num:Node State:Node Repos State
+    # Let's remove the first 3 lines
+    lines = stdout.rstrip().splitlines()[3:]
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        fields = line.split(':')
+        if len(fields) != 7:
+            msg = f'Expecting 7 fields for cluster status, got {len(line)}.'
+            module.log('[WARNING] ' + msg)
+            results['meta']['messages'].append(msg)
+            continue
+        if 'name' not in cluster:
+            cluster['name'] = fields[0]
+            cluster['state'] = fields[1]
+            cluster['nodes'] = []
+        cluster['nodes'].append(fields[2])
+        cluster[fields[2]] = {}
+        cluster[fields[2]]['state'] = fields[5]
+        cluster[fields[2]]['repos_state'] = fields[6]
+
+    cluster_cache[vios] = status
+
+
+def collect_cluster_status(module, targets_list):
+    """
+    Collect the SSP cluster status of all the VIOSes of the target list
+    concurrently, so that checking the cluster status of a tuple does not
+    require any remote command.
+
+    arguments:
+        module          (dict): The Ansible module
+        targets_list    (list): Target tuple list of VIOS
+    note:
+        Set cluster_cache[vios] for each VIOS.
+    return:
+        none
+    """
+
+    threads = []
+    for target_tuple in targets_list:
+        for vios in target_tuple:
+            if vios in cluster_cache:
+                continue
+            process = threading.Thread(target=get_vios_cluster_status, args=(module, vios))
+            process.start()
+            threads.append(process)
+
+    for process in threads:
+        process.join(300)  # wait 5 min for c_rsh to timeout
+        if process.is_alive():
+            module.log(f'[WARNING] {process} Not responding')
+
+
 def check_vios_cluster_status(module, target_tuple):
     """
     Check the cluster status of the VIOS tuple.
@@ -575,6 +704,9 @@ def check_vios_cluster_status(module, target_tuple):
     refer to the same cluster and the node states is OK.
     For a single VIOS, when the cluster status is inactive.
 
+    The cluster status is read from the cache filled by
+    collect_cluster_status, it is collected if missing.
+
     arguments:
         module          (dict): The Ansible module
         target_tuple    (list): The tuple of VIOS(es) to check
@@ -586,58 +718,23 @@ def check_vios_cluster_status(module, target_tuple):
     vios_key = tuple_str(target_tuple)
     tuple_len = len(target_tuple)
 
-    for vios in target_tuple:
-        results['nim_node']['vios'][vios]['cluster'] = {}
+    collect_cluster_status(module, [target_tuple])
 
-    # get the cluster status
     for vios in target_tuple:
-        cmd = ['/usr/ios/cli/ioscli cluster -list && /usr/ios/cli/ioscli cluster -status -fmt :']
-        rc, stdout, stderr = nim_exec(module, results['nim_node']['vios'][vios]['hostname'], cmd)
-        if rc != 0:
-            # Check a cluster is configured
-            stdout = stdout.rstrip()
-            if stdout.find('Cluster does not exist') != -1:
-                msg = f'There is no cluster on vios {vios}'
-                module.log(msg)
-                continue
-            # the command failed and stdout contains command's stderr
-            cmd = ' '.join(cmd)
-            msg = f'Cannot get cluster status on {vios}: command \'{cmd}\', rc:{rc}, stderr:{stdout}'
+        status = cluster_cache.get(vios)
+        if status is None:
+            msg = f'Cannot get cluster status on {vios}: no answer'
             module.log('[WARNING] ' + msg)
             results['meta']['messages'].append(msg)
-            results['meta'][vios_key][vios]['stdout'] = stdout
-            results['meta'][vios_key][vios]['stderr'] = stderr
             return False
-
-        # stdout is like:
-        # CLUSTER_NAME:    porthos_cl1
-        # CLUSTER_ID:      adf01bd81de611ea8012be6aa4a49d02
-        #
-        # porthos_cl1:OK:porthos-vios1:8286-42A02103341V:2:OK:OK
-        # porthos_cl1:OK:porthos-vios2:8286-42A02103341V:3:OK:OK
-        #
-        # with the following:
-        # Cluster Name:Cluster State:Node Name:Node MTM:Node Partition Num:Node State:Node Repos State
-        # Let's remove the first 3 lines
-        lines = stdout.rstrip().splitlines()[3:]
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            fields = line.split(':')
-            if len(fields) != 7:
-                msg = f'Expecting 7 fields for cluster status, got {len(line)}.'
-                module.log('[WARNING] ' + msg)
-                results['meta']['messages'].append(msg)
-                continue
-            if 'name' not in results['nim_node']['vios'][vios]['cluster']:
-                results['nim_node']['vios'][vios]['cluster']['name'] = fields[0]
-                results['nim_node']['vios'][vios]['cluster']['state'] = fields[1]
-                results['nim_node']['vios'][vios]['cluster']['nodes'] = []
-            results['nim_node']['vios'][vios]['cluster']['nodes'].append(fields[2])
-            results['nim_node']['vios'][vios]['cluster'][fields[2]] = {}
-            results['nim_node']['vios'][vios]['cluster'][fields[2]]['state'] = fields[5]
-            results['nim_node']['vios'][vios]['cluster'][fields[2]]['repos_state'] = fields[6]
+        if status['error']:
+            module.log('[WARNING] ' + status['error'])
+            results['meta']['messages'].append(status['error'])
+            results['meta'][vios_key][vios]['stdout'] = status['stdout']
+            results['meta'][vios_key][vios]['stderr'] = status['stderr']
+            return False
+        # each VIOS keeps its own copy as the node states are updated on stop/start
+        results['nim_node']['vios'][vios]['cluster'] = copy.deepcopy(status['cluster'])
 
     # TODO Improvement: cluster_name is a short hostname. But hostname here after is from 'if1' definition and can
     # be an IP address. Moreover tuple is NIM client name can differ from hostname. We could get the actual hostname.
@@ -792,16 +889,77 @@ def get_updateios_cmd(module):
     return cmd
 
 
+def tuple_frames(target_tuple):
+    """
+    Get the managed systems hosting the VIOSes of a tuple.
+    The managed system is the third field of the mgmt_profile1 NIM
+    attribute, UNKNOWN_FRAME when it is not set.
+
+    arguments:
+        target_tuple    (list): The tuple of VIOS(es)
+    return:
+        frames  (set): names of the managed systems
+    """
+    frames = set()
+    for vios in target_tuple:
+        fields = results['nim_node']['vios'][vios].get('mgmt_profile1', '').split()
+        frames.add(fields[2] if len(fields) >= 3 else UNKNOWN_FRAME)
+    return frames
+
+
+def frames_conflict(frames, busy_frames):
+    """
+    Check if a tuple can be updated while other tuples are updated.
+
+    arguments:
+        frames      (set): managed systems of the tuple, see tuple_frames
+        busy_frames (set): managed systems of the tuples being updated
+    return:
+        True if a managed system is shared or is not known
+    """
+    if not busy_frames:
+        return False
+    return UNKNOWN_FRAME in frames or UNKNOWN_FRAME in busy_frames or bool(frames & busy_frames)
+
+
+class UpdateiosThread(threading.Thread):
+    """
+    Class used to update a VIOS tuple while other tuples are updated.
+    The thread reports its end in the done queue of the scheduler.
+    """
+
+    def __init__(self, module, target_tuple, updateios_cmd, done):
+        vios_key = tuple_str(target_tuple)
+        self._module = module
+        self._target_tuple = target_tuple
+        self._updateios_cmd = updateios_cmd
+        self._done = done
+        threading.Thread.__init__(self, name=f'UpdateiosThread({vios_key})')
+        self.daemon = True
+
+    def run(self):
+        self._module.debug(f'Starting {self.name}')
+        try:
+            nim_updateios_tuple(self._module, self._target_tuple, self._updateios_cmd)
+        except Exception as exc:
+            vios_key = tuple_str(self._target_tuple)
+            msg = f'Unexpected error while updating {vios_key}: {exc}'
+            self._module.log(msg)
+            results['meta'][vios_key]['messages'].append(msg)
+            results['status'][vios_key] = 'FAILURE-UPDT1'
+        finally:
+            self._module.debug(f'End of {self.name}')
+            self._done.put(self)
+
+
 def nim_updateios(module, targets_list, vios_status, time_limit):
     """
     Execute the updateios command
     For each VIOS tuple,
     - retrieve the previous status if any (looking for SUCCESS-HC and SUCCESS-UPDT)
-    - for each VIOS of the tuple, check the cluster name and node status
-    - stop the cluster if necessary
-    - perform the updateios operation
-    - wait for the copy to finish
-    - start the cluster if necessary
+    - schedule the tuple update, up to max_parallel tuples are updated
+      concurrently when their VIOSes are on different managed systems
+    - stop scheduling tuples once the time limit is reached
 
     arguments:
         module          (dict): The Ansible module
@@ -817,11 +975,10 @@ def nim_updateios(module, targets_list, vios_status, time_limit):
     # build the updateios command from the playbook parameters
     updateios_cmd = get_updateios_cmd(module)
 
-    got_cluster_status = False
+    pending = []
     for target_tuple in targets_list:
         module.debug(f'Processing target_tuple: {target_tuple}')
 
-        tuple_len = len(target_tuple)
         vios_key = tuple_str(target_tuple)
 
         # if previous status (health check) is known, check the vios tuple has passed
@@ -837,93 +994,158 @@ def nim_updateios(module, targets_list, vios_status, time_limit):
                 vios_status_key = vios_status[vios_key]
                 msg = f'{vios_key} tuple skipped (vios_status: {vios_status_key})'
                 module.log('[WARNING] ' + msg)
-                results['status'][vios_key] = vios_status[vios_key]
                 results['meta'][vios_key]['messages'].append(msg)
                 results['status'][vios_key] = vios_status[vios_key]
                 continue
 
-        # check if there is time to handle this tuple
-        if time_limit is not None and time.localtime(time.time()) >= time_limit:
-            time_limit_str = time.strftime("%m/%d/%Y %H:%M", time_limit)
-            msg = f'Time limit {time_limit_str} reached, no further operation'
+        pending.append(target_tuple)
+
+    # get the cluster status of all the VIOSes at once
+    if pending and module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster']:
+        collect_cluster_status(module, pending)
+
+    max_parallel = max(module.params['max_parallel'] or 1, 1)
+    tuples_frames = {}
+    for target_tuple in pending:
+        vios_key = tuple_str(target_tuple)
+        tuples_frames[vios_key] = tuple_frames(target_tuple)
+        if max_parallel > 1 and UNKNOWN_FRAME in tuples_frames[vios_key]:
+            msg = f'Managed system of {vios_key} not known (mgmt_profile1 not set), the tuple is updated alone'
             module.log('[WARNING] ' + msg)
             results['meta'][vios_key]['messages'].append(msg)
-            results['status'][vios_key] = "SKIPPED-TIMEOUT"
-            return
 
-        if module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster'] and not got_cluster_status:
-            # check if cluster is defined for this VIOSes tuple.
-            cluster_ok = check_vios_cluster_status(module, target_tuple)
-            if not cluster_ok:
-                msg = f"{vios_key} VIOSes skipped (bad cluster status)"
-                module.log('[WARNING] ' + msg)
-                results['meta'][vios_key]['messages'].append(msg)
-                msg = 'Update operation can only be done when both VIOSes belong to the'\
-                      ' same cluster and their node state is OK, or for a single VIOS,'\
-                      ' when the cluster status is inactive.'
-                module.log(msg)
-                results['meta'][vios_key]['messages'].append(msg)
-                results['status'][vios_key] = 'FAILURE-CLUSTER'
+    done = queue.Queue()
+    running = {}
+    busy_frames = set()
+    while pending or running:
+        # start as many tuples as possible in the targets order
+        for target_tuple in list(pending):
+            if len(running) >= max_parallel:
+                break
+            frames = tuples_frames[tuple_str(target_tuple)]
+            if frames_conflict(frames, busy_frames):
                 continue
-            got_cluster_status = True
 
-        results['status'][vios_key] = "SUCCESS-UPDT"
-        # DEBUG-Begin : Uncomment for testing without effective update operation
-        # results['meta'][vios_key]['messages'].append('Warning: testing without effective update operation')
-        # results['meta'][vios_key]['messages'].append('NIM Command: {0} '.format(updateios_cmd))
-        # rc = 0
-        # stdout = 'NIM Command: {0} '.format(updateios_cmd)
-        # continue
-        # DEBUG-End
+            # check if there is time to handle this tuple
+            if time_limit is not None and time.localtime(time.time()) >= time_limit:
+                time_limit_str = time.strftime("%m/%d/%Y %H:%M", time_limit)
+                msg = f'Time limit {time_limit_str} reached, no further operation'
+                module.log('[WARNING] ' + msg)
+                for skipped_tuple in pending:
+                    vios_key = tuple_str(skipped_tuple)
+                    results['meta'][vios_key]['messages'].append(msg)
+                    results['status'][vios_key] = "SKIPPED-TIMEOUT"
+                pending = []
+                break
 
-        for vios in target_tuple:
-            module.log(f'Updating VIOS: {vios}')
+            pending.remove(target_tuple)
+            busy_frames |= frames
+            th = UpdateiosThread(module, target_tuple, updateios_cmd, done)
+            running[th] = frames
+            th.start()
 
-            # set the error label to be used in sub routines
-            if vios == target_tuple[0]:
-                err_label = "FAILURE-UPDT1"
-            else:
-                err_label = "FAILURE-UPDT2"
-
-            # if needed stop the cluster for the VIOS
-            restart_needed = False
-            if tuple_len == 2 and module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster']:
-                if not cluster_stop_start(module, target_tuple, vios_key, vios, 'stop'):
-                    results['status'][vios_key] = err_label
-                    break  # cannot continue
-                restart_needed = True
-
-            # Perform the updateios operation
-            cmd = updateios_cmd + [vios]
-            action = module.params['action']
-            cmd = ' '.join(cmd)
-            rc, stdout, stderr = module.run_command(cmd)
-            results['meta'][vios_key][vios]['cmd'] = ' '.join(cmd)
-            results['meta'][vios_key][vios]['stdout'] = stdout
-            results['meta'][vios_key][vios]['stderr'] = stderr
-            skip_next_target = False
-            if rc != 0:
-                msg = f'Failed to perform {action} updateios operation on {vios}, cmd:\'{cmd}\', rc:{rc}'
-                module.log(msg + f', stdout: {stdout}' + f', stderr: {stderr}')
-                results['meta'][vios_key]['messages'].append(msg)
+        if not running:
+            break
+
+        # wait for a tuple update to end to free its managed systems
+        th = done.get()
+        th.join()
+        busy_frames -= running.pop(th)
+
+
+def nim_updateios_tuple(module, target_tuple, updateios_cmd):
+    """
+    Update a VIOS tuple.
+    - for each VIOS of the tuple, check the cluster name and node status
+    - stop the cluster if necessary
+    - perform the updateios operation
+    - start the cluster if necessary
+
+    arguments:
+        module          (dict): The Ansible module
+        target_tuple    (list): The tuple of VIOS(es) to update
+        updateios_cmd   (list): The updateios command without the target
+    note:
+        Set the update status in results['status'][vios_key].
+    return:
+        none
+    """
+
+    tuple_len = len(target_tuple)
+    vios_key = tuple_str(target_tuple)
+
+    if module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster']:
+        # check if cluster is defined for this VIOSes tuple.
+        cluster_ok = check_vios_cluster_status(module, target_tuple)
+        if not cluster_ok:
+            msg = f"{vios_key} VIOSes skipped (bad cluster status)"
+            module.log('[WARNING] ' + msg)
+            results['meta'][vios_key]['messages'].append(msg)
+            msg = 'Update operation can only be done when both VIOSes belong to the'\
+                  ' same cluster and their node state is OK, or for a single VIOS,'\
+                  ' when the cluster status is inactive.'
+            module.log(msg)
+            results['meta'][vios_key]['messages'].append(msg)
+            results['status'][vios_key] = 'FAILURE-CLUSTER'
+            return
+
+    results['status'][vios_key] = "SUCCESS-UPDT"
+    # DEBUG-Begin : Uncomment for testing without effective update operation
+    # results['meta'][vios_key]['messages'].append('Warning: testing without effective update operation')
+    # results['meta'][vios_key]['messages'].append('NIM Command: {0} '.format(updateios_cmd))
+    # rc = 0
+    # stdout = 'NIM Command: {0} '.format(updateios_cmd)
+    # return
+    # DEBUG-End
+
+    for vios in target_tuple:
+        module.log(f'Updating VIOS: {vios}')
+
+        # set the error label to be used in sub routines
+        if vios == target_tuple[0]:
+            err_label = "FAILURE-UPDT1"
+        else:
+            err_label = "FAILURE-UPDT2"
+
+        # if needed stop the cluster for the VIOS
+        restart_needed = False
+        if tuple_len == 2 and module.params['action'] in ['install', 'cleanup'] and module.params['manage_cluster']:
+            if not cluster_stop_start(module, target_tuple, vios_key, vios, 'stop'):
                 results['status'][vios_key] = err_label
-                # in case of failure try to restart the cluster if needed
-                skip_next_target = True
-            else:
-                msg = f'VIOS {vios} updateios {action} successfull'
-                module.log(msg)
-                results['meta'][vios_key]['messages'].append(msg)
-                results['changed'] = True
+                break  # cannot continue
+            restart_needed = True
+
+        # Perform the updateios operation
+        cmd = updateios_cmd + [vios]
+        action = module.params['action']
+        cmd = ' '.join(cmd)
+        rc, stdout, stderr = module.run_command(cmd)
+        results['meta'][vios_key][vios]['cmd'] = cmd
+        results['meta'][vios_key][vios]['stdout'] = stdout
+        results['meta'][vios_key][vios]['stderr'] = stderr
+        skip_next_target = False
+        if rc != 0:
+            msg = f'Failed to perform {action} updateios operation on {vios}, cmd:\'{cmd}\', rc:{rc}'
+            module.log(msg + f', stdout: {stdout}' + f', stderr: {stderr}')
+            results['meta'][vios_key]['messages'].append(msg)
+            results['status'][vios_key] = err_label
+            # in case of failure try to restart the cluster if needed
+            skip_next_target = True
+        else:
+            msg = f'VIOS {vios} updateios {action} successfull'
+            module.log(msg)
+            results['meta'][vios_key]['messages'].append(msg)
+            results['changed'] = True
 
-            # if needed restart the cluster for the VIOS
-            # TODO check if updateios returns before it finishes
-            if restart_needed:
-                if not cluster_stop_start(module, target_tuple, vios_key, vios, 'start'):
-                    results['status'][vios_key] = err_label
-                    break  # cannot continue
+        # if needed restart the cluster for the VIOS
+        # TODO check if updateios returns before it finishes
+        if restart_needed:
+            if not cluster_stop_start(module, target_tuple, vios_key, vios, 'start'):
+                results['status'][vios_key] = err_label
+                break  # cannot continue
 
-            if skip_next_target:
-                break
+        if skip_next_target:
+            break
 
 
 def main():
@@ -941,6 +1163,7 @@ def main():
             manage_cluster=dict(type='bool', default=False),
             preview=dict(type='bool', default=True),
             time_limit=dict(type='str'),
+            max_parallel=dict(type='int', default=1),
             vios_status=dict(type='dict'),
             nim_node=dict(type='dict')
         ),
@@ -61,6 +61,13 @@ options:
     type: str
     choices: [ minimize, upper, lower, nearest ]
     default: nearest
+  max_parallel:
+    description:
+    - Specifies the maximum number of VIOS tuples to handle concurrently.
+    - The VIOSes of a tuple are always handled one after the other.
+    - The alternate disk copies in progress are monitored with a single NIM state polling loop.
+    type: int
+    default: 1
   force:
     description:
     - Forces removal of any existing alternate disk copy on target disks.
@@ -105,6 +112,18 @@ EXAMPLES = r'''
       - nimvios02: []
       - nimvios03: []
 
+- name: Perform alternate disk copies on three VIOS pairs at the same time
+  nim_vios_alt_disk:
+    action: alt_disk_copy
+    max_parallel: 3
+    targets:
+      - nimvios01: []
+        nimvios02: []
+      - nimvios03: []
+        nimvios04: []
+      - nimvios05: []
+        nimvios06: []
+
 - name: Perform a cleanup of any existing alternate disk copy on nimvios01
   nim_vios_alt_disk:
     action: alt_disk_clean
@@ -128,6 +147,28 @@ status:
             type: str
             sample: 'SUCCESS-ALTDC'
     sample: "{ vios1: 'SUCCESS-ALTDC', vios2: 'FAILURE-ALTDC wrong rootvg state on vios2' }"
+timings:
+    description:
+    - Duration in seconds of the stages of the operation for each VIOS tuple (dictionary key).
+    - C(queue) is the time waited before the tuple was started, C(check) the rootvg checks,
+      C(disk_selection) the alternate disk selection and C(total) the whole tuple operation.
+    - C(vioses) gives for each VIOS the duration of the C(unmirror), C(copy), C(mirror) or
+      C(clean) stages it went through.
+    returned: always
+    type: dict
+    sample:
+        "timings": {
+            "vios1-vios2": {
+                "queue": 0.0,
+                "check": 4.2,
+                "disk_selection": 3.1,
+                "total": 2315.6,
+                "vioses": {
+                    "vios1": {"copy": 1150.3},
+                    "vios2": {"copy": 1157.9}
+                }
+            }
+        }
 nim_node:
     description: NIM node info.
     returned: always
@@ -180,13 +221,19 @@ meta:
                     elements: str
 '''
 
+import queue
 import re
 import time
 import socket
+import threading
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_state import NimStateWatcher
 
 results = {}
+nim_watcher = None
+# upper bound of the wait for one alt_disk copy, whatever its progress
+ALT_DISK_WAIT_TIMEOUT = 4 * 3600
 
 
 def nim_exec(module, node, command):
@@ -972,72 +1019,50 @@ def wait_altdisk_install(module, vios, hdisks, vios_key, altdisk_op_tab, err_lab
     module.debug(f'vios: {vios}, hdisks: {hdisks}, vios_key: {vios_key}')
     module.log(f'Waiting completion of alt_disk copy {hdisks} on {vios}...')
 
-    # if there is no progress in nim operation "info" attribute for more than
-    # 30 minutes we time out: 180 * 10s = 30 min
-    wait_time = 0
-    check_count = 0
-    nim_info_prev = "___"   # this info should not appear in nim info attribute
-    while check_count <= 180:
-        time.sleep(10)
-        wait_time += 10
-
-        cmd = ['lsnim', '-Z', '-a', 'Cstate', '-a', 'info', '-a', 'Cstate_result', vios]
-        ret, stdout, stderr = module.run_command(cmd)
-        if ret != 0:
-            msg = f'to get the NIM state for {vios}'
-            altdisk_op_tab[vios_key] = f"{err_label} {msg}"
-            msg = 'Failed ' + msg + f', lsnim returned: {stderr}'
-            results['meta'][vios]['messages'].append(msg)
-            module.log('ERROR: ' + msg)
-            break
+    # the shared watcher polls the NIM state of all the VIOSes with one lsnim
+    # command and times out if there is no progress in the "info" attribute
+    # for more than 30 minutes
+    nim_watcher.watch(vios)
+    state = nim_watcher.wait(vios, timeout=ALT_DISK_WAIT_TIMEOUT)
+    if state is None:
+        msg = f'alternate disk copy on {vios} timed out'
+        altdisk_op_tab[vios_key] = f"{err_label} {msg}"
+        msg += f'. NIM operation for {hdisks} did not end within {ALT_DISK_WAIT_TIMEOUT // 60} minutes'
+        results['meta'][vios]['messages'].append(msg)
+        module.log('WARNING: ' + msg)
+        return -1
 
-        # info attribute (that appears in 3rd possition) can be empty. So stdout looks like:
-        # #name:Cstate:info:Cstate_result:
-        # <viosName>:ready for a NIM operation:success
-        # <viosName>:alt_disk_install operation is being performed:
-        #                 Creating logical volume alt_hd2.:success:
-        # <viosName>:ready for a NIM operation:0505-126 alt_disk_install- target disk hdisk2 has
-        #                 a volume group assigned to it.:failure:
-        nim_status = stdout.split('\n')[1].rstrip().split(':')
-        nim_Cstate = nim_status[1]
-        if len(nim_status) == 4 and ((nim_status[2].lower()) == "success"
-                                     or (nim_status[2].lower()) == "failure"):
-            nim_result = nim_status[2].lower()
-        else:
-            nim_info = nim_status[2]
-            nim_result = nim_status[3].lower()
+    nim_info = state['info']
+    nim_result = state['Cstate_result']
 
-        if nim_Cstate == "ready for a NIM operation":
-            msg = f'alt_disk copy operation on {vios} ended with nim_result: {nim_result}, nim_info:{nim_info}'
-            results['meta'][vios]['messages'].append(msg)
-            module.log(msg)
-            if nim_result != "success":
-                msg = f'to perform alt_disk copy on {vios}: {nim_info}'
-                altdisk_op_tab[vios_key] = f"{err_label} {msg}"
-                results['meta'][vios]['messages'].append('Failed ' + msg)
-                module.log('ERROR: Failed ' + msg)
-                return 1
-            else:
-                return 0
-        else:
-            if nim_info_prev == nim_info:
-                check_count += 1
-            else:
-                nim_info_prev = nim_info
-                check_count = 0
+    if state['status'] == 'error':
+        msg = f'to get the NIM state for {vios}'
+        altdisk_op_tab[vios_key] = f"{err_label} {msg}"
+        msg = 'Failed ' + msg + f', lsnim returned: {nim_info}'
+        results['meta'][vios]['messages'].append(msg)
+        module.log('ERROR: ' + msg)
+        return 1
 
-        if wait_time % 60 == 0:
-            wait_time = wait_time / 60
-            module.log(f'Waiting completion of alt_disk copy {hdisks} on {vios}... {wait_time} minute(s)')
+    if state['status'] == 'blocked':
+        # timed out before the end of alt_disk_install
+        msg = f'alternate disk copy on {vios} blocked'
+        altdisk_op_tab[vios_key] = f"{err_label} {msg}"
+        msg += f'. NIM operation for {hdisks} blocked: {nim_info}'
+        results['meta'][vios]['messages'].append(msg)
+        module.log('WARNING: ' + msg)
+        return -1
 
-    # timed out before the end of alt_disk_install
-    msg = f'alternate disk copy on {vios} blocked'
-    altdisk_op_tab[vios_key] = f"{err_label} {msg}"
-    msg += f'. NIM operation for {hdisks} blocked: {nim_info}'
+    msg = f'alt_disk copy operation on {vios} ended with nim_result: {nim_result}, nim_info:{nim_info}'
     results['meta'][vios]['messages'].append(msg)
-    module.log('WARNING: ' + msg)
+    module.log(msg)
+    if state['status'] != 'success':
+        msg = f'to perform alt_disk copy on {vios}: {nim_info}'
+        altdisk_op_tab[vios_key] = f"{err_label} {msg}"
+        results['meta'][vios]['messages'].append('Failed ' + msg)
+        module.log('ERROR: Failed ' + msg)
+        return 1
 
-    return -1
+    return 0
 
 
 def alt_disk_action(module, params, action, targets, vios_status, time_limit):
@@ -1046,11 +1071,10 @@ def alt_disk_action(module, params, action, targets, vios_status, time_limit):
 
     For each VIOS tuple,
     - retrieve the previous status if any (looking for SUCCESS-HC and SUCCESS-UPDT)
-    - for each VIOS of the tuple, check the rootvg, find and valid the hdisk for the operation
-    - unmirror rootvg if necessary
-    - perform the alt disk copy or cleanup operation
-    - wait for the copy to finish
-    - mirror rootvg if necessary
+    - schedule the operation on the tuple, up to max_parallel tuples are
+      handled concurrently, their alt_disk_install operations being
+      monitored by the shared NIM state watcher
+    - stop scheduling tuples once the time limit is reached
 
     arguments:
         module      (dict): The Ansible module
@@ -1068,8 +1092,9 @@ def alt_disk_action(module, params, action, targets, vios_status, time_limit):
 
     module.debug(f'action: {action}, targets: {targets}, vios_status: {vios_status}')
 
-    rootvg_info = {}
     altdisk_op_tab = {}
+    pending = []
+    start = time.time()
 
     for vios_dict in targets:
         module.debug(f'action: {action} for target: {vios_dict}')
@@ -1080,6 +1105,7 @@ def alt_disk_action(module, params, action, targets, vios_status, time_limit):
         vios_key = '-'.join(vios_list)
 
         module.debug(f'vios_key: {vios_key}')
+        results['timings'][vios_key] = {'vioses': {}}
 
         # if health check status is known, check the vios tuple has passed
         # the health check successfuly
@@ -1099,178 +1125,275 @@ def alt_disk_action(module, params, action, targets, vios_status, time_limit):
                 module.log("WARNING: " + msg)
                 continue
 
-        # check if there is time to handle this tuple
-        if not (time_limit is None) and time.localtime(time.time()) >= time_limit:
-            altdisk_op_tab[vios_key] = "SKIPPED-TIMEDOUT"
-            time_limit_str = time.strftime("%m/%d/%Y %H:%M", time_limit)
-            msg = f"Time limit {time_limit_str} reached, no further operation"
+        pending.append((vios_dict, vios_list, vios_key))
+
+    max_parallel = max(params['max_parallel'] or 1, 1)
+    done = queue.Queue()
+    running = []
+    while pending or running:
+        while pending and len(running) < max_parallel:
+            vios_dict, vios_list, vios_key = pending.pop(0)
+
+            # check if there is time to handle this tuple
+            if not (time_limit is None) and time.localtime(time.time()) >= time_limit:
+                altdisk_op_tab[vios_key] = "SKIPPED-TIMEDOUT"
+                time_limit_str = time.strftime("%m/%d/%Y %H:%M", time_limit)
+                msg = f"Time limit {time_limit_str} reached, no further operation"
+                results['meta']['messages'].append(msg)
+                module.log(msg)
+                continue
+
+            altdisk_op_tab[vios_key] = "SUCCESS-ALTDC"
+            results['timings'][vios_key]['queue'] = round(time.time() - start, 1)
+            th = AltDiskThread(module, params, action, vios_dict, vios_list, vios_key, altdisk_op_tab, done)
+            running.append(th)
+            th.start()
+
+        if not running:
+            break
+
+        # wait for a tuple operation to end to start the next one
+        th = done.get()
+        th.join()
+        running.remove(th)
+
+    module.debug(f'altdisk_op_tab: {altdisk_op_tab}')
+    return altdisk_op_tab
+
+
+class AltDiskThread(threading.Thread):
+    """
+    Class used to perform the alternate disk operation on a VIOS tuple
+    while other tuples are handled.
+    The thread reports its end in the done queue of the scheduler.
+    """
+
+    def __init__(self, module, params, action, vios_dict, vios_list, vios_key, altdisk_op_tab, done):
+        self._module = module
+        self._tuple_args = (params, action, vios_dict, vios_list, vios_key, altdisk_op_tab)
+        self._vios_key = vios_key
+        self._altdisk_op_tab = altdisk_op_tab
+        self._done = done
+        threading.Thread.__init__(self, name=f'AltDiskThread({vios_key})')
+        self.daemon = True
+
+    def run(self):
+        self._module.debug(f'Starting {self.name}')
+        start = time.time()
+        try:
+            alt_disk_tuple(self._module, *self._tuple_args)
+        except Exception as exc:
+            msg = f'Unexpected error on {self._vios_key}: {exc}'
+            self._module.log('ERROR: ' + msg)
             results['meta']['messages'].append(msg)
-            module.log(msg)
-            continue
+            self._altdisk_op_tab[self._vios_key] = f"FAILURE-ALTDC {msg}"
+        finally:
+            results['timings'][self._vios_key]['total'] = round(time.time() - start, 1)
+            self._module.debug(f'End of {self.name}')
+            self._done.put(self)
 
-        altdisk_op_tab[vios_key] = "SUCCESS-ALTDC"
 
-        if action == 'alt_disk_copy':
-            for vios in vios_dict:
-                rootvg_info[vios] = check_rootvg(module, vios)
+def alt_disk_tuple(module, params, action, vios_dict, vios_list, vios_key, altdisk_op_tab):
+    """
+    alt_disk_copy / alt_disk_clean operation on a VIOS tuple
 
-            ret = find_valid_altdisk(module, params, action, vios_dict, vios_key,
-                                     rootvg_info, altdisk_op_tab)
-            if ret != 0:
-                continue
+    - for each VIOS of the tuple, check the rootvg, find and valid the hdisk for the operation
+    - unmirror rootvg if necessary
+    - perform the alt disk copy or cleanup operation
+    - wait for the copy to finish
+    - mirror rootvg if necessary
+
+    The duration of each stage is recorded in results['timings'][vios_key].
+
+    arguments:
+        module          (dict): The Ansible module
+        params          (dict): The parameters for the provided action
+        action           (str): The action to perform
+        vios_dict       (dict): The VIOS dictionary with associated list of hdisks
+        vios_list       (list): The sorted list of VIOS of the tuple
+        vios_key         (str): The key for altdisk_op_tab status dicionary
+        altdisk_op_tab  (dict): The operation status
+    return:
+        none
+    """
 
-        for vios, hdisks in vios_dict.items():
+    rootvg_info = {}
+    timings = results['timings'][vios_key]
 
-            # set the error label to be used in sub routines
-            if action == 'alt_disk_copy':
-                err_label = "FAILURE-ALTDCOPY1"
-                if vios != vios_list[0]:
-                    err_label = "FAILURE-ALTDCOPY2"
-            elif action == 'alt_disk_clean':
-                err_label = "FAILURE-ALTDCLEAN1"
-                if vios != vios_list[0]:
-                    err_label = "FAILURE-ALTDCLEAN2"
+    if action == 'alt_disk_copy':
+        start = time.time()
+        for vios in vios_dict:
+            rootvg_info[vios] = check_rootvg(module, vios)
+        timings['check'] = round(time.time() - start, 1)
 
-            msg = f'Using {hdisks} as alternate disks on {vios}'
-            results['meta'][vios]['messages'].append(msg)
-            module.log(msg)
+        start = time.time()
+        ret = find_valid_altdisk(module, params, action, vios_dict, vios_key,
+                                 rootvg_info, altdisk_op_tab)
+        timings['disk_selection'] = round(time.time() - start, 1)
+        if ret != 0:
+            return
 
-            if action == 'alt_disk_copy':
-                # unmirror the vg if necessary
-                # check mirror
+    for vios, hdisks in vios_dict.items():
+        vios_timings = timings['vioses'].setdefault(vios, {})
+
+        # set the error label to be used in sub routines
+        if action == 'alt_disk_copy':
+            err_label = "FAILURE-ALTDCOPY1"
+            if vios != vios_list[0]:
+                err_label = "FAILURE-ALTDCOPY2"
+        elif action == 'alt_disk_clean':
+            err_label = "FAILURE-ALTDCLEAN1"
+            if vios != vios_list[0]:
+                err_label = "FAILURE-ALTDCLEAN2"
+
+        msg = f'Using {hdisks} as alternate disks on {vios}'
+        results['meta'][vios]['messages'].append(msg)
+        module.log(msg)
 
-                copies_h = rootvg_info[vios]["copy_dict"]
-                nb_copies = len(copies_h.keys())
+        if action == 'alt_disk_copy':
+            # unmirror the vg if necessary
+            # check mirror
 
-                if nb_copies > 1:
-                    if not params['force']:
-                        altdisk_op_tab[vios_key] = f"{err_label} rootvg is mirrored on {vios}"
-                        msg = f'The rootvg is mirrored on {vios} and force option is not set'
-                        results['meta'][vios]['messages'].append(msg)
-                        module.log(msg)
-                        break
+            copies_h = rootvg_info[vios]["copy_dict"]
+            nb_copies = len(copies_h.keys())
 
-                    msg = f'Stop mirroring on {vios}'
+            if nb_copies > 1:
+                if not params['force']:
+                    altdisk_op_tab[vios_key] = f"{err_label} rootvg is mirrored on {vios}"
+                    msg = f'The rootvg is mirrored on {vios} and force option is not set'
                     results['meta'][vios]['messages'].append(msg)
-                    module.log('WARNING: ' + msg)
+                    module.log(msg)
+                    break
 
-                    cmd = ['/usr/sbin/unmirrorvg', 'rootvg']
-                    ret, stdout, stderr = nim_exec(module, vios, cmd)
-                    if ret != 0:
-                        altdisk_op_tab[vios_key] = f"{err_label} to unmirror rootvg on {vios}"
-                        msg = f'Failed to unmirror rootvg on {vios}: {stderr}'
-                        results['meta'][vios]['messages'].append(msg)
-                        module.log('ERROR: ' + msg)
-                        break
-                    if stderr.find('rootvg successfully unmirrored') == -1:
-                        # unmirror command Failed
-                        altdisk_op_tab[vios_key] = f"{err_label} to unmirror rootvg on {vios}"
-                        msg = f'Failed to unmirror rootvg on {vios}: {stdout} {stderr}'
-                        results['meta'][vios]['messages'].append(msg)
-                        module.log('ERROR: ' + msg)
-                        break
+                msg = f'Stop mirroring on {vios}'
+                results['meta'][vios]['messages'].append(msg)
+                module.log('WARNING: ' + msg)
 
-                    # unmirror command OK
-                    msg = f'Unmirror rootvg on {vios} successful'
-                    results['meta'][vios]['messages'].append(msg)
-                    module.log('WARNING: ' + msg)
-
-                module.log(f'Alternate disk copy on {vios}')
-
-                # alt_disk_copy
-                cmd = ['nim', '-o', 'alt_disk_install',
-                       '-a', 'source=rootvg',
-                       '-a', 'disk=' + ' '.join(hdisks),
-                       '-a', 'set_bootlist=no',
-                       '-a', 'boot_client=no',
-                       vios]
-                ret_altdc, stdout, stderr = module.run_command(cmd)
-                if ret_altdc != 0:
-                    altdisk_op_tab[vios_key] = f"{err_label} to copy {hdisks} on {vios}"
-                    msg = f'Failed to copy {hdisks} on {vios}: {stderr}'
+                cmd = ['/usr/sbin/unmirrorvg', 'rootvg']
+                start = time.time()
+                ret, stdout, stderr = nim_exec(module, vios, cmd)
+                vios_timings['unmirror'] = round(time.time() - start, 1)
+                if ret != 0:
+                    altdisk_op_tab[vios_key] = f"{err_label} to unmirror rootvg on {vios}"
+                    msg = f'Failed to unmirror rootvg on {vios}: {stderr}'
                     results['meta'][vios]['messages'].append(msg)
                     module.log('ERROR: ' + msg)
-                else:
-                    results['changed'] = True
-                    # wait till alt_disk_install ends
-                    ret_altdc = wait_altdisk_install(module, vios, hdisks,
-                                                     vios_key, altdisk_op_tab,
-                                                     err_label)
-
-                # restore the mirroring if necessary
-                if nb_copies > 1:
-                    msg = f'Restore mirror on {vios}'
+                    break
+                if stderr.find('rootvg successfully unmirrored') == -1:
+                    # unmirror command Failed
+                    altdisk_op_tab[vios_key] = f"{err_label} to unmirror rootvg on {vios}"
+                    msg = f'Failed to unmirror rootvg on {vios}: {stdout} {stderr}'
                     results['meta'][vios]['messages'].append(msg)
-                    module.log(msg)
+                    module.log('ERROR: ' + msg)
+                    break
 
-                    cmd = ['/usr/sbin/mirrorvg', '-m', '-c', nb_copies, 'rootvg', copies_h[2]]
-                    if nb_copies > 2:
-                        cmd += [copies_h[3]]
+                # unmirror command OK
+                msg = f'Unmirror rootvg on {vios} successful'
+                results['meta'][vios]['messages'].append(msg)
+                module.log('WARNING: ' + msg)
+
+            module.log(f'Alternate disk copy on {vios}')
+
+            # alt_disk_copy
+            cmd = ['nim', '-o', 'alt_disk_install',
+                   '-a', 'source=rootvg',
+                   '-a', 'disk=' + ' '.join(hdisks),
+                   '-a', 'set_bootlist=no',
+                   '-a', 'boot_client=no',
+                   vios]
+            start = time.time()
+            ret_altdc, stdout, stderr = module.run_command(cmd)
+            if ret_altdc != 0:
+                altdisk_op_tab[vios_key] = f"{err_label} to copy {hdisks} on {vios}"
+                msg = f'Failed to copy {hdisks} on {vios}: {stderr}'
+                results['meta'][vios]['messages'].append(msg)
+                module.log('ERROR: ' + msg)
+            else:
+                results['changed'] = True
+                # wait till alt_disk_install ends
+                ret_altdc = wait_altdisk_install(module, vios, hdisks,
+                                                 vios_key, altdisk_op_tab,
+                                                 err_label)
+            vios_timings['copy'] = round(time.time() - start, 1)
+
+            # restore the mirroring if necessary
+            if nb_copies > 1:
+                msg = f'Restore mirror on {vios}'
+                results['meta'][vios]['messages'].append(msg)
+                module.log(msg)
 
-                    ret, stdout, stderr = nim_exec(module, vios, cmd)
-                    if ret != 0:
-                        altdisk_op_tab[vios_key] = f"{err_label} to mirror rootvg on {vios}"
-                        msg = f'Failed to mirror rootvg on {vios}: {stderr}'
-                        results['meta'][vios]['messages'].append(msg)
-                        module.log('ERROR: ' + msg)
-                        break
-                    if stderr.find('Failed to mirror the volume group') == -1:
-                        msg = f'Mirror rootvg on {vios} successful'
-                        results['meta'][vios]['messages'].append(msg)
-                        module.log(msg)
+                cmd = ['/usr/sbin/mirrorvg', '-m', '-c', nb_copies, 'rootvg', copies_h[2]]
+                if nb_copies > 2:
+                    cmd += [copies_h[3]]
 
-                    # mirror command failed
+                start = time.time()
+                ret, stdout, stderr = nim_exec(module, vios, cmd)
+                vios_timings['mirror'] = round(time.time() - start, 1)
+                if ret != 0:
                     altdisk_op_tab[vios_key] = f"{err_label} to mirror rootvg on {vios}"
-                    msg = f'Failed to mirror rootvg on {vios}: {stdout} {stderr}'
+                    msg = f'Failed to mirror rootvg on {vios}: {stderr}'
                     results['meta'][vios]['messages'].append(msg)
                     module.log('ERROR: ' + msg)
                     break
+                if stderr.find('Failed to mirror the volume group') == -1:
+                    msg = f'Mirror rootvg on {vios} successful'
+                    results['meta'][vios]['messages'].append(msg)
+                    module.log(msg)
 
-                if ret_altdc != 0:
-                    # timed out or an error occured, continue with next target_tuple
-                    break
+                # mirror command failed
+                altdisk_op_tab[vios_key] = f"{err_label} to mirror rootvg on {vios}"
+                msg = f'Failed to mirror rootvg on {vios}: {stdout} {stderr}'
+                results['meta'][vios]['messages'].append(msg)
+                module.log('ERROR: ' + msg)
+                break
 
-            elif action == 'alt_disk_clean':
-                module.log(f'Alternate disk clean on {vios}')
+            if ret_altdc != 0:
+                # timed out or an error occured, continue with next target_tuple
+                break
 
-                ret = check_valid_altdisks(module, action, vios, hdisks, vios_key,
-                                           altdisk_op_tab, err_label)
-                if not ret:
-                    continue
+        elif action == 'alt_disk_clean':
+            module.log(f'Alternate disk clean on {vios}')
+
+            ret = check_valid_altdisks(module, action, vios, hdisks, vios_key,
+                                       altdisk_op_tab, err_label)
+            if not ret:
+                continue
+
+            msg = f'Using {hdisks} as alternate disks on {vios}'
+            results['meta'][vios]['messages'].append(msg)
+            module.log(msg)
 
-                msg = f'Using {hdisks} as alternate disks on {vios}'
+            # First remove the alternate VG
+            cmd = ['/usr/sbin/alt_rootvg_op', '-X', 'altinst_rootvg']
+            start = time.time()
+            ret, stdout, stderr = nim_exec(module, vios, cmd)
+            vios_timings['clean'] = round(time.time() - start, 1)
+            if ret != 0:
+                altdisk_op_tab[vios_key] = f"{err_label} to remove altinst_rootvg on {vios}"
+                msg = f'Failed to remove altinst_rootvg on {vios}: {stderr}'
                 results['meta'][vios]['messages'].append(msg)
-                module.log(msg)
+                module.log('ERROR: ' + msg)
+                continue
+
+            msg = f'Remove altinst_rootvg from {hdisks} of {vios}: Success'
+            results['meta'][vios]['messages'].append(msg)
+            module.log(msg)
+            results['changed'] = True
 
-                # First remove the alternate VG
-                cmd = ['/usr/sbin/alt_rootvg_op', '-X', 'altinst_rootvg']
+            for hdisk in hdisks:
+                # Clears the owning VG from the disk
+                cmd = ['/usr/sbin/chpv', '-C', hdisk]
                 ret, stdout, stderr = nim_exec(module, vios, cmd)
                 if ret != 0:
-                    altdisk_op_tab[vios_key] = f"{err_label} to remove altinst_rootvg on {vios}"
-                    msg = f'Failed to remove altinst_rootvg on {vios}: {stderr}'
+                    altdisk_op_tab[vios_key] = f"{err_label} to clear altinst_rootvg from {hdisk} on {vios}"
+                    msg = f'Failed to clear altinst_rootvg from disk {hdisk} on {vios}: {stderr}'
                     results['meta'][vios]['messages'].append(msg)
                     module.log('ERROR: ' + msg)
                     continue
 
-                msg = f'Remove altinst_rootvg from {hdisks} of {vios}: Success'
+                msg = f'Clear altinst_rootvg from disk from {hdisks} of {vios}: Success'
                 results['meta'][vios]['messages'].append(msg)
                 module.log(msg)
-                results['changed'] = True
-
-                for hdisk in hdisks:
-                    # Clears the owning VG from the disk
-                    cmd = ['/usr/sbin/chpv', '-C', hdisk]
-                    ret, stdout, stderr = nim_exec(module, vios, cmd)
-                    if ret != 0:
-                        altdisk_op_tab[vios_key] = f"{err_label} to clear altinst_rootvg from {hdisk} on {vios}"
-                        msg = f'Failed to clear altinst_rootvg from disk {hdisk} on {vios}: {stderr}'
-                        results['meta'][vios]['messages'].append(msg)
-                        module.log('ERROR: ' + msg)
-                        continue
-
-                    msg = f'Clear altinst_rootvg from disk from {hdisks} of {vios}: Success'
-                    results['meta'][vios]['messages'].append(msg)
-                    module.log(msg)
 
     module.debug(f'altdisk_op_tab: {altdisk_op_tab}')
     return altdisk_op_tab
@@ -1279,6 +1402,7 @@ def alt_disk_action(module, params, action, targets, vios_status, time_limit):
 def main():
 
     global results
+    global nim_watcher
 
     module = AnsibleModule(
         argument_spec=dict(
@@ -1292,6 +1416,7 @@ def main():
                                   choices=['minimize', 'upper', 'lower', 'nearest'],
                                   default='nearest'),
             force=dict(type='bool', default=False),
+            max_parallel=dict(type='int', default=1),
         )
     )
 
@@ -1303,6 +1428,7 @@ def main():
         meta={'messages': []},
         nim_node={},
         status={},
+        timings={},
     )
 
     # Get module params
@@ -1314,10 +1440,13 @@ def main():
     params['targets'] = targets
     params['disk_size_policy'] = module.params['disk_size_policy']
     params['force'] = module.params['force']
+    params['max_parallel'] = module.params['max_parallel']
 
     vios_status = {}
     targets_altdisk_status = {}
 
+    nim_watcher = NimStateWatcher(module)
+
     # Build nim node info
     refresh_nim_node(module, 'vios')
 
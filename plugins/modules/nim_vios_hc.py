@@ -45,10 +45,25 @@ options:
     type: list
     elements: str
     required: true
+  uuid_cache:
+    description:
+    - Path of the file on the NIM master where the managed system and VIOS UUIDs discovered through
+      the HMC are cached between runs.
+    - Entries are keyed by HMC, CEC serial number and VIOS name.
+    type: path
+    default: /var/adm/ansible/nim_vios_hc_uuid.json
+  uuid_cache_ttl:
+    description:
+    - Number of seconds a cached UUID entry remains valid.
+    - C(0) disables the cache, the UUIDs are then discovered from the HMC on every run.
+    type: int
+    default: 86400
 notes:
   - Use the B(power_aix_vioshc) role to install the required B(vioshc.py) script on the NIM master.
   - The default log directory for the B(vioshc.py) script is B(/tmp/vios_maint).
   - The B(vioshc.py) script uses Curl to get information through the REST API of the VIOSes' HMC.
+  - Cached UUIDs are discarded when the VIOS partition ID changes, when they expire, or when a
+    health check using them fails; the UUIDs of the HMC are then discovered again.
 '''
 
 EXAMPLES = r'''
@@ -58,6 +73,12 @@ EXAMPLES = r'''
       - vios1,vios2
       - vios3
     action: health_check
+
+- name: Perform a health check discovering the UUIDs from the HMC on every run
+  nim_vios_hc:
+    targets: vios1,vios2
+    action: health_check
+    uuid_cache_ttl: 0
 '''
 
 RETURN = r'''
@@ -80,13 +101,18 @@ status:
     type: dict
 '''
 
+import json
 import re
 import os
+import tempfile
+import time
 
 from ansible.module_utils.basic import AnsibleModule
 
 OUTPUT = []
 NIM_NODE = {}
+UUID_CACHE = {}
+CACHED_VIOS = set()
 results = None
 
 
@@ -352,6 +378,101 @@ def check_vios_targets(module, targets):
     return vios_list_tuples_res
 
 
+def uuid_cache_key(hmc_id, cec_serial, vios):
+    """
+    Build the key of a VIOS entry in the UUID cache.
+    """
+    return f'{hmc_id}:{cec_serial}:{vios}'
+
+
+def load_uuid_cache(module, cache_file, ttl):
+    """
+    Load the persistent UUID cache from the NIM master.
+    Expired entries are dropped.
+
+    arguments:
+        cache_file: path of the cache file
+        ttl: validity of an entry in seconds
+
+    return: a dictionary of cache entries
+    """
+    if ttl <= 0 or not os.path.exists(cache_file):
+        return {}
+
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as exc:
+        module.log(f'[WARNING] Ignoring UUID cache {cache_file}: {exc}')
+        return {}
+    if not isinstance(cache, dict):
+        module.log(f'[WARNING] Ignoring UUID cache {cache_file}: bad format')
+        return {}
+
+    now = time.time()
+    return {key: entry for key, entry in cache.items()
+            if isinstance(entry, dict) and now - entry.get('timestamp', 0) < ttl}
+
+
+def save_uuid_cache(module, cache_file):
+    """
+    Atomically write the UUID cache on the NIM master.
+    The cache is an optimization, failures are only logged.
+    """
+    cache_dir = os.path.dirname(cache_file) or '.'
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        fd, tmp_file = tempfile.mkstemp(dir=cache_dir, prefix='.nim_vios_hc_')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(UUID_CACHE, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, cache_file)
+    except OSError as exc:
+        module.log(f'[WARNING] Failed to save UUID cache {cache_file}: {exc}')
+
+
+def apply_uuid_cache(module):
+    """
+    Complete the NIM_NODE VIOS entries with the UUIDs found in the cache.
+    An entry is only used if the partition ID of the VIOS did not change,
+    otherwise it is invalidated.
+    """
+    for vios, nimvios in NIM_NODE['nim_vios'].items():
+        if 'mgmt_hmc_id' not in nimvios or 'mgmt_cec_serial' not in nimvios:
+            continue
+        key = uuid_cache_key(nimvios['mgmt_hmc_id'], nimvios['mgmt_cec_serial'], vios)
+        entry = UUID_CACHE.get(key)
+        if entry is None:
+            continue
+        if entry.get('vios_part_id') != nimvios['mgmt_vios_id']:
+            module.debug(f'UUID cache entry {key} invalidated: partition ID changed')
+            del UUID_CACHE[key]
+            continue
+        nimvios['vios_uuid'] = entry['vios_uuid']
+        nimvios['cec_uuid'] = entry['cec_uuid']
+        CACHED_VIOS.add(vios)
+
+    module.debug(f'VIOS UUIDs from cache: {sorted(CACHED_VIOS)}')
+
+
+def invalidate_uuid_cache(module, hmc_id, vioses=None):
+    """
+    Remove the cache entries of an HMC, or only those of the given VIOSes.
+    The UUIDs are also removed from NIM_NODE so they are discovered again.
+    """
+    for vios, nimvios in NIM_NODE['nim_vios'].items():
+        if nimvios.get('mgmt_hmc_id') != hmc_id:
+            continue
+        if vioses is not None and vios not in vioses:
+            continue
+        key = uuid_cache_key(hmc_id, nimvios.get('mgmt_cec_serial'), vios)
+        if UUID_CACHE.pop(key, None) is not None:
+            module.debug(f'UUID cache entry {key} invalidated')
+        nimvios.pop('vios_uuid', None)
+        nimvios.pop('cec_uuid', None)
+        CACHED_VIOS.discard(vios)
+
+
 def vios_health(module, mgmt_sys_uuid, hmc_ip, vios_uuids):
     """
     Check the health of the given VIOS or pair of VIOSes from a rolling
@@ -420,6 +541,9 @@ def vios_health_init(module, hmc_id, hmc_ip):
         results['msg'] = f'Failed to get the VIOS information, vioshc returned: {ret}'
         module.fail_json(**results)
 
+    # The discovery is authoritative for this HMC: drop its cached entries
+    invalidate_uuid_cache(module, hmc_id)
+
     # Parse the output and store the UUIDs
     data_start = 0
     vios_section = 0
@@ -470,6 +594,12 @@ def vios_health_init(module, hmc_id, hmc_ip):
                    and NIM_NODE['nim_vios'][vios_key]['mgmt_cec_serial'] == cec_serial:
                     NIM_NODE['nim_vios'][vios_key]['vios_uuid'] = vios_uuid
                     NIM_NODE['nim_vios'][vios_key]['cec_uuid'] = cec_uuid
+                    UUID_CACHE[uuid_cache_key(hmc_id, cec_serial, vios_key)] = {
+                        'cec_uuid': cec_uuid,
+                        'vios_uuid': vios_uuid,
+                        'vios_part_id': vios_part_id,
+                        'timestamp': time.time(),
+                    }
                     break
             continue
 
@@ -499,9 +629,14 @@ def health_check(module, targets):
     a rolling update operation.
 
     For each VIOS tuple:
-    - call vioshc.py a first time to collect the VIOS UUIDs
+    - call vioshc.py a first time to collect the VIOS UUIDs if they
+      are not already known from the cache
     - call vioshc.py a second time to check the healthiness
 
+    If the check fails with UUIDs coming from the cache, they might be
+    stale: the cache is invalidated for the tuple and the check is
+    retried once with freshly discovered UUIDs.
+
     return: a dictionary with the state of each VIOS tuple
     """
 
@@ -565,6 +700,16 @@ def health_check(module, targets):
             OUTPUT.append('    Checking if we can update the VIOS')
             ret = vios_health(module, mgmt_uuid, hmc_ip, vios_uuid)
 
+            if ret != 0 and CACHED_VIOS.intersection(target_tuple):
+                OUTPUT.append('    Cached VIOS UUID might be stale, getting VIOS UUID')
+                module.log(f'Retrying health check of {vios_key} with discovered UUIDs')
+                invalidate_uuid_cache(module, hmc_id, target_tuple)
+                vios_health_init(module, hmc_id, hmc_ip)
+                if all('vios_uuid' in NIM_NODE['nim_vios'][vios] for vios in target_tuple):
+                    vios_uuid = [NIM_NODE['nim_vios'][vios]['vios_uuid'] for vios in target_tuple]
+                    mgmt_uuid = NIM_NODE['nim_vios'][vios1]['cec_uuid']
+                    ret = vios_health(module, mgmt_uuid, hmc_ip, vios_uuid)
+
             if ret == 0:
                 OUTPUT.append('    Health check succeeded')
                 module.log(f"Health check succeeded for {vios_key}")
@@ -635,6 +780,8 @@ def main():
         argument_spec=dict(
             targets=dict(required=True, type='list', elements='str'),
             action=dict(required=True, choices=['health_check'], type='str'),
+            uuid_cache=dict(required=False, type='path', default='/var/adm/ansible/nim_vios_hc_uuid.json'),
+            uuid_cache_ttl=dict(required=False, type='int', default=86400),
         )
     )
 
@@ -647,6 +794,8 @@ def main():
 
     # Get module params
     targets = module.params['targets']
+    uuid_cache = module.params['uuid_cache']
+    uuid_cache_ttl = module.params['uuid_cache_ttl']
 
     OUTPUT.append(f'VIOS Health Check operation for {targets}')
 
@@ -656,6 +805,10 @@ def main():
     # Build nim node info
     build_nim_node(module)
 
+    # Get the VIOS UUIDs known from previous runs
+    UUID_CACHE.update(load_uuid_cache(module, uuid_cache, uuid_cache_ttl))
+    apply_uuid_cache(module)
+
     ret = check_vios_targets(module, targets)
     if (ret is None) or (not ret):
         OUTPUT.append('    Warning: Empty target list')
@@ -678,6 +831,9 @@ def main():
 
         targets_health_status = health_check(module, target_list)
 
+        if uuid_cache_ttl > 0:
+            save_uuid_cache(module, uuid_cache)
+
         OUTPUT.append('VIOS Health Check status:')
         module.log('VIOS Health Check status:')
         for vios_key, vios_health_status in targets_health_status.items():
@@ -10,6 +10,7 @@
 
 from __future__ import absolute_import, division, print_function
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.stanza import decode_value, get_stanza, parse_colon_listing
 __metaclass__ = type
 
 DOCUMENTATION = r'''
@@ -358,7 +359,9 @@ attrs:
   returned: always
   contains:
     cmd:
-      description: Command that is run to update attr
+      description:
+        - Command that is run to update attr.
+        - All the attributes that require change are updated by the same command.
       returned: Only if attr requires change
       type: str
     stdout:
@@ -385,9 +388,10 @@ result = dict(
 )
 
 
-def set_attr_value(module, stanza, attr, target_value):
+def set_attr_values(module, stanza, target_values):
     # -> dict:
-    """ Sets the selected file->stanza->attr=target_value.
+    """ Sets the selected file->stanza->attr=target_value for all the
+    attributes of target_values with a single chsec command.
     If command fails, exits using module.fail_json.
     Returns a dict of:
         cmd: string of command run
@@ -396,22 +400,19 @@ def set_attr_value(module, stanza, attr, target_value):
         stderr: stderr
     """
     chsec_command = module.get_bin_path('chsec', required=True)
-    if str(target_value) in ["True", "False"]:
-        if str(target_value) == "True":
-            target_value = "true"
-        else:
-            target_value = "false"
-    cmd = [
-        chsec_command,
-        '-f', '/etc/security/user',
-        '-s', stanza,
-        '-a', '='.join(map(str, [attr, target_value]))
-    ]
+    cmd = [chsec_command, '-f', '/etc/security/user', '-s', stanza]
+    for attr, target_value in target_values.items():
+        if str(target_value) in ["True", "False"]:
+            if str(target_value) == "True":
+                target_value = "true"
+            else:
+                target_value = "false"
+        cmd += ['-a', '='.join(map(str, [attr, target_value]))]
     rc, stdout, stderr = module.run_command(cmd)
     if rc != 0:
         msg = 'Failed to run chsec command: ' + ' '.join(cmd)
         if "3004-692" in stderr:
-            msg += f"Invalid value provided - {target_value}"
+            msg += " Invalid value provided"
         module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
     return_dict = {
         'cmd': ' '.join(cmd),
@@ -422,18 +423,31 @@ def set_attr_value(module, stanza, attr, target_value):
     return return_dict
 
 
-def get_current_attr_value(module, stanza, attr):
+def get_current_attr_values(module, stanza, attrs):
     """
-    Returns the current value of the provided attribute
+    Returns the current values of the provided attributes, read from
+    /etc/security/user, or with a single lssec command if the file cannot
+    be read or has no such stanza
     arguments:
         module (dict) - Ansible generic argument spec
-        stanza (str) - Stanza for which the attribute needs to be checked
-        attr (str) - Attribute that needs to be checked
+        stanza (str) - Stanza for which the attributes need to be checked
+        attrs (list) - Attributes that need to be checked
     returns:
-        lssec_out (str) - Current value of the provided attribute
+        values (dict) - Current value of each provided attribute
     """
+    if not attrs:
+        return {}
+    try:
+        values = get_stanza('/etc/security/user', stanza)
+    except (OSError, UnicodeDecodeError) as exc:
+        module.debug(f'Cannot read /etc/security/user: {exc}, using lssec')
+        values = None
+    if values is not None:
+        return {attr: values.get(attr, '') for attr in attrs}
     lssec_command = module.get_bin_path('lssec', required=True)
-    cmd = [lssec_command, '-c', '-f', '/etc/security/user', '-s', stanza, '-a', attr]
+    cmd = [lssec_command, '-c', '-f', '/etc/security/user', '-s', stanza]
+    for attr in attrs:
+        cmd += ['-a', attr]
     rc, stdout, stderr = module.run_command(cmd)
     if rc != 0:
         if "3004-725" in stderr:
@@ -441,9 +455,9 @@ def get_current_attr_value(module, stanza, attr):
         else:
             msg = 'Failed to run lssec command: ' + ' '.join(cmd)
         module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
-    # Strip newline and double-quotation marks that are sometimes added
-    lssec_out = stdout.splitlines()[1].split(':', 1)[1].strip('\\\"\n')
-    return str(lssec_out)
+    values = next(iter(parse_colon_listing(stdout).values()), {})
+    # the values are sometimes enclosed in double quotes
+    return {attr: decode_value(values.get(attr, '')) for attr in attrs}
 
 
 def run_chsec(module):
@@ -463,17 +477,22 @@ def run_chsec(module):
         'attrs': {},
     }
 
-    changed_attrs = 0
-
     params = module.params
+    target_vals = {}
     for attr in params.keys():
         if attr in ["state", "stanza"] or not params[attr]:
             continue
         if state == 'absent':
-            target_val = ''
+            target_vals[attr] = ''
         else:
-            target_val = str(params[attr])
-        current_val = get_current_attr_value(module, stanza, attr)
+            target_vals[attr] = str(params[attr])
+
+    # Read all the attributes at once
+    current_vals = get_current_attr_values(module, stanza, list(target_vals))
+
+    changes = {}
+    for attr, target_val in target_vals.items():
+        current_val = current_vals[attr]
 
         msg_attr = {
             'status': 'unchanged',
@@ -485,12 +504,16 @@ def run_chsec(module):
             if module.check_mode:
                 msg_attr["check_mode"] = True
             else:
-                cmd_return = set_attr_value(module, stanza, attr, target_val)
-                msg_attr.update(cmd_return)
+                changes[attr] = target_val
             results['changed'] = True
             msg_attr['status'] = 'changed'
-            changed_attrs += 1
         results['attrs'][attr] = msg_attr
+
+    # Apply all the changes at once
+    if changes:
+        cmd_return = set_attr_values(module, stanza, changes)
+        for attr in changes:
+            results['attrs'][attr].update(cmd_return)
     return results
 
 
@@ -7,10 +7,10 @@
 from __future__ import absolute_import, division, print_function
 import os
 import re
-import glob
-import shutil
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.suma_metadata import (
+    SumaMetadata, SumaMetadataError)
 __metaclass__ = type
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
@@ -122,6 +122,14 @@ options:
       not exact, for example I(oslevel=Latest).
     type: path
     default: /var/adm/ansible/metadata
+  metadata_ttl:
+    description:
+    - Specifies the number of seconds the SP levels found in the SUMA metadata are cached in
+      I(metadata_dir).
+    - The metadata is downloaded again when a requested level is not in the cache.
+    - C(0) disables the cache, the metadata is then downloaded on every run.
+    type: int
+    default: 86400
 notes:
   - The B(/var/adm/ras/suma.log) file on your system contains detailed results from running the SUMA
     command.
@@ -246,33 +254,6 @@ def compute_rq_type(oslevel, last_sp):
     return 'ERROR'
 
 
-def find_sp_version(file):
-    """
-    Open and parse the provided file to find higher SP version
-    arguments:
-        file    path of the file to parse
-    return:
-       sp_version   value found or None
-    """
-    sp_version = ""
-    module.debug(f"opening file: {file}")
-    with open(file, mode="r", encoding="utf-8") as myfile:
-        for line in myfile:
-            # module.debug("line: {0}".format(line.rstrip()))
-            match_item = re.match(
-                r"^<SP name=\"([0-9]{4}-[0-9]{2}-[0-9]{2}-[0-9]{4})\">$",
-                line.rstrip())
-            if match_item:
-                version = match_item.group(1)
-                debug_line = line.rstrip()
-                module.debug(f"matched line: {debug_line}, version={version}")
-                if sp_version == "" or version > sp_version:
-                    sp_version = version
-                break
-
-    return sp_version
-
-
 def compute_rq_name(rq_type, oslevel, last_sp):
     """
     Compute rq_name.
@@ -317,56 +298,30 @@ def compute_rq_name(rq_type, oslevel, last_sp):
             results['msg'] = msg
             module.fail_json(**results)
 
-        if not os.path.exists(suma_params['metadata_dir']):
-            os.makedirs(suma_params['metadata_dir'])
-
-        DLTarget = suma_params['metadata_dir']
-        DisplayName = suma_params['description']
-        FilterDir = suma_params['metadata_dir']
-
-        cmd = ['/usr/sbin/suma', '-x', '-a', 'Action=Metadata', '-a', 'RqType=Latest']
-        cmd += ['-a', f'DLTarget={DLTarget}']
-        cmd += ['-a', f'FilterML={metadata_filter_ml}']
-        cmd += ['-a', f'DisplayName="{DisplayName}"']
-        cmd += ['-a', f'FilterDir={FilterDir}']
-
-        rc, stdout, stderr = module.run_command(cmd)
-        if rc != 0:
-            msg_cmd = ' '.join(cmd)
-            msg = f"Suma metadata command '{msg_cmd}' failed with return code {rc}"
-            module.log(msg + f", stderr: {stderr}, stdout:{stdout}".format(stderr, stdout))
-            results['cmd'] = ' '.join(cmd)
-            results['stdout'] = stdout
-            results['stderr'] = stderr
-            results['msg'] = msg
+        metadata = SumaMetadata(module, suma_params['metadata_dir'], suma_params['description'],
+                                suma_params['metadata_ttl'])
+        try:
+            if len(oslevel) == 10:
+                # find latest SP build number for the SP
+                sp_version = metadata.sp_build(metadata_filter_ml, oslevel)
+            else:
+                # find latest SP build number for the TL
+                sp_version = metadata.latest_sp(metadata_filter_ml)
+        except SumaMetadataError as exc:
+            module.log(exc.msg + f", stderr: {exc.stderr}, stdout:{exc.stdout}")
+            results['cmd'] = exc.cmd
+            results['stdout'] = exc.stdout
+            results['stderr'] = exc.stderr
+            results['msg'] = exc.msg
             module.fail_json(**results)
-        debug_cmd = ' '.join(cmd)
-        module.debug(f"SUMA command '{debug_cmd}' rc:{rc}, stdout:{stdout}")
-
-        sp_version = ""
-        if len(oslevel) == 10:
-            # find latest SP build number for the SP
-            file_name = suma_params['metadata_dir'] + "/installp/ppc/" + oslevel + ".xml"
-            sp_version = find_sp_version(file_name)
-        else:
-            # find latest SP build number for the TL
-            file_name = suma_params['metadata_dir'] + "/installp/ppc/" + "*.xml"
-            files = glob.glob(file_name)
-            module.debug(f"searching SP in files: {files}")
-            for cur_file in files:
-                version = find_sp_version(cur_file)
-                if sp_version == "" or version > sp_version:
-                    sp_version = version
 
         if sp_version is None or not sp_version.strip():
             msg = f"Cannot determine SP version for OS level {oslevel}: \
-                'SP name' not found in metadata files {files}"
+                'SP name' not found in metadata files"
             module.log(msg)
             results['msg'] = msg
             module.fail_json(**results)
 
-        shutil.rmtree(suma_params['metadata_dir'])
-
         rq_name = sp_version
         msg = f'Suma metadata: {rq_name} is the latest SP of {oslevel}'
         module.log(msg)
@@ -845,6 +800,7 @@ def main():
             sched_time=dict(required=False, type='str'),
             description=dict(required=False, type='str'),
             metadata_dir=dict(required=False, type='path', default='/var/adm/ansible/metadata'),
+            metadata_ttl=dict(required=False, type='int', default=86400),
         ),
         required_if=[
             ['action', 'edit', ['task_id']],
@@ -903,6 +859,7 @@ def main():
         suma_params['oslevel'] = module.params['oslevel']
         suma_params['download_dir'] = module.params['download_dir']
         suma_params['metadata_dir'] = module.params['metadata_dir']
+        suma_params['metadata_ttl'] = module.params['metadata_ttl']
         suma_params['download_only'] = module.params['download_only']
         suma_params['save_task'] = module.params['save_task']
         suma_params['last_sp'] = module.params['last_sp']
@@ -7,6 +7,9 @@
 from __future__ import absolute_import, division, print_function
 import re
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.ibm.power_aix.plugins.module_utils.stanza import (
+    get_stanzas, parse_colon_listing, read_colon_file, read_stanza_file
+)
 __metaclass__ = type
 
 ANSIBLE_METADATA = {'metadata_version': '1.1',
@@ -22,6 +25,8 @@ short_description: Create new users or change/remove attributes of users on AIX.
 description:
 - This module facilitates the creation of a new user with provided attributes, the
   modification of attributes or deletion of an existing user.
+- It can also reconcile a list of users in one task with I(users), reading all the users once and
+  running only the commands needed.
 version_added: '1.0.0'
 requirements:
 - AIX >= 7.1 TL3
@@ -38,16 +43,46 @@ options:
     - C(absent) deletes the user with provided I(name).
     - C(modify) changes the specified I(attributes) of an exiting user.
     - If the user doesn't exist on the system, it will be created.
+    - Required when I(name) is used.
     type: str
     choices: [ present, absent, modify ]
-    required: true
   name:
     description:
     - Specifies the user name.
     - It must be unique, you cannot use the ALL or default keywords in the user name.
+    - Mutually exclusive with I(users), one of them is required.
     type: str
     aliases: [ user ]
-    required: true
+  users:
+    description:
+    - Specifies a list of users to reconcile in one task.
+    - All the users are read once with C(lsuser -c ALL), then only the users that differ are created,
+      changed or removed, and all the passwords to change are set with a single C(chpasswd) command.
+    - I(remove_homedir), I(change_passwd_on_login) and I(load_module) apply to all the users.
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+        - Specifies the user name.
+        type: str
+        required: true
+      state:
+        description:
+        - C(present) creates the user or changes its I(attributes).
+        - C(absent) deletes the user.
+        type: str
+        choices: [ present, absent ]
+        default: present
+      attributes:
+        description:
+        - Specifies the attributes of the user, see I(attributes).
+        type: dict
+      password:
+        description:
+        - Specifies the encrypted string of the password.
+        - With I(load_module=files), the password is not changed if it is already set.
+        type: str
   attributes:
     description:
     - Specifies the attributes to be changed or created for the user.
@@ -106,6 +141,17 @@ EXAMPLES = r'''
     attributes:
       home: /home/test/aixguest1010
       data: 1272
+
+- name: Reconcile a list of users
+  ibm.power_aix.user:
+    users:
+    - name: aixguest1010
+      attributes:
+        home: /home/test/aixguest1010
+    - name: aixguest1011
+      password: as$12ndhkfjk$1c
+    - name: aixguest1012
+      state: absent
 '''
 
 RETURN = r'''
@@ -126,14 +172,36 @@ stderr:
     description: The standard error.
     returned: If the command failed.
     type: str
+users:
+    description:
+    - The names of the users created, modified and removed, and of the users whose password was set.
+    returned: When I(users) is used.
+    type: dict
+    sample: {"created": ["aixguest1011"], "modified": ["aixguest1010"], "removed": [], "password": ["aixguest1011"]}
 '''
 
+# Stanza files with the user attributes, the attributes not set for a user
+# are taken from the 'default' stanza
+USER_STANZA_FILES = ['/etc/security/user', '/etc/security/limits', '/etc/security/environ']
+
+
+def format_value(val):
+    '''
+    Returns the value of an attribute as displayed by lsuser, the boolean
+    values being in lower case.
+    '''
+    pattern = re.compile(r'yes|true|always|no|false|never', re.IGNORECASE)
+    if val in [True, False] or re.fullmatch(pattern, str(val)):
+        return str(val).lower()
+    return str(val)
+
 
-def get_chuser_command(module):
+def get_chuser_command(module, user_attrs=None):
     '''
     Returns the 'cmd' needed to run to implement changes on
     arguments:
-        module  (dict): The Ansible module
+        module      (dict): The Ansible module
+        user_attrs  (dict): Current user attributes, read with lsuser if None
     note:
         Exits with fail_json in case of error
     return:
@@ -148,14 +216,15 @@ def get_chuser_command(module):
         return None
 
     # 'user_attrs' contains the key=value pairs that are _currently_ set in AIX
-    lsuser_cmd = f"lsuser -R { load_module } -C { name }"
-    rc, stdout, stderr = module.run_command(lsuser_cmd)
-    if rc != 0:
-        msg = f"\nFailed to validate attributes for the user: { name }"
-        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
-    keys = stdout.splitlines()[0].split(':')
-    values = stdout.splitlines()[1].split(':')
-    user_attrs = dict(zip(keys, values))
+    if user_attrs is None:
+        lsuser_cmd = f"lsuser -R { load_module } -C { name }"
+        rc, stdout, stderr = module.run_command(lsuser_cmd)
+        if rc != 0:
+            msg = f"\nFailed to validate attributes for the user: { name }"
+            module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+        keys = stdout.splitlines()[0].split(':')
+        values = stdout.splitlines()[1].split(':')
+        user_attrs = dict(zip(keys, values))
 
     # Adding the load module to the command so that the correct user's attributes are changed.
     load_module_opts = f"-R { load_module } "
@@ -165,14 +234,12 @@ def get_chuser_command(module):
     cmd = ""
     load_module_opts = None
     for attr, val in attributes.items():
-        pattern = re.compile(r'(yes|true|always|no|false|never)', re.IGNORECASE)
-        if val in [True, False] or re.match(pattern, str(val)):
-            val = str(val).lower()
+        val = format_value(val)
         # For idempotency, we compare what Anisble whats the value to be
         #  compared to what is already set
         # Only add attr=val to the opts list they're different. No reason to
         #  if the values are identical!
-        if user_attrs[attr] != val:
+        if user_attrs.get(attr) != val:
             opts += f"{ attr }=\"{ val }\" "
 
     if load_module_opts is not None:
@@ -226,10 +293,53 @@ def check_LDAP(module):
         module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
 
 
+def read_user_files(name):
+    '''
+    read_user_files returns a dict with the attributes of a user of the
+    files load module, read from /etc/passwd, /etc/group and the stanza
+    files of /etc/security. As lsuser, the attributes not set for the user
+    have the value of the default stanza.
+
+    argument:
+        name  (str): User name
+    return:
+        (dict): User attributes with a value, None if the user does not exist
+    note:
+        Raises OSError if a file cannot be read
+    '''
+    passwd = read_colon_file('/etc/passwd')
+    if len(passwd.get(name, [])) < 7:
+        return None
+    fields = passwd[name]
+    pgrp = ''
+    groups = []
+    for group, gfields in read_colon_file('/etc/group').items():
+        if len(gfields) > 2 and gfields[2] == fields[3] and not pgrp:
+            pgrp = group
+            groups.insert(0, group)
+        elif len(gfields) > 3 and name in gfields[3].split(','):
+            groups.append(group)
+    attrs = {
+        'id': fields[2],
+        'pgrp': pgrp,
+        'groups': ','.join(groups),
+        'home': fields[5],
+        'shell': fields[6],
+        'gecos': fields[4],
+    }
+    for path in USER_STANZA_FILES:
+        sfile = read_stanza_file(path)
+        attrs.update(sfile.get(name, default='default') or sfile.get('default') or {})
+    attrs.update(read_stanza_file('/etc/security/user.roles').get(name) or {})
+    return {attr: value for attr, value in attrs.items() if value != ""}
+
+
 def get_user_attrs(module):
     '''
     get_user_attrs returns a dict with all attributes defined for the user.
     The user must exist. The function will not check its existence.
+    The attributes of a user of the files load module are read from the
+    files, lsuser is used if an attribute to set is not found.
 
     argument:
         module  (dict): The Ansible module
@@ -237,6 +347,15 @@ def get_user_attrs(module):
         (dict): User attributes
     '''
     name = module.params['name']
+    if module.params['load_module'] == 'files':
+        try:
+            attrs = read_user_files(name)
+        except (OSError, UnicodeDecodeError) as exc:
+            module.debug(f"Cannot read the user files: { exc }, using lsuser")
+            attrs = None
+        wanted = module.params['attributes'] or {}
+        if attrs is not None and all(attr in attrs for attr in wanted):
+            return attrs
     cmd = f"lsuser -f { name }"
     rc, stdout, stderr = module.run_command(cmd)
     if rc != 0 and stderr:
@@ -288,7 +407,7 @@ def modify_user(module):
     # Redefine attributes
     module.params['attributes'] = attrs
     # Get + Run chuser commands
-    cmd = get_chuser_command(module)
+    cmd = get_chuser_command(module, current_attrs)
     if cmd is not None:
         rc, stdout, stderr = module.run_command(cmd)
         if rc != 0:
@@ -400,6 +519,12 @@ def user_exists(module):
     load_module = module.params['load_module']
     name = module.params['name']
 
+    if load_module == 'files':
+        try:
+            return name in read_colon_file('/etc/passwd')
+        except (OSError, UnicodeDecodeError) as exc:
+            module.debug(f"Cannot read /etc/passwd: { exc }, using lsuser")
+
     # Adding the load module to the command so that the user's
     # existence is checked at the right location.
     load_module_opts = f"-R { load_module }"
@@ -445,17 +570,147 @@ def change_password(module):
     return msg
 
 
+def get_all_users(module):
+    '''
+    Reads the attributes of all the users with a single lsuser command.
+
+    arguments:
+        module  (dict): The Ansible module
+    note:
+        Exits with fail_json in case of error
+    return:
+        (dict): User name: user attributes
+    '''
+    cmd = ['lsuser', '-R', module.params['load_module'], '-c', 'ALL']
+    rc, stdout, stderr = module.run_command(cmd)
+    if rc != 0:
+        msg = "Failed to list the users"
+        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr)
+    return parse_colon_listing(stdout)
+
+
+def get_password_hashes(module):
+    '''
+    Reads the encrypted passwords of the users of the files load module
+    from /etc/security/passwd.
+
+    arguments:
+        module  (dict): The Ansible module
+    return:
+        (dict): User name: encrypted password, empty if it cannot be read
+    '''
+    if module.params['load_module'] != 'files':
+        return {}
+    try:
+        return {name: attrs.get('password') for name, attrs
+                in get_stanzas('/etc/security/passwd', attrs=['password']).items()}
+    except (OSError, UnicodeDecodeError) as exc:
+        module.debug(f"Cannot read /etc/security/passwd: { exc }")
+        return {}
+
+
+def run_bulk_command(module, cmd, summary, msg, data=None):
+    '''
+    Runs a command of reconcile_users.
+
+    note:
+        Exits with fail_json in case of error, the summary of the changes
+        already made is returned
+    '''
+    rc, stdout, stderr = module.run_command(cmd, data=data)
+    if rc != 0:
+        module.fail_json(msg=msg, rc=rc, stdout=stdout, stderr=stderr, cmd=' '.join(cmd),
+                         users=summary, changed=any(summary.values()))
+
+
+def reconcile_users(module):
+    '''
+    Reconciles the list of users of the 'users' option with the system. All
+    the users are read once, then only the commands needed are run, the
+    passwords being set with a single chpasswd command.
+
+    arguments:
+        module  (dict): The Ansible module
+    note:
+        Exits with fail_json in case of error
+    return:
+        (message, changed status, summary of the changes)
+    '''
+    load_module = module.params['load_module']
+    names = [entry['name'] for entry in module.params['users']]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        module.fail_json(msg=f"Users listed more than once: { ', '.join(duplicates) }")
+
+    current = get_all_users(module)
+    hashes = get_password_hashes(module)
+    summary = {'created': [], 'modified': [], 'removed': [], 'password': []}
+    passwords = []
+
+    for entry in module.params['users']:
+        name = entry['name']
+        if entry['state'] == 'absent':
+            if name in current:
+                cmd = ['userdel']
+                if module.params['remove_homedir']:
+                    cmd.append('-r')
+                cmd.append(name)
+                run_bulk_command(module, cmd, summary, f"Unable to remove the user name: { name }")
+                summary['removed'].append(name)
+            continue
+
+        attrs = {attr: format_value(val) for attr, val in (entry['attributes'] or {}).items()}
+        if name not in current:
+            cmd = ['mkuser', '-R', load_module] + [f"{ attr }={ val }" for attr, val in attrs.items()] + [name]
+            run_bulk_command(module, cmd, summary, f"Failed to create user: { name }")
+            summary['created'].append(name)
+        else:
+            changes = {attr: val for attr, val in attrs.items() if current[name].get(attr, '') != val}
+            if changes:
+                cmd = ['chuser', '-R', load_module] + [f"{ attr }={ val }" for attr, val in changes.items()] + [name]
+                run_bulk_command(module, cmd, summary, f"Failed to modify attributes for the user: { name }")
+                summary['modified'].append(name)
+
+        if entry['password'] is not None and hashes.get(name) != entry['password']:
+            passwords.append(f"{ name }:{ entry['password'] }")
+            summary['password'].append(name)
+
+    if passwords:
+        cmd = ['chpasswd', '-e', '-R', load_module]
+        if not module.params['change_passwd_on_login']:
+            cmd.append('-c')
+        run_bulk_command(module, cmd, summary, "Failed to set the passwords of the users",
+                         data='\n'.join(passwords))
+
+    changed = any(summary.values())
+    if changed:
+        msg = f"Users created: { len(summary['created']) }, modified: { len(summary['modified']) }, " \
+              f"removed: { len(summary['removed']) }, passwords set: { len(summary['password']) }"
+    else:
+        msg = "No changes were made."
+    return (msg, changed, summary)
+
+
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            state=dict(type='str', required=True, choices=['present', 'absent', 'modify']),
-            name=dict(type='str', required=True, aliases=['user']),
+            state=dict(type='str', choices=['present', 'absent', 'modify']),
+            name=dict(type='str', aliases=['user']),
+            users=dict(type='list', elements='dict', options=dict(
+                name=dict(type='str', required=True),
+                state=dict(type='str', default='present', choices=['present', 'absent']),
+                attributes=dict(type='dict'),
+                password=dict(type='str', no_log=True),
+            )),
             attributes=dict(type='dict'),
             remove_homedir=dict(type='bool', default=True, no_log=False),
             change_passwd_on_login=dict(type='bool', default=False, no_log=False),
             password=dict(type='str', no_log=True),
             load_module=dict(type='str', default='files', choices=['files', 'LDAP']),
         ),
+        mutually_exclusive=[['name', 'users']],
+        required_one_of=[['name', 'users']],
+        required_by={'name': 'state'},
         supports_check_mode=False
     )
 
@@ -468,6 +723,10 @@ def main():
     if module.params['load_module'] == "LDAP":
         check_LDAP(module)
 
+    if module.params['users'] is not None:
+        msg, changed, summary = reconcile_users(module)
+        module.exit_json(changed=changed, msg=msg, users=summary)
+
     if state == 'absent':
         if user_exists(module):
             msg = remove_user(module)
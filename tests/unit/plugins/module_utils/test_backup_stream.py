@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import gzip
+import io
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import backup_stream
+
+
+class TestBackupStream(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.image = os.path.join(self.tmpdir, 'rootvg.mksysb')
+        rand = random.Random(2)
+        # half random, half compressible data
+        self.archive = bytes(rand.getrandbits(8) for i in range(100000)) + b'./usr/lib/libc.a\n' * 6000
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_compress_and_decompress(self):
+        index = backup_stream.compress_stream(io.BytesIO(self.archive), self.image, block_size=16384, max_workers=3)
+        self.assertEqual(index['size'], len(self.archive))
+        self.assertEqual(index['compressed_size'], os.path.getsize(self.image))
+        self.assertEqual(len(index['blocks']), (len(self.archive) + 16383) // 16384)
+        self.assertEqual(index['blocks'][1][0], 16384)
+
+        # independent gzip members, readable with gunzip
+        with gzip.open(self.image) as fobj:
+            self.assertEqual(fobj.read(), self.archive)
+
+        backup_stream.write_index(self.image, index)
+        self.assertEqual(backup_stream.read_index(self.image)['sha256'], index['sha256'])
+
+        dest = io.BytesIO()
+        self.assertEqual(backup_stream.decompress_stream(self.image, dest, index, max_workers=3), len(self.archive))
+        self.assertEqual(dest.getvalue(), self.archive)
+
+    def test_checksum_mismatch(self):
+        index = backup_stream.compress_stream(io.BytesIO(self.archive), self.image, block_size=16384)
+        index['sha256'] = '0' * 64
+        with self.assertRaises(ValueError):
+            backup_stream.decompress_stream(self.image, io.BytesIO(), index)
+
+    def test_no_index(self):
+        self.assertIsNone(backup_stream.read_index(self.image))
+        with open(backup_stream.index_path(self.image), 'w') as fobj:
+            fobj.write('{"format": "other"}')
+        self.assertIsNone(backup_stream.read_index(self.image))
+
+    def test_reader_stops(self):
+        index = backup_stream.compress_stream(io.BytesIO(self.archive), self.image, block_size=16384)
+        rfd, wfd = os.pipe()
+        header = []
+
+        def reader():
+            # only the header of the archive is read
+            with os.fdopen(rfd, 'rb') as fobj:
+                header.append(fobj.read(100))
+
+        thd = threading.Thread(target=reader)
+        thd.start()
+        with open(wfd, 'wb', buffering=0) as dest:
+            with self.assertRaises(BrokenPipeError):
+                backup_stream.decompress_stream(self.image, dest, index, max_workers=2)
+        thd.join()
+        self.assertEqual(header, [self.archive[:100]])
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.dedup_store import DedupStore
+
+
+class TestDedupStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = DedupStore(os.path.join(self.tmpdir, 'store'), avg_size=4096, bufsize=16384)
+        rand = random.Random(1)
+        self.base = bytes(rand.getrandbits(8) for i in range(256 * 1024))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'wb') as fobj:
+            fobj.write(data)
+        return path
+
+    def test_shifted_image_is_deduplicated(self):
+        self.store.ingest(self.write('img1', self.base), 'img1')
+        shifted = self.base[:1000] + b'inserted bytes' + self.base[1000:]
+        stats = self.store.ingest(self.write('img2', shifted), 'img2', source='lpar2')
+
+        self.assertEqual(stats['size'], len(shifted))
+        self.assertLess(stats['new_bytes'], len(shifted) // 10)
+        self.assertGreater(stats['dedup_ratio'], 10)
+        self.assertEqual(self.store.recipe('img2')['source'], 'lpar2')
+
+        store_stats = self.store.stats()
+        self.assertEqual(store_stats['images'], 2)
+        self.assertEqual(store_stats['size'], len(self.base) + len(shifted))
+
+    def test_reconstitute(self):
+        self.store.ingest(self.write('img1', self.base), 'img1')
+        dest = os.path.join(self.tmpdir, 'restore', 'img1')
+        stats = self.store.reconstitute('img1', dest)
+        self.assertEqual(stats['size'], len(self.base))
+        with open(dest, 'rb') as fobj:
+            self.assertEqual(fobj.read(), self.base)
+
+    def test_reconstitute_corrupted_chunk(self):
+        self.store.ingest(self.write('img1', self.base), 'img1')
+        digest = self.store.recipe('img1')['chunks'][0][0]
+        with open(self.store.chunk_path(digest), 'wb') as fobj:
+            fobj.write(b'garbage')
+        dest = os.path.join(self.tmpdir, 'img1.restored')
+        with self.assertRaises(ValueError):
+            self.store.reconstitute('img1', dest)
+        self.assertFalse(os.path.exists(dest))
+
+    def test_unknown_image(self):
+        self.assertIsNone(self.store.recipe('missing'))
+        with self.assertRaises(ValueError):
+            self.store.reconstitute('missing', os.path.join(self.tmpdir, 'missing'))
+
+    def test_created_on_first_write(self):
+        self.assertEqual(self.store.stats()['images'], 0)
+        self.assertFalse(os.path.exists(self.store.path))
+        self.store.ingest(self.write('img1', self.base), 'img1')
+        self.assertTrue(os.path.isdir(self.store.recipe_dir))
+        self.assertEqual(self.store.stats()['images'], 1)
+
+    def test_verify(self):
+        self.store.ingest(self.write('img1', self.base), 'img1')
+        digest, expected = self.store.verify('img1')
+        self.assertEqual(digest, expected)
+        chunk = self.store.recipe('img1')['chunks'][1][0]
+        os.remove(self.store.chunk_path(chunk))
+        with self.assertRaises(ValueError):
+            self.store.verify('img1')
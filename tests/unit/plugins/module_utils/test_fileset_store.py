@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.fileset_store import FilesetStore
+
+FILESET = 'installp/ppc/bos.rte.7.2.5.1.U'
+
+
+class TestFilesetStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.module = mock.Mock()
+        self.lpp1 = os.path.join(self.tmpdir, '7200-05-01-2038-lpp_source')
+        self.lpp2 = os.path.join(self.tmpdir, '7200-05-02-2114-lpp_source')
+        self.write(self.lpp1, FILESET, b'bos.rte content')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, lpp_source, relname, data):
+        path = os.path.join(lpp_source, relname)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as fobj:
+            fobj.write(data)
+        return path
+
+    def test_link_from_sibling(self):
+        store = FilesetStore(self.module, self.tmpdir)
+        src, size = store.find(FILESET, store.lpp_sources(exclude=self.lpp2))
+        self.assertEqual(src, os.path.join(self.lpp1, FILESET))
+        self.assertEqual(size, len(b'bos.rte content'))
+
+        dest = os.path.join(self.lpp2, FILESET)
+        self.assertEqual(store.link(src, dest, FILESET), 'hardlink')
+        self.assertTrue(os.path.samefile(src, dest))
+
+        # the store shares the same inode, nothing is copied
+        stats = store.ingest_dir(self.lpp2)
+        self.assertEqual(stats['filesets'], 1)
+        blob, size = store.find(FILESET)
+        self.assertTrue(blob.startswith(os.path.join(self.tmpdir, '.filesets')))
+        self.assertTrue(os.path.samefile(blob, dest))
+        self.assertEqual(os.stat(dest).st_nlink, 3)
+
+    def test_downloaded_copy_is_shared(self):
+        store = FilesetStore(self.module, self.tmpdir)
+        store.ingest_dir(self.lpp1)
+        store.save()
+
+        dest = self.write(self.lpp2, FILESET, b'bos.rte content')
+        store = FilesetStore(self.module, self.tmpdir)
+        store.ingest_dir(self.lpp2)
+        self.assertTrue(os.path.samefile(dest, os.path.join(self.lpp1, FILESET)))
+        self.assertEqual(len(os.listdir(os.path.join(self.tmpdir, '.filesets'))), 2)
+
+    def test_prune(self):
+        store = FilesetStore(self.module, self.tmpdir)
+        store.ingest_dir(self.lpp1)
+        self.assertEqual(store.prune(), 0)
+
+        shutil.rmtree(self.lpp1)
+        self.assertEqual(store.prune(), len(b'bos.rte content'))
+        self.assertEqual(store.find(FILESET), (None, 0))
+
+    def test_linked_filesets_not_read(self):
+        store = FilesetStore(self.module, self.tmpdir)
+        store.ingest_dir(self.lpp1)
+        store.save()
+        # a fileset linked from the store under another lpp_source
+        src, size = store.find(FILESET)
+        store.link(src, os.path.join(self.lpp2, FILESET), FILESET)
+
+        store = FilesetStore(self.module, self.tmpdir)
+        with mock.patch('ansible_collections.ibm.power_aix.plugins.module_utils.fileset_store.file_sha256') as sha:
+            stats = store.ingest_dir(self.lpp1)
+            stats2 = store.ingest_dir(self.lpp2)
+        sha.assert_not_called()
+        self.assertEqual((stats['filesets'], stats2['filesets']), (1, 1))
+        self.assertEqual([name for name in os.listdir(os.path.join(self.lpp2, 'installp/ppc')) if name.startswith('.link_')],
+                         [])
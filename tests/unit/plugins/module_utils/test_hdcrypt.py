@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import hdcrypt
+
+SHOWVG_OUTPUT = """VG NAME / ID                     ENCRYPTION ENABLED
+rootvg                           no
+datavg                           yes
+oldvg                            yes
+"""
+
+SHOWLV_OUTPUT = """NAME                CRYPTO_STATUS         %_ENCRYPTED     NOTE
+hd5                 disabled              0
+datalv01            encrypted             100
+datalv02            converting            42              Conversion in progress
+"""
+
+SHOWPV_OUTPUT = """NAME                CRYPTO_STATUS         %_ENCRYPTED     NOTE
+hdisk0              disabled              0
+hdisk1              encrypted             100
+"""
+
+
+class TestHdcrypt(unittest.TestCase):
+    def setUp(self):
+        self.module = mock.Mock()
+        outputs = {
+            'showvg': (0, SHOWVG_OUTPUT, ''),
+            'showlv': (1, SHOWLV_OUTPUT, 'hdcryptmgr: 0516-010 Volume group oldvg must be varied on.\n'),
+            'showpv': (0, SHOWPV_OUTPUT, ''),
+        }
+        self.module.run_command.side_effect = lambda cmd: outputs[cmd[1]]
+
+    def test_parse_table(self):
+        table = hdcrypt.parse_table('lv', SHOWLV_OUTPUT)
+        self.assertEqual(list(table), ['hd5', 'datalv01', 'datalv02'])
+        self.assertEqual(table['hd5'], {'NAME': 'hd5', 'CRYPTO_STATUS': 'disabled', '%_ENCRYPTED': '0', 'NOTE': ''})
+        self.assertEqual(hdcrypt.parse_table('vg', SHOWVG_OUTPUT)['datavg']['ENCRYPTION ENABLED'], 'yes')
+
+    def test_collect_status(self):
+        status = hdcrypt.collect_status(self.module)
+        self.assertEqual(len(status['vg']), 3)
+        self.assertEqual(status['lv']['datalv01']['CRYPTO_STATUS'], 'encrypted')
+        self.assertEqual(list(status['pv']), ['hdisk0', 'hdisk1'])
+        self.assertEqual(status['errors'], ['hdcryptmgr: 0516-010 Volume group oldvg must be varied on.'])
+        # a single showlv for all the volume groups, no lslv, lsvg or lspv
+        self.assertEqual([call[0][0] for call in self.module.run_command.call_args_list], [
+            [hdcrypt.HDCRYPTMGR, 'showvg'],
+            [hdcrypt.HDCRYPTMGR, 'showlv', 'rootvg', 'datavg', 'oldvg'],
+            [hdcrypt.HDCRYPTMGR, 'showpv'],
+        ])
+
+    def test_collect_devices(self):
+        status = hdcrypt.collect_status(self.module, ['datavg', 'datalv02', 'hdisk1', 'nolv'])
+        self.assertEqual((list(status['vg']), list(status['lv']), list(status['pv'])),
+                         (['datavg'], ['datalv02'], ['hdisk1']))
+        self.assertEqual(status['missing'], ['nolv'])
+
+    def test_conversion_rate(self):
+        # 1024 MB device, from 10% to 60% in 100 seconds
+        self.assertEqual(hdcrypt.conversion_rate(1024, 10, 1000, 60, 1100), (5.12, 80))
+        self.assertEqual(hdcrypt.conversion_rate(1024, 10, 1000, 10, 1100), (0.0, None))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.mount_table import (
+    MountTable, MountTableError, parse_mount_output
+)
+
+MOUNT_OUTPUT = """  node       mounted        mounted over    vfs       date        options
+-------- ---------------  ---------------  ------ ------------ ---------------
+         /dev/hd4         /                jfs2   Nov 07 19:11 rw,log=/dev/hd8
+         /dev/hd3         /tmp             jfs2   Nov 07 19:11 rw,log=/dev/hd8
+         /dev/testlv      /tmp/testfs      jfs2   Nov 07 19:11 rw,log=/dev/hd8
+         /proc            /proc            procfs Nov 07 19:11 rw
+nimitz   /nim/build_net   /test            nfs3   Nov 07 19:12 ro,bg,hard,intr
+"""
+
+LSFS_OUTPUT = """#MountPoint:Device:Vfs:Nodename:Type:Size:Options:AutoMount:Acct
+/:/dev/hd4:jfs2::bootfs:1966080:rw:yes:no
+/tmp/testfs:/dev/testlv:jfs2::local:163840:rw:no:no
+/tmp/test:/dev/lv00:jfs2::local:655360:rw:no:no
+/mnt/nfs:/export/data:nfs:nimitz:nfs::bg,hard,intr,vers=4,sec=sys:krb5:yes:no
+"""
+
+
+class TestMountTable(unittest.TestCase):
+    def setUp(self):
+        self.module = mock.Mock()
+        self.module.run_command.side_effect = \
+            lambda cmd: (0, MOUNT_OUTPUT if cmd[0].endswith('mount') else LSFS_OUTPUT, '')
+
+    def test_parse_mount_output(self):
+        entries = parse_mount_output(MOUNT_OUTPUT)
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(entries[2], {'node': '', 'device': '/dev/testlv', 'mount_point': '/tmp/testfs',
+                                      'vfs': 'jfs2', 'date': 'Nov 07 19:11', 'options': 'rw,log=/dev/hd8'})
+        self.assertEqual((entries[4]['node'], entries[4]['device'], entries[4]['mount_point'], entries[4]['vfs']),
+                         ('nimitz', '/nim/build_net', '/test', 'nfs3'))
+
+    def test_lookups(self):
+        table = MountTable(self.module)
+        # exact match: /tmp/test is a prefix of the mounted /tmp/testfs
+        self.assertEqual(table.mounted_status(['/tmp/testfs', '/tmp/test', '/test', '/']),
+                         {'/tmp/testfs': True, '/tmp/test': False, '/test': True, '/': True})
+        self.assertEqual([entry['mount_point'] for entry in table.mounted('node', 'nimitz')], ['/test'])
+        self.assertEqual(table.filesystem('/dev/lv00')['mount_point'], '/tmp/test')
+        self.assertEqual(table.filesystem('/mnt/nfs')['options'], 'bg,hard,intr,vers=4,sec=sys:krb5')
+        self.assertEqual(table.filesystem('/mnt/nfs')['automount'], 'yes')
+        self.assertIsNone(table.filesystem('/tmp/tes'))
+        self.assertEqual(len(table.filesystems('type', 'local')), 2)
+        # each command is run once
+        self.assertEqual(self.module.run_command.call_count, 2)
+
+    def test_error(self):
+        self.module.run_command.side_effect = None
+        self.module.run_command.return_value = (1, '', 'mount: error')
+        with self.assertRaises(MountTableError) as exc:
+            MountTable(self.module).is_mounted('/')
+        self.assertEqual((exc.exception.cmd, exc.exception.rc), ('/usr/sbin/mount', 1))
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import mpio_paths
+
+LSPATH_OUTPUT = """hdisk0:fscsi0:500507680b215660,0:0:Available:Enabled
+hdisk0:fscsi1:500507680b215661,0:1:Available:Failed
+hdisk1:fscsi0:500507680b215660,1000000000000:0:Available:Enabled
+hdisk1:fscsi1:500507680b215661,1000000000000:1:Available:Enabled
+hdisk2:vscsi0:810000000000:0:Defined:N/A
+"""
+
+
+class TestMpioPaths(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.module = mock.Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_paths_and_index(self):
+        entries = mpio_paths.parse_lspath(LSPATH_OUTPUT)
+        paths = mpio_paths.build_paths(entries)
+        self.assertEqual(paths['hdisk0']['fscsi1'], {'500507680b215661,0': {
+            'path_id': 1, 'path_status': 'Available', 'status': 'Failed'}})
+        self.assertEqual(paths['hdisk2']['vscsi0']['810000000000'], {'path_id': 0, 'path_status': 'Defined'})
+
+        index = mpio_paths.build_index(entries)
+        self.assertEqual(index['disks']['hdisk0'], {'paths': 2, 'status': {'Enabled': 1, 'Failed': 1},
+                                                    'parents': {'fscsi0': {'Enabled': 1}, 'fscsi1': {'Failed': 1}}})
+        self.assertEqual(index['disks']['hdisk2']['status'], {'Defined': 1})
+        self.assertEqual(index['parents']['fscsi1'], {'disks': 2, 'paths': 2, 'status': {'Enabled': 1, 'Failed': 1}})
+
+    def test_delta(self):
+        snapshot_file = os.path.join(self.tmpdir, 'adm', 'mpio_paths.json')
+        scope = [None, None]
+        current = mpio_paths.snapshot(mpio_paths.parse_lspath(LSPATH_OUTPUT))
+        self.assertIsNone(mpio_paths.load_snapshot(self.module, snapshot_file, scope))
+        self.assertEqual(len(mpio_paths.compute_delta(None, current)['added']), 5)
+        mpio_paths.save_snapshot(self.module, snapshot_file, scope, current)
+
+        stdout = LSPATH_OUTPUT.replace('1:Available:Failed', '1:Available:Enabled')
+        stdout = stdout.replace('hdisk2:vscsi0:810000000000:0:Defined:N/A', 'hdisk3:vscsi0:820000000000:0:Available:Enabled')
+        previous = mpio_paths.load_snapshot(self.module, snapshot_file, scope)
+        delta = mpio_paths.compute_delta(previous, mpio_paths.snapshot(mpio_paths.parse_lspath(stdout)))
+        self.assertEqual(delta['changed'], [{'name': 'hdisk0', 'parent': 'fscsi1', 'connection': '500507680b215661,0',
+                                             'path_id': 1, 'path_status': 'Available', 'status': 'Enabled',
+                                             'previous': {'path_status': 'Available', 'status': 'Failed'}}])
+        self.assertEqual([path['name'] for path in delta['added']], ['hdisk3'])
+        self.assertEqual(delta['removed'], [{'name': 'hdisk2', 'parent': 'vscsi0', 'connection': '810000000000',
+                                             'path_id': 0, 'path_status': 'Defined'}])
+        # a snapshot of another scope is not compared
+        self.assertIsNone(mpio_paths.load_snapshot(self.module, snapshot_file, ['hdisk0', None]))
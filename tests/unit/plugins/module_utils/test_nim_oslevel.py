@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_oslevel
+
+
+class FakeClients(object):
+    """
+    run_command of a module answering 'oslevel -s' through c_rsh.
+    """
+
+    def __init__(self, levels, hang=()):
+        self.levels = levels
+        self.hang = hang
+        self.calls = []
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+
+    def __call__(self, cmd):
+        target = 'master' if cmd[0] == '/usr/bin/oslevel' else cmd[1]
+        with self.lock:
+            self.calls.append(target)
+        if target in self.hang:
+            self.release.wait(5)
+        if target not in self.levels:
+            return 0, 'rc=1\n', ''
+        if target == 'master':
+            return 0, self.levels[target] + '\n', ''
+        return 0, self.levels[target] + '\nrc=0\n', ''
+
+
+class TestNimOslevel(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tmpdir, 'oslevel.json')
+        self.module = mock.Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_min_max(self):
+        levels = {'a': '7200-05-03-2148', 'b': '7200-10-01-2300', 'c': '7200-05', 'd': 'timedout'}
+        self.assertEqual(nim_oslevel.min_oslevel(levels), '7200-05')
+        self.assertEqual(nim_oslevel.max_oslevel(levels), '7200-10-01-2300')
+        self.assertIsNone(nim_oslevel.max_oslevel({'d': 'timedout'}))
+
+    def test_cached(self):
+        self.module.run_command = FakeClients({'master': '7300-02-01-2346', 'lpar1': '7200-05-03-2148'})
+        oslevels, errors = nim_oslevel.get_oslevels(self.module, ['master', 'lpar1', 'lpar2'],
+                                                    max_workers=2, cache_file=self.cache_file)
+        self.assertEqual(oslevels, {'master': '7300-02-01-2346', 'lpar1': '7200-05-03-2148', 'lpar2': 'timedout'})
+        self.assertEqual(list(errors), ['lpar2'])
+
+        oslevels, errors = nim_oslevel.get_oslevels(self.module, ['master', 'lpar1', 'lpar2'],
+                                                    cache_file=self.cache_file)
+        self.assertEqual(oslevels['lpar1'], '7200-05-03-2148')
+        # only the failed client is queried again
+        self.assertEqual(sorted(self.module.run_command.calls), ['lpar1', 'lpar2', 'lpar2', 'master'])
+
+        nim_oslevel.invalidate_oslevels(self.module, ['lpar1'], cache_file=self.cache_file)
+        nim_oslevel.get_oslevels(self.module, ['lpar1'], cache_file=self.cache_file)
+        self.assertEqual(self.module.run_command.calls.count('lpar1'), 2)
+
+    def test_timeout(self):
+        self.module.run_command = FakeClients({'lpar1': '7200-05-03-2148', 'lpar2': '7200-05-03-2148'},
+                                              hang=['lpar2'])
+        oslevels, errors = nim_oslevel.get_oslevels(self.module, ['lpar1', 'lpar2'], timeout=0.5,
+                                                    cache_file=self.cache_file, ttl=0)
+        self.module.run_command.release.set()
+        self.assertEqual(oslevels, {'lpar1': '7200-05-03-2148', 'lpar2': 'timedout'})
+        self.assertIn('No answer', errors['lpar2'])
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    def test_resolve(self):
+        # the NIM name of lpar1 is not its hostname
+        self.module.run_command = FakeClients({'lpar1.example.com': '7200-05-03-2148'})
+        oslevels, errors = nim_oslevel.get_oslevels(self.module, ['lpar1'], cache_file=self.cache_file,
+                                                    resolve={'lpar1': 'lpar1.example.com'}.get)
+        self.assertEqual(oslevels, {'lpar1': '7200-05-03-2148'})
+        self.assertEqual(errors, {})
+        self.assertEqual(self.module.run_command.calls, ['lpar1.example.com'])
+        # cached under the NIM name
+        oslevels, errors = nim_oslevel.get_oslevels(self.module, ['lpar1'], cache_file=self.cache_file)
+        self.assertEqual(oslevels, {'lpar1': '7200-05-03-2148'})
+
+    def test_concurrent_updates(self):
+        # concurrent invalidations and additions are all kept
+        nim_oslevel.update_cache(self.module, self.cache_file,
+                                 oslevels={f'lpar{i}': '7200-05-03-2148' for i in range(20)})
+        threads = [threading.Thread(target=nim_oslevel.invalidate_oslevels,
+                                    args=(self.module, [f'lpar{i}']), kwargs={'cache_file': self.cache_file})
+                   for i in range(10)]
+        threads += [threading.Thread(target=nim_oslevel.update_cache,
+                                     args=(self.module, self.cache_file), kwargs={'oslevels': {f'new{i}': '7300-02'}})
+                    for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cached = nim_oslevel.load_cache(self.module, self.cache_file, 300)
+        self.assertEqual(sorted(cached), sorted([f'lpar{i}' for i in range(10, 20)] + [f'new{i}' for i in range(10)]))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import nim_state
+
+
+lsnim_running = """#name:Cstate:info:Cstate_result:
+vios1:alt_disk_install operation is being performed:Creating logical volume alt_hd2.:success:
+vios2:ready for a NIM operation:success:
+"""
+
+lsnim_done = """#name:Cstate:info:Cstate_result:
+vios1:ready for a NIM operation:0505-126 alt_disk_install- target disk hdisk2 has
+                a volume group assigned to it.:failure:
+"""
+
+
+class TestParseLsnimState(unittest.TestCase):
+    def test_parse_info_and_empty_info(self):
+        states = nim_state.parse_lsnim_state(lsnim_running, ['vios1', 'vios2'])
+        self.assertEqual(states['vios1']['Cstate'], 'alt_disk_install operation is being performed')
+        self.assertEqual(states['vios1']['info'], 'Creating logical volume alt_hd2.')
+        self.assertEqual(states['vios1']['Cstate_result'], 'success')
+        self.assertEqual(states['vios2']['info'], '')
+        self.assertEqual(states['vios2']['Cstate_result'], 'success')
+
+    def test_parse_multiline_info(self):
+        states = nim_state.parse_lsnim_state(lsnim_done, ['vios1'])
+        self.assertEqual(states['vios1']['Cstate'], nim_state.NIM_READY_STATE)
+        self.assertIn('a volume group assigned to it.', states['vios1']['info'])
+        self.assertEqual(states['vios1']['Cstate_result'], 'failure')
+
+
+class TestNimStateWatcher(unittest.TestCase):
+    def setUp(self):
+        self.module = mock.Mock()
+        self.watcher = nim_state.NimStateWatcher(self.module, min_interval=0.01, max_interval=0.02)
+
+    def test_shared_poll_for_several_objects(self):
+        self.module.run_command.side_effect = [(0, lsnim_running, ''), (0, lsnim_done, '')]
+        self.watcher.watch('vios1')
+        self.watcher.watch('vios2')
+        state2 = self.watcher.wait('vios2', timeout=5)
+        state1 = self.watcher.wait('vios1', timeout=5)
+        self.assertEqual(state2['status'], 'success')
+        self.assertEqual(state1['status'], 'failure')
+        cmd = self.module.run_command.call_args_list[0][0][0]
+        self.assertEqual(cmd[-2:], ['vios1', 'vios2'])
+        self.assertEqual(self.watcher.polls, 2)
+
+    def test_lsnim_error(self):
+        self.module.run_command.return_value = (1, '', '0042-053 lsnim: there is no NIM object named "vios9"')
+        self.watcher.watch('vios9')
+        state = self.watcher.wait('vios9', timeout=5)
+        self.assertEqual(state['status'], 'error')
+        self.assertIn('vios9', state['info'])
+
+    def test_blocked_without_progress(self):
+        self.watcher.stall_timeout = 0
+        self.module.run_command.return_value = (0, lsnim_running, '')
+        self.watcher.watch('vios1')
+        # first poll records the info, the next one detects the stall
+        state = self.watcher.wait('vios1', timeout=5)
+        self.assertEqual(state['status'], 'blocked')
+
+    def test_lsnim_transient_error(self):
+        self.module.run_command.side_effect = [(1, '', 'lsnim: timed out'), (0, lsnim_done, '')]
+        self.watcher.watch('vios1')
+        state = self.watcher.wait('vios1', timeout=5)
+        # the failed poll is retried on the next tick
+        self.assertEqual(state['status'], 'failure')
+        self.assertEqual(self.watcher.polls, 2)
+
+    def test_lsnim_error_on_one_object(self):
+        def run_command(cmd):
+            if 'vios9' in cmd:
+                return (1, '', '0042-053 lsnim: there is no NIM object named "vios9"')
+            return (0, lsnim_running, '')
+
+        self.module.run_command.side_effect = run_command
+        self.watcher.watch('vios2')
+        self.watcher.watch('vios9')
+        state9 = self.watcher.wait('vios9', timeout=5)
+        state2 = self.watcher.wait('vios2', timeout=5)
+        # only the object lsnim fails on is in error
+        self.assertEqual(state9['status'], 'error')
+        self.assertIn('vios9', state9['info'])
+        self.assertEqual(state2['status'], 'success')
+
+    def test_poll_exception(self):
+        self.module.run_command.side_effect = OSError('lsnim not found')
+        self.watcher.watch('vios1')
+        state = self.watcher.wait('vios1', timeout=5)
+        self.assertEqual(state['status'], 'error')
+        self.assertIn('lsnim not found', state['info'])
+        self.assertIsNone(self.watcher._thread)
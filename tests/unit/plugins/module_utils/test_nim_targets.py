@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+import unittest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.nim_targets import NimTargets, expand_targets
+
+
+def linear_expand_targets(targets, nim_clients):
+    """
+    Previous expansion of the NIM modules, matching each pattern against
+    every client, used as reference by the tests.
+    """
+    clients = []
+    for target in targets:
+        rmatch = re.match(r"(\w+)\[(\d+):(\d+)\]", target)
+        if rmatch:
+            name = rmatch.group(1)
+            for i in range(int(rmatch.group(2)), int(rmatch.group(3)) + 1):
+                if name + str(i) in nim_clients:
+                    clients.append(name + str(i))
+            continue
+        rmatch = re.match(r"(\w+)\*$", target)
+        if rmatch:
+            name = rmatch.group(1)
+            for curr_name in nim_clients:
+                if re.match(rf"^{name}\.*", curr_name):
+                    clients.append(curr_name)
+            continue
+        if target.upper() == 'ALL' or target == '*':
+            clients = nim_clients
+            continue
+        if target in nim_clients:
+            clients.append(target)
+    return list(set(clients))
+
+
+class TestNimTargets(unittest.TestCase):
+    def setUp(self):
+        self.index = NimTargets(groups={'standalone': ['lpar2', 'lpar10', 'lpar1', 'lpar01', 'db1'],
+                                        'vios': ['vios2', 'vios1']},
+                                extra=['master'])
+
+    def test_patterns(self):
+        self.assertEqual(self.index.expand(['lpar*']), ['lpar01', 'lpar1', 'lpar10', 'lpar2'])
+        # range names are built from integers, without leading zeros
+        self.assertEqual(self.index.expand(['lpar[1:10]']), ['lpar1', 'lpar2', 'lpar10'])
+        self.assertEqual(self.index.expand(['vios', 'master']), ['vios1', 'vios2', 'master'])
+        self.assertEqual(self.index.expand(['unknown', 'lpar[3:5]']), [])
+        self.assertEqual(len(self.index.expand(['ALL'])), 7)
+        self.assertNotIn('master', self.index.expand(['*']))
+
+    def test_stable_order_without_duplicates(self):
+        self.assertEqual(self.index.expand(['db1', 'lpar[1:2]', 'lpar*', 'db*']),
+                         ['db1', 'lpar1', 'lpar2', 'lpar01', 'lpar10'])
+
+    def test_many_clients(self):
+        # 3000 clients, dozens of patterns
+        clients = [f'{prefix}{i}' for prefix in ('lpar', 'aix', 'db', 'web', 'app', 'vios') for i in range(500)]
+        patterns = [f'{prefix}{i}*' for prefix in ('lpar', 'aix', 'db', 'web') for i in range(1, 10)]
+        patterns += [f'app[{i * 20}:{i * 20 + 50}]' for i in range(10)] + ['vios42', 'web499']
+
+        targets = expand_targets(patterns, clients)
+        self.assertEqual(sorted(targets), sorted(linear_expand_targets(patterns, clients)))
+        self.assertEqual(len(targets), len(set(targets)))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import stanza
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'stanza')
+
+
+class TestStanza(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def copy(self, name, age=60):
+        path = os.path.join(self.tmpdir, name)
+        shutil.copy(os.path.join(FIXTURES, name), path)
+        past = time.time() - age
+        os.utime(path, (past, past))
+        return path
+
+    def test_parse_corpus(self):
+        sfile = stanza.StanzaFile.from_file(os.path.join(FIXTURES, 'security_user'))
+        self.assertEqual(sfile.names(), ['default', 'root', 'daemon', 'bin', 'guest', 'tester'])
+        root = sfile.get('root')
+        self.assertEqual(root['SYSTEM'], 'compat')
+        self.assertEqual(list(root), ['admin', 'SYSTEM', 'registry', 'loginretries', 'account_locked', 'rlogin'])
+        self.assertNotIn('minlen', root)
+        # the attributes not set come from the default stanza, as for lsuser
+        tester = sfile.get('tester', default='default')
+        self.assertEqual((tester['minlen'], tester['maxage'], tester['histsize']), ('8', '13', '0'))
+        self.assertEqual(sfile.get('guest'), {})
+        self.assertIsNone(sfile.get('nobody'))
+        self.assertEqual(sfile.query(['root', 'tester', 'nobody'], attrs=['admin', 'minlen']),
+                         {'root': {'admin': 'true', 'minlen': ''}, 'tester': {'admin': 'false', 'minlen': '8'}})
+
+        login = stanza.get_stanzas(os.path.join(FIXTURES, 'security_login.cfg'))
+        self.assertTrue(login['shells']['shells'].endswith('/usr/bin/sh,/usr/bin/bsh,/usr/bin/csh,/usr/bin/ksh,/usr/bin/tsh,/usr/bin/ksh93,/usr/bin/rksh'))
+        self.assertEqual(login['default']['herald'], 'Authorized access only\\n\\rlogin: ')
+        self.assertEqual(login['default']['logintimes'], '')
+
+        limits = stanza.get_stanzas(os.path.join(FIXTURES, 'security_limits'), ['root', 'tester'],
+                                    attrs=['data', 'nofiles'], default='default')
+        self.assertEqual(limits, {'root': {'data': '262144', 'nofiles': '2000'},
+                                  'tester': {'data': '1272', 'nofiles': '4000'}})
+        environ = stanza.get_stanza(os.path.join(FIXTURES, 'security_environ'), 'tester')
+        self.assertEqual(environ, {'usrenv': 'EDITOR=vi,PAGER=more'})
+
+    def test_colon_files(self):
+        passwd = stanza.read_colon_file(os.path.join(FIXTURES, 'passwd'))
+        self.assertEqual(passwd['tester'], ['tester', '!', '205', '1', 'Test account', '/home/tester', '/usr/bin/ksh'])
+        inittab = stanza.read_colon_file(os.path.join(FIXTURES, 'inittab'))
+        # the lines starting with a colon are comments
+        self.assertEqual(list(inittab)[:3], ['init', 'brc', 'powerfail'])
+        self.assertIn('perfstat', inittab)
+
+    def test_rewrite_keeps_layout(self):
+        path = self.copy('security_user')
+        with open(path) as fobj:
+            original = fobj.read().splitlines()
+
+        sfile = stanza.StanzaFile.from_file(path)
+        self.assertFalse(sfile.set('tester', {'admin': 'false'}))
+        self.assertTrue(sfile.set('tester', {'minlen': 10, 'maxage': None, 'histsize': 5}))
+        self.assertTrue(sfile.set('newuser', {'admin': 'false', 'SYSTEM': 'LDAP files'}))
+        self.assertTrue(sfile.remove('guest'))
+        sfile.write()
+
+        with open(path) as fobj:
+            lines = fobj.read().splitlines()
+        # comments, blank lines and the other stanzas are untouched
+        self.assertEqual(lines[:66], original[:66])
+        self.assertEqual(lines[66:], ['tester:', '\tadmin = false', '\t* set by the security team', '\tminlen = 10',
+                                      '\thistsize = 5', '', 'newuser:', '\tadmin = false', '\tSYSTEM = "LDAP files"'])
+        reread = stanza.StanzaFile.from_file(path)
+        self.assertEqual(reread.get('newuser'), {'admin': 'false', 'SYSTEM': 'LDAP files'})
+        self.assertIsNone(reread.get('guest'))
+        self.assertEqual([name for name in os.listdir(self.tmpdir)], ['security_user'])
+
+    def test_cache(self):
+        path = self.copy('security_limits')
+        first = stanza.read_stanza_file(path)
+        self.assertIs(stanza.read_stanza_file(path), first)
+
+        sfile = stanza.StanzaFile.from_file(path)
+        sfile.set('tester', {'data': 2000})
+        sfile.write()
+        # the file was changed and is read again, but not cached as it
+        # was modified less than a second ago
+        second = stanza.read_stanza_file(path)
+        self.assertEqual(second.get('tester')['data'], '2000')
+        self.assertIsNot(stanza.read_stanza_file(path), second)
+
+    def test_concurrent_change(self):
+        path = self.copy('security_group')
+        sfile = stanza.StanzaFile.from_file(path)
+        sfile.set('devs', {'adms': 'tester,guest'})
+        with open(path, 'a') as fobj:
+            fobj.write('\nnewgroup:\n\tadmin = false\n')
+        with self.assertRaises(stanza.StanzaError):
+            sfile.write()
+        self.assertNotIn('adms = tester,guest', open(path).read())
+
+    def test_colon_listing(self):
+        stdout = ("#name:id:pgrp:home:gecos\nroot:0:system:/:\n"
+                  "#name:id:pgrp:home\ntester:205:staff:/home/tester\n"
+                  "#name:id:pgrp:home:gecos\nweb:300:staff:/home/web:Web server\\: nginx\n")
+        self.assertEqual(stanza.parse_colon_listing(stdout), {
+            'root': {'id': '0', 'pgrp': 'system', 'home': '/', 'gecos': ''},
+            'tester': {'id': '205', 'pgrp': 'staff', 'home': '/home/tester'},
+            'web': {'id': '300', 'pgrp': 'staff', 'home': '/home/web', 'gecos': 'Web server: nginx'},
+        })
+
+    def test_stanza_records(self):
+        stdout = ('\nCuAt:\n\tname = "hdisk0"\n\tattribute = "queue_depth"\n\tvalue = "20"\n\tnls_index = 12\n'
+                  '\nCuAt:\n\tname = "hdisk0"\n\tattribute = "pvid"\n\tvalue = ""\n')
+        self.assertEqual(stanza.parse_stanza_records(stdout), [
+            ('CuAt', {'name': 'hdisk0', 'attribute': 'queue_depth', 'value': '20', 'nls_index': '12'}),
+            ('CuAt', {'name': 'hdisk0', 'attribute': 'pvid', 'value': ''}),
+        ])
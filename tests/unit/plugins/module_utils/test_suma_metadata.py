@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.suma_metadata import (
+    SumaMetadata, SumaMetadataError)
+
+
+class FakeSuma(object):
+    """
+    run_command of a module, writing the metadata files of the
+    published SPs in the DLTarget of the suma command.
+    """
+
+    def __init__(self, sps, rc=0):
+        self.sps = sps
+        self.rc = rc
+        self.calls = 0
+
+    def __call__(self, cmd):
+        self.calls += 1
+        if self.rc != 0:
+            return self.rc, '', 'suma error'
+        dl_target = [arg for arg in cmd if arg.startswith('DLTarget=')][0].split('=', 1)[1]
+        ppc_dir = os.path.join(dl_target, 'installp', 'ppc')
+        os.makedirs(ppc_dir)
+        for sp in self.sps:
+            with open(os.path.join(ppc_dir, sp[:10] + '.xml'), 'w') as f:
+                f.write(f'<?xml version="1.0"?>\n<SP name="{sp}">\n</SP>\n')
+        return 0, '', ''
+
+
+class TestSumaMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.module = mock.Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_cached_between_runs(self):
+        self.module.run_command = FakeSuma(['7200-05-01-2038', '7200-05-03-2148', '7200-05-02-2114'])
+        metadata = SumaMetadata(self.module, self.tmpdir, 'test')
+        self.assertEqual(metadata.latest_sp('7200-05', tl='7200-05'), '7200-05-03-2148')
+        self.assertEqual(metadata.tl_index['7200-05'], ['7200-05-01-2038', '7200-05-02-2114', '7200-05-03-2148'])
+
+        metadata = SumaMetadata(self.module, self.tmpdir, 'test')
+        self.assertEqual(metadata.sp_build('7200-05', '7200-05-02'), '7200-05-02-2114')
+        self.assertEqual(self.module.run_command.calls, 1)
+        # only the index is kept
+        self.assertEqual(os.listdir(self.tmpdir), ['metadata_index.json'])
+
+    def test_refresh_when_not_found(self):
+        self.module.run_command = FakeSuma(['7200-05-01-2038'])
+        SumaMetadata(self.module, self.tmpdir, 'test').latest_sp('7200-05')
+
+        self.module.run_command.sps.append('7200-05-02-2114')
+        metadata = SumaMetadata(self.module, self.tmpdir, 'test')
+        self.assertEqual(metadata.sp_build('7200-05', '7200-05-02'), '7200-05-02-2114')
+        self.assertEqual(self.module.run_command.calls, 2)
+        self.assertIsNone(metadata.sp_build('7200-05', '7200-05-09'))
+        self.assertEqual(self.module.run_command.calls, 2)
+
+    def test_ttl(self):
+        self.module.run_command = FakeSuma(['7200-05-01-2038'])
+        SumaMetadata(self.module, self.tmpdir, 'test', ttl=0).latest_sp('7200-05')
+        SumaMetadata(self.module, self.tmpdir, 'test', ttl=0).latest_sp('7200-05')
+        self.assertEqual(self.module.run_command.calls, 2)
+
+    def test_error(self):
+        self.module.run_command = FakeSuma([], rc=1)
+        metadata = SumaMetadata(self.module, self.tmpdir, 'test')
+        with self.assertRaises(SumaMetadataError) as ctx:
+            metadata.latest_sp('7200-05')
+        self.assertEqual(ctx.exception.rc, 1)
+        self.assertEqual(os.listdir(self.tmpdir), [])
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+import unittest
+
+from ansible_collections.ibm.power_aix.plugins.module_utils.worker_pool import WorkerPool, run_parallel
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_run_parallel(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+        release = threading.Event()
+        done = []
+
+        def func(item):
+            with lock:
+                state['running'] += 1
+                state['max'] = max(state['max'], state['running'])
+                if state['max'] == 3:
+                    release.set()
+            release.wait(5)
+            with lock:
+                state['running'] -= 1
+                done.append(item)
+
+        run_parallel(func, range(10), 3)
+        self.assertEqual(sorted(done), list(range(10)))
+        self.assertEqual(state['max'], 3)
+
+        # no thread for no item
+        run_parallel(func, [], 3)
+
+    def test_error(self):
+        done = []
+
+        def func(item):
+            if item == 2:
+                raise ValueError('item 2')
+            done.append(item)
+
+        with self.assertRaises(ValueError):
+            run_parallel(func, range(5), 2)
+        # the other items are still processed
+        self.assertEqual(sorted(done), [0, 1, 3, 4])
+
+    def test_put_while_running(self):
+        done = []
+        pool = WorkerPool(done.append, 1, name='TestThread')
+        for item in range(5):
+            pool.put(item)
+        pool.close()
+        self.assertEqual(done, list(range(5)))
+        self.assertFalse(any(thd.is_alive() for thd in pool.threads))
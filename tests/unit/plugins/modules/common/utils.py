@@ -54,6 +54,7 @@ df_output_path2 = os.path.dirname(os.path.abspath(__file__)) + "/sample_df_outpu
 df_output_path3 = os.path.dirname(os.path.abspath(__file__)) + "/sample_df_output3"
 mount_output_path1 = os.path.dirname(os.path.abspath(__file__)) + "/sample_mount_output1"
 mount_output_path2 = os.path.dirname(os.path.abspath(__file__)) + "/sample_mount_output2"
+mount_output_path3 = os.path.dirname(os.path.abspath(__file__)) + "/sample_mount_output3"
 lsvg_output_path1 = os.path.dirname(os.path.abspath(__file__)) + "/sample_lsvg_output1"
 lsvg_output_path2 = os.path.dirname(os.path.abspath(__file__)) + "/sample_lsvg_output2"
 lsvg_output_path3 = os.path.dirname(os.path.abspath(__file__)) + "/sample_lsvg_output3"
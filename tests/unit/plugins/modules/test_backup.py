@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.module_utils import backup_stream
+from ansible_collections.ibm.power_aix.plugins.modules import backup
+
+
+class TestRunOnImage(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.location = os.path.join(self.tmpdir, 'rootvg.mksysb')
+        self.archive = b'./bosinst.data\n' * 10000
+        self.index = backup_stream.compress_stream(io.BytesIO(self.archive), self.location, block_size=16384)
+        backup_stream.write_index(self.location, self.index)
+        self.params = {'location': self.location, 'compress_threads': 2}
+        backup.results = {'changed': False, 'msg': ''}
+        self.module = mock.Mock()
+
+    def read_image(self, size=None):
+        def run_command(cmd):
+            with open(cmd[cmd.index('-f') + 1], 'rb') as fobj:
+                data = fobj.read() if size is None else fobj.read(size)
+            return 0, f'{len(data)} bytes read', ''
+        return run_command
+
+    def test_restore_streamed(self):
+        self.module.run_command.side_effect = self.read_image()
+        rc = backup.run_on_image(self.module, ['/usr/sbin/restvg', '-f', self.location], self.params, self.index)
+        self.assertEqual(rc, 0)
+        self.assertEqual(backup.results['stdout'], f'{len(self.archive)} bytes read')
+        # the command reads a pipe, no decompressed copy of the image is written
+        self.assertNotIn(self.location, self.module.run_command.call_args[0][0])
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['rootvg.mksysb', 'rootvg.mksysb.idx'])
+
+    def test_view_header_cached(self):
+        self.module.run_command.side_effect = self.read_image(100)
+        cmd = ['/bin/restvg', '-f', self.location, '-l']
+        self.assertEqual(backup.run_on_image(self.module, cmd, self.params, self.index, cache=True), 0)
+        self.assertEqual(backup.results['stdout'], '100 bytes read')
+        self.assertEqual(backup.run_on_image(self.module, cmd, self.params, self.index, cache=True), 0)
+        self.assertEqual(self.module.run_command.call_count, 1)
+        self.assertIn(' '.join(cmd), backup_stream.read_index(self.location)['view'])
+
+    def test_command_does_not_open_image(self):
+        self.module.run_command.return_value = (1, '', 'restvg: usage')
+        rc = backup.run_on_image(self.module, ['/usr/sbin/restvg', '-f', self.location], self.params, self.index)
+        self.assertEqual(rc, 1)
+        self.assertEqual(backup.results['msg'], '')
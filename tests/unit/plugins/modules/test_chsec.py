@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.modules import chsec, password_rules_policies
+
+LSSEC_OUTPUT = '#name:histexpire:pwdchecks:home\ndefault:"26":"C\\\\":/home/a\\:b\n'
+
+
+class TestLssec(unittest.TestCase):
+    def setUp(self):
+        self.module = mock.Mock()
+        self.module.get_bin_path.return_value = '/usr/bin/lssec'
+        self.module.run_command.return_value = (0, LSSEC_OUTPUT, '')
+
+    def test_chsec_values(self):
+        with mock.patch.object(chsec, 'get_stanza', side_effect=OSError('not on AIX')):
+            values = chsec.get_current_attr_values(self.module, '/etc/security/user', 'default',
+                                                   ['histexpire', 'pwdchecks', 'home', 'maxage'])
+        # only the enclosing double quotes are removed
+        self.assertEqual(values, {'histexpire': '26', 'pwdchecks': 'C\\\\', 'home': '/home/a:b', 'maxage': ''})
+        self.assertEqual(self.module.run_command.call_args[0][0], [
+            '/usr/bin/lssec', '-c', '-f', '/etc/security/user', '-s', 'default',
+            '-a', 'histexpire', '-a', 'pwdchecks', '-a', 'home', '-a', 'maxage'])
+
+    def test_password_rules_values(self):
+        with mock.patch.object(password_rules_policies, 'get_stanza', return_value=None):
+            values = password_rules_policies.get_current_attr_values(self.module, 'default', ['histexpire', 'pwdchecks'])
+        self.assertEqual(values, {'histexpire': '26', 'pwdchecks': 'C\\\\'})
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.modules import devices
+
+from .common.utils import AnsibleFailJson, fail_json
+
+ODMGET_CUDV = """
+CuDv:
+        name = "hdisk0"
+        status = 1
+        chgstatus = 2
+        PdDvLn = "disk/fcp/mpioosdisk"
+
+CuDv:
+        name = "hdisk1"
+        status = 0
+        chgstatus = 2
+        PdDvLn = "disk/fcp/mpioosdisk"
+
+CuDv:
+        name = "hdisk2"
+        status = 1
+        chgstatus = 2
+        PdDvLn = "disk/fcp/mpioosdisk"
+
+CuDv:
+        name = "en0"
+        status = 1
+        chgstatus = 2
+        PdDvLn = "adapter/vdevice/IBM,l-lan"
+"""
+
+ODMGET_PDAT = """
+PdAt:
+        uniquetype = "disk/fcp/mpioosdisk"
+        attribute = "queue_depth"
+        deflt = "20"
+
+PdAt:
+        uniquetype = "disk/fcp/mpioosdisk"
+        attribute = "reserve_policy"
+        deflt = "single_path"
+
+PdAt:
+        uniquetype = "disk/fcp/mpioosdisk"
+        attribute = "reserve_policy"
+        deflt = "no_reserve"
+
+PdAt:
+        uniquetype = "disk/fcp/mpioosdisk"
+        attribute = "algorithm"
+        deflt = "fail_over"
+"""
+
+ODMGET_CUAT = """
+CuAt:
+        name = "hdisk0"
+        attribute = "queue_depth"
+        value = "32"
+
+CuAt:
+        name = "hdisk1"
+        attribute = "reserve_policy"
+        value = "no_reserve"
+
+CuAt:
+        name = "hdisk1"
+        attribute = "alt_path"
+        value = "fscsi0"
+
+CuAt:
+        name = "hdisk1"
+        attribute = "alt_path"
+        value = "fscsi1"
+
+CuAt:
+        name = "en0"
+        attribute = "mtu"
+        value = "9000"
+"""
+
+
+def run_command(cmd):
+    if cmd[0] != 'odmget':
+        return 0, '', ''
+    if cmd[-1] == 'CuDv':
+        return 0, ODMGET_CUDV, ''
+    if cmd[-1] == 'CuAt':
+        return 0, ODMGET_CUAT, ''
+    if cmd[-1] == 'PdAt' and cmd[2] == 'uniquetype=disk/fcp/mpioosdisk':
+        return 0, ODMGET_PDAT, ''
+    return 0, '', ''
+
+
+class TestDevices(unittest.TestCase):
+    def setUp(self):
+        self.module = mock.Mock()
+        self.module.run_command.side_effect = run_command
+        self.module.fail_json = fail_json
+        self.module.params = {'force': False, 'chtype': 'reboot', 'max_parallel': 4, 'devices': []}
+
+    def test_get_devices_odm(self):
+        odm = devices.get_devices_odm(self.module, ['hdisk0', 'hdisk1', 'hdisk9'])
+        self.assertEqual(sorted(odm), ['hdisk0', 'hdisk1'])
+        self.assertEqual(odm['hdisk0'], {'status': '1', 'attributes': {
+            'queue_depth': ['32'], 'reserve_policy': ['single_path'], 'algorithm': ['fail_over']}})
+        # the customized values override the defaults, multi-valued attributes keep all their values
+        self.assertEqual(odm['hdisk1'], {'status': devices.DEFINED_STATUS, 'attributes': {
+            'queue_depth': ['20'], 'reserve_policy': ['no_reserve'], 'algorithm': ['fail_over'],
+            'alt_path': ['fscsi0', 'fscsi1']}})
+        # a single PdAt query per device type
+        self.assertEqual([call[0][0] for call in self.module.run_command.call_args_list], [
+            ['odmget', 'CuDv'],
+            ['odmget', '-q', 'uniquetype=disk/fcp/mpioosdisk', 'PdAt'],
+            ['odmget', 'CuAt'],
+        ])
+
+    def test_chdev_devices(self):
+        self.module.params['devices'] = [
+            {'name': 'hdisk0', 'attributes': {'queue_depth': 32, 'reserve_policy': 'no_reserve'}},
+            {'name': 'hdisk1', 'attributes': {'queue_depth': 64, 'alt_path': 'fscsi1'}},
+            {'name': 'hdisk2', 'attributes': {'queue_depth': 20, 'algorithm': 'fail_over'}},
+        ]
+        changed, msg, summary = devices.chdev_devices(self.module)
+        self.assertTrue(changed)
+        self.assertEqual(summary, {'modified': ['hdisk0', 'hdisk1'], 'failed': []})
+        chdev = sorted(call[0][0] for call in self.module.run_command.call_args_list if call[0][0][0] == 'chdev')
+        # the Defined device is changed in the database only, the other one according to chtype
+        self.assertEqual(chdev, [
+            ['chdev', '-l', 'hdisk0', '-a', 'reserve_policy=no_reserve', '-P'],
+            ['chdev', '-l', 'hdisk1', '-a', 'queue_depth=64'],
+        ])
+
+    def test_chdev_devices_unchanged(self):
+        self.module.params['devices'] = [{'name': 'hdisk1', 'attributes': {'queue_depth': '20', 'alt_path': 'fscsi0'}}]
+        changed, msg, summary = devices.chdev_devices(self.module)
+        self.assertFalse(changed)
+        self.assertEqual(summary, {'modified': [], 'failed': []})
+        self.assertEqual(self.module.run_command.call_count, 3)
+
+        self.module.params['devices'] = [{'name': 'hdisk7', 'attributes': {'queue_depth': '20'}}]
+        with self.assertRaises(AnsibleFailJson) as context:
+            devices.chdev_devices(self.module)
+        self.assertIn('hdisk7', context.exception.args[0]['msg'])
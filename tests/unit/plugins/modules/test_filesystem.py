@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.modules import filesystem
+
+from .common.utils import AnsibleExitJson, exit_json, fail_json
+
+LSFS_C_OUTPUT = """#MountPoint:Device:Vfs:Nodename:Type:Size:Options:AutoMount:Acct
+/tmp/testfs:/dev/testlv:jfs2:::163840:rw:no:no
+/tmp/oldfs:/dev/oldlv:jfs2:::163840:rw:yes:no
+/mnt/nfs:/export/data:nfs:nfsserver:::bg,hard,intr:yes:no
+"""
+
+LSFS_Q_HEADER = "Name            Nodename   Mount Pt               VFS   Size    Options    Auto Accounting\n"
+LSFS_Q_TESTFS = """/dev/testlv     --         /tmp/testfs            jfs2  163840  rw         no   no
+  (lv size: 163840, fs size: 163840, block size: 4096, sparse files: yes, inline log: no, inline log size: --, \
+EAformat: v1, Quota: no, DMAPI: no, VIX: yes, EFS: no, ISNAPSHOT: no, MAXEXT: 0, MountGuard: no, LFF: no)
+"""
+
+MOUNT_OUTPUT = """  node       mounted        mounted over    vfs       date        options
+-------- ---------------  ---------------  ------ ------------ ---------------
+         /dev/hd4         /                jfs2   Oct 01 10:00 rw,log=/dev/hd8
+         /dev/testlv      /tmp/testfs      jfs2   Oct 01 10:00 rw,log=INLINE
+"""
+
+LSVG_L_OUTPUT = """rootvg:
+LV NAME             TYPE       LPs     PPs     PVs  LV STATE      MOUNT POINT
+hd4                 jfs2       2       2       1    open/syncd    /
+datavg:
+LV NAME             TYPE       LPs     PPs     PVs  LV STATE      MOUNT POINT
+testlv              jfs2       1       1       1    open/syncd    /tmp/testfs
+oldlv               jfs2       1       1       1    closed/syncd  /tmp/oldfs
+"""
+
+
+def fs_params(filesystem, **kwargs):
+    params = dict.fromkeys(['attributes', 'fs_type', 'vg', 'device', 'nfs_server', 'auto_mount', 'permissions',
+                            'mount_group', 'account_subsystem'])
+    params.update(filesystem=filesystem, state='present', fs_type='jfs2', nfs_soft_mount=False, rm_mount_point=False)
+    params.update(kwargs)
+    return params
+
+
+def run_command(cmd, data=None):
+    if isinstance(cmd, str):
+        cmd = cmd.split()
+    if cmd[0].endswith('mount'):
+        return 0, MOUNT_OUTPUT, ''
+    if cmd[0].endswith('lsfs') and cmd[1] == '-c':
+        if len(cmd) == 2:
+            return 0, LSFS_C_OUTPUT, ''
+        return 0, LSFS_C_OUTPUT.splitlines()[0] + '\n' + LSFS_C_OUTPUT.splitlines()[1] + '\n', ''
+    if cmd[0] == 'lsfs' and cmd[1] == '-q':
+        return 0, LSFS_Q_HEADER + LSFS_Q_TESTFS, ''
+    if cmd == ['lsvg', '-o']:
+        return 0, 'datavg\nrootvg\n', ''
+    if cmd == ['lsvg', '-l', '-i']:
+        return 0, LSVG_L_OUTPUT, ''
+    return 0, '', ''
+
+
+class TestFilesystem(unittest.TestCase):
+    def setUp(self):
+        filesystem.result = dict(changed=False, msg='', cmd='', stdout='', stderr='')
+        filesystem.mount_table = None
+        self.addCleanup(setattr, filesystem, 'mount_table', None)
+        self.module = mock.Mock()
+        self.module.run_command.side_effect = run_command
+        self.module.exit_json = exit_json
+        self.module.fail_json = fail_json
+
+    def test_parse_lsfs_query(self):
+        query = filesystem.parse_lsfs_query(LSFS_Q_HEADER + LSFS_Q_TESTFS)
+        self.assertEqual(list(query), ['/tmp/testfs'])
+        attributes = query['/tmp/testfs']
+        self.assertEqual(attributes['name'], '/dev/testlv')
+        self.assertEqual(attributes['nodename'], '--')
+        self.assertEqual(attributes['block size'], '4096')
+        self.assertEqual(attributes['logsize'], '--')
+        self.assertEqual(attributes['ea'], 'v1')
+        self.assertEqual(attributes['managed'], 'no')
+        self.assertEqual(attributes['lff'], 'no')
+
+    def test_current_attrs(self):
+        entry = filesystem.parse_lsfs_output(LSFS_C_OUTPUT)[0]
+        query = filesystem.parse_lsfs_query(LSFS_Q_HEADER + LSFS_Q_TESTFS)['/tmp/testfs']
+        attributes = filesystem.current_attrs(entry, query)
+        # the empty lsfs -c fields are kept, not replaced by the lsfs -q '--'
+        self.assertEqual(attributes['nodename'], '')
+        self.assertEqual(attributes['type'], '')
+        self.assertEqual(attributes['auto'], 'no')
+        self.assertEqual(attributes['accounting'], 'no')
+        self.assertEqual(attributes['vix'], 'yes')
+        self.assertEqual(attributes['logsize'], '--')
+
+    def test_compare_attrs(self):
+        self.module.params = fs_params('/tmp/testfs', auto_mount='no', permissions='rw', account_subsystem='no',
+                                       attributes=['vix=yes', 'ea=v1'])
+        with self.assertRaises(AnsibleExitJson) as context:
+            filesystem.compare_attrs(self.module)
+        self.assertIn("No modification is required", context.exception.args[0]['msg'])
+
+        self.module.params = fs_params('/tmp/testfs', auto_mount='no', permissions='rw', attributes=['vix=no'])
+        filesystem.compare_attrs(self.module)
+        self.assertEqual(self.module.params['attributes'], ['vix=no'])
+        self.assertEqual(self.module.params['auto_mount'], '')
+        self.assertEqual(self.module.params['permissions'], '')
+
+        self.module.params = fs_params('/tmp/testfs', auto_mount='yes')
+        filesystem.compare_attrs(self.module)
+        self.assertEqual(self.module.params['auto_mount'], 'yes')
+        self.assertEqual(self.module.params['attributes'], [])
+
+    def test_plan_filesystems(self):
+        self.module.params = {'filesystems': [
+            fs_params('/tmp/testfs', attributes=['vix=yes']),
+            fs_params('/tmp/newfs', vg='datavg', attributes=['size=64M']),
+            fs_params('/tmp/testfs2', state='absent'),
+            fs_params('/tmp/oldfs', state='absent', rm_mount_point=True),
+            fs_params('/mnt/nfs', permissions='ro'),
+        ]}
+        operations = filesystem.plan_filesystems(self.module)
+        self.assertEqual([(op['filesystem'], op['action'], op['cmd'].split()) for op in operations], [
+            ('/tmp/newfs', 'create', ['crfs', '-v', 'jfs2', '-g', 'datavg', '-m', '/tmp/newfs', '-a', 'size=64M']),
+            ('/tmp/oldfs', 'remove', ['rmfs', '-r', '/tmp/oldfs']),
+            ('/mnt/nfs', 'modify', ['chnfsmnt', '-t', 'ro', '-f', '/mnt/nfs', '-d', '/export/data', '-h', 'nfsserver']),
+        ])
+        self.assertEqual(operations[1]['device'], '/dev/oldlv')
+        self.assertTrue(operations[2]['nfs'])
+        # a single lsfs -q for the existing local filesystems with attributes
+        queries = [call[0][0] for call in self.module.run_command.call_args_list if call[0][0][:2] == ['lsfs', '-q']]
+        self.assertEqual(queries, [['lsfs', '-q', '/tmp/testfs']])
+
+        self.module.params = {'filesystems': [fs_params('/tmp/testfs', attributes=['vix=no'])]}
+        operations = filesystem.plan_filesystems(self.module)
+        self.assertEqual([(op['action'], op['cmd'].split()) for op in operations],
+                         [('modify', ['chfs', '-a', 'vix=no', '/tmp/testfs'])])
+
+    def test_run_operations(self):
+        calls = []
+        threads = set()
+
+        def record(cmd, data=None):
+            if isinstance(cmd, str):
+                calls.append(cmd.split()[0] + ' ' + cmd.split()[-1])
+                threads.add(threading.current_thread().name)
+            return run_command(cmd, data)
+        self.module.run_command.side_effect = record
+
+        operations = [
+            {'filesystem': '/tmp/newfs', 'action': 'create', 'nfs': False, 'vg': 'datavg', 'device': '',
+             'cmd': 'crfs -v jfs2 -g datavg -m /tmp/newfs'},
+            {'filesystem': '/tmp/rootfs', 'action': 'create', 'nfs': False, 'vg': 'rootvg', 'device': '',
+             'cmd': 'crfs -v jfs2 -g rootvg -m /tmp/rootfs'},
+            {'filesystem': '/tmp/testfs', 'action': 'modify', 'nfs': False, 'device': '/dev/testlv',
+             'cmd': 'chfs -a vix=no /tmp/testfs'},
+            {'filesystem': '/tmp/oldfs', 'action': 'remove', 'nfs': False, 'device': '/dev/oldlv',
+             'cmd': 'rmfs /tmp/oldfs'},
+            {'filesystem': '/mnt/nfs', 'action': 'remove', 'nfs': True, 'device': '/export/data',
+             'cmd': 'rmnfsmnt -I -f /mnt/nfs'},
+        ]
+        filesystem.run_operations(self.module, operations, 2)
+
+        self.assertEqual({op['filesystem']: op['vg'] for op in operations}, {
+            '/tmp/newfs': 'datavg', '/tmp/rootfs': 'rootvg', '/tmp/testfs': 'datavg',
+            '/tmp/oldfs': 'datavg', '/mnt/nfs': None})
+        self.assertTrue(all(op['rc'] == 0 for op in operations))
+        # the operations on datavg run one after the other, removals first
+        datavg = [call for call in calls if call.split()[-1] in ('/tmp/newfs', '/tmp/testfs', '/tmp/oldfs')]
+        self.assertEqual(datavg, ['rmfs /tmp/oldfs', 'chfs /tmp/testfs', 'crfs /tmp/newfs'])
+        self.assertEqual(len(calls), 5)
+        self.assertLessEqual(len(threads), 2)
+
+    def test_run_operations_sequential(self):
+        operations = [
+            {'filesystem': '/tmp/newfs', 'action': 'create', 'nfs': False, 'vg': 'datavg', 'device': '',
+             'cmd': 'crfs -v jfs2 -g datavg -m /tmp/newfs'},
+            {'filesystem': '/tmp/oldfs', 'action': 'remove', 'nfs': False, 'device': '/dev/oldlv',
+             'cmd': 'rmfs /tmp/oldfs'},
+        ]
+        filesystem.run_operations(self.module, operations, 1)
+        # no lsvg without parallelism, the volume group is only known for the creation
+        self.assertEqual([call[0][0] for call in self.module.run_command.call_args_list],
+                         ['rmfs /tmp/oldfs', 'crfs -v jfs2 -g datavg -m /tmp/newfs'])
+        self.assertEqual([op['vg'] for op in operations], ['datavg', None])
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.modules import group
+from ansible_collections.ibm.power_aix.plugins.module_utils.stanza import StanzaFile, parse_colon_file
+
+from .common.utils import fail_json
+
+GROUP_FILES = {
+    '/etc/group': "system:!:0:root\nstaff:!:1:ipsec,test123\ndevgrp:!:300:\n",
+    '/etc/security/group': "system:\n\tadmin = true\n\nstaff:\n\tadmin = false\n\tadms = test123\n",
+}
+
+
+class TestGroupFiles(unittest.TestCase):
+    def setUp(self):
+        patchers = [
+            mock.patch.object(group, 'read_colon_file', side_effect=lambda path: parse_colon_file(GROUP_FILES[path])),
+            mock.patch.object(group, 'read_stanza_file', side_effect=lambda path: StanzaFile(GROUP_FILES[path], path)),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_read_group_files(self):
+        self.assertEqual(group.read_group_files('staff'),
+                         {'id': '1', 'users': 'ipsec,test123', 'admin': 'false', 'adms': 'test123'})
+        # no stanza in /etc/security/group
+        self.assertEqual(group.read_group_files('devgrp'), {'id': '300', 'users': ''})
+        self.assertIsNone(group.read_group_files('nogroup'))
+
+    def test_get_group_attributes(self):
+        module = mock.Mock()
+        module.params = {'name': 'staff', 'load_module': 'files'}
+        self.assertEqual(group.get_group_attributes(module)['adms'], 'test123')
+        module.run_command.assert_not_called()
+
+
+LSGROUP_ALL = """#name:id:admin:users:adms:registry
+system:0:true:root,pconsole,esaadmin::files
+staff:1:false:ipsec,test123:test123:files
+devgrp:300:false:::files
+"""
+
+
+def group_entry(name, **kwargs):
+    entry = dict.fromkeys(['group_attributes', 'user_list_action', 'user_list_type', 'users_list'])
+    entry.update(name=name, state='present')
+    entry.update(kwargs)
+    return entry
+
+
+class TestReconcileGroups(unittest.TestCase):
+    def setUp(self):
+        group.result = dict(changed=False, msg='', cmd='', stdout='', stderr='')
+        self.module = mock.Mock()
+        self.module.fail_json = fail_json
+        self.module.params = {'load_module': 'files', 'remove_keystore': True}
+        self.module.run_command.side_effect = lambda cmd: (0, LSGROUP_ALL if cmd[0] == 'lsgroup' else '', '')
+
+    def commands(self):
+        return [call[0][0] for call in self.module.run_command.call_args_list[1:]]
+
+    def test_group_changes(self):
+        current = {'id': '1', 'admin': 'false', 'users': 'ipsec,test123', 'adms': 'test123'}
+        self.assertEqual(group.group_changes(group_entry('staff', group_attributes={'admin': False}), current), {})
+        entry = group_entry('staff', user_list_action='add', user_list_type='members', users_list=['test123', 'dev1'])
+        self.assertEqual(group.group_changes(entry, current), {'users': 'ipsec,test123,dev1'})
+        entry = group_entry('staff', user_list_action='remove', user_list_type='admins', users_list=['dev1'])
+        self.assertEqual(group.group_changes(entry, current), {})
+        # the user list action applies to the users attribute set in group_attributes
+        entry = group_entry('staff', group_attributes={'users': 'ipsec'}, user_list_action='add',
+                            user_list_type='members', users_list=['test123'])
+        self.assertEqual(group.group_changes(entry, current), {})
+        self.assertEqual(group.group_changes(group_entry('new', group_attributes={'id': 400}), {}), {'id': '400'})
+
+    def test_unchanged(self):
+        self.module.params['groups'] = [
+            group_entry('staff', group_attributes={'admin': False, 'id': 1}, user_list_action='add',
+                        user_list_type='admins', users_list=['test123']),
+            group_entry('devgrp', user_list_action='remove', user_list_type='members', users_list=['dev1']),
+            group_entry('nogroup', state='absent'),
+        ]
+        self.assertEqual(group.reconcile_groups(self.module), "No changes were made.")
+        self.assertFalse(group.result['changed'])
+        self.assertEqual(self.module.run_command.call_count, 1)
+
+    def test_changes(self):
+        self.module.params['groups'] = [
+            group_entry('staff', group_attributes={'adms': 'test123,dev1'}, user_list_action='remove',
+                        user_list_type='members', users_list=['ipsec']),
+            group_entry('newgrp', group_attributes={'id': 400}, user_list_action='add',
+                        user_list_type='members', users_list=['dev1']),
+            group_entry('devgrp', state='absent'),
+        ]
+        group.reconcile_groups(self.module)
+        # a single chgroup for the attribute and the user list changes
+        self.assertEqual(self.commands(), [
+            ['chgroup', '-R', 'files', 'adms=test123,dev1', 'users=test123', 'staff'],
+            ['mkgroup', '-R', 'files', 'id=400', 'users=dev1', 'newgrp'],
+            ['rmgroup', '-R', 'files', '-p', 'devgrp'],
+        ])
+        self.assertEqual(group.result['groups'], {'created': ['newgrp'], 'modified': ['staff'], 'removed': ['devgrp']})
@@ -31,6 +31,11 @@ class TestCreateInittab(unittest.TestCase):
         rc, stdout, stderr = 0, "sample stdout", "sample stderr"
         self.module.run_command.return_value = (rc, stdout, stderr)
 
+        # the inittab of the test host is not read, lsitab is used
+        patcher = mock.patch.object(inittab, 'read_colon_file', side_effect=OSError('not on AIX'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_success_create_entry(self):
         msg = inittab.create_entry(self.module)
         testMsg = "\nEntry is created in inittab file SUCCESSFULLY: %s" %self.module.params["name"]
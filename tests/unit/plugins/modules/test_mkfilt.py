@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.modules import mkfilt
+
+LSFILT_OUTPUT = """1|permit|0.0.0.0|0.0.0.0|0.0.0.0|0.0.0.0|no|udp|eq|4001|eq|4001|both|both|no|all packets|0|all|0|||Default Rule
+2|permit|0.0.0.0|0.0.0.0|0.0.0.0|0.0.0.0|no|all|any|0|eq|22|both|inbound|no|all packets|0|en0|0|||ssh in
+3|permit|0.0.0.0|0.0.0.0|0.0.0.0|0.0.0.0|no|all|eq|22|any|0|both|outbound|no|all packets|0|en0|0|||ssh out
+4|deny|10.0.0.0|255.0.0.0|0.0.0.0|0.0.0.0|no|all|any|0|any|0|both|both|no|all packets|0|all|0|||deny 10
+"""
+
+
+def rule(**kwargs):
+    params = dict.fromkeys(['id', 'new_id', 's_addr', 's_mask', 's_opr', 's_port', 'd_addr', 'd_mask',
+                            'd_opr', 'd_port', 'icmp_type_opr', 'icmp_type', 'icmp_code_opr', 'icmp_code',
+                            'tunnel', 'interface', 'fragment', 'timeout', 'description', 'protocol',
+                            'routing', 'antivirus', 'pattern', 'pattern_filename'])
+    params.update(action='permit', direction='both', log=False, source_routing=False)
+    params.update(kwargs)
+    return params
+
+
+SSH_IN = rule(direction='inbound', d_opr='eq', d_port='22', interface='en0', description='ssh in')
+SSH_OUT = rule(direction='outbound', s_opr='eq', s_port='22', interface='en0', description='ssh out')
+DENY_10 = rule(action='deny', s_addr='10.0.0.0', s_mask='255.0.0.0', description='deny 10')
+HTTP_IN = rule(direction='inbound', d_opr='eq', d_port='80', description='http in')
+
+
+class TestMkfilt(unittest.TestCase):
+    def setUp(self):
+        mkfilt.results = dict(changed=False, msg='', stdout='', stderr='')
+        self.module = mock.Mock()
+        self.module.run_command.return_value = (0, LSFILT_OUTPUT, '')
+        self.current = [r for r in mkfilt.list_rules(self.module, 'ipv4') if r['id'] != '1']
+
+    def test_normalize_rule(self):
+        self.assertEqual([mkfilt.rule_key(mkfilt.normalize_rule(r, 'ipv4')) for r in (SSH_IN, SSH_OUT, DENY_10)],
+                         [mkfilt.rule_key(r) for r in self.current])
+
+    def test_diff_rules(self):
+        desired = [mkfilt.normalize_rule(r, 'ipv4') for r in (SSH_IN, SSH_OUT, DENY_10)]
+        self.assertEqual(mkfilt.diff_rules(self.current, desired), [])
+
+        # insert before rule 3, change rule 4, append
+        desired = [mkfilt.normalize_rule(r, 'ipv4') for r in
+                   (SSH_IN, HTTP_IN, SSH_OUT, rule(action='deny', s_addr='10.0.0.0', s_mask='255.0.0.0'), HTTP_IN)]
+        self.assertEqual(mkfilt.diff_rules(self.current, desired),
+                         [('change', '4', 3), ('add', None, 4), ('add', '3', 1)])
+
+        desired = [mkfilt.normalize_rule(DENY_10, 'ipv4')]
+        self.assertEqual(mkfilt.diff_rules(self.current, desired), [('remove', '3', None), ('remove', '2', None)])
+
+    def test_apply_ruleset(self):
+        params = {'ipv4': {'rules': [SSH_IN, DENY_10], 'default': None, 'log': None, 'force': False}}
+        self.module.run_command.side_effect = lambda cmd: (0, LSFILT_OUTPUT if cmd[0] == 'lsfilt' else '', '')
+        self.assertIsNone(mkfilt.apply_ruleset(self.module, params, 'ipv4'))
+        self.assertEqual([call[0][0] for call in self.module.run_command.call_args_list[1:]], [
+            ['lsfilt', '-v4', '-O'],
+            ['rmfilt', '-v4', '-n', '3'],
+            ['mkfilt', '-v4', '-u'],
+        ])
+        self.assertEqual(mkfilt.results['ruleset'], {'ipv4': {'added': 0, 'changed': 0, 'removed': 1}})
+        self.assertTrue(mkfilt.results['changed'])
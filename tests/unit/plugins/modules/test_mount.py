@@ -13,8 +13,8 @@ from ansible_collections.ibm.power_aix.plugins.modules import mount
 from .common.utils import (
     AnsibleExitJson, AnsibleFailJson, exit_json, fail_json,
     rootdir, lsfs_output_path2, lsfs_output_path3, lsfs_output_path4,
-    df_output_path1, df_output_path2, df_output_path3, mount_output_path1,
-    mount_output_path2
+    df_output_path1, df_output_path2, mount_output_path1,
+    mount_output_path2, mount_output_path3
 )
 
 
@@ -55,12 +55,12 @@ class TestIsMountGroupMounted(unittest.TestCase):
         # load sample output
         with open(lsfs_output_path4, "r") as f:
             self.lsfs_output4 = f.read().strip()
-        with open(df_output_path1, "r") as f:
-            self.df_output1 = f.read().strip()
-        with open(df_output_path2, "r") as f:
-            self.df_output2 = f.read().strip()
-        with open(df_output_path3, "r") as f:
-            self.df_output3 = f.read().strip()
+        with open(mount_output_path1, "r") as f:
+            self.mount_output1 = f.read().strip()
+        with open(mount_output_path2, "r") as f:
+            self.mount_output2 = f.read().strip()
+        with open(mount_output_path3, "r") as f:
+            self.mount_output3 = f.read().strip()
 
     def test_fail_fetch_all_fs_in_mount_group(self):
         (rc, stdout, stderr) = (1, "sample stdout", "sample stderr")
@@ -101,7 +101,7 @@ class TestIsMountGroupMounted(unittest.TestCase):
         }
         self.module.run_command.side_effect = [
             (0, self.lsfs_output4, "sample stderr"),
-            (0, self.df_output3, "sample stderr")
+            (0, self.mount_output3, "sample stderr")
         ]
         actual_mnt_grp_mounted = mount.is_mount_group_mounted(self.module, self.mount_group)
         actual_mnt_pts = actual_mnt_grp_mounted.keys()
@@ -122,7 +122,7 @@ class TestIsMountGroupMounted(unittest.TestCase):
         }
         self.module.run_command.side_effect = [
             (0, self.lsfs_output4, "sample stderr"),
-            (0, self.df_output1, "sample stderr")
+            (0, self.mount_output1, "sample stderr")
         ]
         actual_mnt_grp_mounted = mount.is_mount_group_mounted(self.module, self.mount_group)
         actual_mnt_pts = actual_mnt_grp_mounted.keys()
@@ -143,7 +143,7 @@ class TestIsMountGroupMounted(unittest.TestCase):
         }
         self.module.run_command.side_effect = [
             (0, self.lsfs_output4, "sample stderr"),
-            (0, self.df_output2, "sample stderr")
+            (0, self.mount_output2, "sample stderr")
         ]
         actual_mnt_grp_mounted = mount.is_mount_group_mounted(self.module, self.mount_group)
         actual_mnt_pts = actual_mnt_grp_mounted.keys()
@@ -157,6 +157,16 @@ class TestIsMountGroupMounted(unittest.TestCase):
             actual_is_mounted = actual_mnt_grp_mounted[mnt_pt]
             self.assertEqual(expected_is_mounted, actual_is_mounted)
 
+    def test_mount_point_prefix_not_mounted(self):
+        # /tmp/test is a prefix of the mounted /tmp/testfs
+        lsfs_output = "Name Nodename Mount Pt VFS Size Options Auto Accounting\n" \
+                      "/dev/lv00 -- /tmp/test jfs2 655360 rw no no"
+        self.module.run_command.side_effect = [
+            (0, lsfs_output, "sample stderr"),
+            (0, self.mount_output1, "sample stderr")
+        ]
+        self.assertEqual(mount.is_mount_group_mounted(self.module, self.mount_group), {"/tmp/test": False})
+
 
 class TestIsFSPathMounted(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Copyright: (c) 2020- IBM, Inc
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from ansible_collections.ibm.power_aix.plugins.modules import nim_backup
+
+
+class TestBackupScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        nim_backup.results = {'meta': {'lpar1': {'messages': []}, 'lpar2': {'messages': []}}, 'status': {}}
+        self.module = mock.Mock()
+        self.module.check_mode = False
+
+    def test_check_mode(self):
+        self.module.check_mode = True
+        scheduler = nim_backup.BackupScheduler(self.module, 2, 1)
+        location = os.path.join(self.tmpdir, 'mksysb', 'new')
+        scheduler.submit('lpar1', print, (), location)
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, 'mksysb')))
+        self.assertEqual(scheduler.pending[0]['fs'], os.stat(self.tmpdir).st_dev)
+
+    def test_remaining(self):
+        scheduler = nim_backup.BackupScheduler(self.module, 2, 1)
+        image = os.path.join(self.tmpdir, 'lpar1_sysb')
+        job = {'size': 100, 'image': image, 'initial': None}
+        self.assertEqual(scheduler._remaining(job), 100)
+        with open(image, 'wb') as fobj:
+            fobj.write(b'x' * 40)
+        self.assertEqual(scheduler._remaining(job), 60)
+        # previous image written again in place
+        job['initial'] = (os.stat(image).st_ino, 40)
+        self.assertEqual(scheduler._remaining(job), 100)
+        with open(image, 'ab') as fobj:
+            fobj.write(b'x' * 150)
+        self.assertEqual(scheduler._remaining(job), 0)
+
+    def test_written_part_not_counted_twice(self):
+        # 100 bytes free once lpar1 has written 40 bytes of its 60 bytes image
+        scheduler = nim_backup.BackupScheduler(self.module, 2, 2)
+        scheduler._fs_free = lambda job: 100
+        started = threading.Event()
+        overlap = []
+
+        def create1(image):
+            with open(image, 'wb') as fobj:
+                fobj.write(b'x' * 40)
+            # the scheduler wakes up when a creation ends, lpar2 is pending
+            scheduler.submit('lpar2', create2, (), self.tmpdir, 70)
+            with scheduler._cond:
+                scheduler._cond.notify_all()
+            overlap.append(started.wait(5))
+
+        def create2():
+            started.set()
+
+        image = os.path.join(self.tmpdir, 'lpar1_sysb')
+        scheduler.submit('lpar1', create1, (image,), self.tmpdir, 60, image)
+        scheduler.run()
+        # 70 + 20 remaining for lpar1 fit in the 100 bytes free
+        self.assertEqual(overlap, [True])
+        self.assertEqual(nim_backup.results['status'], {})
+
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.image = os.path.join(self.tmpdir, 'lpar1_sysb')
+        with open(self.image, 'wb') as fobj:
+            fobj.write(b'mksysb image')
+        nim_backup.results = {'meta': {'lpar1': {'messages': []}}, 'status': {}}
+        for name, value in (('CATALOG', {}), ('dedup_store', None)):
+            patcher = mock.patch.object(nim_backup, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.module = mock.Mock()
+        self.module.run_command.return_value = (
+            0, f'lpar1_sysb:\n   class    = resources\n   type     = mksysb\n   location = {self.image}\n', '')
+
+    def test_checksum_on_first_verify(self):
+        with mock.patch.object(nim_backup, 'file_checksum') as checksum:
+            nim_backup.catalog_add(self.module, 'lpar1', 'lpar1_sysb')
+        # the image is not read at creation
+        checksum.assert_not_called()
+        entry = nim_backup.CATALOG['lpar1_sysb']
+        self.assertEqual(entry['size'], len(b'mksysb image'))
+        self.assertEqual(entry['inode'], os.stat(self.image).st_ino)
+        self.assertIsNone(entry['checksum'])
+
+        verify = nim_backup.verify_backup(self.module, 'lpar1_sysb', entry, None)
+        self.assertEqual(verify['status'], 'RECORDED')
+        entry['checksum'] = verify['checksum']
+        self.assertEqual(nim_backup.verify_backup(self.module, 'lpar1_sysb', entry, None)['status'], 'OK')
+
+    def test_changed_before_first_verify(self):
+        nim_backup.catalog_add(self.module, 'lpar1', 'lpar1_sysb')
+        entry = nim_backup.CATALOG['lpar1_sysb']
+        with open(self.image, 'ab') as fobj:
+            fobj.write(b' modified')
+        verify = nim_backup.verify_backup(self.module, 'lpar1_sysb', entry, None)
+        self.assertEqual(verify['status'], 'MISMATCH')
+        self.assertIsNone(verify['checksum'])
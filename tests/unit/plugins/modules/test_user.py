@@ -9,6 +9,7 @@ import unittest
 from unittest import mock
 
 from ansible_collections.ibm.power_aix.plugins.modules import user
+from ansible_collections.ibm.power_aix.plugins.module_utils.stanza import StanzaFile, parse_colon_file
 
 from .common.utils import (
     AnsibleFailJson, fail_json, 
@@ -31,6 +32,12 @@ class TestCreateUser(unittest.TestCase):
         rc, stdout, stderr = 0, "sample stdout", "sample stderr"
         self.module.run_command.return_value = (rc, stdout, stderr)
 
+        # the user files of the test host are not read, the commands are used
+        for func in ['read_colon_file', 'read_stanza_file']:
+            patcher = mock.patch.object(user, func, side_effect=OSError('not on AIX'))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
         # sample lsuser output
         with open(lsuser_output_path1, "r") as f:
             self.lsuser_output1 = f.read().strip()
@@ -379,3 +386,117 @@ class TestCreateUser(unittest.TestCase):
 
     #     user.modify_user(self.module)
     #     self.module.run_command.assert_called_with("chuser account_locked=\"false\" capabilities=\"CAP_AACCT\"  test123")
+
+
+USER_FILES = {
+    '/etc/passwd': "root:!:0:0::/:/usr/bin/ksh\ntest123:!:210:1:Test user:/home/test123:/usr/bin/ksh\n",
+    '/etc/group': "system:!:0:root\nstaff:!:1:ipsec,test123\nsecurity:!:7:root,test123\n",
+    '/etc/security/user': "default:\n\tadmin = false\n\tloginretries = 0\n\tmaxage = 0\n\n"
+                          "test123:\n\tloginretries = 3\n\tmaxage = 8\n",
+    '/etc/security/limits': "default:\n\tfsize = 2097151\n\tcore = 2097151\n\n"
+                            "test123:\n\tcore = -1\n",
+    # no stanza for the user: the default stanza applies
+    '/etc/security/environ': "default:\n\tusrenv = \n",
+    '/etc/security/user.roles': "test123:\n\troles = FSAdmin\n",
+}
+
+
+class TestUserFiles(unittest.TestCase):
+    def setUp(self):
+        patchers = [
+            mock.patch.object(user, 'read_colon_file', side_effect=lambda path: parse_colon_file(USER_FILES[path])),
+            mock.patch.object(user, 'read_stanza_file', side_effect=lambda path: StanzaFile(USER_FILES[path], path)),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_read_user_files(self):
+        attrs = user.read_user_files('test123')
+        self.assertEqual(attrs, {
+            'id': '210', 'pgrp': 'staff', 'groups': 'staff,security', 'home': '/home/test123',
+            'shell': '/usr/bin/ksh', 'gecos': 'Test user',
+            # user stanza over the default stanza
+            'admin': 'false', 'loginretries': '3', 'maxage': '8', 'fsize': '2097151', 'core': '-1',
+            'roles': 'FSAdmin',
+        })
+        self.assertIsNone(user.read_user_files('nouser'))
+
+    def test_get_user_attrs(self):
+        module = mock.Mock()
+        module.params = {'name': 'test123', 'load_module': 'files', 'attributes': {'maxage': 8}}
+        self.assertEqual(user.get_user_attrs(module)['maxage'], '8')
+        module.run_command.assert_not_called()
+        # an attribute not in the files is read with lsuser
+        module.params['attributes'] = {'capabilities': 'CAP_NUMA_ATTACH'}
+        module.run_command.return_value = (0, 'test123:\n\tcapabilities=CAP_NUMA_ATTACH\n', '')
+        self.assertEqual(user.get_user_attrs(module), {'capabilities': 'CAP_NUMA_ATTACH'})
+
+
+LSUSER_ALL = """#name:id:pgrp:groups:home:shell:maxage:login
+root:0:system:system,bin,sys:/:/usr/bin/ksh:0:true
+test123:210:staff:staff,security:/home/test123:/usr/bin/ksh:8:true
+olduser:211:staff:staff:/home/olduser:/usr/bin/ksh:0:false
+"""
+
+
+def user_entry(name, **kwargs):
+    entry = {'name': name, 'state': 'present', 'attributes': None, 'password': None}
+    entry.update(kwargs)
+    return entry
+
+
+class TestReconcileUsers(unittest.TestCase):
+    def setUp(self):
+        self.module = mock.Mock()
+        self.module.fail_json = fail_json
+        self.module.params = {'load_module': 'files', 'remove_homedir': True, 'change_passwd_on_login': False}
+        self.module.run_command.side_effect = lambda cmd, data=None: (0, LSUSER_ALL if cmd[0] == 'lsuser' else '', '')
+        patcher = mock.patch.object(user, 'get_stanzas', return_value={
+            'root': {'password': 'rootHash'}, 'test123': {'password': '{ssha512}06$abc'}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def commands(self):
+        return [(call[0][0], call[1].get('data')) for call in self.module.run_command.call_args_list[1:]]
+
+    def test_unchanged(self):
+        self.module.params['users'] = [
+            user_entry('test123', attributes={'maxage': 8, 'login': True, 'shell': '/usr/bin/ksh'},
+                       password='{ssha512}06$abc'),
+            user_entry('nouser', state='absent'),
+        ]
+        msg, changed, summary = user.reconcile_users(self.module)
+        self.assertFalse(changed)
+        self.assertEqual(msg, "No changes were made.")
+        # only lsuser -c ALL
+        self.assertEqual(self.module.run_command.call_count, 1)
+        self.assertEqual(self.module.run_command.call_args[0][0], ['lsuser', '-R', 'files', '-c', 'ALL'])
+
+    def test_changes(self):
+        self.module.params['users'] = [
+            user_entry('test123', attributes={'maxage': 8, 'login': False}, password='{ssha512}06$abc'),
+            user_entry('newuser', attributes={'pgrp': 'staff', 'gecos': 'Nora Smith', 'login': 'True'},
+                       password='{ssha512}06$new'),
+            user_entry('root', password='{ssha512}06$root'),
+            user_entry('olduser', state='absent'),
+        ]
+        msg, changed, summary = user.reconcile_users(self.module)
+        self.assertTrue(changed)
+        self.assertEqual(summary, {'created': ['newuser'], 'modified': ['test123'], 'removed': ['olduser'],
+                                   'password': ['newuser', 'root']})
+        # the passwords are set with a single chpasswd reading its standard input
+        self.assertEqual(self.commands(), [
+            (['chuser', '-R', 'files', 'login=false', 'test123'], None),
+            # only the boolean values are lower cased
+            (['mkuser', '-R', 'files', 'pgrp=staff', 'gecos=Nora Smith', 'login=true', 'newuser'], None),
+            (['userdel', '-r', 'olduser'], None),
+            (['chpasswd', '-e', '-R', 'files', '-c'], 'newuser:{ssha512}06$new\nroot:{ssha512}06$root'),
+        ])
+
+    def test_duplicates(self):
+        self.module.params['users'] = [user_entry('test123'), user_entry('test123', state='absent')]
+        with self.assertRaises(AnsibleFailJson) as context:
+            user.reconcile_users(self.module)
+        self.assertIn('test123', context.exception.args[0]['msg'])
+        self.module.run_command.assert_not_called()